@@ -0,0 +1,145 @@
+#
+# Honeybee: A Plugin for Environmental Analysis (GPL) started by Mostapha Sadeghipour Roudsari
+#
+# This file is part of Honeybee.
+#
+# Copyright (c) 2013-2015, Mostapha Sadeghipour Roudsari <Sadeghipour@gmail.com>
+# Honeybee is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published
+# by the Free Software Foundation; either version 3 of the License,
+# or (at your option) any later version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Honeybee; If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+
+
+"""
+Benchmark starting grid-based runs from the ambient file of an earlier run.
+
+Run this script from Rhino's Python editor after Honeybee_Honeybee has flown in
+Grasshopper and a grid-based study has run once with Run Daylight Simulation. Set
+studyFolder to the folder of the study. The rtrace parameters are read from the
+first batch file of the study so the runs use the parameters of the recipe.
+
+The test points of all the .pts files are traced numOfRuns times with an empty
+ambient file and then numOfRuns times starting from a copy of the ambient file of
+the last empty run, the same as a study with reuseAmbientFile_ set to True. One
+rtrace process traces all the points. The wall time of each run and the difference
+between the illuminance of the runs with the ambient file and the first empty run
+are printed.
+"""
+
+import scriptcontext as sc
+import subprocess
+import shutil
+import time
+import os
+
+studyFolder = "c:\\ladybug\\unnamed\\gridBasedSimulation"
+numOfRuns = 3
+
+
+def getRtraceOptions(studyFolder):
+    # the rtrace line of the first batch file without the ambient, error and octree files
+    batchFiles = sorted(f for f in os.listdir(studyFolder) if f.endswith("_0_RAD.bat"))
+    if len(batchFiles) == 0:
+        raise IOError("Can't find the batch files of a grid-based study in %s."%studyFolder)
+    
+    with open(os.path.join(studyFolder, batchFiles[0]), "r") as batchFile:
+        rtraceLines = [line for line in batchFile if line.strip().startswith("rtrace")]
+    
+    words = rtraceLines[0].split("<")[0].split()
+    options = []
+    skipValue = False
+    for word in words[1:-1]:
+        if skipValue: skipValue = False
+        elif word in ("-af", "-e"): skipValue = True
+        else: options.append(word)
+    
+    return batchFiles[0][:-len("_0_RAD.bat")], options, words[-1]
+
+
+def getPtsLines(studyFolder, radFileName):
+    ptsLines = []
+    cpuCount = 0
+    while os.path.isfile(os.path.join(studyFolder, radFileName + "_%d.pts"%cpuCount)):
+        with open(os.path.join(studyFolder, radFileName + "_%d.pts"%cpuCount), "r") as ptsFile:
+            ptsLines.extend(line for line in ptsFile if line.strip())
+        cpuCount += 1
+    return ptsLines
+
+
+def trace(command, ptsLines, env):
+    startTime = time.time()
+    process = subprocess.Popen(command, stdin = subprocess.PIPE, stdout = subprocess.PIPE, \
+                               stderr = subprocess.PIPE, cwd = studyFolder, env = env)
+    output, error = process.communicate("".join(ptsLines))
+    if process.returncode != 0: raise Exception("rtrace failed: " + error)
+    return time.time() - startTime, output.splitlines()
+
+
+def getIlluminance(resultLine):
+    R, G, B = map(float, resultLine.split()[:3])
+    return 179 * (.265 * R + .67 * G + .065 * B)
+
+
+def main():
+    if not sc.sticky.has_key("honeybee_release"):
+        print "You should first let Honeybee to fly..."
+        return
+    
+    radFileName, options, octFile = getRtraceOptions(studyFolder)
+    ptsLines = getPtsLines(studyFolder, radFileName)
+    ambFile = os.path.join(studyFolder, radFileName + "_benchmark.amb")
+    cachedAmbFile = ambFile[:-4] + "_cached.amb"
+    
+    RADPath = sc.sticky["honeybee_folders"]["RADPath"]
+    env = dict(os.environ)
+    env["RAYPATH"] = ".;" + sc.sticky["honeybee_folders"]["RADLibPath"]
+    env["PATH"] = RADPath + ";" + env.get("PATH", "")
+    command = [os.path.join(RADPath, "rtrace")] + options + ["-af", os.path.basename(ambFile), octFile]
+    
+    emptyTimes = []
+    for runCount in range(numOfRuns):
+        if os.path.isfile(ambFile): os.remove(ambFile)
+        wallTime, resultLines = trace(command, ptsLines, env)
+        emptyTimes.append(wallTime)
+        if runCount == 0: referenceLines = resultLines
+    
+    if not os.path.isfile(ambFile):
+        print "rtrace didn't write an ambient file. -ab or -aa is 0."
+        return
+    shutil.copyfile(ambFile, cachedAmbFile)
+    
+    cachedTimes = []
+    differences = []
+    for runCount in range(numOfRuns):
+        shutil.copyfile(cachedAmbFile, ambFile)
+        wallTime, resultLines = trace(command, ptsLines, env)
+        cachedTimes.append(wallTime)
+        for referenceLine, resultLine in zip(referenceLines, resultLines):
+            reference = getIlluminance(referenceLine)
+            if reference > 0:
+                differences.append(abs(getIlluminance(resultLine) - reference) / reference)
+    
+    for f in (ambFile, cachedAmbFile): os.remove(f)
+    
+    emptyTime = sum(emptyTimes) / len(emptyTimes)
+    cachedTime = sum(cachedTimes) / len(cachedTimes)
+    print "%d points: rtrace %s"%(len(ptsLines), " ".join(options))
+    print "    empty ambient file:  " + ", ".join(["%.2f"%t for t in emptyTimes]) + " seconds (mean %.2f)"%emptyTime
+    print "    cached ambient file: " + ", ".join(["%.2f"%t for t in cachedTimes]) + " seconds (mean %.2f)"%cachedTime
+    if emptyTime > 0: print "    wall time saving: %.1f%%"%(100 * (emptyTime - cachedTime) / emptyTime)
+    if differences:
+        print "    illuminance difference: %.1f%% mean, %.1f%% max"%(100 * sum(differences) / len(differences), \
+                                                                  100 * max(differences))
+
+
+main()
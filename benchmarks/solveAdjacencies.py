@@ -0,0 +1,152 @@
+#
+# Honeybee: A Plugin for Environmental Analysis (GPL) started by Mostapha Sadeghipour Roudsari
+#
+# This file is part of Honeybee.
+#
+# Copyright (c) 2013-2015, Mostapha Sadeghipour Roudsari <Sadeghipour@gmail.com>
+# Honeybee is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published
+# by the Free Software Foundation; either version 3 of the License,
+# or (at your option) any later version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Honeybee; If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+
+
+"""
+Benchmark hb_SurfacePlaneIndex against the all-pairs search of Solve Adjacencies.
+
+Run this script from Rhino's Python editor after Honeybee_Honeybee has flown in
+Grasshopper. It builds a grid of 100, 500 and 2,000 box zones (several floors of
+3 x 3 x 3 m rooms) and finds the adjacent surfaces of each model twice:
+
+    - all pairs: every outdoor surface is tested against every surface of every
+      other zone with the normal check of the older component. The ray test the
+      older component ran per zone is left out so this time is a lower bound.
+    - indexed: only the candidates of hb_SurfacePlaneIndex are tested.
+
+Both searches use the same closest point test as the component, so they must find
+the same pairs. The wall time of each search and the number of surface pairs that
+went through the closest point test are printed. The all-pairs search of the
+2,000 zone model takes a long time in IronPython.
+"""
+
+import Rhino as rc
+import scriptcontext as sc
+import math
+import time
+
+zoneCounts = [100, 500, 2000]
+roomSize = 3
+roomsPerFloor = 100
+
+
+def createZones(numOfZones):
+    hb_EPZone = sc.sticky["honeybee_EPZone"]
+
+    numOfRows = int(math.sqrt(min(numOfZones, roomsPerFloor)))
+    HBZones = []
+    for zoneCount in range(numOfZones):
+        floor, roomCount = divmod(zoneCount, roomsPerFloor)
+        row, column = divmod(roomCount, numOfRows)
+        minPt = rc.Geometry.Point3d(column * roomSize, row * roomSize, floor * roomSize)
+        maxPt = rc.Geometry.Point3d(minPt.X + roomSize, minPt.Y + roomSize, minPt.Z + roomSize)
+        zoneBrep = rc.Geometry.Box(rc.Geometry.BoundingBox(minPt, maxPt)).ToBrep()
+
+        HBZone = hb_EPZone(zoneBrep, zoneCount, "zone_" + `zoneCount`, ['Office', 'OpenOffice'], True)
+        HBZone.decomposeZone(30)
+        HBZones.append(HBZone)
+
+    return HBZones
+
+
+def getTestPts(srf, tol):
+    # the same test points as Solve Adjacencies
+    BrepMesh = rc.Geometry.Mesh.CreateFromBrep(srf.geometry, rc.Geometry.MeshingParameters.Default)[0]
+    BrepMesh.FaceNormals.ComputeFaceNormals()
+    BrepMesh.FaceNormals.UnitizeFaceNormals()
+
+    testPts = []
+    for faceIndex in range(BrepMesh.Faces.Count):
+        srfNormal = BrepMesh.FaceNormals[faceIndex]
+        meshSrfCen = BrepMesh.Faces.GetFaceCenter(faceIndex)
+        testPts.append(rc.Geometry.Point3d.Add(meshSrfCen, -rc.Geometry.Vector3d(srfNormal) * tol / 2))
+    return testPts
+
+
+def isAdjacent(surface, testPts, tol):
+    for pt in testPts:
+        if surface.geometry.ClosestPoint(pt).DistanceTo(pt) <= tol: return True
+    return False
+
+
+def solveAllPairs(HBZones, tol, angleTol):
+    pairs = set()
+    numOfTests = 0
+    for testZoneCount, testZone in enumerate(HBZones):
+        for srfCount, srf in enumerate(testZone.surfaces):
+            testPts = getTestPts(srf, tol)
+            for targetZoneCount, targetZone in enumerate(HBZones):
+                if targetZoneCount == testZoneCount: continue
+                for targetSrfCount, surface in enumerate(targetZone.surfaces):
+                    normalAngle = abs(rc.Geometry.Vector3d.VectorAngle(surface.normalVector, srf.normalVector))
+                    revNormalAngle = abs(rc.Geometry.Vector3d.VectorAngle(surface.normalVector, -srf.normalVector))
+                    if normalAngle != 0 and revNormalAngle > angleTol: continue
+                    numOfTests += 1
+                    if isAdjacent(surface, testPts, tol):
+                        pairs.add(((testZoneCount, srfCount), (targetZoneCount, targetSrfCount)))
+    return pairs, numOfTests
+
+
+def solveIndexed(HBZones, tol, angleTol):
+    pairs = set()
+    numOfTests = 0
+    srfIndex = sc.sticky["honeybee_SurfacePlaneIndex"](HBZones, tol, angleTol)
+    for testZoneCount, testZone in enumerate(HBZones):
+        for srfCount, srf in enumerate(testZone.surfaces):
+            candidates = srfIndex.getCandidates(testZoneCount, srfCount)
+            if len(candidates) == 0: continue
+            testPts = getTestPts(srf, tol)
+            for candidate in candidates:
+                numOfTests += 1
+                if isAdjacent(srfIndex.getSurface(candidate)[1], testPts, tol):
+                    pairs.add(((testZoneCount, srfCount), candidate))
+    return pairs, numOfTests
+
+
+def main():
+    if not sc.sticky.has_key("honeybee_release"):
+        print "You should first let Honeybee to fly..."
+        return
+
+    tol = sc.doc.ModelAbsoluteTolerance
+    angleTol = sc.doc.ModelAngleToleranceRadians
+
+    for numOfZones in zoneCounts:
+        HBZones = createZones(numOfZones)
+
+        startTime = time.time()
+        indexedPairs, indexedTests = solveIndexed(HBZones, tol, angleTol)
+        indexedTime = time.time() - startTime
+
+        startTime = time.time()
+        allPairs, allTests = solveAllPairs(HBZones, tol, angleTol)
+        allPairsTime = time.time() - startTime
+
+        print "%d zones, %d surfaces"%(numOfZones, sum(len(HBZone.surfaces) for HBZone in HBZones))
+        print "    all pairs: %.2f seconds, %d closest point tests"%(allPairsTime, allTests)
+        print "    indexed:   %.2f seconds, %d closest point tests"%(indexedTime, indexedTests)
+        if indexedPairs != allPairs:
+            print "    the results are different! %d pairs with the index and %d pairs without it."%(len(indexedPairs), len(allPairs))
+        else:
+            print "    both found the same %d adjacent surfaces."%len(allPairs)
+
+
+main()
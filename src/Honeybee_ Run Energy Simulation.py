@@ -47,7 +47,7 @@ Provided by Honeybee 0.0.58
         simulationOutputs_: A list of the outputs that you would like EnergyPlus to write into the result CSV file.  This can be any set of any outputs that you would like from EnergyPlus, writen as a list of text that will be written into the IDF.  It is recommended that, if you are not expereinced with writing EnergyPlus outputs, you should use the "Honeybee_Write EP Result Parameters" component to request certain types of common outputs.  If no value is input here, this component will automatically request outputs of heating, cooling, lighting, and equipment energy use.
         +++++++++++++++: ...
         _writeIdf: Set to "True" to have the component take your HBZones and other inputs and write them into an IDF file.  The file path of the resulting file will appear in the idfFileAddress output of this component.  Note that only setting this to "True" and not setting the output below to "True" will not automatically run the IDF through EnergyPlus for you.
-        runEnergyPlus_: Set to "True" to have the component run your IDF through EnergyPlus once it has finished writing it.  This will ensure that a CSV result file appears in the resultFileAddress output. Set to 2 if you want the analysis to run in background. This option is useful for parametric runs when you don't want to see command shells.
+        runEnergyPlus_: Set to "True" to have the component run your IDF through EnergyPlus once it has finished writing it.  This will ensure that a CSV result file appears in the resultFileAddress output. Set to 2 if you want the analysis to run in background. This option is useful for parametric runs when you don't want to see command shells. If the IDF file and the weather file have not changed since the last successful run the simulation is skipped and the previous results are used.
         +++++++++++++++: ...
         _workingDir_: An optional working directory to a folder on your system, into which your IDF and result files will be written.  NOTE THAT DIRECTORIES INPUT HERE SHOULD NOT HAVE ANY SPACES OR UNDERSCORES IN THE FILE PATH.
         _idfFileName_: Optional text which will be used to name your IDF and result files.  Change this to aviod over-writing results of previous energy simulations.
@@ -79,6 +79,9 @@ import math
 import shutil
 import collections
 import subprocess
+import hashlib
+import json
+import time
 
 rc.Runtime.HostUtils.DisplayOleAlerts(False)
 
@@ -1229,6 +1232,139 @@ class WriteIDF(object):
         return newfinancialdata
         
 
+class IncrementalIDFFile(object):
+    """
+    A replacement for the idf file object which keeps track of the IDF objects.
+    
+    Strings are collected in named sections (e.g. one for each zone) and each IDF
+    object is hashed when the file is closed. The hashes are compared with the
+    ones from the previous run (saved next to the idf file as *.idf.hash) to
+    report which zones and schedules have changed. The idf file is only rewritten
+    if its content has changed.
+    
+    Args:
+        idfFileFullName: Full path to the idf file.
+        runKey: A list of values other than the idf file that change the results
+            (e.g. weather file and EnergyPlus folder).
+    """
+    
+    def __init__(self, idfFileFullName, runKey = []):
+        self.idfFileFullName = idfFileFullName
+        self.hashFileFullName = idfFileFullName + ".hash"
+        self.runKey = runKey
+        self.sectionNames = []
+        self.sections = {}
+        self.setSection("header")
+        
+        self.isUnchanged = False
+        self.changedSections = []
+        self.changedObjects = []
+        
+        self.previousHashes = {}
+        if os.path.isfile(self.hashFileFullName):
+            try:
+                with open(self.hashFileFullName, "r") as hashFile:
+                    self.previousHashes = json.load(hashFile)
+            except:
+                self.previousHashes = {}
+    
+    def setSection(self, sectionName):
+        if sectionName not in self.sections:
+            self.sectionNames.append(sectionName)
+            self.sections[sectionName] = []
+        self.currentSection = self.sections[sectionName]
+    
+    def write(self, string):
+        self.currentSection.append(string)
+    
+    def getHash(self, text):
+        try: return hashlib.md5(text).hexdigest()
+        except: return hashlib.md5(text.encode("utf-8")).hexdigest()
+    
+    def getObjects(self, sectionText):
+        """Split the text of a section into a dictionary of {class,name: object text}."""
+        objects = collections.OrderedDict()
+        objectText = ""
+        objectFields = ""
+        for line in sectionText.splitlines(True):
+            objectText += line
+            fields = line.split("!")[0]
+            objectFields += fields
+            if ";" in fields:
+                key = ",".join([field.strip().upper() for field in objectFields.split(";")[0].split(",")[:2]])
+                # some objects such as outputs don't have a name
+                uniqueKey, count = key, 1
+                while uniqueKey in objects:
+                    count += 1
+                    uniqueKey = key + "#" + str(count)
+                objects[uniqueKey] = self.getHash(objectText.strip())
+                objectText, objectFields = "", ""
+        return objects
+    
+    def close(self):
+        idfText = ""
+        hashes = {"runKey": self.runKey, "sections": {}, "simulated": False}
+        
+        previousSections = self.previousHashes.get("sections", {})
+        for sectionName in self.sectionNames:
+            sectionText = "".join(self.sections[sectionName])
+            idfText += sectionText
+            objects = self.getObjects(sectionText)
+            hashes["sections"][sectionName] = objects
+            
+            previousObjects = previousSections.get(sectionName, {})
+            changedObjects = [key for key, objectHash in objects.items() if previousObjects.get(key) != objectHash]
+            changedObjects += [key for key in previousObjects if key not in objects]
+            if len(changedObjects) != 0:
+                self.changedSections.append(sectionName)
+                self.changedObjects.extend([(sectionName, key) for key in changedObjects])
+        
+        # removed sections
+        for sectionName in previousSections:
+            if sectionName not in hashes["sections"]:
+                self.changedSections.append(sectionName)
+        
+        hashes["idfHash"] = self.getHash(idfText)
+        
+        idfExists = os.path.isfile(self.idfFileFullName)
+        if idfExists and hashes["idfHash"] == self.previousHashes.get("idfHash"):
+            # don't touch the file so the date of the file stays the same
+            self.isUnchanged = self.runKey == self.previousHashes.get("runKey")
+            hashes["simulated"] = self.isUnchanged and self.previousHashes.get("simulated", False)
+        else:
+            with open(self.idfFileFullName, "w") as idfFile:
+                idfFile.write(idfText)
+        
+        self.hashes = hashes
+        self.saveHashes()
+    
+    def saveHashes(self):
+        try:
+            with open(self.hashFileFullName, "w") as hashFile:
+                json.dump(self.hashes, hashFile)
+        except:
+            pass
+    
+    def isSimulated(self):
+        return self.hashes["simulated"]
+    
+    def setSimulated(self, simulated = True):
+        self.hashes["simulated"] = simulated
+        self.saveHashes()
+    
+    def getChangedNames(self, prefixes):
+        """Return the names of the changed sections that start with any of the prefixes."""
+        names = []
+        for sectionName in self.changedSections:
+            for prefix in prefixes:
+                if sectionName.startswith(prefix) and sectionName[len(prefix):] not in names:
+                    names.append(sectionName[len(prefix):])
+        return names
+    
+    def getChangedSchedules(self):
+        return [key.split(",")[-1] for sectionName, key in self.changedObjects if sectionName == "schedules"]
+    
+
 class RunIDF(object):
     
     def writeBatchFile(self, workingDir, idfFileName, epwFileAddress, EPDirectory = 'C:\\EnergyPlusV8-1-0', runInBackground = False):
@@ -1270,6 +1406,7 @@ class RunIDF(object):
 
 sc.sticky["honeybee_WriteIDF"] = WriteIDF
 sc.sticky["honeybee_RunIDF"] = RunIDF
+sc.sticky["honeybee_IncrementalIDFFile"] = IncrementalIDFFile
 
 
 def main(north, epwFileAddress, EPParameters, analysisPeriod, HBZones, HBContext,
@@ -1381,7 +1518,9 @@ def main(north, epwFileAddress, EPParameters, analysisPeriod, HBZones, HBContext
     reEvaluate.evaluateZones()
     
     idfFileFullName = workingDir + "\\" + idfFileName
-    idfFile = open(idfFileFullName, "w")
+    # only the changed objects are reported and the file is only rewritten if it has changed
+    EPRunKey = [epwFileAddress, os.path.getsize(epwFileAddress), os.path.getmtime(epwFileAddress), EPPath]
+    idfFile = IncrementalIDFFile(idfFileFullName, EPRunKey)
     
     ################## HEADER ###################
     print "[1 of 8] Writing simulation parameters..."
@@ -1514,6 +1653,7 @@ def main(north, epwFileAddress, EPParameters, analysisPeriod, HBZones, HBContext
             idfFile.write(hb_writeIDF.EPShdSurface(shading))
        
     # Shading Surfaces
+    idfFile.setSection("context")
     if HBContext and HBContext[0]!=None:
         print "[2 of 8] Writing context surfaces..."
         # call the objects from the lib
@@ -1533,6 +1673,8 @@ def main(north, epwFileAddress, EPParameters, analysisPeriod, HBZones, HBContext
     
     # write idf file
     for zone in thermalZonesPyClasses:
+        idfFile.setSection("zone:" + zone.name)
+        
         # Zone
         idfFile.write(hb_writeIDF.EPZone(zone))
         
@@ -1619,6 +1761,7 @@ def main(north, epwFileAddress, EPParameters, analysisPeriod, HBZones, HBContext
     # please contact me ajszilasi@gmail.com
     
     print "[4 of 8] Writing Electric Load Center - Generator specifications ..."
+    idfFile.setSection("generators")
         
     HBgeneratoroutputs = []
     
@@ -1933,6 +2076,7 @@ def main(north, epwFileAddress, EPParameters, analysisPeriod, HBZones, HBContext
             
     ################ Construction #####################
     print "[5 of 8] Writing materials and constructions..."
+    idfFile.setSection("constructions")
     
     # Write constructions
     for cnstr in EPConstructionsCollection:
@@ -1953,6 +2097,7 @@ def main(north, epwFileAddress, EPParameters, analysisPeriod, HBZones, HBContext
     
     ################ BODYII #####################
     print "[6 of 8] Writing schedules..."
+    idfFile.setSection("schedules")
     
     #Check if schedules need to be written for air mixing or natural ventilation.
     needToWriteMixSched = False
@@ -2027,6 +2172,8 @@ def main(north, epwFileAddress, EPParameters, analysisPeriod, HBZones, HBContext
         
         for zone in zones:
             #zone = zones[0]
+            idfFile.setSection("loads:" + zone.name)
+            
             if zone.HVACSystem[-1]!=None:
                 warning = "An HVAC system is applied to " + zone.name + \
                           ".\n" + \
@@ -2084,6 +2231,7 @@ def main(north, epwFileAddress, EPParameters, analysisPeriod, HBZones, HBContext
                         idfFile.write(hb_writeIDF.EPNatVentFan(zone, natVentCount))
     
     #Write any additional strings.
+    idfFile.setSection("additionalStrings")
     if additionalStrings_ != []:
         idfFile.write("\n")
         for string in additionalStrings_:
@@ -2102,6 +2250,7 @@ def main(north, epwFileAddress, EPParameters, analysisPeriod, HBZones, HBContext
         idfFile.write("\n")
     
     ################## FOOTER ###################
+    idfFile.setSection("outputs")
     # write output lines
     # request surface information in the eio file.
     idfFile.write(hb_writeIDF.requestSrfeio())
@@ -2133,22 +2282,51 @@ def main(north, epwFileAddress, EPParameters, analysisPeriod, HBZones, HBContext
         
     idfFile.close()
     
-    print "...\n... idf file is successfully written to : " + idfFileFullName + "\n"
+    if idfFile.isUnchanged:
+        print "...\n... idf file has not changed since the last run: " + idfFileFullName + "\n"
+    else:
+        print "...\n... idf file is successfully written to : " + idfFileFullName + "\n"
+        changedZones = idfFile.getChangedNames(["zone:", "loads:"])
+        changedSchedules = idfFile.getChangedSchedules()
+        if len(changedZones) != 0: print "Changed zones: " + ", ".join(changedZones)
+        if len(changedSchedules) != 0: print "Changed schedules: " + ", ".join(changedSchedules)
     
     ######################## RUN ENERGYPLUS SIMULATION #######################
     resultFileFullName = None
     if runEnergyPlus:
-        print "Analysis is running!..."
-        # write the batch file
-        hb_runIDF.writeBatchFile(workingDir, idfFileName, epwFileAddress, sc.sticky["honeybee_folders"]["EPPath"], runEnergyPlus > 1)
+        # find the result file from the last run
         resultFileFullName = idfFileFullName.replace('.idf', '.csv')
-        try:
-            print workingDir + '\eplusout.csv'
-            test = open(workingDir + '\eplusout.csv', 'r')
-            test.close()
+        if os.path.isfile(workingDir + '\eplusout.csv'):
             resultFileFullName = workingDir + '\eplusout.csv'
-        except:
-            pass
+        
+        if idfFile.isUnchanged and idfFile.isSimulated() and os.path.isfile(resultFileFullName):
+            print "The model and the weather file are the same as the last run. EnergyPlus won't run again."
+        else:
+            print "Analysis is running!..."
+            # remove the results of the last run so they are never taken for the results of this run
+            errorFileFullName = idfFileFullName.replace('.idf', '.err')
+            for lastResultFile in [errorFileFullName, idfFileFullName.replace('.idf', '.csv'), workingDir + '\eplusout.csv']:
+                try: os.remove(lastResultFile)
+                except OSError: pass
+            idfFile.setSimulated(False)
+            runStartTime = int(time.time())
+            
+            # write the batch file
+            hb_runIDF.writeBatchFile(workingDir, idfFileName, epwFileAddress, sc.sticky["honeybee_folders"]["EPPath"], runEnergyPlus > 1)
+            resultFileFullName = idfFileFullName.replace('.idf', '.csv')
+            try:
+                print workingDir + '\eplusout.csv'
+                test = open(workingDir + '\eplusout.csv', 'r')
+                test.close()
+                resultFileFullName = workingDir + '\eplusout.csv'
+            except:
+                pass
+            
+            # only reuse the results next time if EnergyPlus has finished in this run and didn't fail
+            if not runEnergyPlus > 1 and os.path.isfile(errorFileFullName) and \
+               os.path.getmtime(errorFileFullName) >= runStartTime:
+                with open(errorFileFullName, 'r') as errFile:
+                    if "**  Fatal  **" not in errFile.read(): idfFile.setSimulated()
         print "...\n...\n\nDone! Read below for errors and warnings:\n\n"
     else:
         print "Set runEnergyPlus to True!"
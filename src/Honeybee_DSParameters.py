@@ -34,6 +34,8 @@ Provided by Honeybee 0.0.58
         _adaptiveZone_: Set the Boolean to True if the user can adapt his/her view within the space. "The concept is based on the hypothesis that if a user is free to look in different directions or place him or herself in different positions within a space, he or she is going to pick the most comfortable one." Read more here > http://daysim.ning.com/page/daysim-header-file-deyword-adaptive-zone
         _dgp_imageSize_: The size of the image to be used for daylight glare probability in pixels. Defult value is 250 px.
         onlyRunGlareAnalysis_: Set to False if you want the component run both annual glare analysis and calculate annula illuminance levels. Default is True.
+        useMatrixEngine_: Set to True to calculate annual illuminance with daylight coefficients and a sky matrix (rcontrib, gendaymtx and dctimestep) instead of Daysim. Dynamic shadings and annual glare analysis still run with Daysim. Default is False.
+        writeBinaryResults_: Set to True to write a binary copy of the annual results next to the .ill files. The binary copy makes reading the results of single points faster. The .ill files are kept so the study takes more disk space. Default is False.
 """
 
 ghenv.Component.Name = "Honeybee_DSParameters"
@@ -55,7 +57,14 @@ import Rhino as rc
 
 class SetDSParameters:
     
-    def __init__(self, outputUnits, dynamicSHDGroup_1,  dynamicSHDGroup_2, RhinoViewsName, adaptiveZone, dgp_imageSize, onlyRunGlareAnalysis):
+    def __init__(self, outputUnits, dynamicSHDGroup_1,  dynamicSHDGroup_2, RhinoViewsName, adaptiveZone, dgp_imageSize, onlyRunGlareAnalysis, writeBinaryResults = False, useMatrixEngine = False):
+        
+        # write a binary copy of the .ill files after the study
+        self.writeBinaryResults = writeBinaryResults
+        
+        # run the study with daylight coefficients and a sky matrix instead of Daysim.
+        # Dynamic shadings and annual glare are only supported by Daysim.
+        self.useMatrixEngine = useMatrixEngine
         
         if len(outputUnits)!=0 and outputUnits[0]!=None: self.outputUnits = outputUnits
         else: self.outputUnits = [2]
@@ -133,7 +142,7 @@ class SetDSParameters:
 
 
 
-def main(outputUnits, dynamicSHDGroup_1,  dynamicSHDGroup_2, RhinoViewsName, adaptiveZone, dgp_imageSize, onlyRunGlareAnalysis = True):
+def main(outputUnits, dynamicSHDGroup_1,  dynamicSHDGroup_2, RhinoViewsName, adaptiveZone, dgp_imageSize, onlyRunGlareAnalysis = True, writeBinaryResults = False, useMatrixEngine = False):
     msg = None
     
     # make sure shading groups don't have similar names
@@ -152,14 +161,15 @@ def main(outputUnits, dynamicSHDGroup_1,  dynamicSHDGroup_2, RhinoViewsName, ada
     except:
         pass            
         
-    DSParameters = SetDSParameters(outputUnits, dynamicSHDGroup_1,  dynamicSHDGroup_2, RhinoViewsName, adaptiveZone, dgp_imageSize, onlyRunGlareAnalysis)
+    DSParameters = SetDSParameters(outputUnits, dynamicSHDGroup_1,  dynamicSHDGroup_2, RhinoViewsName, adaptiveZone, dgp_imageSize, onlyRunGlareAnalysis, writeBinaryResults, useMatrixEngine)
     
     return msg, DSParameters
 
 
 
 _adaptiveZone_ = False
-msg, DSParameters = main(_outputUnits_, dynamicSHDGroup_1_,  dynamicSHDGroup_2_, _RhinoViewsName, _adaptiveZone_, _dgp_imageSize_, onlyRunGlareAnalysis_)
+
+msg, DSParameters = main(_outputUnits_, dynamicSHDGroup_1_,  dynamicSHDGroup_2_, _RhinoViewsName, _adaptiveZone_, _dgp_imageSize_, onlyRunGlareAnalysis_, writeBinaryResults_ == True, useMatrixEngine_ == True)
 
 if msg != None:
     ghenv.Component.AddRuntimeMessage(gh.GH_RuntimeMessageLevel.Error, msg)                
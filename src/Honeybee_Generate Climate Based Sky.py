@@ -24,6 +24,7 @@
 Genrate Climate Based Sky
 
 This component generate a climate based sky for any hour of the year
+The skies are cached by the weather file, the hour and north so the same sky is only written once.
 -
 Provided by Honeybee 0.0.58
     
@@ -69,11 +70,7 @@ def getRadiationValues(epw_file, HOY):
             difRad = (float(line.split(',')[15]))
     return dirRad, difRad
 
-def RADDaylightingSky(epwFileAddress, locName, lat, long, timeZone, hour, day, month,  north = 0):
-    
-    dirNrmRad, difHorRad = getRadiationValues(epwFileAddress, date2Hour(month, day, hour))
-    
-    print "Direct: " + `dirNrmRad` + "| Diffuse: " + `difHorRad`
+def RADDaylightingSky(dirNrmRad, difHorRad, locName, lat, long, timeZone, hour, day, month,  north = 0):
     
     return  "# start of sky definition for daylighting studies\n" + \
             "# location name: " + locName + " LAT: " + lat + "\n" + \
@@ -152,20 +149,38 @@ def main(outputType, weatherFile, month, day, hour, north = 0):
         ghenv.Component.AddRuntimeMessage(w, "epwWeatherFile address is not a valid .epw file")
         return -1
         
-    # make new folder for each city
-    subWorkingDir = os.path.join(sc.sticky["Honeybee_DefaultFolder"], "skylib\\climateBasedSkies\\", newLocName)
-    subWorkingDir = lb_preparation.makeWorkingDir(subWorkingDir)
-    # print 'Current working directory is set to: ', subWorkingDir
+    skyFileName = "climateBasedSky@_" + `month` + "_" + `day` + "@" + ('%.2f'%hour).replace(".", "") + ".sky"
     
-    outputFile = subWorkingDir + "\\climateBasedSky@_" + `month` + "_" + `day` + "@" + ('%.2f'%hour).replace(".", "") + ".sky"
-
     northAngle, northVector = lb_preparation.angle2north(north)
-
-    skyStr = RADDaylightingSky(weatherFile, newLocName, lat, lngt, timeZone, hour, day, month, math.degrees(northAngle))
     
-    skyFile = open(outputFile, 'w')
-    skyFile.write(skyStr)
-    skyFile.close()
+    # check the cache for the same sky
+    hb_skyCache = sc.sticky["honeybee_SkyCache"]()
+    skyParameters = {"location": [lat, lngt, timeZone], "month": month, "day": day, "hour": hour,
+                     "north": math.degrees(northAngle), "outputType": outputType}
+    key = hb_skyCache.getKey(weatherFile, "climateBasedSky", skyParameters)
+    cachedFiles = hb_skyCache.getSkyFiles(key, [skyFileName])
+    skyInfo = hb_skyCache.getSkyInfo(key)
+    
+    if cachedFiles and skyInfo.has_key("directRadiation"):
+        outputFile = cachedFiles[0]
+        dirNrmRad, difHorRad = skyInfo["directRadiation"], skyInfo["diffuseRadiation"]
+    else:
+        dirNrmRad, difHorRad = getRadiationValues(weatherFile, date2Hour(month, day, hour))
+        
+        # make new folder for each sky in the cache
+        subWorkingDir = hb_skyCache.addSky(key, weatherFile, "climateBasedSky", skyParameters,
+                                           {"directRadiation": dirNrmRad, "diffuseRadiation": difHorRad})
+        # print 'Current working directory is set to: ', subWorkingDir
+        
+        outputFile = os.path.join(subWorkingDir, skyFileName)
+        
+        skyStr = RADDaylightingSky(dirNrmRad, difHorRad, newLocName, lat, lngt, timeZone, hour, day, month, math.degrees(northAngle))
+        
+        skyFile = open(outputFile, 'w')
+        skyFile.write(skyStr)
+        skyFile.close()
+    
+    print "Direct: " + `dirNrmRad` + "| Diffuse: " + `difHorRad`
     
     return outputFile , `day` + "_" + `month` + "@" + ('%.2f'%hour).replace(".", "")
     
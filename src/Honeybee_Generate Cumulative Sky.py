@@ -26,6 +26,7 @@ GenCumulativeSky is developed by Darren Robinson and Andrew Stone, and modified
 For more information, reference: "http://plea-arch.net/PLEA/ConferenceResources/PLEA2004/Proceedings/p1153final.pdf"
 
 The first time you use this component, you need to be connected to the internet so the component can download GenCumulativeSky.exe to the working directory.
+The skies are cached by the weather file and the analysis period so the same sky is only generated once.
 -
 Provided by Honeybee 0.0.58
     
@@ -72,7 +73,7 @@ def main(weatherFile, analysisPeriod):
                  "4 0 0 1 180\n"
         return skyStr
         
-    if sc.sticky.has_key('ladybug_release'):
+    if sc.sticky.has_key('ladybug_release') and sc.sticky.has_key('honeybee_release'):
         try:
             if not sc.sticky['ladybug_release'].isCompatible(ghenv.Component): return -1
         except:
@@ -104,9 +105,9 @@ def main(weatherFile, analysisPeriod):
             return -1
         
     else:
-        print "You should first let the Ladybug fly..."
+        print "You should first let Ladybug and Honeybee to fly..."
         w = gh.GH_RuntimeMessageLevel.Warning
-        ghenv.Component.AddRuntimeMessage(w, "You should first let the Ladybug fly...")
+        ghenv.Component.AddRuntimeMessage(w, "You should first let Ladybug and Honeybee to fly...")
         return -1
     
     if weatherFile != None and weatherFile[-3:] == 'epw':
@@ -122,9 +123,24 @@ def main(weatherFile, analysisPeriod):
         ghenv.Component.AddRuntimeMessage(w, "epwWeatherFile address is not a valid .epw file")
         return -1
     
-    # make new folder for each city
-    subWorkingDir = os.path.join(sc.sticky["Honeybee_DefaultFolder"], "skylib\\cumulativeSkies\\", newLocName)
-    subWorkingDir = lb_preparation.makeWorkingDir(subWorkingDir)
+    # read the analysis period to name the file
+    stMonth, stDay, stHour, endMonth, endDay, endHour = lb_preparation.readRunPeriod(analysisPeriod, False)
+    
+    skyFileName = "cumulativeSky_" + "_".join([str(stMonth), str(stDay), str(stHour), str(endMonth), str(endDay), str(endHour)])  + ".sky"
+    calFileName = newLocName + '_1.cal'
+    
+    # check the cache for the same sky
+    hb_skyCache = sc.sticky["honeybee_SkyCache"]()
+    skyParameters = {"location": [lat, lngt, timeZone],
+                     "analysisPeriod": [stMonth, stDay, stHour, endMonth, endDay, endHour]}
+    key = hb_skyCache.getKey(weatherFile, "cumulativeSky", skyParameters)
+    cachedFiles = hb_skyCache.getSkyFiles(key, [calFileName, skyFileName])
+    if cachedFiles:
+        print "Using the cumulative sky from " + hb_skyCache.getSkyFolder(key)
+        return cachedFiles[-1]
+    
+    # make new folder for each sky in the cache
+    subWorkingDir = hb_skyCache.addSky(key, weatherFile, "cumulativeSky", skyParameters)
     # print 'Current working directory is set to: ', subWorkingDir
     # copy .epw file to sub-directory
     lb_preparation.copyFile(weatherFile, subWorkingDir + "\\" + newLocName + '.epw')
@@ -140,15 +156,21 @@ def main(weatherFile, analysisPeriod):
     batchFile.close()
     os.system(batchFileName)
     
+    # the weather file is not needed in the cache anymore
+    try: os.remove(subWorkingDir + "\\" + newLocName + '.epw')
+    except: pass
+    
     # call file address
-    calFile = subWorkingDir + "\\" + newLocName + '_1.cal'
+    calFile = subWorkingDir + "\\" + calFileName
+    if not os.path.isfile(calFile):
+        warning = "GenCumulativeSky failed to generate the sky. Check the batch file at: " + batchFileName
+        print warning
+        ghenv.Component.AddRuntimeMessage(gh.GH_RuntimeMessageLevel.Warning, warning)
+        return -1
     
     #write the sky file
-    # read the analysis period to name the file
-    stMonth, stDay, stHour, endMonth, endDay, endHour = lb_preparation.readRunPeriod(analysisPeriod, False)
-    
-    
-    outputFile = subWorkingDir + "\\cumulativeSky_" + "_".join([str(stMonth), str(stDay), str(stHour), str(endMonth), str(endDay), str(endHour)])  + ".sky"
+    # the sky file is written last so the sky is only read from the cache if it is complete
+    outputFile = subWorkingDir + "\\" + skyFileName
     
     skystr = cumSkystr(calFile)
     
@@ -96,6 +96,44 @@ else:
     
 
 
+class endUseSqlFile(object):
+    """Read annual end uses with honeybee_EPSQLReader when OpenStudio libraries are not available.
+    
+    Methods have the same names as OpenStudio SqlFile (e.g. electricityInteriorLighting)
+    and return the value in GJ for energy and m3 for water.
+    """
+    
+    fuels = {"electricity": "Electricity", "naturalGas": "Natural Gas", "water": "Water"}
+    endUses = {"InteriorLighting": "Interior Lighting", "ExteriorLighting": "Exterior Lighting",
+               "InteriorEquipment": "Interior Equipment", "ExteriorEquipment": "Exterior Equipment",
+               "Heating": "Heating", "Cooling": "Cooling", "WaterSystems": "Water Systems",
+               "Humidification": "Humidification", "HeatRecovery": "Heat Recovery",
+               "HeatRejection": "Heat Rejection", "Refrigeration": "Refrigeration",
+               "Generators": "Generators", "Fans": "Fans", "Pumps": "Pumps",
+               "TotalEndUses": "Total End Uses"}
+    
+    def __init__(self, sqlPath):
+        self.sqlReader = sc.sticky["honeybee_EPSQLReader"](sqlPath)
+        self.endUseValues = self.sqlReader.getEndUses()
+    
+    def getEndUse(self, fuel, endUse):
+        try: return self.endUseValues[endUse][fuel][0]
+        except KeyError: return 0.0
+    
+    def __getattr__(self, name):
+        for fuelKey, fuel in self.fuels.items():
+            if name.startswith(fuelKey) and name[len(fuelKey):] in self.endUses:
+                endUse = self.endUses[name[len(fuelKey):]]
+                return lambda: self.getEndUse(fuel, endUse)
+        raise AttributeError(name)
+    
+    def close(self):
+        self.sqlReader.close()
+    
+    def connectionOpen(self):
+        return self.sqlReader.connection != None
+
+
 class dictToClass(object):
     def __init__(self,pyDict):
         self.d = pyDict
@@ -171,13 +209,18 @@ def main(sqlPath):
     pp = pprint.PrettyPrinter(indent=4)
     sqlPath = _sqlFilePath
     print sqlPath
-    sqlFile = ops.SqlFile(ops.Path(sqlPath))
-    print sqlFile
-    conversionFactorElec = float(str(ops.OptionalDouble(277.777778)))
+    if openStudioIsReady:
+        sqlFile = ops.SqlFile(ops.Path(sqlPath))
+        conversionFactorElec = float(str(ops.OptionalDouble(277.777778)))
     outputs={}
     electricity = {}
     naturalgas={}
     try:
+        if not openStudioIsReady:
+            # read the end uses directly from the sql file
+            sqlFile = endUseSqlFile(sqlPath)
+            conversionFactorElec = 277.777778
+        print sqlFile
         print 'starting'
         elecVals = elecSqlVals(sqlFile)
         waterVals = waterSqlVals(sqlFile)
@@ -267,6 +310,9 @@ def main(sqlPath):
         return allAnnualTotals, annualElectricity, annualNaturalGas, annualWater
     except Exception, e:
         print e
+        msg = "Failed to read the annual end uses from " + sqlPath + ":\n" + str(e)
+        ghenv.Component.AddRuntimeMessage(gh.GH_RuntimeMessageLevel.Warning, msg)
+        return None, None, None, None
     
 
 if _sqlFilePath != None:
@@ -69,17 +69,36 @@ import os
 import System.Threading.Tasks as tasks
 import System
 import time
-from itertools import chain
+from itertools import chain, izip
 import datetime
 import json
+import hashlib
+import array
+import bisect
 import copy
 import urllib2 as urllib
 import cPickle as pickle
 import subprocess
+import threading
+import tempfile
 import uuid
 import re
 import random
 
+try:
+    # used to find the processes that a batch file starts on Windows
+    import clr
+    clr.AddReference("System.Management")
+    from System.Management import ManagementObjectSearcher
+except Exception:
+    ManagementObjectSearcher = None
+
+try:
+    # used to read EnergyPlus sql files. not available in every IronPython
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
 PI = math.pi
 
 rc.Runtime.HostUtils.DisplayOleAlerts(False)
@@ -368,6 +387,443 @@ class hb_findFolders():
         return None, None
 
 
+class hb_LibraryCache(object):
+    """
+    On-disk cache for the parsed content of library files.
+    
+    The parsed data of each file is pickled in a cache folder. Cache files are named
+    after the normalized absolute path of the source file so files with the same
+    name in different folders don't share a cache. The cache is used as long as the
+    size and modification time of the source file are the same. If they have
+    changed the md5 hash of the file is checked before the file is parsed again.
+    
+    Args:
+        cacheFolder: Folder to save the cache files.
+    """
+    
+    version = 2
+    
+    def __init__(self, cacheFolder):
+        self.cacheFolder = cacheFolder
+    
+    def getNormalizedPath(self, filePath):
+        return os.path.normcase(os.path.normpath(os.path.abspath(filePath)))
+    
+    def getCacheFile(self, filePath, key):
+        pathHash = hashlib.md5(self.getNormalizedPath(filePath).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cacheFolder, os.path.basename(filePath) + "." + pathHash + "." + key + ".pkl")
+    
+    def getStamp(self, filePath):
+        return os.path.getsize(filePath), os.path.getmtime(filePath)
+    
+    def getHash(self, filePath):
+        md5 = hashlib.md5()
+        with open(filePath, "rb") as inf:
+            while True:
+                chunk = inf.read(1048576)
+                if not chunk: break
+                md5.update(chunk)
+        return md5.hexdigest()
+    
+    def load(self, filePath, key):
+        """Return the cached data for filePath or None if the cache is not valid."""
+        cacheFile = self.getCacheFile(filePath, key)
+        if not os.path.isfile(cacheFile): return None
+        
+        try:
+            with open(cacheFile, "rb") as inf:
+                # header is pickled separately so the data is only loaded if it's valid
+                header = pickle.load(inf)
+                if header["version"] != self.version: return None
+                if header["path"] != self.getNormalizedPath(filePath): return None
+                
+                if header["stamp"] != self.getStamp(filePath):
+                    # the file has been touched. Check if the content has changed
+                    if header["hash"] != self.getHash(filePath): return None
+                    data = pickle.load(inf)
+                    self.save(filePath, key, data, header["hash"])
+                    return data
+                
+                return pickle.load(inf)
+        except Exception, e:
+            print "Failed to load the cache for %s: %s"%(filePath, str(e))
+            return None
+    
+    def save(self, filePath, key, data, fileHash = None):
+        if fileHash == None: fileHash = self.getHash(filePath)
+        header = {"version": self.version, "path": self.getNormalizedPath(filePath), \
+                  "stamp": self.getStamp(filePath), "hash": fileHash}
+        try:
+            if not os.path.isdir(self.cacheFolder): os.makedirs(self.cacheFolder)
+            with open(self.getCacheFile(filePath, key), "wb") as outf:
+                pickle.dump(header, outf, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(data, outf, pickle.HIGHEST_PROTOCOL)
+        except Exception, e:
+            print "Failed to write the cache for %s: %s"%(filePath, str(e))
+
+
+class hb_SkyCache(object):
+    """
+    On-disk cache for sky files and sky matrices.
+    
+    Each sky is saved in its own folder in the cache folder. The name of the folder is
+    the hash of the content of the weather file, the type of the sky and the sky
+    parameters (location, analysis period, sky density, north, ...) so the same sky
+    is only generated once and is shared between all the studies that use the cache.
+    A sky is only returned from the cache if all of its files are in the folder. The
+    skies that are not used recently are removed when the cache is full.
+    
+    Args:
+        cacheFolder: Folder to save the skies. Default is skylib\\skyCache in Honeybee folder.
+        maxNumOfSkies: Maximum number of skies in the cache.
+        maxCacheSize: Maximum size of the cache in MB.
+    """
+    
+    infoFileName = "sky.json"
+    
+    # hash of the weather files by path. The hash is calculated again if the file changes
+    epwHashes = {}
+    
+    def __init__(self, cacheFolder = None, maxNumOfSkies = 200, maxCacheSize = 500):
+        if cacheFolder == None:
+            cacheFolder = os.path.join(sc.sticky["Honeybee_DefaultFolder"], "skylib", "skyCache")
+        self.cacheFolder = cacheFolder
+        self.maxNumOfSkies = maxNumOfSkies
+        self.maxCacheSize = maxCacheSize
+    
+    def getEPWHash(self, epwFile):
+        epwFile = os.path.abspath(epwFile)
+        stamp = os.path.getsize(epwFile), os.path.getmtime(epwFile)
+        if epwFile in self.epwHashes and self.epwHashes[epwFile][0] == stamp:
+            return self.epwHashes[epwFile][1]
+        
+        md5 = hashlib.md5()
+        with open(epwFile, "rb") as inf:
+            for chunk in iter(lambda: inf.read(1048576), ""):
+                md5.update(chunk)
+        self.epwHashes[epwFile] = stamp, md5.hexdigest()
+        return md5.hexdigest()
+    
+    def normalizeValue(self, value):
+        # 0, 0.0 and "0" should all be the same sky
+        if isinstance(value, (list, tuple)):
+            return [self.normalizeValue(v) for v in value]
+        try: return "%.6g"%float(value)
+        except: return str(value)
+    
+    def getKey(self, epwFile, skyType, skyParameters):
+        """Return the key of a sky.
+        
+        Args:
+            epwFile: Path to the weather file.
+            skyType: Type of the sky (e.g. cumulativeSky).
+            skyParameters: A dictionary of the parameters that change the sky.
+        """
+        parameters = [(key, self.normalizeValue(value)) for key, value in sorted(skyParameters.items())]
+        return hashlib.md5("\n".join([self.getEPWHash(epwFile), skyType, json.dumps(parameters)])).hexdigest()
+    
+    def getSkyFolder(self, key):
+        return os.path.join(self.cacheFolder, key)
+    
+    def getSkyFiles(self, key, fileNames):
+        """Return the path to the files of a sky or None if the sky is not in the cache."""
+        skyFolder = self.getSkyFolder(key)
+        skyFiles = [os.path.join(skyFolder, fileName) for fileName in fileNames]
+        for skyFile in skyFiles:
+            if not os.path.isfile(skyFile): return None
+        
+        # update modified time so the sky is kept in the cache
+        infoFile = os.path.join(skyFolder, self.infoFileName)
+        if os.path.isfile(infoFile): os.utime(infoFile, None)
+        return skyFiles
+    
+    def getSkyInfo(self, key):
+        """Return the description of a sky as a dictionary."""
+        try:
+            with open(os.path.join(self.getSkyFolder(key), self.infoFileName), "r") as inf:
+                return json.load(inf)
+        except Exception:
+            return {}
+    
+    def addSky(self, key, epwFile, skyType, skyParameters, info = {}):
+        """Create the folder for a new sky and return the path to the folder.
+        
+        The files of the sky should be written to this folder. Other information
+        (e.g. radiation values) can be saved in info.
+        """
+        self.cleanCache()
+        
+        skyFolder = self.getSkyFolder(key)
+        if not os.path.isdir(skyFolder): os.makedirs(skyFolder)
+        
+        skyInfo = {"skyType": skyType,
+                   "weatherFile": epwFile,
+                   "parameters": dict([(k, self.normalizeValue(v)) for k, v in skyParameters.items()]),
+                   "created": time.strftime("%Y-%m-%d %H:%M:%S")}
+        skyInfo.update(info)
+        with open(os.path.join(skyFolder, self.infoFileName), "w") as outf:
+            json.dump(skyInfo, outf, indent = 4)
+        
+        return skyFolder
+    
+    def removeSky(self, key):
+        skyFolder = self.getSkyFolder(key)
+        if os.path.isdir(skyFolder):
+            shutil.rmtree(skyFolder, True)
+    
+    def getFolderSize(self, folder):
+        return sum([os.path.getsize(os.path.join(folder, f)) for f in os.listdir(folder) \
+                    if os.path.isfile(os.path.join(folder, f))])
+    
+    def getCachedSkies(self):
+        """Return a list of the skies in the cache from the most recent one.
+        
+        Each sky is a dictionary with key, folder, size (MB) and lastUsed in addition
+        to the description of the sky.
+        """
+        if not os.path.isdir(self.cacheFolder): return []
+        
+        skies = []
+        for key in os.listdir(self.cacheFolder):
+            skyFolder = self.getSkyFolder(key)
+            if not os.path.isdir(skyFolder): continue
+            infoFile = os.path.join(skyFolder, self.infoFileName)
+            lastUsed = os.path.getmtime(infoFile if os.path.isfile(infoFile) else skyFolder)
+            
+            sky = self.getSkyInfo(key)
+            sky.update({"key": key, "folder": skyFolder, \
+                        "size": self.getFolderSize(skyFolder) / 1048576.0, \
+                        "lastUsed": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(lastUsed)), \
+                        "mtime": lastUsed})
+            skies.append(sky)
+        
+        skies.sort(key = lambda sky: sky["mtime"], reverse = True)
+        return skies
+    
+    def getCacheSize(self):
+        """Return the size of the cache in MB."""
+        return sum([sky["size"] for sky in self.getCachedSkies()])
+    
+    def cleanCache(self, maxNumOfSkies = None, maxCacheSize = None):
+        """Remove the skies that are not used recently to keep the cache under the limits."""
+        if maxNumOfSkies == None: maxNumOfSkies = self.maxNumOfSkies
+        if maxCacheSize == None: maxCacheSize = self.maxCacheSize
+        
+        cacheSize = 0
+        for count, sky in enumerate(self.getCachedSkies()):
+            cacheSize += sky["size"]
+            if count >= maxNumOfSkies or cacheSize > maxCacheSize:
+                self.removeSky(sky["key"])
+
+
+class hb_EPObjectLocation(object):
+    """
+    Location of an EnergyPlus object in a library file.
+    
+    The location keeps the size and the modification time of the file. If the file
+    has changed since it was indexed the object is found again by its key and name.
+    
+    Args:
+        filePath: Path to the library file.
+        offset: Byte offset of the object in the file.
+        length: Length of the object in bytes.
+        shortKey: Short key of the object (e.g. Material).
+        name: Name of the object in upper case.
+        fileStamp: (size, modification time) of the file when it was indexed. Default
+            is the current size and modification time of the file.
+    """
+    
+    def __init__(self, filePath, offset, length, shortKey, name, fileStamp = None):
+        self.filePath = filePath
+        self.offset = offset
+        self.length = length
+        self.shortKey = shortKey
+        self.name = name
+        if fileStamp == None: fileStamp = self.getFileStamp(filePath)
+        self.fileStamp = fileStamp
+    
+    @staticmethod
+    def getFileStamp(filePath):
+        return os.path.getsize(filePath), os.path.getmtime(filePath)
+    
+    def readEPObject(self):
+        with open(self.filePath, "rb") as epFile:
+            epFile.seek(self.offset)
+            EPObjectStr = epFile.read(self.length).replace("\r\n", "\n")
+        return hb_LazyEPLibrary.parseEPObject(EPObjectStr)
+    
+    def reindex(self):
+        """Find the object in the file again. Return False if it is not in the file anymore."""
+        fileStamp = self.getFileStamp(self.filePath)
+        with open(self.filePath, "rb") as epFile:
+            epFileString = epFile.read()
+        
+        for (key, shortKey, name, values), offset, length in hb_LazyEPLibrary.iterEPObjects(epFileString):
+            if shortKey == self.shortKey and name == self.name:
+                self.offset, self.length, self.fileStamp = offset, length, fileStamp
+                return True
+        return False
+    
+    def load(self):
+        """Read the object from the file and return it as {0: key, 1: (value, comment), ...}."""
+        if not os.path.isfile(self.filePath):
+            raise ValueError("Failed to read %s from %s. "%(self.name, self.filePath) + \
+                             "The file doesn't exist anymore. Let Honeybee fly again!")
+        
+        EPObject = None
+        if self.getFileStamp(self.filePath) == self.fileStamp: EPObject = self.readEPObject()
+        
+        if EPObject == None or EPObject[0] != self.shortKey or EPObject[1] != self.name:
+            # the file has changed since it was indexed
+            if not self.reindex():
+                raise ValueError("Failed to read %s from %s. "%(self.name, self.filePath) + \
+                                 "The object is removed from the file since it was loaded. Let Honeybee fly again!")
+            EPObject = self.readEPObject()
+        
+        return EPObject[2]
+
+
+class hb_LazyEPLibrary(dict):
+    """
+    Dictionary of EnergyPlus objects that parses each object on first access.
+    
+    Values can be hb_EPObjectLocation and are replaced with the parsed
+    {0: key, 1: (value, comment), ...} dictionary once they are requested.
+    Keys, membership and length work without parsing any object. version changes
+    every time objects are added or removed.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self, *args, **kwargs)
+        self.version = 0
+    
+    @staticmethod
+    def getEPObjectHeader(EPObjectStr):
+        """Return key, shortKey, name and the list of value lines for an EnergyPlus object string."""
+        rawLines = EPObjectStr.strip().split("\n")
+        lines = []
+        for line in rawLines:
+            if line.strip() == '' or line.startswith('!'): continue
+            lines.append(line)
+            
+        if len(lines) < 2: return None
+        
+        key = lines[0].split(",")[0].strip()
+        shortKey = key.split(":")[0]
+        name = lines[1].split(",")[0].strip().upper()
+        values = lines[2:]
+        # it's a two line object such as Any Number scheduleTypeLimit
+        if values == []:
+            name = lines[1].split(";")[0].strip() # name is the last input
+        
+        return key, shortKey, name, values
+    
+    @staticmethod
+    def iterEPObjects(epFileString):
+        """Yield the header, byte offset and byte length of each EnergyPlus object in a file string."""
+        for match in re.finditer(r'(.[^;]*;.[^\n]*)', epFileString + "\n", re.MULTILINE):
+            header = hb_LazyEPLibrary.getEPObjectHeader(match.group(0).replace("\r\n", "\n"))
+            if header == None: continue
+            yield header, match.start(), match.end() - match.start()
+    
+    @staticmethod
+    def parseEPObject(EPObjectStr):
+        """Return shortKey, name and {0: key, 1: (value, comment), ...} for an EnergyPlus object string."""
+        header = hb_LazyEPLibrary.getEPObjectHeader(EPObjectStr)
+        if header == None: return None
+        key, shortKey, name, values = header
+        
+        EPObject = dict() # create an empty dictonary
+        EPObject[0] = key
+        
+        count = 1
+        delimiter = ","
+        for value in values:
+            if not len(value.strip()): continue #pass empty lines
+            if count==len(values): delimiter = ";"
+            v = value.split(delimiter)[0].strip() # find the  value
+            if value.find("!")!= -1:
+                c = value.split("!")[-1].rstrip() # find the  value
+            else:
+                c = ""
+            EPObject[count] = v, c
+            count += 1
+        
+        return shortKey, name, EPObject
+    
+    def __getitem__(self, name):
+        value = dict.__getitem__(self, name)
+        if isinstance(value, hb_EPObjectLocation):
+            value = value.load()
+            dict.__setitem__(self, name, value)
+        return value
+    
+    def __setitem__(self, name, value):
+        dict.__setitem__(self, name, value)
+        self.version += 1
+    
+    def __delitem__(self, name):
+        dict.__delitem__(self, name)
+        self.version += 1
+    
+    def clear(self):
+        dict.clear(self)
+        self.version += 1
+    
+    def get(self, name, default = None):
+        if name in self: return self[name]
+        return default
+    
+    def pop(self, name, *args):
+        if name in self:
+            value = self[name]
+            del self[name]
+            return value
+        return dict.pop(self, name, *args)
+    
+    def setdefault(self, name, default = None):
+        if name not in self: self[name] = default
+        return self[name]
+    
+    def update(self, other = (), **kwargs):
+        # copy locations as they are so objects are not parsed
+        if isinstance(other, hb_LazyEPLibrary):
+            for name in dict.keys(other):
+                dict.__setitem__(self, name, dict.__getitem__(other, name))
+        else:
+            dict.update(self, other)
+        dict.update(self, kwargs)
+        self.version += 1
+    
+    def copy(self):
+        lib = hb_LazyEPLibrary()
+        lib.update(self)
+        return lib
+    
+    def iteritems(self):
+        for name in self.keys():
+            yield name, self[name]
+    
+    def itervalues(self):
+        for name in self.keys():
+            yield self[name]
+    
+    def items(self):
+        return list(self.iteritems())
+    
+    def values(self):
+        return list(self.itervalues())
+    
+    def popitem(self):
+        name, value = dict.popitem(self)
+        self.version += 1
+        if isinstance(value, hb_EPObjectLocation): value = value.load()
+        return name, value
+    
+    def getNumOfLoadedObjects(self):
+        return len([v for v in dict.values(self) if not isinstance(v, hb_EPObjectLocation)])
+
+
 class PrepareTemplateEPLibFiles(object):
     """
     Download Template files and check for available libraries for EnergyPlus
@@ -375,11 +831,12 @@ class PrepareTemplateEPLibFiles(object):
     def __init__(self, downloadTemplate = False, workingDir = None):
         
         if not workingDir: workingDir = sc.sticky["Honeybee_DefaultFolder"]
-        if not sc.sticky.has_key("honeybee_constructionLib"): sc.sticky ["honeybee_constructionLib"] = {}
-        if not sc.sticky.has_key("honeybee_materialLib"): sc.sticky ["honeybee_materialLib"] = {}
-        if not sc.sticky.has_key("honeybee_windowMaterialLib"): sc.sticky ["honeybee_windowMaterialLib"] = {}
-        if not sc.sticky.has_key("honeybee_ScheduleLib"): sc.sticky["honeybee_ScheduleLib"] = {}
-        if not sc.sticky.has_key("honeybee_ScheduleTypeLimitsLib"): sc.sticky["honeybee_ScheduleTypeLimitsLib"] = {}
+        for libKey in ["honeybee_constructionLib", "honeybee_materialLib", "honeybee_windowMaterialLib", \
+                       "honeybee_ScheduleLib", "honeybee_ScheduleTypeLimitsLib"]:
+            if not sc.sticky.has_key(libKey): sc.sticky[libKey] = hb_LazyEPLibrary()
+            elif not isinstance(sc.sticky[libKey], hb_LazyEPLibrary):
+                # library from an older version. objects are parsed on request now.
+                sc.sticky[libKey] = hb_LazyEPLibrary(sc.sticky[libKey])
         if not sc.sticky.has_key("honeybee_thermMaterialLib"): sc.sticky["honeybee_thermMaterialLib"] = {}
         
         self.downloadTemplate = downloadTemplate
@@ -392,11 +849,11 @@ class PrepareTemplateEPLibFiles(object):
         client.DownloadFile(url, localFilePath)
     
     def cleanHBLib(self):
-        sc.sticky ["honeybee_constructionLib"] = {}
-        sc.sticky ["honeybee_materialLib"] = {}
-        sc.sticky ["honeybee_windowMaterialLib"] = {}
-        sc.sticky["honeybee_ScheduleLib"] = {}
-        sc.sticky["honeybee_ScheduleTypeLimitsLib"] = {}
+        sc.sticky ["honeybee_constructionLib"] = hb_LazyEPLibrary()
+        sc.sticky ["honeybee_materialLib"] = hb_LazyEPLibrary()
+        sc.sticky ["honeybee_windowMaterialLib"] = hb_LazyEPLibrary()
+        sc.sticky["honeybee_ScheduleLib"] = hb_LazyEPLibrary()
+        sc.sticky["honeybee_ScheduleTypeLimitsLib"] = hb_LazyEPLibrary()
     
     def cleanThermLib(self):
         sc.sticky["honeybee_thermMaterialLib"] = {}
@@ -463,8 +920,12 @@ class PrepareTemplateEPLibFiles(object):
             # load the json file
             filepath = os.path.join(workingDir, 'OpenStudio_Standards.json')
             try:
-                with open(filepath) as jsondata:
-                    openStudioStandardLib = json.load(jsondata)
+                libraryCache = hb_LibraryCache(os.path.join(workingDir, "libraryCache"))
+                openStudioStandardLib = libraryCache.load(filepath, "standards")
+                if openStudioStandardLib == None:
+                    with open(filepath) as jsondata:
+                        openStudioStandardLib = json.load(jsondata)
+                    libraryCache.save(filepath, "standards", openStudioStandardLib)
                 
                 sc.sticky ["honeybee_OpenStudioStandardsFile"] = openStudioStandardLib
                 print "Standard template file is loaded from %s\n"%filepath
@@ -522,15 +983,12 @@ class PrepareTemplateEPLibFiles(object):
 
 class HB_GetEPLibraries:
     
-    def __init__(self):
-        self.libraries = {
-            "Material": {},
-            "WindowMaterial": {},
-            "Construction": {},
-            "Schedule" : {},
-            "ScheduleTypeLimits": {},
-            "ThermMaterial": {}
-            }
+    def __init__(self, cacheFolder = None):
+        # parsed libraries are cached in cacheFolder (see hb_LibraryCache) if provided
+        if cacheFolder: self.libraryCache = hb_LibraryCache(cacheFolder)
+        else: self.libraryCache = None
+        
+        self.cleanHBLibs()
     
     def getEPMaterials(self):
         return self.libraries["Material"]
@@ -556,22 +1014,42 @@ class HB_GetEPLibraries:
         
         if isMatFile == False:
             print "Loading EP materials, constructions and schedules from %s"%EPfile
-            EPObjects = self.getEnergyPlusObjectsFromFile(EPfile)
-            self.loadEPConstructionsMaterialsAndSchedules(EPObjects, cleanCurrentLib)
+            EPObjectsIndex = None
+            if self.libraryCache != None: EPObjectsIndex = self.libraryCache.load(EPfile, "EPLibraryIndex")
+            
+            if EPObjectsIndex == None:
+                EPObjectsIndex = self.indexEnergyPlusObjectsFromFile(EPfile)
+                if self.libraryCache != None: self.libraryCache.save(EPfile, "EPLibraryIndex", EPObjectsIndex)
+            
+            # objects will be parsed once they are requested from the library
+            libraries = {}
+            for shortKey in self.libraries.keys(): libraries[shortKey] = {}
+            fileStamp = hb_EPObjectLocation.getFileStamp(EPfile)
+            for shortKey, name, offset, length in EPObjectsIndex:
+                libraries[shortKey][name] = hb_EPObjectLocation(EPfile, offset, length, shortKey, name, fileStamp)
+            
+            self.updateLibraries(libraries, cleanCurrentLib)
         else:
             print "Loading THERM materials from %s"%EPfile
-            self.getThermObjectsFromFile(EPfile)
+            thermMaterials = None
+            if self.libraryCache != None: thermMaterials = self.libraryCache.load(EPfile, "thermMaterials")
+            
+            if thermMaterials == None:
+                thermMaterials = self.parseThermObjectsFromFile(EPfile)
+                if self.libraryCache != None: self.libraryCache.save(EPfile, "thermMaterials", thermMaterials)
+            
+            self.addThermMaterials(thermMaterials)
         
         if report:
             self.report()
     
     def cleanHBLibs(self):
         self.libraries = {
-            "Material": {},
-            "WindowMaterial": {},
-            "Construction": {},
-            "Schedule" : {},
-            "ScheduleTypeLimits": {},
+            "Material": hb_LazyEPLibrary(),
+            "WindowMaterial": hb_LazyEPLibrary(),
+            "Construction": hb_LazyEPLibrary(),
+            "Schedule" : hb_LazyEPLibrary(),
+            "ScheduleTypeLimits": hb_LazyEPLibrary(),
             "ThermMaterial": {}
             }
             
@@ -579,42 +1057,29 @@ class HB_GetEPLibraries:
     # TODO: Check if keys can be case insensitive
     # TODO: Create EPObjects and not dictionaries
     def loadEPConstructionsMaterialsAndSchedules(self, EPObjectsString, cleanCurrentLib = True):
-        
+        libraries = self.parseEPConstructionsMaterialsAndSchedules(EPObjectsString)
+        self.updateLibraries(libraries, cleanCurrentLib)
+    
+    def updateLibraries(self, libraries, cleanCurrentLib = True):
         if cleanCurrentLib: self.cleanHBLibs()
         
+        for shortKey, EPObjects in libraries.items():
+            self.libraries[shortKey].update(EPObjects)
+    
+    def parseEPConstructionsMaterialsAndSchedules(self, EPObjectsString):
+        """Return a dictionary of EPObjects for each library from a list of EnergyPlus object strings."""
+        libraries = {}
+        for shortKey in self.libraries.keys(): libraries[shortKey] = {}
+        
         for EPObjectStr in EPObjectsString:
-            rawLines = EPObjectStr.strip().split("\n")
-            lines = []
-            for line in rawLines:
-                if line.strip() == '' or line.startswith('!'): continue
-                lines.append(line)
-                
-            if len(lines) < 2: continue
-            
-            key = lines[0].split(",")[0].strip()
-            shortKey = key.split(":")[0]
-            name = lines[1].split(",")[0].strip().upper()
-            values = lines[2:]
-            # it's a two line object such as Any Number scheduleTypeLimit
-            if values == []:
-                name = lines[1].split(";")[0].strip() # name is the last input
-                
-            if shortKey in self.libraries:
-                self.libraries[shortKey][name] = dict() # create an empty dictonary
-                self.libraries[shortKey][name][0] = key
-                
-                count = 1
-                delimiter = ","
-                for value in values:
-                    if not len(value.strip()): continue #pass empty lines
-                    if count==len(values): delimiter = ";"
-                    v = value.split(delimiter)[0].strip() # find the  value
-                    if value.find("!")!= -1:
-                        c = value.split("!")[-1].rstrip() # find the  value
-                    else:
-                        c = ""
-                    self.libraries[shortKey][name][count] = v, c
-                    count += 1
+            EPObject = hb_LazyEPLibrary.parseEPObject(EPObjectStr)
+            if EPObject == None: continue
+            
+            shortKey, name, EPObjectData = EPObject
+            if shortKey in libraries:
+                libraries[shortKey][name] = EPObjectData
+        
+        return libraries
     
     def report(self): 
         # Report findings
@@ -644,6 +1109,29 @@ class HB_GetEPLibraries:
         
         return rawEPObjects
     
+    def indexEnergyPlusObjectsFromFile(self, epFilePath):
+        """
+        Scan EnergyPlus file and return the location of materials, constructions and schedules
+        
+        Args:
+            epFilePath: Path to EnergyPlus file
+        
+        Returns:
+            A list of (shortKey, name, byte offset, byte length) for each object.
+        """
+        if not os.path.isfile(epFilePath):
+            raise ValueError("Can't find %s."%epFilePath)
+        
+        with open(epFilePath, "rb") as epFile:
+            epFileString = epFile.read()
+        
+        EPObjectsIndex = []
+        for (key, shortKey, name, values), offset, length in hb_LazyEPLibrary.iterEPObjects(epFileString):
+            if shortKey not in self.libraries or shortKey == "ThermMaterial": continue
+            EPObjectsIndex.append((shortKey, name, offset, length))
+        
+        return EPObjectsIndex
+    
     def getEnergyPlusObjectsFromFile(self, epFilePath):
         """
         Parse EnergyPlus file and return a list of radiance objects as separate strings
@@ -669,9 +1157,14 @@ class HB_GetEPLibraries:
     
     
     def getThermObjectsFromFile(self, matFile):
+        self.addThermMaterials(self.parseThermObjectsFromFile(matFile))
+    
+    def parseThermObjectsFromFile(self, matFile):
+        """Return a dictionary of THERM materials. Colors are kept as html strings so they can be pickled."""
         if not os.path.isfile(matFile):
             raise ValueError("Can't find %s."%matFile)
         
+        thermMaterials = {}
         with open(matFile, "r") as mFile:
             for rowCount, row in enumerate(mFile):
                 if rowCount > 1:
@@ -680,16 +1173,27 @@ class HB_GetEPLibraries:
                         matNameLine = row.split('"')
                         matName = matNameLine[1].upper()
                         #Make a sub-dictionary for the material.
-                        self.libraries["ThermMaterial"][matName] = {}
+                        thermMaterial = {}
                         
                         #Create the material with the values from the file.
-                        self.libraries["ThermMaterial"][matName]["Name"] = matName
-                        self.libraries["ThermMaterial"][matName]["Type"] = int(matPropLine[-1])
-                        self.libraries["ThermMaterial"][matName]["Conductivity"] = float(matPropLine[-5])
-                        self.libraries["ThermMaterial"][matName]["Absorptivity"] = float(matPropLine[-4])
-                        self.libraries["ThermMaterial"][matName]["Emissivity"] = float(matPropLine[-3])
-                        self.libraries["ThermMaterial"][matName]["RGBColor"] = System.Drawing.ColorTranslator.FromHtml("#" + matPropLine[-2])
+                        thermMaterial["Name"] = matName
+                        thermMaterial["Type"] = int(matPropLine[-1])
+                        thermMaterial["Conductivity"] = float(matPropLine[-5])
+                        thermMaterial["Absorptivity"] = float(matPropLine[-4])
+                        thermMaterial["Emissivity"] = float(matPropLine[-3])
+                        thermMaterial["RGBColor"] = "#" + matPropLine[-2]
+                        thermMaterials[matName] = thermMaterial
                     except: pass
+        
+        return thermMaterials
+    
+    def addThermMaterials(self, thermMaterials):
+        for matName, thermMaterial in thermMaterials.items():
+            try:
+                thermMaterial = dict(thermMaterial)
+                thermMaterial["RGBColor"] = System.Drawing.ColorTranslator.FromHtml(thermMaterial["RGBColor"])
+                self.libraries["ThermMaterial"][matName] = thermMaterial
+            except: pass
 
 class RADMaterialAux(object):
 
@@ -1553,67 +2057,1615 @@ class hb_MSHToRAD(object):
     
         return matFile, radFile
 
-class hb_WriteRAD(object):
+class hb_BatchJob(object):
+    """A single command that is executed by hb_BatchJobScheduler
+
+        Args:
+            name: A unique name for the job
+            command: Command or batch file to be executed
+            dependsOn: List of job names that should be finished before this job starts
+            shell: Set to True to run the command through the shell
+            workingDir: Optional working directory for the command
+    """
     
-    def __init__(self, component = ghenv.Component):
+    def __init__(self, name, command, dependsOn = [], shell = False, workingDir = None):
+        self.name = name
+        self.command = command
+        self.dependsOn = list(dependsOn)
+        self.shell = shell
+        self.workingDir = workingDir
         
-        self.component = component
+        # pending, running, finished, failed, skipped or cancelled
+        self.status = "pending"
+        self.process = None
+        self.returnCode = None
+        self.stdout = ""
+        self.stderr = ""
+        self.startTime = None
+        self.wallTime = None
+        # peak memory in KB. On Windows it's the largest peak working set of the
+        # process and the processes that it starts (e.g. rtrace in a batch file)
+        self.peakMemory = None
+    
+    def __repr__(self):
+        return "Job %s [%s]"%(self.name, self.status)
+
+
+class hb_BatchJobScheduler(object):
+    """Run a number of jobs on a bounded number of workers
+    
+        Jobs start as soon as a worker is free and all of their dependencies
+        are finished. There is no polling for running processes; every job waits
+        for its own process and wakes up the scheduler as soon as it exits.
         
-        self.hb_writeRADAUX = sc.sticky["honeybee_WriteRADAUX"]()
-        self.hb_RADMaterialAUX = sc.sticky["honeybee_RADMaterialAUX"]
-        self.lb_preparation = sc.sticky["ladybug_Preparation"]()
-        self.hb_writeDS = sc.sticky["honeybee_WriteDS"]()
+        Args:
+            maxWorkers: Maximum number of jobs that run at the same time
+            captureOutput: Set to True to collect stdout and stderr of each job
+            stopOnFailure: Set to True to skip the jobs that depend on a failed job
+            cancelCheck: An optional function that returns True if the run should be cancelled
+            checkInterval: Time in seconds between two calls to cancelCheck
+            onJobDone: An optional function that is called with each job once it is finished
+                or failed. It's called from the thread that runs the scheduler
         
-        self.hb_radParDict = sc.sticky["honeybee_RADParameters"]().radParDict
+        On POSIX systems each job runs in its own process group so cancelling a job
+        also stops the processes that its shell or batch file started.
         
-        hb_folders = sc.sticky["honeybee_folders"]
-        self.hb_RADPath = hb_folders["RADPath"]
-        self.hb_RADLibPath = hb_folders["RADLibPath"]
-        self.hb_DSPath = hb_folders["DSPath"]
-        self.hb_DSCore = hb_folders["DSCorePath"]
-        self.hb_DSLibPath = hb_folders["DSLibPath"]
+        Usage:
+            scheduler = hb_BatchJobScheduler(maxWorkers = 4)
+            scheduler.addJob("init", "init.bat")
+            scheduler.addJob("cpu0", "cpu0.bat", ["init"])
+            scheduler.addJob("cpu1", "cpu1.bat", ["init"])
+            scheduler.addJob("merge", "merge.bat", ["cpu0", "cpu1"])
+            jobs = scheduler.run()
+    """
+    
+    def __init__(self, maxWorkers = 1, captureOutput = False, stopOnFailure = False, \
+                 cancelCheck = None, checkInterval = 0.5, onJobDone = None):
+        self.maxWorkers = max(1, int(maxWorkers))
+        self.captureOutput = captureOutput
+        self.stopOnFailure = stopOnFailure
+        self.cancelCheck = cancelCheck
+        self.checkInterval = checkInterval
+        self.onJobDone = onJobDone
+        self.jobs = []
+        self.jobsDict = {}
+        self.doneJobs = set()
+        self.isCancelled = False
+        self.condition = threading.Condition()
+    
+    # time in seconds between two reads of the memory of a job on Windows
+    memoryCheckInterval = 1
+    
+    def addJob(self, name, command, dependsOn = [], shell = False, workingDir = None):
+        if name in self.jobsDict:
+            raise ValueError("Duplicate job name: %s"%name)
+        
+        for depName in dependsOn:
+            # jobs can only depend on jobs that are already added
+            # which also makes sure that there is no circular dependency
+            if depName not in self.jobsDict:
+                raise ValueError("%s depends on %s which is not added to the scheduler."%(name, depName))
+        
+        job = hb_BatchJob(name, command, dependsOn, shell, workingDir)
+        self.jobs.append(job)
+        self.jobsDict[name] = job
+        return job
+    
+    def getJob(self, name):
+        return self.jobsDict[name]
+    
+    def isReady(self, job):
+        for depName in job.dependsOn:
+            if self.jobsDict[depName].status not in ("finished", "failed"):
+                return False
+        return True
+    
+    def isBlocked(self, job):
+        # a job is blocked if any of the dependencies will never finish
+        for depName in job.dependsOn:
+            depStatus = self.jobsDict[depName].status
+            if depStatus in ("skipped", "cancelled"): return True
+            if depStatus == "failed" and self.stopOnFailure: return True
+        return False
+    
+    def waitForProcess(self, job):
+        process = job.process
+        if hasattr(os, "wait4"):
+            pid, status, rusage = os.wait4(process.pid, 0)
+            if os.WIFSIGNALED(status): process.returncode = -os.WTERMSIG(status)
+            else: process.returncode = os.WEXITSTATUS(status)
+            job.peakMemory = rusage.ru_maxrss
+        elif os.name == "nt":
+            job.peakMemory = self.waitForWindowsProcess(process.pid)
+            process.wait()
+        else:
+            process.wait()
+        return process.returncode
+    
+    def waitForWindowsProcess(self, pid):
+        """Wait for a process on Windows and return its peak memory in KB.
         
+            The peak working set of a process can only be read while the process is
+            running so it's read every memoryCheckInterval seconds until it exits.
+        """
+        try:
+            dotNetProcess = System.Diagnostics.Process.GetProcessById(pid)
+        except Exception:
+            # the process is already finished
+            return None
         
-    def writeRADAndMaterialFiles(self, originalHBObjects, subWorkingDir, radFileName, \
-                                 analysisRecipe, meshParameters, exportInteriorWalls):
+        peakMemory = 0
+        while True:
+            peakMemory = max(peakMemory, self.getProcessTreePeakMemory(dotNetProcess))
+            if dotNetProcess.WaitForExit(int(self.memoryCheckInterval * 1000)): break
         
-        # initiate RAD Parameters
-        if analysisRecipe.radParameters==None:
-            quality = 0
-            analysisRecipe.radParameters = {}
-            print "Default values are set for RAD parameters"
-            for key in self.hb_radParDict.keys():
-                #print key + " is set to " + str(hb_radParDict[key][quality])
-                analysisRecipe.radParameters[key] = self.hb_radParDict[key][quality]
+        return peakMemory / 1024
+    
+    def getProcessTreePeakMemory(self, dotNetProcess):
+        # largest peak working set in bytes of the process and the processes that it started
+        try:
+            dotNetProcess.Refresh()
+            peakMemory = dotNetProcess.PeakWorkingSet64
+        except Exception:
+            # the process has exited
+            return 0
         
-        # collect information from analysis recipe
-        radParameters = analysisRecipe.radParameters
-        simulationType = analysisRecipe.type
+        if ManagementObjectSearcher == None: return peakMemory
         
-        radFileFullName = os.path.join(subWorkingDir, radFileName + '.rad')
+        try:
+            childProcesses = {}
+            searcher = ManagementObjectSearcher("SELECT ProcessId, ParentProcessId, PeakWorkingSetSize FROM Win32_Process")
+            for item in searcher.Get():
+                # PeakWorkingSetSize is in KB
+                childProcesses.setdefault(int(item["ParentProcessId"]), []).append( \
+                    (int(item["ProcessId"]), int(item["PeakWorkingSetSize"]) * 1024))
+        except Exception:
+            return peakMemory
+        
+        pids = [dotNetProcess.Id]
+        visited = set(pids)
+        while pids:
+            for childPid, childPeakMemory in childProcesses.get(pids.pop(), []):
+                if childPid in visited: continue
+                visited.add(childPid)
+                pids.append(childPid)
+                peakMemory = max(peakMemory, childPeakMemory)
+        
+        return peakMemory
+    
+    def executeJob(self, job):
+        stdoutFile = stderrFile = None
+        try:
+            if self.captureOutput:
+                stdoutFile = tempfile.TemporaryFile()
+                stderrFile = tempfile.TemporaryFile()
+            
+            # start a new process group so killJob can stop the processes started by the shell
+            preexecFunction = os.setsid if os.name != "nt" else None
+            job.process = subprocess.Popen(job.command, shell = job.shell, cwd = job.workingDir, \
+                                           stdout = stdoutFile, stderr = stderrFile, \
+                                           preexec_fn = preexecFunction)
+            returnCode = self.waitForProcess(job)
+            
+            if self.captureOutput:
+                stdoutFile.seek(0)
+                stderrFile.seek(0)
+                job.stdout = stdoutFile.read()
+                job.stderr = stderrFile.read()
+        except Exception, e:
+            returnCode = -1
+            job.stderr += "Failed to execute %s: %s"%(job.command, str(e))
+        finally:
+            if stdoutFile: stdoutFile.close()
+            if stderrFile: stderrFile.close()
         
-        IESObjects = {}
-        IESCount = 0    
-        # call the objects from the lib
-        hb_hive = sc.sticky["honeybee_Hive"]()
-        HBObjects = hb_hive.callFromHoneybeeHive(originalHBObjects)
+        self.condition.acquire()
+        try:
+            job.returnCode = returnCode
+            job.wallTime = time.time() - job.startTime
+            if job.status != "cancelled":
+                job.status = "finished" if returnCode == 0 else "failed"
+            self.condition.notifyAll()
+        finally:
+            self.condition.release()
+    
+    def startJob(self, job):
+        job.status = "running"
+        job.startTime = time.time()
+        worker = threading.Thread(target = self.executeJob, args = (job,))
+        worker.setDaemon(True)
+        worker.start()
+    
+    def killJob(self, job):
+        # don't poll the process here. The worker thread is the only one waiting for it
+        if job.process == None or job.returnCode != None: return
+        try:
+            if os.name == "nt":
+                # kill the whole process tree started by the batch file
+                subprocess.call("taskkill /F /T /PID %d"%job.process.pid, shell = True)
+            else:
+                # kill the process group of the job. See executeJob
+                import signal
+                os.killpg(job.process.pid, signal.SIGKILL)
+        except Exception, e:
+            print "Failed to kill %s: %s"%(job.name, str(e))
+    
+    def cancel(self):
+        """Kill running jobs and cancel the jobs that are not started yet."""
+        self.condition.acquire()
+        try:
+            self.isCancelled = True
+            for job in self.jobs:
+                if job.status == "pending":
+                    job.status = "cancelled"
+                elif job.status == "running":
+                    job.status = "cancelled"
+                    self.killJob(job)
+            self.condition.notifyAll()
+        finally:
+            self.condition.release()
+    
+    def notifyDoneJobs(self):
+        # should be called while the condition is acquired
+        if self.onJobDone == None: return
+        
+        doneJobs = [job for job in self.jobs \
+                    if job.status in ("finished", "failed") and job.name not in self.doneJobs]
+        if len(doneJobs) == 0: return
+        
+        self.condition.release()
+        try:
+            for job in doneJobs:
+                self.doneJobs.add(job.name)
+                try:
+                    self.onJobDone(job)
+                except Exception, e:
+                    print "Failed to call onJobDone for %s: %s"%(job.name, str(e))
+        finally:
+            self.condition.acquire()
+    
+    def run(self):
+        """Run all the jobs and return them once they are all done."""
+        self.condition.acquire()
+        try:
+            while True:
+                self.notifyDoneJobs()
+                
+                running = 0
+                pending = []
+                for job in self.jobs:
+                    if job.status == "running": running += 1
+                    elif job.status == "pending": pending.append(job)
+                
+                # skip the jobs that will never be ready
+                for job in pending:
+                    if self.isBlocked(job): job.status = "skipped"
+                pending = [job for job in pending if job.status == "pending"]
+                
+                if running == 0 and len(pending) == 0:
+                    # jobs that are finished while the last jobs were reported
+                    self.notifyDoneJobs()
+                    break
+                
+                for job in pending:
+                    if running >= self.maxWorkers: break
+                    if self.isReady(job):
+                        self.startJob(job)
+                        running += 1
+                
+                # wait for one of the jobs to finish
+                self.condition.wait(self.checkInterval)
+                
+                if self.cancelCheck != None and not self.isCancelled:
+                    self.condition.release()
+                    try:
+                        if self.cancelCheck(): self.cancel()
+                    finally:
+                        self.condition.acquire()
+        finally:
+            self.condition.release()
+        
+        return self.jobs
+    
+    def report(self):
+        lines = []
+        for job in self.jobs:
+            line = "%s: %s"%(job.name, job.status)
+            if job.returnCode != None: line += ", exit code %d"%job.returnCode
+            if job.wallTime != None: line += ", %.2f seconds"%job.wallTime
+            if job.peakMemory != None: line += ", peak memory %d KB"%job.peakMemory
+            lines.append(line)
+        return "\n".join(lines)
+
+
+class hb_RtraceChunkScheduler(object):
+    """Run rtrace for test points in small chunks on a pool of persistent rtrace processes
+    
+        Each worker starts one rtrace process and keeps taking the next chunk of points
+        until all the chunks are calculated, so a worker that gets the fast points will
+        calculate more chunks and no worker waits for the slowest part of the grid.
+        Results are returned in the same order as the input points.
         
-        geoRadFile = open(radFileFullName, 'w')
-        geoRadFile.write("#GENERATED BY HONEYBEE\n")
-        customRADMat = {} # dictionary to collect the custom material names
-        customMixFunRadMat = {} # dictionary to collect the custom mixfunc material names
-        surfaceList = []
-        rotateObjects = False
-        if len(HBObjects)!=0:
-            # if this is an annual analysis and north is not 0 rotate all Honeybee objects
-            if analysisRecipe.type == 2 and analysisRecipe.northDegrees!=0:
-                print "Rotating the scene for %d degrees"%analysisRecipe.northDegrees
+        Args:
+            command: rtrace command as a list of arguments. It should include -x 1 -y 0 so
+                rtrace flushes the result of each point as soon as it's calculated. It can
+                also be a function that returns the command for a worker (e.g. to use a
+                different ambient file for each worker)
+            ptsLines: List of test point lines (x y z vx vy vz)
+            numOfWorkers: Number of rtrace processes
+            chunkSize: Number of points in each chunk. Default is a size that makes
+                chunksPerWorker chunks for each worker
+            workingDir: Working directory for rtrace processes
+            env: Optional environment variables for rtrace processes (e.g. RAYPATH)
+            cancelCheck: An optional function that returns True if the run should be cancelled
+            checkInterval: Time in seconds between two calls to cancelCheck
+        
+        Usage:
+            scheduler = hb_RtraceChunkScheduler(command, ptsLines, numOfWorkers = 4)
+            resultLines = scheduler.run()
+            print scheduler.report()
+    """
+    
+    chunksPerWorker = 8
+    
+    def __init__(self, command, ptsLines, numOfWorkers = 1, chunkSize = None, workingDir = None, \
+                 env = None, cancelCheck = None, checkInterval = 0.5):
+        self.command = command
+        self.ptsLines = ptsLines
+        self.numOfWorkers = max(1, min(int(numOfWorkers), len(ptsLines)))
+        
+        if chunkSize == None:
+            chunkSize = int(math.ceil(len(ptsLines) / float(self.numOfWorkers * self.chunksPerWorker)))
+        self.chunkSize = max(1, int(chunkSize))
+        
+        self.workingDir = workingDir
+        self.env = env
+        self.cancelCheck = cancelCheck
+        self.checkInterval = checkInterval
+        
+        # list of (start, end) for each chunk
+        self.chunks = [(start, min(start + self.chunkSize, len(ptsLines))) \
+                       for start in range(0, len(ptsLines), self.chunkSize)]
+        self.results = [None] * len(self.chunks)
+        # (workerCount, numOfPoints, seconds) for each chunk
+        self.chunkStats = [None] * len(self.chunks)
+        
+        self.nextChunk = 0
+        self.processes = {}
+        self.errors = []
+        self.isCancelled = False
+        self.condition = threading.Condition()
+    
+    def getNextChunk(self):
+        self.condition.acquire()
+        try:
+            if self.isCancelled or self.nextChunk >= len(self.chunks): return None
+            chunkCount = self.nextChunk
+            self.nextChunk += 1
+            return chunkCount
+        finally:
+            self.condition.release()
+    
+    def writeLines(self, stream, lines):
+        try:
+            stream.writelines(lines)
+            stream.flush()
+        except Exception:
+            # the process is killed. The reader will report it
+            pass
+    
+    def runChunk(self, process, chunkCount):
+        start, end = self.chunks[chunkCount]
+        
+        # write the points in a separate thread so rtrace never blocks
+        # on a full output pipe while we are still writing the input
+        writer = threading.Thread(target = self.writeLines, args = (process.stdin, self.ptsLines[start:end]))
+        writer.setDaemon(True)
+        writer.start()
+        
+        results = []
+        for ptCount in range(end - start):
+            line = process.stdout.readline()
+            if not line:
+                raise Exception("rtrace stopped before the end of chunk %d. Check error.log."%chunkCount)
+            results.append(line)
+        
+        writer.join()
+        return results
+    
+    def runWorker(self, workerCount):
+        process = None
+        try:
+            command = self.command(workerCount) if callable(self.command) else self.command
+            process = subprocess.Popen(command, cwd = self.workingDir, env = self.env, \
+                                       stdin = subprocess.PIPE, stdout = subprocess.PIPE)
+            self.processes[workerCount] = process
+            
+            while True:
+                chunkCount = self.getNextChunk()
+                if chunkCount == None: break
                 
-                transform = rc.Geometry.Transform.Rotation(math.radians(analysisRecipe.northDegrees), \
-                            rc.Geometry.Point3d.Origin)
-                rotateObjects = True
+                startTime = time.time()
+                self.results[chunkCount] = self.runChunk(process, chunkCount)
+                start, end = self.chunks[chunkCount]
+                self.chunkStats[chunkCount] = (workerCount, end - start, time.time() - startTime)
+        
+        except Exception, e:
+            if not self.isCancelled:
+                self.errors.append("Worker %d failed: %s"%(workerCount, str(e)))
+                self.cancel()
+        finally:
+            if process != None:
+                try:
+                    process.stdin.close()
+                    process.wait()
+                except Exception:
+                    pass
             
-            for objCount, HBObj in enumerate(HBObjects):
+            self.condition.acquire()
+            try:
+                self.condition.notifyAll()
+            finally:
+                self.condition.release()
+    
+    def killProcess(self, process):
+        if process.returncode != None: return
+        try:
+            if os.name == "nt":
+                subprocess.call("taskkill /F /T /PID %d"%process.pid, shell = True)
+            else:
+                process.kill()
+        except Exception, e:
+            print "Failed to kill rtrace: %s"%str(e)
+    
+    def cancel(self):
+        """Stop giving out new chunks and kill the rtrace processes."""
+        self.condition.acquire()
+        try:
+            self.isCancelled = True
+            processes = self.processes.values()
+            self.condition.notifyAll()
+        finally:
+            self.condition.release()
+        
+        for process in processes: self.killProcess(process)
+    
+    def run(self):
+        """Run all the chunks and return the result lines in the order of input points.
+        
+        Returns None if the run is cancelled or any of the workers fails.
+        """
+        workers = []
+        for workerCount in range(self.numOfWorkers):
+            worker = threading.Thread(target = self.runWorker, args = (workerCount,))
+            worker.setDaemon(True)
+            worker.start()
+            workers.append(worker)
+        
+        self.condition.acquire()
+        try:
+            while any([worker.isAlive() for worker in workers]):
+                # wait for one of the workers to finish
+                self.condition.wait(self.checkInterval)
+                
+                if self.cancelCheck != None and not self.isCancelled:
+                    self.condition.release()
+                    try:
+                        if self.cancelCheck(): self.cancel()
+                    finally:
+                        self.condition.acquire()
+        finally:
+            self.condition.release()
+        
+        if self.isCancelled or None in self.results: return None
+        
+        return list(chain.from_iterable(self.results))
+    
+    def report(self):
+        lines = []
+        for chunkCount, stats in enumerate(self.chunkStats):
+            if stats == None:
+                lines.append("chunk %d: not calculated"%chunkCount)
+                continue
+            workerCount, numOfPoints, seconds = stats
+            line = "chunk %d: %d points on worker %d in %.2f seconds"%(chunkCount, numOfPoints, workerCount, seconds)
+            if seconds > 0: line += " (%.1f points/s)"%(numOfPoints / seconds)
+            lines.append(line)
+        lines.extend(self.errors)
+        return "\n".join(lines)
+
+
+class hb_PointResultStore(object):
+    """Results of test points that are kept between the runs of the same scene
+    
+        Each result is keyed by the position and direction of the point as it's written
+        to the .pts file. The store file is named by the hash of the scene and the rtrace
+        parameters (see hb_WriteRADAUX.getPointResultStoreFile) so only the points that
+        are not calculated before need to be traced. New results are appended to the
+        file so saving the results costs in proportion to the new points.
+        
+        Args:
+            storeFile: Path to the store file
+        
+        Usage:
+            resultStore = hb_PointResultStore(storeFile)
+            resultLine = resultStore.getResult(ptsLine)
+            resultStore.addResult(ptsLine, resultLine)
+            resultStore.save()
+    """
+    
+    separator = "|"
+    
+    def __init__(self, storeFile):
+        self.storeFile = storeFile
+        self.results = {}
+        self.newKeys = []
+        self.load()
+    
+    def getKey(self, ptsLine):
+        return " ".join(ptsLine.split())
+    
+    def load(self):
+        if not os.path.isfile(self.storeFile): return
+        
+        with open(self.storeFile, "r") as storeFile:
+            for line in storeFile:
+                line = line.rstrip("\r\n")
+                # lines of a save that didn't finish don't end with the separator
+                if not line.endswith(self.separator) or line.count(self.separator) != 2: continue
+                key, result, empty = line.split(self.separator)
+                self.results[key] = result + "\n"
+        
+        # update modified time so the store is kept in the cache
+        os.utime(self.storeFile, None)
+    
+    def getResult(self, ptsLine):
+        """Return the result line of a point or None if the point is not calculated before."""
+        return self.results.get(self.getKey(ptsLine))
+    
+    def addResult(self, ptsLine, resultLine):
+        key = self.getKey(ptsLine)
+        if key not in self.results: self.newKeys.append(key)
+        self.results[key] = resultLine
+    
+    def save(self):
+        """Append the new results to the store file."""
+        if len(self.newKeys) == 0: return
+        
+        folder = os.path.dirname(self.storeFile)
+        if folder and not os.path.isdir(folder): os.makedirs(folder)
+        
+        # start from a new line if the last save didn't finish
+        startLine = ""
+        if os.path.isfile(self.storeFile) and os.path.getsize(self.storeFile) > 0:
+            with open(self.storeFile, "rb") as storeFile:
+                storeFile.seek(-1, 2)
+                if storeFile.read(1) != "\n": startLine = "\n"
+        
+        with open(self.storeFile, "a") as storeFile:
+            storeFile.write(startLine)
+            storeFile.writelines([self.separator.join([key, self.results[key].rstrip("\r\n"), ""]) + "\n" \
+                                  for key in self.newKeys])
+        self.newKeys = []
+    
+    def __len__(self):
+        return len(self.results)
+
+
+class hb_TiledImage(object):
+    """Stitch the tiles of a view into a single image as soon as each tile is rendered
+    
+        Each rendered tile is added to the image with pcompos so the image can be
+        used as a progressive preview while the other tiles are still rendering. The
+        tiles are in rows from the bottom of the image (the same order as pcompos -a).
+        The image is written to a temporary file first so it's never read half-written.
+        
+        Args:
+            imageFileName: Path to the stitched image
+            tileFileNames: Path to the tiles from bottom-left to top-right
+            nXDiv: Number of columns
+            nYDiv: Number of rows
+            pcomposPath: Path to pcompos
+    """
+    
+    def __init__(self, imageFileName, tileFileNames, nXDiv, nYDiv, pcomposPath = "pcompos"):
+        self.imageFileName = imageFileName
+        self.tileFileNames = tileFileNames
+        self.nXDiv = nXDiv
+        self.nYDiv = nYDiv
+        self.pcomposPath = pcomposPath
+        self.tileSize = None
+        self.addedTiles = set()
+    
+    @staticmethod
+    def getResolution(HDRFileName):
+        """Return (x, y) resolution of a radiance picture from its header."""
+        with open(HDRFileName, "rb") as HDRFile:
+            # the header ends with an empty line and is followed by the resolution string
+            line = HDRFile.readline()
+            while line and line.strip() != "":
+                line = HDRFile.readline()
+            resolution = HDRFile.readline().split()
+        
+        if len(resolution) != 4:
+            raise ValueError("Failed to read the resolution of %s."%HDRFileName)
+        
+        if resolution[0][1] == "Y": return int(resolution[3]), int(resolution[1])
+        else: return int(resolution[1]), int(resolution[3])
+    
+    def addTile(self, tileCount):
+        """Add a rendered tile to the image and return True if it's added."""
+        tileFileName = self.tileFileNames[tileCount]
+        if tileCount in self.addedTiles or not os.path.isfile(tileFileName): return False
+        
+        # rpict changes the resolution to keep the aspect ratio of the view
+        # so the size of the tiles is only known after they are rendered
+        xRes, yRes = self.getResolution(tileFileName)
+        if self.tileSize == None: self.tileSize = xRes, yRes
+        xRes, yRes = self.tileSize
+        
+        command = [self.pcomposPath, "-x", str(self.nXDiv * xRes), "-y", str(self.nYDiv * yRes)]
+        if len(self.addedTiles) != 0:
+            command.extend([self.imageFileName, "0", "0"])
+        command.extend([tileFileName, str((tileCount % self.nXDiv) * xRes), str((tileCount // self.nXDiv) * yRes)])
+        
+        tempFileName = self.imageFileName + ".tmp"
+        with open(tempFileName, "wb") as tempFile:
+            returnCode = subprocess.call(command, stdout = tempFile)
+        
+        if returnCode != 0:
+            print "pcompos failed to add %s to %s."%(tileFileName, self.imageFileName)
+            return False
+        
+        if os.path.isfile(self.imageFileName): os.remove(self.imageFileName)
+        os.rename(tempFileName, self.imageFileName)
+        self.addedTiles.add(tileCount)
+        return True
+    
+    def isComplete(self):
+        return len(self.addedTiles) == len(self.tileFileNames)
+    
+    def progress(self):
+        return "%s: %d of %d tiles"%(os.path.basename(self.imageFileName), len(self.addedTiles), len(self.tileFileNames))
+
+
+class hb_EPCSVReader(object):
+    """
+    Read selected columns of an EnergyPlus result csv file.
+    
+    Requested columns are parsed in a single pass into arrays of floats and are
+    cached in sc.sticky by file path, size and modification time. Result components
+    that read the same file share the parsed columns and only the columns that are
+    not in the cache are read from the file.
+    If useSQLFile is True and the sql file of the same run is next to the csv file
+    the requested columns are read from the sql file with hb_EPSQLReader and only
+    the columns that are not found there are parsed from the csv file.
+    
+    Args:
+        csvFile: Path to EnergyPlus result csv file.
+        useSQLFile: Set to True to read the columns from the sql file of the same
+            run when sqlite3 is available. Default is False.
+    """
+    
+    maxNumOfCachedFiles = 4
+    # maximum difference between modification time of the csv and the sql file in seconds
+    maxSQLTimeDifference = 600
+    
+    def __init__(self, csvFile, useSQLFile = False):
+        if not os.path.isfile(csvFile):
+            raise IOError("Can't find %s."%csvFile)
+        
+        self.csvFile = os.path.normpath(csvFile)
+        self.useSQLFile = useSQLFile
+        self.cache = self.getCache()
+    
+    def getCache(self):
+        if not sc.sticky.has_key("honeybee_EPCSVCache"): sc.sticky["honeybee_EPCSVCache"] = {}
+        csvCache = sc.sticky["honeybee_EPCSVCache"]
+        
+        stamp = os.path.getsize(self.csvFile), os.path.getmtime(self.csvFile)
+        cache = csvCache.get(self.csvFile)
+        if cache == None or cache["stamp"] != stamp:
+            cache = {"stamp": stamp, "headerLine": None, "numOfRows": None, "columns": {}}
+            csvCache[self.csvFile] = cache
+        
+        cache["lastUse"] = time.time()
+        
+        # remove the files that are not used recently
+        while len(csvCache) > self.maxNumOfCachedFiles:
+            oldestFile = min(csvCache.keys(), key = lambda f: csvCache[f]["lastUse"])
+            del csvCache[oldestFile]
+        
+        return cache
+    
+    def getHeaderLine(self):
+        """Return the first line of the file."""
+        if self.cache["headerLine"] == None:
+            with open(self.csvFile, "r") as csvFile:
+                self.cache["headerLine"] = csvFile.readline()
+        return self.cache["headerLine"]
+    
+    def getHeader(self):
+        """Return the name of the columns."""
+        return self.getHeaderLine().split(',')
+    
+    def getColumns(self, columnIndices):
+        """
+        Return a list of arrays for columnIndices. Values that can't be converted
+        to float (e.g. empty values for outputs with a different frequency) are nan.
+        """
+        columns = self.cache["columns"]
+        missingIndices = sorted(set(columnIndices) - set(columns.keys()))
+        
+        if missingIndices and self.useSQLFile:
+            columns.update(self.getSQLColumns(missingIndices))
+            missingIndices = sorted(set(columnIndices) - set(columns.keys()))
+        
+        if missingIndices or self.cache["numOfRows"] == None:
+            # split the lines only up to the last requested column
+            maxSplit = missingIndices[-1] + 1 if missingIndices else 1
+            newColumns = [array.array('d') for index in missingIndices]
+            nan = float("nan")
+            numOfRows = 0
+            with open(self.csvFile, "r") as csvFile:
+                csvFile.readline()
+                for line in csvFile:
+                    values = line.split(',', maxSplit)
+                    for index, column in zip(missingIndices, newColumns):
+                        try: column.append(float(values[index]))
+                        except (ValueError, IndexError): column.append(nan)
+                    numOfRows += 1
+            
+            self.cache["numOfRows"] = numOfRows
+            for index, column in zip(missingIndices, newColumns):
+                columns[index] = column
+        
+        return [columns[index] for index in columnIndices]
+    
+    def getSQLFile(self):
+        """Return the sql file of the same run if it is next to the csv file. Otherwise return None."""
+        sqlFile = os.path.splitext(self.csvFile)[0] + ".sql"
+        if not os.path.isfile(sqlFile): return None
+        # the sql file of an older run
+        if abs(os.path.getmtime(sqlFile) - os.path.getmtime(self.csvFile)) > self.maxSQLTimeDifference:
+            return None
+        return sqlFile
+    
+    def getSQLColumns(self, columnIndices):
+        """
+        Return {columnIndex: array} for the columns that are found in the sql file.
+        Columns that are not found or don't have a value for every row of the csv
+        file (e.g. meters or outputs of the sizing periods) are not returned.
+        """
+        if sqlite3 == None: return {}
+        sqlFile = self.getSQLFile()
+        if sqlFile == None: return {}
+        
+        header = self.getHeader()
+        sqlReader = hb_EPSQLReader(sqlFile)
+        try:
+            dictionaryIndices = sqlReader.getDictionaryIndices( \
+                [header[index] if index < len(header) else "" for index in columnIndices])
+            indices = dict((columnIndex, dictionaryIndex) for columnIndex, dictionaryIndex \
+                           in zip(columnIndices, dictionaryIndices) if dictionaryIndex != None)
+            if len(indices) == 0: return {}
+            values = sqlReader.getValues(indices.values())
+        except Exception:
+            # it is not an EnergyPlus sql file. use the csv file
+            return {}
+        finally:
+            sqlReader.close()
+        
+        numOfRows = self.getNumOfRows()
+        columns = {}
+        for columnIndex, dictionaryIndex in indices.items():
+            if len(values[dictionaryIndex]) == numOfRows:
+                columns[columnIndex] = array.array('d', values[dictionaryIndex])
+        return columns
+    
+    def getNumOfRows(self):
+        """Return number of data rows without the header."""
+        if self.cache["numOfRows"] == None: self.getColumns([])
+        return self.cache["numOfRows"]
+    
+    def iterRows(self, columnIndices):
+        """
+        Yield a dictionary of {columnIndex: value} for each row. Values that are not
+        numbers are returned as None.
+        """
+        columnIndices = sorted(set(columnIndices))
+        columns = self.getColumns(columnIndices)
+        for rowCount in xrange(self.getNumOfRows()):
+            row = {}
+            for index, column in zip(columnIndices, columns):
+                value = column[rowCount]
+                # nan is not equal to itself
+                if value != value: value = None
+                row[index] = value
+            yield row
+
+
+class hb_EPSQLReader(object):
+    """
+    Read EnergyPlus results directly from eplusout.sql using sqlite3.
+    
+    Time series are read from ReportDataDictionary/ReportData and summaries from
+    TabularDataWithStrings. Only the dictionary entries that match the requested
+    variable, keys and frequency are read so a single zone of a large model can be
+    read without loading the rest of the results. Time series come back with the
+    same header as the csv result components
+    (key:location/dataType/units/frequency/startsAt/endsAt). hb_EPCSVReader uses
+    this class to read the columns of a csv file from the sql file of the same run.
+    The file is opened read-only.
+    
+    ReportData of EnergyPlus sql files has no index on ReportDataDictionaryIndex
+    so every query of the time series scans the whole table. Before reading the
+    time series the file is copied to the temp folder and the index is added to the
+    copy. The copy is reused until the sql file changes. The copies that are not
+    used recently are removed when there are more than maxNumOfIndexedCopies copies
+    or they are larger than maxIndexedCopiesSize.
+    
+    Args:
+        sqlFile: Path to EnergyPlus sql result file.
+    """
+    
+    # EnvironmentType of the weather file run periods in EnvironmentPeriods table
+    runPeriodEnvironmentType = 3
+    
+    # ReportingFrequency in the sql file for the frequency in csv column headings
+    csvFrequencies = {"TimeStep": ["Zone Timestep", "HVAC System Timestep"],
+                      "RunPeriod": ["Run Period"]}
+    
+    # folder for the indexed copies of the sql files
+    indexedCopyFolder = os.path.join(tempfile.gettempdir(), "honeybee_sql")
+    maxNumOfIndexedCopies = 20
+    # MB
+    maxIndexedCopiesSize = 2000
+    
+    def __init__(self, sqlFile):
+        if not os.path.isfile(sqlFile):
+            raise IOError("Can't find %s."%sqlFile)
+        
+        self.sqlFile = os.path.normpath(sqlFile)
+        self.connectedFile = self.sqlFile
+        self.connection = None
+        self.location = None
+        self.runPeriod = None
+    
+    def connect(self):
+        """Open the sql file. Nothing is written to the file."""
+        if self.connection != None: return self.connection
+        
+        if sqlite3 == None:
+            raise ImportError("sqlite3 is not available in this version of python. " + \
+                              "Use the csv result components instead.")
+        
+        self.connection = sqlite3.connect(self.connectedFile)
+        
+        # the file belongs to EnergyPlus. make sure no query changes it
+        try: self.connection.execute("PRAGMA query_only = ON")
+        except sqlite3.Error: pass
+        
+        return self.connection
+    
+    def close(self):
+        if self.connection != None:
+            self.connection.close()
+            self.connection = None
+    
+    def query(self, sql, parameters = ()):
+        return self.connect().execute(sql, parameters).fetchall()
+    
+    def hasReportDataIndex(self):
+        """Check if ReportData has an index that starts with ReportDataDictionaryIndex."""
+        for indexRow in self.query("PRAGMA index_list(ReportData)"):
+            columns = self.query('PRAGMA index_info("%s")'%indexRow[1])
+            if columns and columns[0][2] == "ReportDataDictionaryIndex": return True
+        return False
+    
+    def getIndexedCopy(self):
+        """
+        Return the path to a copy of the sql file with an index on ReportDataDictionaryIndex.
+        The copy is named after the path, size and modification time of the sql file
+        and older copies of the same file are removed.
+        """
+        pathHash = hashlib.md5(os.path.normcase(os.path.abspath(self.sqlFile)).encode("utf-8")).hexdigest()[:16]
+        copyName = "%s_%d_%d.sql"%(pathHash, os.path.getsize(self.sqlFile), int(os.path.getmtime(self.sqlFile)))
+        copyFile = os.path.join(self.indexedCopyFolder, copyName)
+        if os.path.isfile(copyFile):
+            # the modification time of the copy is the last time it is used
+            try: os.utime(copyFile, None)
+            except OSError: pass
+            return copyFile
+        
+        if not os.path.isdir(self.indexedCopyFolder): os.makedirs(self.indexedCopyFolder)
+        for fileName in os.listdir(self.indexedCopyFolder):
+            if fileName.startswith(pathHash + "_"):
+                try: os.remove(os.path.join(self.indexedCopyFolder, fileName))
+                except OSError: pass
+        
+        # index a temporary file so a failed run doesn't leave a copy without the index
+        tempFile = copyFile + ".tmp"
+        shutil.copyfile(self.sqlFile, tempFile)
+        connection = sqlite3.connect(tempFile)
+        try:
+            connection.execute("CREATE INDEX IF NOT EXISTS ReportDataDictionaryIndexOfReportData " + \
+                               "ON ReportData (ReportDataDictionaryIndex, TimeIndex)")
+            connection.commit()
+        finally:
+            connection.close()
+        os.rename(tempFile, copyFile)
+        
+        self.cleanIndexedCopies()
+        return copyFile
+    
+    @classmethod
+    def cleanIndexedCopies(cls, maxNumOfCopies = None, maxCopiesSize = None):
+        """Remove the indexed copies that are not used recently to keep them under the limits."""
+        if maxNumOfCopies == None: maxNumOfCopies = cls.maxNumOfIndexedCopies
+        if maxCopiesSize == None: maxCopiesSize = cls.maxIndexedCopiesSize
+        if not os.path.isdir(cls.indexedCopyFolder): return
+        
+        copies = []
+        for fileName in os.listdir(cls.indexedCopyFolder):
+            if not fileName.endswith(".sql"): continue
+            copyFile = os.path.join(cls.indexedCopyFolder, fileName)
+            try: copies.append((os.path.getmtime(copyFile), os.path.getsize(copyFile) / 1048576.0, copyFile))
+            except OSError: pass
+        
+        copiesSize = 0
+        for count, (lastUsed, size, copyFile) in enumerate(sorted(copies, reverse = True)):
+            copiesSize += size
+            if count >= maxNumOfCopies or copiesSize > maxCopiesSize:
+                # the copy can be open in another reader
+                try: os.remove(copyFile)
+                except OSError: pass
+    
+    def connectIndexed(self):
+        """Connect to the indexed copy of the sql file if ReportData doesn't have an index."""
+        if self.connectedFile != self.sqlFile or self.hasReportDataIndex(): return
+        try:
+            copyFile = self.getIndexedCopy()
+        except Exception:
+            # the copy can't be made. read the original file
+            return
+        self.close()
+        self.connectedFile = copyFile
+    
+    @staticmethod
+    def getFilter(field, values, upperCase = False):
+        """Return a sql condition and the parameters for field IN values."""
+        if values == None: return None, []
+        if isinstance(values, basestring): values = [values]
+        values = list(values)
+        if upperCase:
+            field = "UPPER(%s)"%field
+            values = [value.upper() for value in values]
+        return "%s IN (%s)"%(field, ", ".join(["?"] * len(values))), values
+    
+    def getLocation(self):
+        """Return location name from the weather file in the same format as the csv components."""
+        if self.location == None:
+            self.location = "NoLocation"
+            try:
+                rows = self.query("SELECT Value FROM TabularDataWithStrings WHERE " + \
+                                  "ReportName = 'InputVerificationandResultsSummary' AND " + \
+                                  "RowName = 'Weather File' LIMIT 1")
+                if rows: self.location = rows[0][0].split("WMO")[0].strip()
+            except Exception:
+                pass
+        return self.location
+    
+    def getRunPeriodEnvironments(self):
+        """Return the index of the weather file run periods."""
+        rows = self.query("SELECT EnvironmentPeriodIndex FROM EnvironmentPeriods " + \
+                          "WHERE EnvironmentType = ?", (self.runPeriodEnvironmentType,))
+        return [row[0] for row in rows]
+    
+    def getRunPeriod(self):
+        """Return start and end of the run period as (month, day, hour) tuples."""
+        if self.runPeriod == None:
+            condition, parameters = self.getFilter("EnvironmentPeriodIndex", self.getRunPeriodEnvironments())
+            sql = "SELECT Month, Day FROM Time WHERE Month IS NOT NULL AND %s ORDER BY TimeIndex %s LIMIT 1"
+            
+            start, end = "NoDate", "NoDate"
+            firstStep = self.query(sql%(condition, "ASC"), parameters)
+            lastStep = self.query(sql%(condition, "DESC"), parameters)
+            if firstStep and lastStep:
+                start = (int(firstStep[0][0]), int(firstStep[0][1]), 1)
+                end = (int(lastStep[0][0]), int(lastStep[0][1]), 24)
+            
+            self.runPeriod = start, end
+        
+        return self.runPeriod
+    
+    def getDataDictionary(self, variableNames = None, keyValues = None, frequency = None):
+        """
+        Return the outputs that are available in the sql file as a list of
+        (index, keyValue, variableName, units, frequency).
+        
+        Args:
+            variableNames: Optional variable name or list of variable names (e.g. Zone Air Temperature)
+            keyValues: Optional zone, surface or system name or list of names. Names are not case sensitive.
+            frequency: Optional reporting frequency (e.g. Hourly, Monthly)
+        """
+        conditions, parameters = [], []
+        for field, values, upperCase in [("Name", variableNames, False),
+                                         ("KeyValue", keyValues, True),
+                                         ("ReportingFrequency", frequency, False)]:
+            condition, values = self.getFilter(field, values, upperCase)
+            if condition == None: continue
+            conditions.append(condition)
+            parameters.extend(values)
+        
+        sql = "SELECT ReportDataDictionaryIndex, KeyValue, Name, Units, ReportingFrequency FROM ReportDataDictionary"
+        if conditions: sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY ReportDataDictionaryIndex"
+        
+        return self.query(sql, parameters)
+    
+    def getTimeSeries(self, variableNames, keyValues = None, frequency = None):
+        """
+        Return a list of (header, values) for each output that matches the input.
+        Header is the same 7 items that csv result components add to the start of
+        each list. Only the values of the weather file run periods are returned.
+        
+        Args:
+            variableNames: Variable name or list of variable names (e.g. Zone Air Temperature)
+            keyValues: Optional zone, surface or system name or list of names.
+            frequency: Optional reporting frequency (e.g. Hourly, Monthly)
+        """
+        location = self.getLocation()
+        start, end = self.getRunPeriod()
+        
+        dataDictionary = self.getDataDictionary(variableNames, keyValues, frequency)
+        valuesDict = self.getValues([row[0] for row in dataDictionary])
+        
+        results = []
+        for index, keyValue, variableName, units, outputFrequency in dataDictionary:
+            
+            values = valuesDict[index]
+            
+            if keyValue: dataType = "%s for %s"%(variableName, keyValue)
+            else: dataType = variableName
+            
+            header = ["key:location/dataType/units/frequency/startsAt/endsAt", location, dataType, \
+                      units, outputFrequency.replace(" ", ""), start, end]
+            
+            results.append((header, values))
+        
+        return results
+    
+    def getValues(self, dictionaryIndices, maxNumOfParameters = 500):
+        """
+        Return {dictionaryIndex: values} for a list of ReportDataDictionaryIndex.
+        Values of the weather file run periods are ordered by time. The outputs are
+        read together and found through the index of ReportData.
+        """
+        self.connectIndexed()
+        envCondition, envParameters = self.getFilter("Time.EnvironmentPeriodIndex", self.getRunPeriodEnvironments())
+        
+        values = dict((index, []) for index in dictionaryIndices)
+        dictionaryIndices = sorted(values.keys())
+        for count in range(0, len(dictionaryIndices), maxNumOfParameters):
+            condition, parameters = self.getFilter("ReportData.ReportDataDictionaryIndex", \
+                                                   dictionaryIndices[count:count + maxNumOfParameters])
+            sql = "SELECT ReportData.ReportDataDictionaryIndex, ReportData.Value FROM ReportData " + \
+                  "INNER JOIN Time ON ReportData.TimeIndex = Time.TimeIndex WHERE %s AND %s "%(condition, envCondition) + \
+                  "ORDER BY ReportData.ReportDataDictionaryIndex, ReportData.TimeIndex"
+            for index, value in self.connect().execute(sql, parameters + envParameters):
+                values[index].append(value)
+        
+        return values
+    
+    @staticmethod
+    def parseCSVHeading(heading):
+        """
+        Return (keyValue, variableName, units, frequency) for a csv column heading
+        (e.g. ZONE_1:Zone Air Temperature [C](Hourly)) or None if it is not an output.
+        """
+        match = re.match(r"^(.*?):(.*) \[(.*)\]\((.*)\)$", heading.strip())
+        if match == None: return None
+        return match.groups()
+    
+    def getDictionaryIndices(self, headings):
+        """Return ReportDataDictionaryIndex for each csv column heading or None if it is not in the sql file."""
+        dataDictionary = {}
+        for index, keyValue, variableName, units, frequency in self.getDataDictionary():
+            dataDictionary[((keyValue or "").upper(), variableName, frequency)] = index
+        
+        indices = []
+        for heading in headings:
+            index = None
+            output = self.parseCSVHeading(heading)
+            if output != None:
+                keyValue, variableName, units, frequency = output
+                for sqlFrequency in self.csvFrequencies.get(frequency, [frequency]):
+                    index = dataDictionary.get((keyValue.upper(), variableName, sqlFrequency))
+                    if index != None: break
+            indices.append(index)
+        
+        return indices
+    
+    def getTabularData(self, reportName = None, tableName = None, rowNames = None, columnNames = None, \
+                       reportForString = "Entire Facility"):
+        """
+        Return a list of (reportName, tableName, rowName, columnName, units, value) from summary reports.
+        Value is converted to float when possible.
+        
+        Args:
+            reportName: Optional report name (e.g. AnnualBuildingUtilityPerformanceSummary)
+            tableName: Optional table name (e.g. End Uses)
+            rowNames: Optional row name or list of row names
+            columnNames: Optional column name or list of column names
+            reportForString: Default is Entire Facility. Set to None to return all the reports.
+        """
+        conditions, parameters = [], []
+        for field, values in [("ReportName", reportName), ("TableName", tableName),
+                              ("RowName", rowNames), ("ColumnName", columnNames),
+                              ("ReportForString", reportForString)]:
+            condition, values = self.getFilter(field, values)
+            if condition == None: continue
+            conditions.append(condition)
+            parameters.extend(values)
+        
+        sql = "SELECT ReportName, TableName, RowName, ColumnName, Units, Value FROM TabularDataWithStrings"
+        if conditions: sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY TabularDataIndex"
+        
+        results = []
+        for row in self.query(sql, parameters):
+            row = list(row)
+            try: row[-1] = float(row[-1])
+            except (TypeError, ValueError): row[-1] = row[-1].strip() if row[-1] else row[-1]
+            results.append(tuple(row))
+        
+        return results
+    
+    def getEndUses(self):
+        """Return annual end uses as {endUse: {fuel: (value, units)}}."""
+        endUses = {}
+        for reportName, tableName, endUse, fuel, units, value in \
+            self.getTabularData("AnnualBuildingUtilityPerformanceSummary", "End Uses"):
+            if not endUse: continue
+            endUses.setdefault(endUse, {})[fuel] = (value, units)
+        return endUses
+
+
+class hb_EPBatchRunner(object):
+    """Run a number of IDF/EPW pairs through EnergyPlus in parallel
+    
+        Each run is copied to its own folder under the working directory so the
+        runs don't overwrite each other's eplusout files. The runs are executed
+        with hb_BatchJobScheduler and the .csv and .sql outputs of all the runs are
+        collected in resultIndex.json inside the working directory.
+        
+        Args:
+            workingDir: Folder for the runs. A sub-folder is created for each run
+            EPDirectory: Folder that EnergyPlus is installed in. Default is the folder
+                that Honeybee has found (sc.sticky["honeybee_folders"]["EPPath"])
+            maxWorkers: Number of simulations that run at the same time. Default is
+                the number of processors
+            command: Optional command to use instead of Epl-run (e.g. a dummy executable
+                for testing). It should be a list of arguments. {idf}, {epw} and {name}
+                will be replaced with the full path to the idf file, the full path to
+                the epw file and the name of the run
+            progressCallback: Optional function that will be called with a list of
+                progress lines while the runs are running
+            cancelCheck: Optional function that returns True if the runs should be cancelled
+        
+        Usage:
+            runner = hb_EPBatchRunner("c:\\ladybug\\sweep", sc.sticky["honeybee_folders"]["EPPath"], maxWorkers = 4)
+            for idfFile in idfFiles:
+                runner.addRun(idfFile, epwFile)
+            results = runner.run()
+    """
+    
+    def __init__(self, workingDir, EPDirectory = None, maxWorkers = None, command = None, \
+                 progressCallback = None, cancelCheck = None, checkInterval = 1):
+        if not os.path.isdir(workingDir): os.makedirs(workingDir)
+        self.workingDir = workingDir
+        if EPDirectory == None and command == None:
+            EPDirectory = sc.sticky["honeybee_folders"]["EPPath"]
+        self.EPDirectory = EPDirectory
+        
+        if maxWorkers == None:
+            try: maxWorkers = int(os.environ["NUMBER_OF_PROCESSORS"])
+            except: maxWorkers = 1
+        self.maxWorkers = maxWorkers
+        
+        self.command = command
+        self.progressCallback = progressCallback
+        self.cancelCheck = cancelCheck
+        self.checkInterval = checkInterval
+        self.runs = []
+        self.scheduler = None
+    
+    def addRun(self, idfFileAddress, epwFileAddress, name = None):
+        """Copy the idf and epw files to a new folder for the run and return the name of the run."""
+        if name == None:
+            name = os.path.splitext(os.path.basename(idfFileAddress))[0]
+        
+        # make sure each run has a unique folder
+        runNames = [run["name"] for run in self.runs]
+        uniqueName, count = name, 1
+        while uniqueName in runNames:
+            uniqueName = name + "_" + str(count)
+            count += 1
+        name = uniqueName
+        
+        runFolder = os.path.join(self.workingDir, name)
+        if not os.path.isdir(runFolder): os.makedirs(runFolder)
+        
+        idfFile = os.path.join(runFolder, name + ".idf")
+        epwFile = os.path.join(runFolder, os.path.basename(epwFileAddress))
+        for source, target in ((idfFileAddress, idfFile), (epwFileAddress, epwFile)):
+            if os.path.normcase(os.path.abspath(source)) != os.path.normcase(os.path.abspath(target)):
+                shutil.copyfile(source, target)
+        
+        self.runs.append({"name": name, "folder": runFolder, "idf": idfFile, "epw": epwFile})
+        return name
+    
+    def getCommand(self, run):
+        if self.command != None:
+            return [arg.replace("{idf}", run["idf"]).replace("{epw}", run["epw"]).replace("{name}", run["name"]) \
+                    for arg in self.command], False
+        
+        fullPath = os.path.splitext(run["idf"])[0]
+        EPLRun = os.path.join(self.EPDirectory, "Epl-run")
+        # Epl-run is a batch file so it should run through the shell
+        return '"%s" "%s" "%s" idf "%s" EP N nolimit N N 0 Y'% \
+               (EPLRun, fullPath, fullPath, os.path.basename(run["epw"])), True
+    
+    def getErrFile(self, run):
+        # EnergyPlus writes eplusout.err while running and Epl-run renames it at the end
+        for fileName in (os.path.splitext(run["idf"])[0] + ".err", os.path.join(run["folder"], "eplusout.err")):
+            if os.path.isfile(fileName): return fileName
+        return None
+    
+    def getProgress(self, run):
+        """Return the last simulation date and the number of warnings, severe and fatal errors."""
+        progress = {"date": None, "warnings": 0, "severe": 0, "fatal": 0, "completed": False}
+        errFile = self.getErrFile(run)
+        if errFile == None: return progress
+        
+        try:
+            with open(errFile, "r") as errInf:
+                for line in errInf:
+                    if "Simulation at" in line:
+                        # e.g. Starting Simulation at 01/21 for RUNPERIOD 1
+                        progress["date"] = line.split("Simulation at")[-1].strip().split(" ")[0]
+                    elif "** Warning **" in line: progress["warnings"] += 1
+                    elif "** Severe  **" in line: progress["severe"] += 1
+                    elif "**  Fatal  **" in line: progress["fatal"] += 1
+                    elif "EnergyPlus Completed Successfully" in line: progress["completed"] = True
+        except:
+            # the file can be locked by EnergyPlus
+            pass
+        
+        return progress
+    
+    def reportProgress(self):
+        lines = []
+        for run in self.runs:
+            job = self.scheduler.getJob(run["name"])
+            line = "%s: %s"%(run["name"], job.status)
+            if job.status == "running":
+                progress = self.getProgress(run)
+                if progress["date"] != None: line += " (%s)"%progress["date"]
+            lines.append(line)
+        
+        if self.progressCallback != None: self.progressCallback(lines)
+        
+        if self.cancelCheck != None: return self.cancelCheck()
+        return False
+    
+    def collectResults(self):
+        results = []
+        for run in self.runs:
+            job = self.scheduler.getJob(run["name"])
+            progress = self.getProgress(run)
+            
+            fileNames = sorted(os.listdir(run["folder"]))
+            result = {"name": run["name"],
+                      "idf": run["idf"],
+                      "epw": run["epw"],
+                      "status": job.status,
+                      "returnCode": job.returnCode,
+                      "wallTime": job.wallTime,
+                      "err": self.getErrFile(run),
+                      "warnings": progress["warnings"],
+                      "severe": progress["severe"],
+                      "fatal": progress["fatal"],
+                      "csv": [os.path.join(run["folder"], f) for f in fileNames if f.lower().endswith(".csv")],
+                      "sql": [os.path.join(run["folder"], f) for f in fileNames if f.lower().endswith(".sql")]
+                      }
+            
+            if progress["fatal"] != 0 and result["status"] == "finished":
+                result["status"] = "failed"
+            
+            results.append(result)
+        
+        with open(os.path.join(self.workingDir, "resultIndex.json"), "w") as indexFile:
+            json.dump(results, indexFile, indent = 4)
+        
+        return results
+    
+    def run(self):
+        """Run all the simulations and return a list of result dictionaries."""
+        self.scheduler = hb_BatchJobScheduler(maxWorkers = self.maxWorkers, captureOutput = True, \
+                                              cancelCheck = self.reportProgress, \
+                                              checkInterval = self.checkInterval)
+        for run in self.runs:
+            command, shell = self.getCommand(run)
+            self.scheduler.addJob(run["name"], command, shell = shell, workingDir = run["folder"])
+        
+        self.scheduler.run()
+        return self.collectResults()
+
+
+class hb_AnnualDaylightMatrix(object):
+    """
+    Annual daylight analysis with daylight coefficients and a sky matrix.
+    
+    Daylight coefficients of the test points for the 145 Tregenza sky patches and
+    the ground are calculated with rcontrib once for each scene and are cached next
+    to the study folder by the content of the scene, the test points and the
+    parameters. The annual results are the product of the daylight coefficients and
+    a sky matrix from gendaymtx, calculated with dctimestep. A new weather file or
+    north angle only needs a new sky matrix and the product. The results are written
+    as Daysim .ill files so they can be read by the annual result components.
+    
+    Args:
+        subWorkingDir: Folder of the annual study.
+        radFileName: Name of the project.
+    """
+    
+    # Tregenza sky (reinhart.cal with MF 1) and the ground patch
+    numOfSkyPatches = 146
+    skyGlowFileName = "skyglow.rad"
+    skyMatrixFileName = "sky.smx"
+    
+    def __init__(self, subWorkingDir, radFileName):
+        self.subWorkingDir = subWorkingDir
+        self.radFileName = radFileName
+        self.hb_writeRADAUX = sc.sticky["honeybee_WriteRADAUX"]()
+    
+    def writeSkyGlowFile(self):
+        """Write a uniform glow for the whole sphere which rcontrib divides into sky patches."""
+        skyGlowFile = os.path.join(self.subWorkingDir, self.skyGlowFileName)
+        with open(skyGlowFile, "w") as skyGlow:
+            skyGlow.write("#@rfluxmtx h=u u=Y\n" + \
+                          "void glow sky_glow\n0\n0\n4 1 1 1 0\n\n" + \
+                          "sky_glow source sky\n0\n0\n4 0 0 1 360\n")
+        return skyGlowFile
+    
+    def getDCCacheFile(self, sceneHash, ptsFileName, rcontribOptions):
+        """Return the path to the cached daylight coefficients for a .pts file."""
+        dcHash = hashlib.md5(sceneHash + "\n" + rcontribOptions + "\n")
+        with open(ptsFileName, "rb") as ptsFile:
+            dcHash.update(ptsFile.read())
+        cacheFolder = self.hb_writeRADAUX.getOctreeCacheFolder(self.subWorkingDir)
+        return os.path.join(cacheFolder, dcHash.hexdigest() + ".dc")
+    
+    def rcontribOptions(self, radParameters):
+        # same parameters as rtrace except the header which is needed by dctimestep
+        # and the ambient cache (-aa, -ar) which rcontrib doesn't use
+        options = []
+        skipValue = False
+        for option in self.hb_writeRADAUX.rtraceOptions(radParameters).split():
+            if skipValue: skipValue = False
+            elif option in ("-aa", "-ar"): skipValue = True
+            elif option not in ("rtrace", "-I", "-h"): options.append(option)
+        return "rcontrib -I+ " + " ".join(options) + \
+               " -e MF:1 -f reinhart.cal -b rbin -bn Nrbins -m sky_glow"
+    
+    def DCLines(self, octFileName, radParameters, sceneHash, cpuCount, numOfPts):
+        """Return the lines to calculate (or copy from the cache) the daylight coefficients for a cpu."""
+        ptsFileName = os.path.join(self.subWorkingDir, self.radFileName + "_" + `cpuCount` + ".pts")
+        DCFileName = os.path.join(self.subWorkingDir, self.radFileName + "_" + `cpuCount` + ".dc")
+        rcontribOptions = self.rcontribOptions(radParameters)
+        
+        cachedDCFile = self.getDCCacheFile(sceneHash, ptsFileName, rcontribOptions)
+        if os.path.isfile(cachedDCFile):
+            print "Using the daylight coefficients from " + cachedDCFile
+            os.utime(cachedDCFile, None)
+            return "copy /Y " + cachedDCFile + " " + DCFileName + " > nul\n"
+        
+        # only copy the file to the cache if rcontrib succeeds
+        return rcontribOptions + " -y " + `numOfPts` + " " + octFileName + ".oct < " + \
+               os.path.basename(ptsFileName) + " > " + os.path.basename(DCFileName) + \
+               " && copy /Y " + DCFileName + " " + cachedDCFile + " > nul\n"
+    
+    def skyMatrixLine(self, weaFileName, outputUnits = 2, northAngle = 0):
+        """Return gendaymtx line for the sky matrix.
+        
+        The scene is not rotated for north. The sky is rotated in the opposite direction instead.
+        """
+        # -O0 visible and -O1 solar radiance
+        output = "-O0" if outputUnits == 2 else "-O1"
+        line = "gendaymtx -m 1 " + output
+        if northAngle != 0: line += " -r " + `-float(northAngle)`
+        return line + " " + weaFileName + " > " + self.skyMatrixFileName + "\n"
+    
+    def skyMatrixLines(self, epwFileName, weaFileName, outputUnits = 2, northAngle = 0):
+        """Return the lines to write the .wea file and the sky matrix or to copy them from the sky cache."""
+        skyCache = hb_SkyCache()
+        skyParameters = {"skyDensity": 1, "outputUnits": outputUnits, "north": northAngle}
+        key = skyCache.getKey(epwFileName, "skyMatrix", skyParameters)
+        
+        cachedFiles = skyCache.getSkyFiles(key, [weaFileName, self.skyMatrixFileName])
+        if cachedFiles:
+            print "Using the sky matrix from " + skyCache.getSkyFolder(key)
+            return "".join(["copy /Y " + cachedFile + " " + os.path.basename(cachedFile) + " > nul\n" \
+                            for cachedFile in cachedFiles])
+        
+        # only copy the files to the cache if gendaymtx succeeds
+        skyFolder = skyCache.addSky(key, epwFileName, "skyMatrix", skyParameters)
+        return "epw2wea " + os.path.basename(epwFileName) + " " + weaFileName + "\n" + \
+               self.skyMatrixLine(weaFileName, outputUnits, northAngle)[:-1] + \
+               " && copy /Y " + weaFileName + " " + os.path.join(skyFolder, weaFileName) + " > nul" + \
+               " && copy /Y " + self.skyMatrixFileName + " " + os.path.join(skyFolder, self.skyMatrixFileName) + " > nul\n"
+    
+    def dctimestepLine(self, cpuCount):
+        return "dctimestep " + self.radFileName + "_" + `cpuCount` + ".dc " + self.skyMatrixFileName + \
+               " > " + self.radFileName + "_" + `cpuCount` + ".mtx\n"
+    
+    def readWeaTimes(self, weaFileName):
+        """Return (month, day, hour) for each line of a .wea file."""
+        times = []
+        with open(weaFileName, "r") as weaFile:
+            for line in weaFile:
+                values = line.split()
+                if len(values) < 5: continue
+                try: times.append((int(values[0]), int(values[1]), float(values[2])))
+                except ValueError: continue
+        return times
+    
+    def iterMatrixRows(self, matrixFileName, numOfColumns):
+        """Yield each row of an ascii radiance matrix as a list of RGB values."""
+        rowSize = 3 * numOfColumns
+        values = []
+        with open(matrixFileName, "rb") as matrixFile:
+            line = matrixFile.readline()
+            if line.startswith("#?RADIANCE"):
+                # skip the header
+                while line.strip() != "": line = matrixFile.readline()
+                line = matrixFile.readline()
+            
+            while line:
+                values.extend(map(float, line.split()))
+                while len(values) >= rowSize:
+                    yield values[:rowSize]
+                    values = values[rowSize:]
+                line = matrixFile.readline()
+    
+    def writeIllFile(self, cpuCount, weaFileName, outputUnits = 2, blockSize = 240):
+        """Convert the result of dctimestep for a cpu to a Daysim .ill file.
+        
+            The RGB values of each point are converted to illuminance (or irradiance)
+            and are written to a point-major float32 file first. The .ill file is written
+            from this file in blocks of hours so the results of all the points for all
+            the hours are never loaded into memory at once.
+        """
+        times = self.readWeaTimes(weaFileName)
+        numOfHours = len(times)
+        
+        # luminous efficacy for illuminance
+        factor = 179 if outputUnits == 2 else 1
+        r, g, b = 0.265 * factor, 0.670 * factor, 0.065 * factor
+        
+        matrixFileName = os.path.join(self.subWorkingDir, self.radFileName + "_" + `cpuCount` + ".mtx")
+        pointsFileName = matrixFileName[:-4] + "_points.bin"
+        
+        numOfPts = 0
+        with open(pointsFileName, "wb") as pointsFile:
+            for row in self.iterMatrixRows(matrixFileName, numOfHours):
+                array.array("f", [r * row[i] + g * row[i + 1] + b * row[i + 2] \
+                                  for i in xrange(0, len(row), 3)]).tofile(pointsFile)
+                numOfPts += 1
+        
+        illFileName = os.path.join(self.subWorkingDir, self.radFileName + "_" + `cpuCount` + ".ill")
+        itemSize = array.array("f").itemsize
+        with open(pointsFileName, "rb") as pointsFile:
+            with open(illFileName, "w") as illFile:
+                for hourStart in range(0, numOfHours, blockSize):
+                    numOfBlockHours = min(blockSize, numOfHours - hourStart)
+                    block = []
+                    for ptCount in range(numOfPts):
+                        values = array.array("f")
+                        pointsFile.seek((ptCount * numOfHours + hourStart) * itemSize)
+                        values.fromfile(pointsFile, numOfBlockHours)
+                        block.append(values)
+                    
+                    for hourCount in range(numOfBlockHours):
+                        month, day, hour = times[hourStart + hourCount]
+                        # same format as Daysim
+                        illFile.write("%d %d %.3f "%(month, day, hour) + \
+                                      "".join([" %.2f"%values[hourCount] for values in block]) + "\n")
+        
+        os.remove(pointsFileName)
+        return illFileName
+
+
+class hb_WriteRAD(object):
+    
+    # number of tiles for each CPU in image-based analysis
+    tilesPerCPU = 4
+    
+    def __init__(self, component = ghenv.Component):
+        
+        self.component = component
+        # (hb_TiledImage, tile batch files) for each view of image-based analysis
+        self.tiledImages = []
+        # ambient file of the study and its copy in the cache. See setAmbientFile
+        self.ambFile = None
+        self.cachedAmbFile = None
+        self.sceneHash = None
+        
+        self.hb_writeRADAUX = sc.sticky["honeybee_WriteRADAUX"]()
+        self.hb_RADMaterialAUX = sc.sticky["honeybee_RADMaterialAUX"]
+        self.lb_preparation = sc.sticky["ladybug_Preparation"]()
+        self.hb_writeDS = sc.sticky["honeybee_WriteDS"]()
+        
+        self.hb_radParDict = sc.sticky["honeybee_RADParameters"]().radParDict
+        
+        hb_folders = sc.sticky["honeybee_folders"]
+        self.hb_RADPath = hb_folders["RADPath"]
+        self.hb_RADLibPath = hb_folders["RADLibPath"]
+        self.hb_DSPath = hb_folders["DSPath"]
+        self.hb_DSCore = hb_folders["DSCorePath"]
+        self.hb_DSLibPath = hb_folders["DSLibPath"]
+        
+        
+    def writeRADAndMaterialFiles(self, originalHBObjects, subWorkingDir, radFileName, \
+                                 analysisRecipe, meshParameters, exportInteriorWalls):
+        
+        # initiate RAD Parameters
+        if analysisRecipe.radParameters==None:
+            quality = 0
+            analysisRecipe.radParameters = {}
+            print "Default values are set for RAD parameters"
+            for key in self.hb_radParDict.keys():
+                #print key + " is set to " + str(hb_radParDict[key][quality])
+                analysisRecipe.radParameters[key] = self.hb_radParDict[key][quality]
+        
+        # collect information from analysis recipe
+        radParameters = analysisRecipe.radParameters
+        simulationType = analysisRecipe.type
+        
+        radFileFullName = os.path.join(subWorkingDir, radFileName + '.rad')
+        
+        IESObjects = {}
+        IESCount = 0    
+        # call the objects from the lib
+        hb_hive = sc.sticky["honeybee_Hive"]()
+        HBObjects = hb_hive.callFromHoneybeeHive(originalHBObjects)
+        
+        geoRadFile = open(radFileFullName, 'w')
+        geoRadFile.write("#GENERATED BY HONEYBEE\n")
+        customRADMat = {} # dictionary to collect the custom material names
+        customMixFunRadMat = {} # dictionary to collect the custom mixfunc material names
+        writtenSurfaces = set() # name of the surfaces that are already in the scene
+        # the surfaces of each object are collected first and the radiance strings
+        # are generated later. See writeRADObjects
+        radObjects = []
+        rotateObjects = False
+        if len(HBObjects)!=0:
+            # if this is an annual analysis and north is not 0 rotate all Honeybee objects
+            # the matrix-based annual analysis rotates the sky instead
+            if analysisRecipe.type == 2 and analysisRecipe.northDegrees!=0 and \
+               not self.isMatrixAnnualAnalysis(analysisRecipe):
+                print "Rotating the scene for %d degrees"%analysisRecipe.northDegrees
+                
+                transform = rc.Geometry.Transform.Rotation(math.radians(analysisRecipe.northDegrees), \
+                            rc.Geometry.Point3d.Origin)
+                rotateObjects = True
+            
+            for objCount, HBObj in enumerate(HBObjects):
+                
+                radObject = []
+                radObjects.append(radObject)
                 
                 if rotateObjects: HBObj.transform(transform, False)
                 
@@ -1629,19 +3681,19 @@ class hb_WriteRAD(object):
                         
                         # if it is an interior wall and the other wall is already written
                         # then don't write this wall
-                        if self.hb_writeRADAUX.isSrfInterior(srf) and srf.BCObject.name in surfaceList:
+                        if self.hb_writeRADAUX.isSrfInterior(srf) and srf.BCObject.name in writtenSurfaces:
                             continue
                         
-                        surfaceList.append(srf.name)
+                        writtenSurfaces.add(srf.name)
                         
                         # collect the custom material informations
                         if srf.RadMaterial!=None:
                             customRADMat, customMixFunRadMat = self.hb_RADMaterialAUX.addRADMatToDocumentDict(srf, customRADMat, customMixFunRadMat)
                         # write the surfaces
                         if srf.isPlanar and len(srf.childSrfs)<2:
-                            geoRadFile.write(self.RADSurface(srf))
+                            radObject.append((self.RADSurface, srf))
                         else:
-                            geoRadFile.write(self.RADNonPlanarSurface(srf))
+                            radObject.append((self.RADNonPlanarSurface, srf))
                         
                         if srf.hasChild:
                             # collect the custom material informations
@@ -1650,7 +3702,7 @@ class hb_WriteRAD(object):
                                     customRADMat, customMixFunRadMat = self.hb_RADMaterialAUX.addRADMatToDocumentDict(childSrf, customRADMat, customMixFunRadMat)
                                     
                             if not srf.isPlanar or len(srf.childSrfs) > 1:
-                                geoRadFile.write(self.RADNonPlanarChildSurface(srf))
+                                radObject.append((self.RADNonPlanarChildSurface, srf))
                             
                             
                 elif HBObj.objectType == "HBSurface":
@@ -1681,11 +3733,11 @@ class hb_WriteRAD(object):
 
                     if HBObj.isPlanar and (not HBObj.isChild and len(HBObj.childSrfs)<2):
                         # check for rad material
-                        geoRadFile.write(self.RADSurface(HBObj))
+                        radObject.append((self.RADSurface, HBObj))
                     else:
-                        geoRadFile.write(self.RADNonPlanarSurface(HBObj))
+                        radObject.append((self.RADNonPlanarSurface, HBObj))
                         if not HBObj.isChild and HBObj.hasChild:
-                            geoRadFile.write(self.RADNonPlanarChildSurface(HBObj))
+                            radObject.append((self.RADNonPlanarChildSurface, HBObj))
                 
                 elif HBObj.objectType == "HBIES":
                     IESCount += 1
@@ -1709,12 +3761,13 @@ class hb_WriteRAD(object):
                     # if it is all fine then write the geometry
                     if IESObjcIsFine:
                         IESName = HBObj.name + "_" + str(IESCount)
-                        geoRadFile.write( HBObj.getRADGeometryStr(IESName, originalHBObjects[objCount]))
+                        radObject.append(HBObj.getRADGeometryStr(IESName, originalHBObjects[objCount]))
                         # downlight_light polygon downlight.d
                         # add to IES Objects list so I can add the materials to the list later
                         if HBObj.name not in IESObjects.keys():
                             IESObjects[HBObj.name] = HBObj
-                    
+        
+        self.writeRADObjects(geoRadFile, radObjects)
         geoRadFile.close()
         
         ########################################################################
@@ -1858,7 +3911,8 @@ class hb_WriteRAD(object):
         flattenPtsNormals = [v for v in self.lb_preparation.flattenList(ptsNormals)]
     
         # if this is an annual analysis and north is not 0 rotate all Honeybee objects
-        if analysisRecipe.type == 2 and analysisRecipe.northDegrees!=0:
+        if analysisRecipe.type == 2 and analysisRecipe.northDegrees!=0 and \
+           not self.isMatrixAnnualAnalysis(analysisRecipe):
             print "Rotating test points for %d degrees"%analysisRecipe.northDegrees
             
             transform = rc.Geometry.Transform.Rotation(math.radians(analysisRecipe.northDegrees), \
@@ -1924,7 +3978,17 @@ class hb_WriteRAD(object):
                 #print key + " is set to " + str(hb_radParDict[key][quality])
                 analysisRecipe.radParameters[key] = self.hb_radParDict[key][quality]
         
+        if analysisRecipe.type == 2 and self.isMatrixAnnualAnalysis(analysisRecipe):
+            # annual daylight analysis - daylight coefficients and sky matrix
+            return self.writeMatrixBatchFiles(subWorkingDir, radFileName, radFileFullName, \
+                                              materialFileName, numOfCPUs, testPtsEachCPU, \
+                                              lenOfPts, analysisRecipe, additionalRadFiles)
+        
         if analysisRecipe.type == 2: # annual daylight analysis - Daysim
+            if getattr(analysisRecipe.DSParameters, "useMatrixEngine", False):
+                print "Dynamic shadings and annual glare are not supported by the matrix-based annual analysis.\n" + \
+                      "The analysis will run with Daysim."
+            
             # read parameters
             runAnnualGlare = analysisRecipe.DSParameters.runAnnualGlare
             onlyAnnualGlare = analysisRecipe.DSParameters.onlyAnnualGlare
@@ -2093,8 +4157,13 @@ class hb_WriteRAD(object):
                     if additionalFile!=None:
                         sceneRadFiles.append(additionalFile)
                 
-            OCTLine = self.hb_writeRADAUX.oconvLine(OCTFileName, sceneRadFiles)
-            if readyOCTFile ==None: batchFile.write(OCTLine)
+            if readyOCTFile ==None:
+                # reuse the octree of the scene if only the sky is changed
+                OCTLine = self.hb_writeRADAUX.cachedOconvLine(subWorkingDir, OCTFileName, sceneRadFiles, radSkyFileName)
+                batchFile.write(OCTLine)
+                self.setAmbientFile(subWorkingDir, OCTFileName, sceneRadFiles, analysisRecipe.radParameters)
+            else:
+                self.setAmbientFile(subWorkingDir, OCTFileName, [readyOCTFile], analysisRecipe.radParameters)
             
             if analysisRecipe.type == 0:
                 # add overture line in case it is an image-based analysis
@@ -2111,76 +4180,84 @@ class hb_WriteRAD(object):
             if len(self.rhinoViewNames)==0:
                 self.rhinoViewNames = [sc.doc.Views.ActiveView.ActiveViewport.Name]
             
+            # split each view into more tiles than CPUs so the CPUs that render
+            # the fast parts of the image (e.g. sky) can render more tiles
+            numOfTiles = numOfCPUs * self.tilesPerCPU if numOfCPUs > 1 else 1
+            
             #recalculate vh and vv
-            nXDiv = int(math.sqrt(numOfCPUs))
-
-            while numOfCPUs%nXDiv !=0 and nXDiv < numOfCPUs:
+            nXDiv = int(math.sqrt(numOfTiles))
+            
+            while numOfTiles%nXDiv !=0 and nXDiv < numOfTiles:
                 nXDiv += 1
             
-            nYDiv = numOfCPUs/nXDiv
-
-            fileNames = []
+            nYDiv = numOfTiles/nXDiv
+            
+            self.tiledImages = []
             HDRPieces = {}
-            for cpuCount in range(numOfCPUs):
-                # create a batch file
-                batchFileName = os.path.join(subWorkingDir, radFileName + '_' + `cpuCount` + '_IMG.bat')
-                batchFiles.append(batchFileName)
-                
-                fileNames.append(batchFileName.split("\\")[-1])
-                batchFile = open(batchFileName, "w")
-                # write path files
-                batchFile.write(pathStr)
-                batchFile.write(os.path.splitdrive(subWorkingDir)[0] + "\n")
-                batchFile.write("cd " + subWorkingDir + "\n")
-                
-                # calculate vs and vl for thi cpu
-                try: vs = (((cpuCount%nXDiv)/(nXDiv-1)) - 0.5) * (nXDiv - 1)
-                except: vs = 0
-                    
-                try: vl = ((int(cpuCount/nXDiv)/(nYDiv-1)) - 0.5) * (nYDiv - 1)
-                except: vl = 0
+            for view in self.rhinoViewNames:
+                view = self.lb_preparation.removeBlank(view)
+                HDRFileName = OCTFileName + "_" + view + ".HDR"
+                HDRFileAddress.append(subWorkingDir + "\\" + HDRFileName)
                 
-                # print vs, vl
-                for view in self.rhinoViewNames:
-                    view = self.lb_preparation.removeBlank(view)
-                    
-                    if cpuCount == 0:
-                        HDRFileAddress.append(subWorkingDir + "\\" + OCTFileName + "_" + view + ".HDR")
-                        HDRPieces[OCTFileName + "_" + view + ".HDR"] = []
+                # collect name of the pieces of the picture
+                HDRPieces[HDRFileName] = []
+                tileBatchFiles = []
+                for tileCount in range(numOfTiles):
+                    # create a batch file
+                    batchFileName = os.path.join(subWorkingDir, radFileName + '_' + view + '_' + `tileCount` + '_IMG.bat')
+                    batchFiles.append(batchFileName)
+                    tileBatchFiles.append(batchFileName)
                     
-                    # collect name of the pieces of the picture
-                    HDRPieces[OCTFileName + "_" + view + ".HDR"].append(OCTFileName + "_" + view + "_" + `cpuCount` + ".HDR")
+                    fileNames.append(batchFileName.split("\\")[-1])
+                    HDRPieces[HDRFileName].append(OCTFileName + "_" + view + "_" + `tileCount` + ".HDR")
                     
-                    viewLine = self.hb_writeRADAUX.exportView(view, analysisRecipe.radParameters, analysisRecipe.cameraType, \
-                                                              analysisRecipe.imageSize, analysisRecipe.sectionPlane, \
-                                                              nXDiv, nYDiv, vs, vl)
+                    # calculate vs and vl for this tile. rows are from the bottom of the image
+                    vs = (tileCount%nXDiv) - (nXDiv - 1) / 2.0
+                    vl = (tileCount/nXDiv) - (nYDiv - 1) / 2.0
                     
-                    # write rpict lines
-                    RPICTLines = self.hb_writeRADAUX.rpictLine(viewLine, OCTFileName, view, analysisRecipe.radParameters, int(analysisRecipe.simulationType), cpuCount)
-                    batchFile.write(RPICTLines)                    
-                    
-                # close the file
-                batchFile.close()
+                    with open(batchFileName, "w") as batchFile:
+                        # write path files
+                        batchFile.write(pathStr)
+                        batchFile.write(os.path.splitdrive(subWorkingDir)[0] + "\n")
+                        batchFile.write("cd " + subWorkingDir + "\n")
+                        
+                        viewLine = self.hb_writeRADAUX.exportView(view, analysisRecipe.radParameters, analysisRecipe.cameraType, \
+                                                                  analysisRecipe.imageSize, analysisRecipe.sectionPlane, \
+                                                                  nXDiv, nYDiv, vs, vl)
+                        
+                        # write rpict lines
+                        ambFile = self.getWorkerAmbientFile(OCTFileName, view + "_" + `tileCount`)
+                        if ambFile != None and ambFile != OCTFileName + ".amb":
+                            batchFile.write(self.hb_writeRADAUX.workerAmbientLine(OCTFileName + ".amb", ambFile))
+                        RPICTLines = self.hb_writeRADAUX.rpictLine(viewLine, OCTFileName, view, analysisRecipe.radParameters, int(analysisRecipe.simulationType), tileCount, ambFile)
+                        batchFile.write(RPICTLines)
                 
-                # PCOMP to merge images into a single HDR
-                pcompFileName = os.path.join(subWorkingDir, radFileName + '_PCOMP.bat')
-                                
-                with open(pcompFileName, "w") as pcompFile:
+                tiledImage = hb_TiledImage(subWorkingDir + "\\" + HDRFileName, \
+                                           [os.path.join(subWorkingDir, piece) for piece in HDRPieces[HDRFileName]], \
+                                           nXDiv, nYDiv, os.path.join(self.hb_RADPath, "pcompos"))
+                self.tiledImages.append((tiledImage, tileBatchFiles))
+            
+            # PCOMP to merge images into a single HDR
+            # runTiledRendering stitches the tiles as they are rendered. This file is
+            # for running the batch files manually
+            pcompFileName = os.path.join(subWorkingDir, radFileName + '_PCOMP.bat')
+            
+            with open(pcompFileName, "w") as pcompFile:
+                
+                # write path files
+                pcompFile.write(pathStr)
+                pcompFile.write(os.path.splitdrive(subWorkingDir)[0] + "\n")
+                pcompFile.write("cd " + subWorkingDir + "\n")
+                
+                for mergedName, pieces in HDRPieces.items():
                     
-                    # write path files
-                    pcompFile.write(pathStr)
-                    pcompFile.write(os.path.splitdrive(subWorkingDir)[0] + "\n")
-                    pcompFile.write("cd " + subWorkingDir + "\n")
+                    pcomposLine = "pcompos -a " + `nXDiv` + " "
+                    # pieces.reverse()
+                    for piece in pieces:
+                        pcomposLine += piece + " "
+                    pcomposLine += " > " + mergedName + "\n"
                     
-                    for mergedName, pieces in HDRPieces.items():
-                        
-                        pcomposLine = "pcompos -a " + `nXDiv` + " "
-                        # pieces.reverse()
-                        for piece in pieces:
-                            pcomposLine += piece + " "
-                        pcomposLine += " > " + mergedName + "\n"
-                        
-                        pcompFile.write(pcomposLine)
+                    pcompFile.write(pcomposLine)
             
             return initBatchFileName, batchFiles, fileNames, pcompFileName, HDRFileAddress
                         
@@ -2202,7 +4279,10 @@ class hb_WriteRAD(object):
                 batchFile.write("cd " + subWorkingDir + "\n")
                 
                 # 3.4. add rtrace lin
-                RTRACELine = self.hb_writeRADAUX.rtraceLine(radFileName, OCTFileName, analysisRecipe.radParameters, int(analysisRecipe.simulationType), cpuCount)
+                ambFile = self.getWorkerAmbientFile(OCTFileName, `cpuCount`)
+                if ambFile != None and ambFile != OCTFileName + ".amb":
+                    batchFile.write(self.hb_writeRADAUX.workerAmbientLine(OCTFileName + ".amb", ambFile))
+                RTRACELine = self.hb_writeRADAUX.rtraceLine(radFileName, OCTFileName, analysisRecipe.radParameters, int(analysisRecipe.simulationType), cpuCount, ambFile)
                 batchFile.write(RTRACELine)
                 
                 # close the file
@@ -2211,7 +4291,180 @@ class hb_WriteRAD(object):
             
             return initBatchFileName, batchFiles, fileNames, pcompFileName, RADResultFilesAddress
         
-    def executeBatchFiles(self, batchFileNames, maxPRuns = None, shell = False, waitingTime = 0.5):
+    def setAmbientFile(self, subWorkingDir, OCTFileName, sceneFiles, radParameters):
+        """Find the cached ambient file of the scene and copy it to the study folder.
+        
+            The hash of the scene files is kept in self.sceneHash.
+        
+            The cached file is copied as OCTFileName.amb which is the ambient file of
+            overture and the workers. See storeAmbientFile.
+        """
+        self.cachedAmbFile = None
+        self.ambFile = os.path.join(subWorkingDir, OCTFileName + ".amb")
+        
+        try:
+            self.sceneHash = self.hb_writeRADAUX.getSceneHash(sceneFiles)
+        except IOError:
+            self.sceneHash = None
+            return
+        
+        if not self.hb_writeRADAUX.isAmbientCacheUsed(radParameters): return
+        
+        self.cachedAmbFile = self.hb_writeRADAUX.getAmbientCacheFile(subWorkingDir, self.sceneHash, radParameters)
+        
+        # remove the copies of the workers from the older runs. See storeAmbientFile
+        for ambFile in self.getWorkerAmbientFiles():
+            try: os.remove(ambFile)
+            except OSError: pass
+        
+        if os.path.isfile(self.cachedAmbFile):
+            # the ambient file of the study folder can be already there (e.g. refine)
+            if not os.path.isfile(self.ambFile) or \
+               os.path.getsize(self.cachedAmbFile) > os.path.getsize(self.ambFile):
+                print "Using the ambient file from " + self.cachedAmbFile
+                shutil.copyfile(self.cachedAmbFile, self.ambFile)
+            os.utime(self.cachedAmbFile, None)
+    
+    def getWorkerAmbientFile(self, OCTFileName, workerName):
+        """Return the ambient file for a worker or None if the ambient cache is not used."""
+        if self.cachedAmbFile == None: return None
+        if self.hb_writeRADAUX.canShareAmbientFile: return OCTFileName + ".amb"
+        return OCTFileName + "_" + workerName + ".amb"
+    
+    def getWorkerAmbientFiles(self):
+        """Return the copies of the ambient file of the study that the workers write to."""
+        prefix = os.path.basename(self.ambFile)[:-4] + "_"
+        folder = os.path.dirname(self.ambFile)
+        if not os.path.isdir(folder): return []
+        return [os.path.join(folder, f) for f in sorted(os.listdir(folder)) \
+                if f.startswith(prefix) and f.lower().endswith(".amb")]
+    
+    def storeAmbientFile(self):
+        """Copy the ambient file of the study to the cache.
+        
+            If the workers write to their own copies (Windows) the values of all the
+            copies are merged into one file. See hb_WriteRADAUX.mergeAmbientFiles.
+            The cached file is only replaced by a file with more values.
+        """
+        if self.cachedAmbFile == None: return
+        
+        workerAmbFiles = self.getWorkerAmbientFiles()
+        if len(workerAmbFiles) == 0 and not os.path.isfile(self.ambFile): return
+        
+        tempAmbFile = self.cachedAmbFile[:-4] + "_" + str(uuid.uuid4())[:8]
+        try:
+            cacheFolder = os.path.dirname(self.cachedAmbFile)
+            if not os.path.isdir(cacheFolder): os.makedirs(cacheFolder)
+            # write to a temporary file first so a study that is running can't read half of the file
+            if len(workerAmbFiles) != 0:
+                self.hb_writeRADAUX.mergeAmbientFiles(self.ambFile, workerAmbFiles, tempAmbFile)
+            else:
+                shutil.copyfile(self.ambFile, tempAmbFile)
+            
+            if os.path.isfile(self.cachedAmbFile) and \
+               os.path.getsize(self.cachedAmbFile) >= os.path.getsize(tempAmbFile):
+                os.remove(tempAmbFile)
+                return
+            
+            if os.path.isfile(self.cachedAmbFile): os.remove(self.cachedAmbFile)
+            os.rename(tempAmbFile, self.cachedAmbFile)
+        except Exception, e:
+            print "Failed to copy the ambient file to the cache: %s"%str(e)
+            try: os.remove(tempAmbFile)
+            except OSError: pass
+            if os.path.isfile(tempAmbFile): os.remove(tempAmbFile)
+    
+    def isMatrixAnnualAnalysis(self, analysisRecipe):
+        """Return True if the annual analysis should run with hb_AnnualDaylightMatrix instead of Daysim."""
+        if analysisRecipe.type != 2 or analysisRecipe.DSParameters == None: return False
+        DSParameters = analysisRecipe.DSParameters
+        if not getattr(DSParameters, "useMatrixEngine", False): return False
+        
+        # dynamic shadings and annual glare are only supported by Daysim
+        hasDynamicShading = len([r for r in DSParameters.DShdR if r.name != "no_blind"]) != 0
+        return not (hasDynamicShading or DSParameters.runAnnualGlare)
+    
+    def getDSWeaFileName(self, analysisRecipe):
+        """Return Daysim location string and the name of the .wea file for an annual analysis."""
+        locationStr, locName = self.hb_writeDS.DSLocationStr(self.hb_writeRADAUX, self.lb_preparation, analysisRecipe.weatherFile)
+        newLocName = self.lb_preparation.removeBlankLight(locName).replace("/", "_")
+        return locationStr, newLocName + '.wea'
+    
+    def writeMatrixBatchFiles(self, subWorkingDir, radFileName, radFileFullName, materialFileName, \
+                              numOfCPUs, testPtsEachCPU, lenOfPts, analysisRecipe, additionalRadFiles):
+        """Write the batch files for an annual analysis with hb_AnnualDaylightMatrix.
+        
+            The init batch file writes the .wea file, the sky matrix (or copies them from
+            hb_SkyCache) and the octree. The batch file for each cpu calculates the daylight
+            coefficients of its points (or copies them from the cache) and multiplies them
+            by the sky matrix. Daysim heading files are written too as they are used by the
+            annual result components.
+        """
+        annualMatrix = hb_AnnualDaylightMatrix(subWorkingDir, radFileName)
+        DSParameters = analysisRecipe.DSParameters
+        outputUnits = DSParameters.outputUnits[0]
+        
+        # copy .epw file to sub-directory
+        locationStr, weaFileName = self.getDSWeaFileName(analysisRecipe)
+        epwFileName = os.path.join(subWorkingDir, weaFileName[:-4] + '.epw')
+        self.lb_preparation.copyFile(analysisRecipe.weatherFile, epwFileName)
+        
+        pathStr = "SET RAYPATH=.;" + self.hb_RADLibPath + ";" + self.hb_DSPath + ";" + \
+                  self.hb_DSLibPath + ";\nPATH=" + self.hb_RADPath + ";" + \
+                  self.hb_DSPath + ";" + self.hb_DSLibPath + ";$PATH\n"
+        
+        folderStr = os.path.splitdrive(subWorkingDir)[0] + "\n" + "cd " + subWorkingDir + "\n"
+        
+        skyGlowFile = annualMatrix.writeSkyGlowFile()
+        sceneRadFiles = [materialFileName, skyGlowFile, radFileFullName]
+        if additionalRadFiles:
+            sceneRadFiles.extend([f for f in additionalRadFiles if f != None])
+        
+        OCTFileName = radFileName + "_DC"
+        initBatchFileName = os.path.join(subWorkingDir, radFileName + '_InitDC.bat')
+        with open(initBatchFileName, "w") as initBatchFile:
+            initBatchFile.write(pathStr)
+            initBatchFile.write(folderStr)
+            initBatchFile.write(annualMatrix.skyMatrixLines(epwFileName, weaFileName, outputUnits, analysisRecipe.northDegrees))
+            initBatchFile.write(self.hb_writeRADAUX.cachedOconvLine(subWorkingDir, OCTFileName, sceneRadFiles, skyGlowFile))
+        
+        sceneHash = self.hb_writeRADAUX.getSceneHash([f for f in sceneRadFiles if f != skyGlowFile])
+        
+        batchFiles = []
+        fileNames = []
+        DSResultFilesAddress = []
+        for cpuCount in range(numOfCPUs):
+            batchFileName = os.path.join(subWorkingDir, radFileName + '_' + `cpuCount` + '_DC.bat')
+            with open(batchFileName, "w") as batchFile:
+                batchFile.write(pathStr)
+                batchFile.write(folderStr)
+                batchFile.write(annualMatrix.DCLines(OCTFileName, analysisRecipe.radParameters, sceneHash, \
+                                                     cpuCount, lenOfPts[cpuCount]))
+                batchFile.write(annualMatrix.dctimestepLine(cpuCount))
+            
+            heaFileName = os.path.join(subWorkingDir, radFileName + '_' + `cpuCount` + '.hea')
+            with open(heaFileName, "w") as heaFile:
+                tempDirName = subWorkingDir + '\\tmp_' + `cpuCount`
+                self.lb_preparation.makeWorkingDir(tempDirName)
+                heaFile.write(self.hb_writeDS.DSHeadingStr(radFileName, subWorkingDir, tempDirName, self.hb_DSCore, cpuCount))
+                heaFile.write(locationStr)
+                heaFile.write(self.hb_writeDS.DSAnalysisUnits(DSParameters.outputUnits, lenOfPts[cpuCount]))
+                heaFile.write(self.hb_writeDS.DSBldgStr(radFileName, materialFileName, radFileFullName, \
+                                                        DSParameters.adaptiveZone, DSParameters.dgp_imageSize, \
+                                                        DSParameters.dgp_imageSize, cpuCount, \
+                                                        analysisRecipe.northDegrees, additionalRadFiles))
+                heaFile.write(self.hb_writeDS.DSRADStr(analysisRecipe.radParameters))
+                heaFile.write(self.hb_writeDS.DSDynamicSimStr(DSParameters.DShdR, radFileName, subWorkingDir, \
+                                                              testPtsEachCPU[cpuCount], cpuCount))
+            
+            batchFiles.append(batchFileName)
+            fileNames.append(os.path.basename(batchFileName))
+            DSResultFilesAddress.append(os.path.join(subWorkingDir, radFileName + '_' + `cpuCount` + '.ill'))
+        
+        return initBatchFileName, batchFiles, fileNames, "", DSResultFilesAddress
+    
+    def executeBatchFiles(self, batchFileNames, maxPRuns = None, shell = False, waitingTime = 0.5, \
+                          dependsOn = [], scheduler = None):
     
         """Run a number of batch files in parallel and
             wait to end of the analysis.
@@ -2220,8 +4473,12 @@ class hb_WriteRAD(object):
                 batchFileNames: List of batch files
                 maxPRuns: max number of files to be ran in parallel (default = 0)
                 shell: set to True if you do NOT want to see the cmd window while the analysis is runnig
+                waitingTime: Time in seconds between two checks for cancellation (Esc key)
+                dependsOn: List of job names that should be finished before these files start
+                scheduler: An optional hb_BatchJobScheduler to add the jobs to. If None
+                    the batch files will be executed and the jobs will be returned.
         """
-    
+        
         if not maxPRuns : maxPRuns = 1
         maxPRuns = int(maxPRuns)
         total = len(batchFileNames)
@@ -2229,51 +4486,253 @@ class hb_WriteRAD(object):
         if maxPRuns < 1: maxPRuns = 1
         if maxPRuns > total: maxPRuns = total
         
-        running = 0
-        done = False
+        runNow = scheduler == None
+        if runNow:
+            scheduler = hb_BatchJobScheduler(maxPRuns, captureOutput = shell, \
+                                             cancelCheck = gh.GH_Document.IsEscapeKeyDown, \
+                                             checkInterval = waitingTime)
+        
         jobs = []
-        pid = 0
+        for batchFileName in batchFileNames:
+            jobs.append(scheduler.addJob(os.path.basename(batchFileName), \
+                        batchFileName.replace("\\", "/"), dependsOn, shell))
+        
+        if not runNow: return jobs
         
         try:
-            while not done:
-                if running < maxPRuns and pid < total:
-                    # execute the files
-                    jobs.append(subprocess.Popen(batchFileNames[pid].replace("\\", "/") , shell = shell))
-                    pid+=1
-                    time.sleep(waitingTime)
-                
-                # count how many jobs are running and how many are done
-                running = 0
-                finished = 0
-                for job in jobs:
-                    if job.poll() is None:
-                        #one job is still running
-                        running += 1
-                    else:
-                        finished += 1
+            scheduler.run()
+        except Exception, e:
+            print "Something went wrong: %s"%str(e)
+            scheduler.cancel()
         
-                if running == maxPRuns:
-                    # wait for half a second
-                    #print "waiting..."
-                    time.sleep(waitingTime)
+        return jobs
+    
+    def runBatchFiles(self, initBatchFileName, batchFileNames, fileNames, \
+                      pcompBatchFile, waitingTime, runInBackground = False, printReport = False):
+        
+        # init -> one job for each cpu -> put all the files together
+        scheduler = hb_BatchJobScheduler(max(1, len(batchFileNames)), captureOutput = runInBackground, \
+                                         cancelCheck = gh.GH_Document.IsEscapeKeyDown, \
+                                         checkInterval = waitingTime)
+        
+        initJobs = self.executeBatchFiles([initBatchFileName], 1, runInBackground, \
+                                          scheduler = scheduler)
+        cpuJobs = self.executeBatchFiles(batchFileNames, len(batchFileNames), runInBackground, \
+                                         dependsOn = [job.name for job in initJobs], scheduler = scheduler)
         
-                if finished ==  total:
-                    done = True
+        if pcompBatchFile!="":
+            scheduler.addJob(os.path.basename(pcompBatchFile), pcompBatchFile, \
+                             [job.name for job in cpuJobs], shell = True)
         
+        try:
+            scheduler.run()
         except Exception, e:
-            print "Something went wrong: %s"%str(e) 
+            print "Something went wrong: %s"%str(e)
+            scheduler.cancel()
+        
+        if scheduler.isCancelled:
+            print "The analysis is cancelled by the user!"
+        if printReport: print scheduler.report()
+        
+        # keep the ambient file for the next run of the same scene. A failed job can
+        # leave a partial or invalid ambient file behind
+        if not scheduler.isCancelled and all(job.status == "finished" for job in scheduler.jobs):
+            self.storeAmbientFile()
+        
+        return scheduler.jobs
     
-    def runBatchFiles(self, initBatchFileName, batchFileNames, fileNames, \
-                      pcompBatchFile, waitingTime, runInBackground = False):
+    def runTiledRendering(self, initBatchFileName, numOfCPUs, waitingTime, runInBackground = False, \
+                          printReport = False):
+        """Render the tiles of image-based analysis on a bounded number of CPUs.
         
-        self.executeBatchFiles([initBatchFileName], maxPRuns = 1, shell = runInBackground, waitingTime = waitingTime)
-        self.executeBatchFiles(batchFileNames, maxPRuns = len(batchFileNames), shell = runInBackground, waitingTime = waitingTime)
+            Tiles of all the views are rendered by numOfCPUs workers after the init batch
+            file (octree and overture) so they all share the same ambient file. Each tile
+            is stitched into the image of its view as soon as it's rendered so the HDR
+            files can be opened as progressive previews while the rest is rendering.
+            
+            Args:
+                initBatchFileName: Init batch file from writeBatchFiles
+                numOfCPUs: Number of tiles that are rendered at the same time
+                waitingTime: Time in seconds between two checks for cancellation (Esc key)
+                runInBackground: Set to True to not show the cmd windows
+            
+            Returns:
+                List of HDR files that are completely rendered.
+        """
+        tiles = {}
+        def addTile(job):
+            if job.status != "finished" or job.name not in tiles: return
+            tiledImage, tileCount = tiles[job.name]
+            if tiledImage.addTile(tileCount): print tiledImage.progress()
+        
+        scheduler = hb_BatchJobScheduler(numOfCPUs, captureOutput = runInBackground, \
+                                         cancelCheck = gh.GH_Document.IsEscapeKeyDown, \
+                                         checkInterval = waitingTime, onJobDone = addTile)
+        
+        initJobs = self.executeBatchFiles([initBatchFileName], 1, runInBackground, \
+                                          scheduler = scheduler)
+        
+        # tiles are added view by view so the first views are finished first
+        for tiledImage, tileBatchFiles in self.tiledImages:
+            tileJobs = self.executeBatchFiles(tileBatchFiles, numOfCPUs, runInBackground, \
+                                              dependsOn = [job.name for job in initJobs], scheduler = scheduler)
+            for tileCount, job in enumerate(tileJobs):
+                tiles[job.name] = tiledImage, tileCount
         
-        if pcompBatchFile!="":
-            os.system(pcompBatchFile) # put all the files together
+        try:
+            scheduler.run()
+        except Exception, e:
+            print "Something went wrong: %s"%str(e)
+            scheduler.cancel()
+        
+        if scheduler.isCancelled:
+            print "The analysis is cancelled by the user!"
+        if printReport: print scheduler.report()
+        
+        # keep the ambient file for the next run of the same scene. A failed job can
+        # leave a partial or invalid ambient file behind
+        if not scheduler.isCancelled and all(job.status == "finished" for job in scheduler.jobs):
+            self.storeAmbientFile()
+        
+        return [tiledImage.imageFileName for tiledImage, tileBatchFiles in self.tiledImages \
+                if tiledImage.isComplete()]
+    
+    def runRtraceChunks(self, subWorkingDir, radFileName, OCTFileName, analysisRecipe, lenOfPts, \
+                        waitingTime = 0.5, chunkSize = None, incremental = False, printReport = True, \
+                        storeResults = False, resultStoreStudyDir = None):
+        """Run a grid-based analysis with hb_RtraceChunkScheduler instead of the rtrace batch files.
+        
+            The test points of all the .pts files are calculated in small chunks by one
+            persistent rtrace process for each CPU. Results are written to the same .res
+            files as the batch files so the results can be read with the .ptn file as before.
+            
+            Args:
+                subWorkingDir: Study folder
+                radFileName: Name of the project
+                OCTFileName: Name of the octree file without .oct
+                analysisRecipe: Grid-based analysis recipe
+                lenOfPts: Number of points in each .pts file (output of writeTestPtFile)
+                waitingTime: Time in seconds between two checks for cancellation (Esc key)
+                chunkSize: Optional number of points in each chunk
+                incremental: Set to True to only trace the points that are not in the
+                    hb_PointResultStore of the octree from the previous runs. The results
+                    of the new points are added to the store. The store is found by the
+                    md5 of the octree so Run and Refine Daylight Simulation share it
+                printReport: Set to False to not print the time, memory and throughput of
+                    the workers. Default is True
+                storeResults: Set to True to trace all the points and add the results
+                    to the hb_PointResultStore of the octree for the next incremental runs
+                resultStoreStudyDir: Study folder that the hb_PointResultStore belongs to.
+                    Default is subWorkingDir
+        """
+        ptsLines = []
+        for cpuCount in range(len(lenOfPts)):
+            ptsFileName = os.path.join(subWorkingDir, radFileName + '_' + `cpuCount` + '.pts')
+            with open(ptsFileName, "r") as ptsFile:
+                ptsLines.extend(ptsFile.readlines())
+        
+        if len(ptsLines) == 0: return []
         
+        octreeHash = None
+        if incremental or storeResults:
+            try:
+                octreeHash = self.hb_writeRADAUX.getSceneHash([os.path.join(subWorkingDir, OCTFileName + ".oct")])
+            except IOError:
+                pass
+        
+        if octreeHash == None:
+            resultLines = self.traceRtraceChunks(subWorkingDir, OCTFileName, analysisRecipe, ptsLines, \
+                                                 len(lenOfPts), waitingTime, chunkSize, printReport)
+            if resultLines == None: return []
+        else:
+            storeFile = self.hb_writeRADAUX.getPointResultStoreFile(resultStoreStudyDir or subWorkingDir, \
+                        octreeHash, analysisRecipe.radParameters, int(analysisRecipe.simulationType))
+            resultStore = hb_PointResultStore(storeFile)
+            
+            if incremental:
+                resultLines = [resultStore.getResult(line) for line in ptsLines]
+            else:
+                resultLines = [None] * len(ptsLines)
+            newPtsIndex = [count for count, resultLine in enumerate(resultLines) if resultLine == None]
+            if incremental:
+                print "%d of %d test points are calculated in the previous runs."%(len(ptsLines) - len(newPtsIndex), len(ptsLines))
+            
+            if len(newPtsIndex) != 0:
+                newResultLines = self.traceRtraceChunks(subWorkingDir, OCTFileName, analysisRecipe, \
+                                                        [ptsLines[count] for count in newPtsIndex], \
+                                                        len(lenOfPts), waitingTime, chunkSize, printReport)
+                if newResultLines == None: return []
+                
+                for count, resultLine in zip(newPtsIndex, newResultLines):
+                    resultLines[count] = resultLine
+                    resultStore.addResult(ptsLines[count], resultLine)
+                resultStore.save()
+        
+        # write the results in the same files as rtrace batch files
+        RADResultFilesAddress = []
+        ptCount = 0
+        for cpuCount, numOfPts in enumerate(lenOfPts):
+            resFileName = os.path.join(subWorkingDir, radFileName + '_' + `cpuCount` + '.res')
+            with open(resFileName, "wb") as resFile:
+                resFile.writelines(resultLines[ptCount:ptCount + numOfPts])
+            ptCount += numOfPts
+            RADResultFilesAddress.append(resFileName)
+        
+        return RADResultFilesAddress
+    
+    def traceRtraceChunks(self, subWorkingDir, OCTFileName, analysisRecipe, ptsLines, numOfWorkers, \
+                          waitingTime = 0.5, chunkSize = None, printReport = True):
+        """Trace the points with hb_RtraceChunkScheduler and return the result lines.
+        
+            Returns None if the analysis is cancelled or rtrace fails.
+        """
+        # -x 1 -y 0 flushes the result of each point so the chunks can be read back right away
+        command = [os.path.join(self.hb_RADPath, "rtrace")] + \
+                  self.hb_writeRADAUX.rtraceOptions(analysisRecipe.radParameters, int(analysisRecipe.simulationType)).split()[1:] + \
+                  ["-x", "1", "-y", "0", "-e", "error.log", OCTFileName + ".oct"]
+        
+        env = dict(os.environ)
+        env["RAYPATH"] = ".;" + self.hb_RADLibPath
+        env["PATH"] = self.hb_RADPath + ";" + env.get("PATH", "")
+        
+        def workerCommand(workerCount):
+            # use the cached ambient file of the scene. See setAmbientFile
+            ambFile = self.getWorkerAmbientFile(OCTFileName, `workerCount`)
+            if ambFile == None: return command
+            if ambFile != OCTFileName + ".amb" and os.path.isfile(self.ambFile):
+                shutil.copyfile(self.ambFile, os.path.join(subWorkingDir, ambFile))
+            return command[:-1] + ["-af", ambFile, command[-1]]
+        
+        scheduler = hb_RtraceChunkScheduler(workerCommand, ptsLines, numOfWorkers, chunkSize, subWorkingDir, \
+                                            env, gh.GH_Document.IsEscapeKeyDown, waitingTime)
+        resultLines = scheduler.run()
+        
+        if scheduler.isCancelled and not scheduler.errors:
+            print "The analysis is cancelled by the user!"
+        if printReport: print scheduler.report()
+        
+        # only keep the ambient file if all the workers finished without an error
+        if resultLines != None and not scheduler.errors: self.storeAmbientFile()
+        
+        return resultLines
+    
     def collectResults(self, subWorkingDir, radFileName, numOfCPUs, analysisRecipe, expectedResultFiles):
         
+        if analysisRecipe.type == 2 and self.isMatrixAnnualAnalysis(analysisRecipe):
+            # convert the results of dctimestep to .ill files
+            annualMatrix = hb_AnnualDaylightMatrix(subWorkingDir, radFileName)
+            weaFileName = os.path.join(subWorkingDir, self.getDSWeaFileName(analysisRecipe)[1])
+            DSResultFilesAddress = []
+            try:
+                for cpuCount in range(numOfCPUs):
+                    DSResultFilesAddress.append(annualMatrix.writeIllFile(cpuCount, weaFileName, \
+                                                analysisRecipe.DSParameters.outputUnits[0]))
+            except Exception, e:
+                print "Can't find the results for the study: " + str(e)
+                DSResultFilesAddress = []
+            
+            return DSResultFilesAddress, {}
+        
         if analysisRecipe.type == 2:
             #annual simulation
             runAnnualGlare = analysisRecipe.DSParameters.runAnnualGlare
@@ -2343,6 +4802,51 @@ class hb_WriteRAD(object):
             time.sleep(1)
             return RADResultFilesAddress
         
+    def writeRADObjects(self, radFile, radObjects, chunkSize = 50, parallel = False):
+        """Generate the radiance strings of Honeybee objects and write them to radFile.
+        
+            Args:
+                radFile: Open file to write the strings to
+                radObjects: A list for each Honeybee object. Each item is a string or a tuple of
+                    (function, surface) that returns the radiance string for the surface.
+                chunkSize: Number of objects that are generated in parallel before they are
+                    written to the file. Strings are always written in the order of radObjects.
+                parallel: Set to True to generate the strings of each chunk in parallel. The
+                    functions should not change any object that is shared between the
+                    Honeybee objects (e.g. RADSurface sets the construction of the surfaces
+                    and extends the coordinates). Default is False.
+        """
+        def getRADString(radObject):
+            radStrs = []
+            for item in radObject:
+                if isinstance(item, basestring): radStrs.append(item)
+                else: radStrs.append(item[0](item[1]))
+            return "".join(radStrs)
+        
+        if not parallel:
+            for radObject in radObjects:
+                radFile.write(getRADString(radObject))
+            return
+        
+        for chunkStart in range(0, len(radObjects), chunkSize):
+            chunk = radObjects[chunkStart:chunkStart + chunkSize]
+            radStrings = [""] * len(chunk)
+            errors = []
+            
+            def getChunkRADString(i):
+                try:
+                    radStrings[i] = getRADString(chunk[i])
+                except Exception:
+                    # keep the traceback of the worker
+                    errors.append(sys.exc_info())
+            
+            tasks.Parallel.ForEach(range(len(chunk)), getChunkRADString)
+            
+            if errors:
+                errorType, error, errorTraceback = errors[0]
+                raise errorType, error, errorTraceback
+            radFile.writelines(radStrings)
+    
     def shiftList(self, list, number = 1):
         newList = []
         newList.extend(list[-number:])
@@ -2361,16 +4865,6 @@ class hb_WriteRAD(object):
             #assign the construction based on type
             surface.construction = surface.cnstrSet[surface.type]
             
-        srfStr =  surface.construction.replace(" ", "_") + " polygon " + surface.name + '_' + `count` + "\n" + \
-            "0\n" + \
-            "0\n" + \
-            `(len(coordinates)*3)` + "\n"
-            
-        ptStr = ''
-        for  pt in coordinates:
-            ptStr = ptStr + '%.4f'%pt.X + '  ' + '%.4f'%pt.Y + '  ' + '%.4f'%pt.Z + '\n'
-        ptStr = ptStr + '\n'
-        
         # check for polygons with only two points.
         # Yes! it is possible. Import a model from REVIT/SketchUp and create some breps out of it
         # and you will get some!
@@ -2378,10 +4872,17 @@ class hb_WriteRAD(object):
             comment = " Polygon " + surface.name + " has less than 3 vertices and is removed by Honeybee.\n"
             return "#" + comment
         
-        return srfStr + ptStr
+        srfStr = ["%s polygon %s_%d\n0\n0\n%d\n"%(surface.construction.replace(" ", "_"), \
+                                                    surface.name, count, len(coordinates)*3)]
+        
+        for pt in coordinates:
+            srfStr.append('%.4f  %.4f  %.4f\n'%(pt.X, pt.Y, pt.Z))
+        srfStr.append('\n')
+        
+        return "".join(srfStr)
 
     def RADSurface(self, surface):
-        fullStr = ''
+        fullStr = []
         # base surface coordinates
         coordinatesList = surface.extractPoints(1, True)
         
@@ -2395,21 +4896,21 @@ class hb_WriteRAD(object):
                     glzCoordinateLists = surface.extractGlzPoints(True)
                     for glzCount, glzCoorList in enumerate(glzCoordinateLists):
                         # glazingStr
-                        fullStr = fullStr + self.getsurfaceStr(surface.childSrfs[0], glzCount, glzCoorList)
+                        fullStr.append(self.getsurfaceStr(surface.childSrfs[0], glzCount, glzCoorList))
                         
                         # shift glazing list
                         glzCoorList = self.shiftList(glzCoorList)
                         coordinates.extend(glzCoorList)
                         coordinates.append(glzCoorList[0])
                     coordinates.extend([endCoordinate, coordinates[0]])
-                fullStr = fullStr + self.getsurfaceStr(surface, count, coordinates)
-            return fullStr
+                fullStr.append(self.getsurfaceStr(surface, count, coordinates))
+            return "".join(fullStr)
         else:
             print "one of the surfaces is not exported correctly"
             return ""
             
     def RADNonPlanarSurface(self, surface):
-        fullStr = ''
+        fullStr = []
         
         # replace the geometry with the punched geometry
         # for planar surfaces with multiple openings
@@ -2429,12 +4930,12 @@ class hb_WriteRAD(object):
             coordinatesList = [coordinatesList]
         for count, coordinates in enumerate(coordinatesList):
             #print count
-            fullStr = fullStr + self.getsurfaceStr(surface, count, coordinates)
+            fullStr.append(self.getsurfaceStr(surface, count, coordinates))
         
-        return fullStr
+        return "".join(fullStr)
     
     def RADNonPlanarChildSurface(self, surface):
-        fullStr = ''
+        fullStr = []
         
         # I should test this function before the first release!
         # Not sure if it will work for cases generated only by surface
@@ -2447,11 +4948,21 @@ class hb_WriteRAD(object):
             coordinatesList = [coordinatesList]
         for glzCount, glzCoorList in enumerate(coordinatesList):
             # glazingStr
-            fullStr = fullStr + self.getsurfaceStr(surface.childSrfs[0], glzCount, glzCoorList)
-        return fullStr
+            fullStr.append(self.getsurfaceStr(surface.childSrfs[0], glzCount, glzCoorList))
+        return "".join(fullStr)
             
 class hb_WriteRADAUX(object):
     
+    # change the version if ambient files from older versions should not be used
+    ambientCacheVersion = 1
+    
+    # radiance only locks the ambient file on systems that support fcntl. On Windows
+    # each process writes to its own copy of the ambient file
+    canShareAmbientFile = os.name != "nt"
+    
+    # output of rtrace -version for each radiance folder
+    radianceVersions = {}
+    
     def __init__(self):
         self.hb_radParDict = sc.sticky["honeybee_RADParameters"]().radParDict
         self.lb_preparation = sc.sticky["ladybug_Preparation"]()
@@ -2677,7 +5188,11 @@ class hb_WriteRADAUX(object):
             except Exception, e:
                 print 'Failed to remove the old directory.'
                 print `e`
-            
+        
+        # octrees of the scene are kept outside the study folder and are reused
+        # by writeBatchFiles if the geometry and materials are not changed
+        self.cleanOctreeCache(subWorkingDir)
+        
         return subWorkingDir, radFileName
     
     def exportTestMesh(self, subWorkingDir, radFileName, analysisRecipe = None):
@@ -2920,7 +5435,7 @@ class hb_WriteRADAUX(object):
             
             # recalculate vh and vv
             if nXDiv != 1:
-                viewHA = (2.*180./PI)*math.atan(((PI/180./2.) * viewHA)/nXDiv)
+                viewHA = (2.*180./PI)*math.atan(math.tan((PI/180./2.)*viewHA)/nXDiv)
                 viewHSize = viewHSize/nXDiv
             if nYDiv != 1:
                 viewVA = (2.*180./PI)*math.atan(math.tan((PI/180./2.)*viewVA)/nYDiv)
@@ -2970,6 +5485,178 @@ class hb_WriteRADAUX(object):
         
         return line
     
+    def getOctreeCacheFolder(self, subWorkingDir):
+        """Return the folder for cached scene octrees next to the study folder.
+        
+        The folder is not inside the study folder so it's kept when the results are overwritten.
+        """
+        return os.path.join(os.path.dirname(subWorkingDir.rstrip("\\")), "octreeCache")
+    
+    def getSceneHash(self, radFilesList):
+        """Return a hash of the content of the radiance files and oconv parameters."""
+        sceneHash = hashlib.md5("oconv -r 2048 -f")
+        for count, address in enumerate(radFilesList):
+            # separate the files so the same content split differently won't match
+            sceneHash.update("\n%d\n"%count)
+            with open(address, "rb") as radFile:
+                for chunk in iter(lambda: radFile.read(1024 * 1024), ""):
+                    sceneHash.update(chunk)
+        return sceneHash.hexdigest()
+    
+    def cachedOconvLine(self, subWorkingDir, octFileName, sceneRadFiles, radSkyFileName):
+        """Return oconv lines that reuse the octree of the scene if it is in the cache.
+        
+        The octree of the scene without the sky is frozen and saved in the cache
+        folder by the hash of the scene files. If only the sky has changed the
+        sky is added to the cached octree with oconv -i.
+        """
+        radFilesList = [f for f in sceneRadFiles if f != radSkyFileName]
+        if radSkyFileName == None or len(radFilesList) == len(sceneRadFiles):
+            return self.oconvLine(octFileName, sceneRadFiles)
+        
+        cacheFolder = self.getOctreeCacheFolder(subWorkingDir)
+        if not os.path.isdir(cacheFolder): os.makedirs(cacheFolder)
+        
+        try:
+            sceneHash = self.getSceneHash(radFilesList)
+        except IOError:
+            # one of the files is missing. let oconv report it
+            return self.oconvLine(octFileName, sceneRadFiles)
+        
+        sceneOctFile = os.path.join(cacheFolder, sceneHash + ".oct")
+        line = ""
+        if os.path.isfile(sceneOctFile):
+            print "Using the octree of the scene from " + sceneOctFile
+            # update modified time so the octree is kept in the cache
+            os.utime(sceneOctFile, None)
+        else:
+            # write to a temporary file first so a failed oconv doesn't leave a broken octree in the cache
+            tempOctFile = os.path.join(cacheFolder, sceneHash + "_" + str(uuid.uuid4())[:8])
+            line += self.oconvLine(tempOctFile.replace("\\", "/"), radFilesList)
+            line += "move /Y " + tempOctFile + ".oct " + sceneOctFile + " > nul\n"
+        
+        line += "oconv -f -i " + sceneOctFile.replace("\\", "/") + " " + radSkyFileName.replace("\\", "/") + \
+                " > " + octFileName + ".oct\n"
+        
+        return line
+    
+    def cleanOctreeCache(self, subWorkingDir, maxNumOfOctrees = 10, maxNumOfDCFiles = 100, \
+                         maxNumOfAmbFiles = 20, maxNumOfResultFiles = 20):
+        """Remove the files that are not used recently from the cache."""
+        cacheFolder = self.getOctreeCacheFolder(subWorkingDir)
+        if not os.path.isdir(cacheFolder): return
+        
+        # daylight coefficients of the matrix-based annual analysis, ambient
+        # files and results of the test points are kept in the same folder
+        for extension, maxNumOfFiles in [(".oct", maxNumOfOctrees), (".dc", maxNumOfDCFiles), \
+                                         (".amb", maxNumOfAmbFiles), (".res", maxNumOfResultFiles)]:
+            cacheFiles = [os.path.join(cacheFolder, f) for f in os.listdir(cacheFolder) if f.endswith(extension)]
+            cacheFiles.sort(key = os.path.getmtime, reverse = True)
+            for cacheFile in cacheFiles[maxNumOfFiles:]:
+                try: os.remove(cacheFile)
+                except: pass
+    
+    def getRadianceVersion(self):
+        RADPath = sc.sticky["honeybee_folders"]["RADPath"]
+        if RADPath not in self.radianceVersions:
+            try:
+                process = subprocess.Popen([os.path.join(RADPath, "rtrace"), "-version"], \
+                                           stdout = subprocess.PIPE, stderr = subprocess.PIPE)
+                version = process.communicate()[0].strip()
+            except Exception:
+                version = ""
+            self.radianceVersions[RADPath] = version or "unknown"
+        return self.radianceVersions[RADPath]
+    
+    def isAmbientCacheUsed(self, radParameters):
+        """Return True if the ambient file of the scene should be reused in the next runs.
+        
+        The cache is only used if reuseAmbientFile is set to True in the parameters
+        (reuseAmbientFile_ input of RADParameters). A run that starts from a cached
+        ambient file interpolates most of the points from the stored values instead of
+        tracing them so the results don't match a new run. In a test room with -ab 5
+        the illuminance was 5.1% different on average and 25.6% at the most.
+        """
+        if not radParameters.get("reuseAmbientFile", False): return False
+        # there are no ambient values to cache with -ab 0 or -aa 0
+        try: return int(radParameters["_ab_"]) > 0 and float(radParameters["_aa_"]) > 0
+        except: return False
+    
+    # AMBMAGIC (557) of radiance's ambient.c. putint writes it after the header in
+    # 2 bytes with the most significant byte first
+    ambientMagic = "\x02\x2d"
+    
+    @staticmethod
+    def getAmbientValuesStart(data, ambFile):
+        """Return the index of the first ambient value in the data of an ambient file.
+        
+        The header lines end with an empty line and are followed by the 2 bytes of the
+        ambient magic number. Raise a ValueError if the magic number doesn't match.
+        """
+        headerEnd = data.find("\n\n")
+        if headerEnd == -1 or data[headerEnd + 2:headerEnd + 4] != hb_WriteRADAUX.ambientMagic:
+            raise ValueError("%s is not a valid radiance ambient file."%ambFile)
+        return headerEnd + 4
+    
+    @staticmethod
+    def mergeAmbientFiles(ambFile, workerAmbFiles, mergedAmbFile):
+        """Merge the ambient values of the copies of the workers into one ambient file.
+        
+        Each worker starts from a copy of ambFile (if it exists) and adds its values to
+        the end of the copy. The new values of each copy are added to ambFile. A copy
+        that doesn't start with ambFile has its own header. See getAmbientValuesStart.
+        
+        Args:
+            ambFile: Ambient file of the study that the copies are made from
+            workerAmbFiles: Ambient files of the workers
+            mergedAmbFile: Path to the merged ambient file
+        """
+        baseData = ""
+        if os.path.isfile(ambFile):
+            with open(ambFile, "rb") as inf: baseData = inf.read()
+            if baseData: hb_WriteRADAUX.getAmbientValuesStart(baseData, ambFile)
+        
+        with open(mergedAmbFile, "wb") as outf:
+            outf.write(baseData)
+            for workerAmbFile in workerAmbFiles:
+                with open(workerAmbFile, "rb") as inf: data = inf.read()
+                if baseData and data.startswith(baseData):
+                    outf.write(data[len(baseData):])
+                elif not baseData:
+                    # there is no ambient file to start from. the first copy is the base
+                    hb_WriteRADAUX.getAmbientValuesStart(data, workerAmbFile)
+                    outf.write(data)
+                    baseData = data
+                else:
+                    outf.write(data[hb_WriteRADAUX.getAmbientValuesStart(data, workerAmbFile):])
+    
+    def getAmbientCacheFile(self, subWorkingDir, sceneHash, radParameters):
+        """Return the path to the cached ambient file of a scene.
+        
+        The ambient values are only valid for the same scene (including the sky), the
+        same parameters and the same version of radiance so they are all in the name.
+        rpict and rtrace use the same file as the image parameters don't change the
+        ambient values.
+        """
+        options = self.rtraceOptions(radParameters).split()
+        options = [option for option in options if option not in ("rtrace", "-I", "-h")]
+        fingerprint = "\n".join([sceneHash, `self.ambientCacheVersion`, self.getRadianceVersion(), " ".join(options)])
+        
+        cacheFolder = self.getOctreeCacheFolder(subWorkingDir)
+        return os.path.join(cacheFolder, hashlib.md5(fingerprint).hexdigest() + ".amb")
+    
+    def getPointResultStoreFile(self, subWorkingDir, sceneHash, radParameters, simulationType = 0):
+        """Return the path to the hb_PointResultStore of a scene for grid-based analysis."""
+        fingerprint = "\n".join([sceneHash, self.getRadianceVersion(), \
+                                 self.rtraceOptions(radParameters, simulationType)])
+        
+        cacheFolder = self.getOctreeCacheFolder(subWorkingDir)
+        return os.path.join(cacheFolder, hashlib.md5(fingerprint).hexdigest() + ".res")
+    
+    def workerAmbientLine(self, ambFile, workerAmbFile):
+        """Return the line that copies the shared ambient file for a worker that can't share it."""
+        return "if exist " + ambFile + " copy /Y " + ambFile + " " + workerAmbFile + " > nul\n"
+    
     def overtureLine(self, view, projectName, viewName, radParameters, analysisType = 0):
         octFile = projectName + ".oct"
         ambFile = projectName + ".amb" #amb file is view independent and can be used globally
@@ -3008,9 +5695,10 @@ class hb_WriteRADAUX(object):
         
         return line0 + line1_1 + line1_2 + line1_3 + line2
 
-    def rpictLine(self, view, projectName, viewName, radParameters, analysisType = 0, cpuCount = 0):
+    def rpictLine(self, view, projectName, viewName, radParameters, analysisType = 0, cpuCount = 0, ambFile = None):
         octFile = projectName + ".oct"
-        ambFile = projectName + ".amb" #amb file is view independent and can be used globally
+        if ambFile == None:
+            ambFile = projectName + ".amb" #amb file is view independent and can be used globally
         unfFile = projectName + "_" + viewName + "_" + `cpuCount` + ".unf" 
         outputFile = projectName + "_" + viewName + "_" + `cpuCount` + ".HDR"
         
@@ -3055,9 +5743,19 @@ class hb_WriteRADAUX(object):
            "ra_gif " + projectName + "_" + viewName + "_FalseColored.pic " + projectName + "_" + viewName + "_FalseColored.gif\n"
         return line
 
-    def rtraceLine(self, projectName, octFileName, radParameters, simulationType = 0, cpuCount = 0):
+    def rtraceLine(self, projectName, octFileName, radParameters, simulationType = 0, cpuCount = 0, ambFile = None):
         ptsFile = projectName + "_" + str(cpuCount) + ".pts"
         outputFile = projectName + "_" + str(cpuCount) + ".res"
+        
+        line1_3 = " -e error.log " + octFileName + ".oct < " + ptsFile + \
+                  " > " + outputFile + "\n"
+        
+        if ambFile != None: line1_3 = " -af " + ambFile + line1_3
+        
+        return self.rtraceOptions(radParameters, simulationType) + line1_3
+    
+    def rtraceOptions(self, radParameters, simulationType = 0):
+        """Return rtrace command and parameters without the input and output files."""
         if simulationType == 0:
             line0 = "rtrace -I "
         elif simulationType == 2:
@@ -3078,11 +5776,8 @@ class hb_WriteRADAUX(object):
         if radParameters.has_key("additional"):
             for par in radParameters["additional"]:
                 line1_2 += "-%s  "%par
-            
-        line1_3 = " -e error.log " + octFileName + ".oct < " + ptsFile + \
-                  " > " + outputFile + "\n"
         
-        return line0 + line1_1 + line1_2 + line1_3
+        return line0 + line1_1 + line1_2
         
     def testPtsStr(self, testPoint, ptsNormal):
         return  '%.4f'%testPoint.X + '\t' + \
@@ -3472,38 +6167,645 @@ class hb_ReadAnnualResultsAux(object):
             # append the file to the list
             illFilesDict[groupName][stateName].append(fullPath)
         
-        # sort the keys
-        illFiles = DataTree[System.Object]()
-        shadingGroupCount = 0
+        # sort the keys
+        illFiles = DataTree[System.Object]()
+        shadingGroupCount = 0
+        
+        for key, fileListDict in illFilesDict.items():
+            stateCount = 0
+            shadingGroupCount+=1
+            for state, fileList in fileListDict.items():
+                if key== -1:
+                    p = GH_Path(0)
+                    shadingGroupCount-=1
+                else:
+                    p = GH_Path(shadingGroupCount, stateCount)
+                    stateCount+=1
+                    
+                try:
+                    if fileName.endswith("_down.ill") or fileName.endswith("_up.ill"):
+                        # conceptual blind
+                        if fileList[0].endswith("_down.ill"):
+                            p = GH_Path(1,0)
+                        else:
+                            p = GH_Path(0)
+                        
+                        illFiles.AddRange(sorted(fileList, key=lambda fileName: int(fileName.split(".")[-2].split("_")[-2])), p)
+                    else:
+                        illFiles.AddRange(sorted(fileList, key=lambda fileName: int(fileName.split(".")[-2].split("_")[-1])), p)
+                        
+                except Exception, e:
+                    # failed to sort!
+                    illFiles.AddRange(fileList, p)
+        
+        return illFiles
+    
+class hb_IllFileReader(object):
+    """
+    Indexed reader for Daysim *.ill files.
+    
+    The first time an hour is requested the file is scanned once to collect the
+    byte offset of every hourly line. The offsets are saved next to the file
+    (*.ill.idx) for the next time. Any hour can then be read directly with a
+    seek. The values are never loaded into memory all at once.
+    Reading the values of a point is delegated to the point-major file of
+    hb_AnnualResultsStore, which Run Daylight Simulation writes after each annual
+    study, so all the hours of a point are read with a single seek. Without an
+    up-to-date store the values of all the requested points are collected in one
+    buffered pass over the ASCII file that only splits each line up to the last
+    requested column. Request all the points of a file in a single call to
+    getPointsValues instead of calling getPointValues for each point.
+    
+    Args:
+        illFile: Path to the .ill file.
+        bufferSize: Size of the read buffer in bytes. Default is 1 MB.
+        useBinaryStore: Set to False to always read the ASCII file.
+    """
+    
+    def __init__(self, illFile, bufferSize = 1048576, useBinaryStore = True):
+        self.illFile = illFile
+        self.bufferSize = bufferSize
+        self.lineOffsets = None
+        self.numOfPts = 0
+        self.store = None
+        
+        if useBinaryStore:
+            store = hb_AnnualResultsStore(os.path.dirname(illFile))
+            storeEntry = store.getEntry(illFile)
+            if storeEntry != None:
+                self.store = store
+                self.storeEntry, fileIndex = storeEntry
+                self.ptsOffset = self.storeEntry["ptsOffsets"][fileIndex]
+                self.numOfPts = self.storeEntry["numOfPts"][fileIndex]
+                return
+        
+        with open(self.illFile, "rb") as illInf:
+            for line in illInf:
+                if self.isDataLine(line):
+                    # first 3 columns are month, day and hour
+                    self.numOfPts = len(line.split()) - 3
+                    break
+    
+    def isDataLine(self, line):
+        return line.strip()!="" and not line.startswith("#")
+    
+    def indexFile(self):
+        # the index is saved next to the .ill file and is reused until the file changes
+        indexFile = self.illFile + ".idx"
+        stamp = [os.path.getsize(self.illFile), os.path.getmtime(self.illFile)]
+        if os.path.isfile(indexFile):
+            try:
+                with open(indexFile, "r") as indexInf:
+                    index = json.load(indexInf)
+                if index["stamp"] == stamp:
+                    self.lineOffsets = index["lineOffsets"]
+                    return
+            except:
+                pass
+        
+        self.lineOffsets = []
+        offset = 0
+        with open(self.illFile, "rb", self.bufferSize) as illInf:
+            for line in illInf:
+                if self.isDataLine(line):
+                    self.lineOffsets.append(offset)
+                offset += len(line)
+        
+        try:
+            with open(indexFile, "w") as indexOutf:
+                json.dump({"stamp": stamp, "lineOffsets": self.lineOffsets}, indexOutf)
+        except:
+            # the study folder can be read-only
+            pass
+    
+    def getNumOfHours(self):
+        if self.store != None: return self.store.header["numOfHours"]
+        if self.lineOffsets == None: self.indexFile()
+        return len(self.lineOffsets)
+    
+    def readLine(self, hourIndex):
+        if self.lineOffsets == None: self.indexFile()
+        with open(self.illFile, "rb") as illInf:
+            illInf.seek(self.lineOffsets[hourIndex])
+            return illInf.readline()
+    
+    def getValue(self, hourIndex, ptIndex):
+        """Return the value for a point at an hour. Both indices start from 0."""
+        if self.store != None:
+            return self.store.readHourValues(self.storeEntry, hourIndex, self.ptsOffset + ptIndex, 1)[0]
+        col = ptIndex + 3
+        return float(self.readLine(hourIndex).split(None, col + 1)[col])
+    
+    def getHourValues(self, hourIndex):
+        """Return the values of all the points for an hour. Hour index starts from 0."""
+        if self.store != None:
+            return self.store.readHourValues(self.storeEntry, hourIndex, self.ptsOffset, self.numOfPts)
+        return map(float, self.readLine(hourIndex).split()[3:])
+    
+    def iterHourValues(self):
+        """Yield the values of all the points for each hour of the file."""
+        if self.store != None:
+            for hourValues in self.store.iterHourValues(self.storeEntry, self.ptsOffset, self.numOfPts):
+                yield hourValues
+            return
+        
+        with open(self.illFile, "rb", self.bufferSize) as illInf:
+            for line in illInf:
+                if self.isDataLine(line):
+                    yield map(float, line.split()[3:])
+    
+    def getPointValues(self, ptIndex):
+        """Return the hourly values for a single point. Point index starts from 0."""
+        return self.getPointsValues([ptIndex])[0]
+    
+    def getPointsValues(self, ptIndices):
+        """Return a list of hourly values for each point in ptIndices in a single pass."""
+        cols = [ptIndex + 3 for ptIndex in ptIndices]
+        for ptIndex in ptIndices:
+            if ptIndex < 0 or ptIndex >= self.numOfPts:
+                raise IndexError("Point index " + `ptIndex` + " is out of range for " + self.illFile)
+        
+        if self.store != None:
+            return self.store.readPointsValues(self.storeEntry, [self.ptsOffset + ptIndex for ptIndex in ptIndices])
+        
+        # don't split the rest of the line after the last requested column
+        maxSplit = max(cols) + 1
+        values = [[] for col in cols]
+        with open(self.illFile, "rb", self.bufferSize) as illInf:
+            for line in illInf:
+                if self.isDataLine(line):
+                    lineSeg = line.split(None, maxSplit)
+                    for count, col in enumerate(cols):
+                        values[count].append(float(lineSeg[col]))
+        
+        return values
+    
+
+class hb_AnnualResultsStore(object):
+    """
+    Binary float32 copy of the annual results (.ill files) of a study.
+    
+    The .ill files of each shading state are merged into an hour-major binary file
+    where the values of all the points for an hour are next to each other, and a
+    point-major file where the values of all the hours for a point are next to each
+    other. The point-major file is what makes reading a single point fast. A small
+    JSON header in the study folder keeps the number of points and hours, the
+    shading group and state of each set of files and the size and modification
+    time of the source .ill files so outdated copies are ignored.
+    
+    The copy is written next to the .ill files and doesn't replace them so it adds
+    to the disk space of the study. Run Daylight Simulation only writes it if
+    writeBinaryResults is set in DSParameters.
+    
+    Args:
+        studyFolder: Folder of the annual study which includes the .ill files.
+    """
+    
+    headerFileName = "annualResults.json"
+    
+    def __init__(self, studyFolder):
+        self.studyFolder = studyFolder
+        self.headerFile = os.path.join(studyFolder, self.headerFileName)
+        self.header = None
+        
+        if os.path.isfile(self.headerFile):
+            try:
+                with open(self.headerFile, "r") as headerInf:
+                    self.header = json.load(headerInf)
+            except Exception, e:
+                print "Failed to load " + self.headerFile + ":\n" + `e`
+                self.header = None
+    
+    def getFileStamp(self, filePath):
+        return [os.path.getsize(filePath), os.path.getmtime(filePath)]
+    
+    def getEntry(self, illFile):
+        """
+        Return the state entry and the index of the ill file inside the entry if
+        the store has an up-to-date copy of the file. Otherwise return None.
+        """
+        if self.header == None: return None
+        
+        fileName = os.path.basename(illFile)
+        for entry in self.header["states"]:
+            if fileName not in entry["illFiles"]: continue
+            fileIndex = entry["illFiles"].index(fileName)
+            try:
+                if self.getFileStamp(illFile) != entry["stamps"][fileIndex]: return None
+            except:
+                return None
+            return entry, fileIndex
+        
+        return None
+    
+    def readValues(self, binaryFile, start, count):
+        values = array.array("f")
+        with open(os.path.join(self.studyFolder, binaryFile), "rb") as binInf:
+            binInf.seek(start * values.itemsize)
+            values.fromfile(binInf, count)
+        if self.header["byteOrder"] != sys.byteorder: values.byteswap()
+        return values.tolist()
+    
+    def readHourValues(self, entry, hourIndex, ptIndex = 0, numOfPts = None):
+        if numOfPts == None: numOfPts = self.header["numOfPts"]
+        start = hourIndex * self.header["numOfPts"] + ptIndex
+        return self.readValues(entry["hourMajorFile"], start, numOfPts)
+    
+    def iterHourValues(self, entry, ptIndex = 0, numOfPts = None):
+        totalNumOfPts = self.header["numOfPts"]
+        if numOfPts == None: numOfPts = totalNumOfPts
+        with open(os.path.join(self.studyFolder, entry["hourMajorFile"]), "rb") as binInf:
+            for hourIndex in range(self.header["numOfHours"]):
+                values = array.array("f")
+                binInf.seek((hourIndex * totalNumOfPts + ptIndex) * values.itemsize)
+                values.fromfile(binInf, numOfPts)
+                if self.header["byteOrder"] != sys.byteorder: values.byteswap()
+                yield values.tolist()
+    
+    def readPointValues(self, entry, ptIndex):
+        return self.readPointsValues(entry, [ptIndex])[0]
+    
+    def readPointsValues(self, entry, ptIndices):
+        """Return the hourly values for each point in ptIndices."""
+        numOfHours = self.header["numOfHours"]
+        if entry.get("pointMajorFile"):
+            # one seek for each point in a single open file
+            values = []
+            with open(os.path.join(self.studyFolder, entry["pointMajorFile"]), "rb") as binInf:
+                for ptIndex in ptIndices:
+                    pointValues = array.array("f")
+                    binInf.seek(ptIndex * numOfHours * pointValues.itemsize)
+                    pointValues.fromfile(binInf, numOfHours)
+                    if self.header["byteOrder"] != sys.byteorder: pointValues.byteswap()
+                    values.append(pointValues.tolist())
+            return values
+        
+        # a store of an older version without the point-major file.
+        # read the range of the points for every hour
+        firstPt = min(ptIndices)
+        values = [[] for ptIndex in ptIndices]
+        for hourValues in self.iterHourValues(entry, firstPt, max(ptIndices) - firstPt + 1):
+            for count, ptIndex in enumerate(ptIndices):
+                values[count].append(hourValues[ptIndex - firstPt])
+        return values
+    
+    def writeStore(self, illFiles, blockSize = 240, writePointMajorFile = True):
+        """
+        Write the binary copy of the results.
+        
+        Args:
+            illFiles: Sorted .ill files as a data tree. This is the output of
+                hb_ReadAnnualResultsAux.sortIllFiles.
+            blockSize: Number of hours which are kept in memory while the hour-major
+                file is transposed into the point-major file.
+            writePointMajorFile: Set to False to only write the hour-major file. This
+                halves the size of the copy but reading the hours of a point then
+                needs a pass over the whole hour-major file. Default is True.
+        """
+        header = {"version": 1,
+                  "dataType": "float32",
+                  "byteOrder": sys.byteorder,
+                  "numOfPts": None,
+                  "numOfHours": None,
+                  "shadingGroups": {},
+                  "states": []
+                  }
+        
+        # remove the old header first so a failed run doesn't leave a broken store
+        if os.path.isfile(self.headerFile): os.remove(self.headerFile)
+        
+        for branch in range(illFiles.BranchCount):
+            fileNames = list(illFiles.Branch(branch))
+            if len(fileNames) == 0: continue
+            
+            indices = list(illFiles.Path(branch).Indices)
+            if len(indices) == 1:
+                shadingGroup, state = 0, 0
+            else:
+                shadingGroup, state = indices[0], indices[1]
+            
+            header["shadingGroups"][`shadingGroup`] = header["shadingGroups"].get(`shadingGroup`, 0) + 1
+            
+            illReaders = [hb_IllFileReader(fileName, useBinaryStore = False) for fileName in fileNames]
+            numOfPtsInEachFile = [illReader.numOfPts for illReader in illReaders]
+            numOfPts = sum(numOfPtsInEachFile)
+            
+            if header["numOfPts"] == None:
+                header["numOfPts"] = numOfPts
+            elif header["numOfPts"] != numOfPts:
+                raise Exception("Number of points in " + os.path.basename(fileNames[0]) + \
+                                " doesn't match the number of points in the other shading states.")
+            
+            stateName = "annualResults_" + `shadingGroup` + "_" + `state`
+            hourMajorFile = stateName + "_hours.bin"
+            pointMajorFile = stateName + "_points.bin"
+            
+            # write the hour-major file by merging the lines of all the ill files
+            numOfHours = 0
+            with open(os.path.join(self.studyFolder, hourMajorFile), "wb") as hourOutf:
+                for hourValues in izip(*[illReader.iterHourValues() for illReader in illReaders]):
+                    array.array("f", list(chain.from_iterable(hourValues))).tofile(hourOutf)
+                    numOfHours += 1
+            
+            if header["numOfHours"] == None:
+                header["numOfHours"] = numOfHours
+            elif header["numOfHours"] != numOfHours:
+                raise Exception("Number of hours in " + os.path.basename(fileNames[0]) + \
+                                " doesn't match the number of hours in the other shading states.")
+            
+            if not writePointMajorFile:
+                # remove the point-major file of an older run
+                pointMajorFile = None
+                try: os.remove(os.path.join(self.studyFolder, stateName + "_points.bin"))
+                except OSError: pass
+            else:
+                # transpose the hour-major file into the point-major file in blocks of hours
+                itemSize = array.array("f").itemsize
+                with open(os.path.join(self.studyFolder, hourMajorFile), "rb") as hourInf:
+                    with open(os.path.join(self.studyFolder, pointMajorFile), "wb") as pointOutf:
+                        for hourStart in range(0, numOfHours, blockSize):
+                            numOfBlockHours = min(blockSize, numOfHours - hourStart)
+                            block = array.array("f")
+                            block.fromfile(hourInf, numOfBlockHours * numOfPts)
+                            for ptIndex in range(numOfPts):
+                                pointOutf.seek((ptIndex * numOfHours + hourStart) * itemSize)
+                                block[ptIndex::numOfPts].tofile(pointOutf)
+            
+            header["states"].append({"shadingGroup": shadingGroup,
+                                     "state": state,
+                                     "illFiles": [os.path.basename(fileName) for fileName in fileNames],
+                                     "numOfPts": numOfPtsInEachFile,
+                                     "ptsOffsets": [sum(numOfPtsInEachFile[:count]) for count in range(len(fileNames))],
+                                     "stamps": [self.getFileStamp(fileName) for fileName in fileNames],
+                                     "hourMajorFile": hourMajorFile,
+                                     "pointMajorFile": pointMajorFile
+                                     })
+        
+        with open(self.headerFile, "w") as headerOutf:
+            json.dump(header, headerOutf, indent = 4)
+        
+        self.header = header
+        return self.headerFile
+    
+class hb_DaylightMetrics(object):
+    """
+    Climate-based daylight metrics (DA, cDA, UDI, sDA and ASE) for annual results.
+    
+    The .ill files are read once. The illuminance values of each point for the
+    occupied hours are kept sorted with their running sums so the metrics for any
+    threshold can be calculated with a binary search and without reading the
+    results again.
+    
+    Args:
+        illFileSets: Sorted .ill files as {shadingGroup: [[files for state 1], ..., [files for state n]]}.
+            Shading group 0 is the results with no blinds.
+        numOfPtsInEachSpace: Number of test points in each space.
+        occupancyFiles: Address to a Daysim occupancy file for each space. If there
+            is only one file it will be used for all the spaces.
+        blindProfiles: Optional list of hourly blind profiles for shading group I for each
+            space (0 = up, 1 = down). These are the shadingProfiles of Daysim Annual
+            Profiles component. Use getBlindProfile to remove the Ladybug header.
+            Without a profile the blinds are always up. readBlindProfile reads the profile
+            from the *_intgain.csv of ds_el_lighting.
+    """
+    
+    def __init__(self, illFileSets, numOfPtsInEachSpace, occupancyFiles, blindProfiles = None):
+        
+        self.numOfPtsInEachSpace = numOfPtsInEachSpace
+        self.numOfSpaces = len(numOfPtsInEachSpace)
         
-        for key, fileListDict in illFilesDict.items():
-            stateCount = 0
-            shadingGroupCount+=1
-            for state, fileList in fileListDict.items():
-                if key== -1:
-                    p = GH_Path(0)
-                    shadingGroupCount-=1
+        self.occupancy = []
+        occupancyDict = {}
+        for spaceCount in range(self.numOfSpaces):
+            try: occFile = occupancyFiles[spaceCount]
+            except: occFile = occupancyFiles[0]
+            if occFile not in occupancyDict:
+                occupancyDict[occFile] = self.readOccupancyFile(occFile)
+            self.occupancy.append(occupancyDict[occFile])
+        
+        self.numOfOccupiedHours = [sum(occ) for occ in self.occupancy]
+        
+        if blindProfiles == None: blindProfiles = []
+        self.blindProfiles = blindProfiles
+        
+        self.readIlluminanceValues(illFileSets)
+    
+    @staticmethod
+    def readOccupancyFile(occFile):
+        """Return a list of 8760 values. 1 is occupied and 0 is not occupied."""
+        occupancy = []
+        with open(occFile, "r") as occInf:
+            for line in occInf:
+                if line.startswith("#") or line.strip() == "": continue
+                if float(line.strip().split(",")[-1]) > 0:
+                    occupancy.append(1)
                 else:
-                    p = GH_Path(shadingGroupCount, stateCount)
-                    stateCount+=1
-                    
-                try:
-                    if fileName.endswith("_down.ill") or fileName.endswith("_up.ill"):
-                        # conceptual blind
-                        if fileList[0].endswith("_down.ill"):
-                            p = GH_Path(1,0)
-                        else:
-                            p = GH_Path(0)
-                        
-                        illFiles.AddRange(sorted(fileList, key=lambda fileName: int(fileName.split(".")[-2].split("_")[-2])), p)
-                    else:
-                        illFiles.AddRange(sorted(fileList, key=lambda fileName: int(fileName.split(".")[-2].split("_")[-1])), p)
-                        
-                except Exception, e:
-                    # failed to sort!
-                    illFiles.AddRange(fileList, p)
+                    occupancy.append(0)
+        return occupancy
+    
+    @staticmethod
+    def getBlindProfile(shadingProfile):
+        """Return the hourly values of a shading profile without the Ladybug header."""
+        shadingProfile = list(shadingProfile)
+        if len(shadingProfile) != 0 and str(shadingProfile[0]).startswith("key:location"):
+            shadingProfile = shadingProfile[7:]
+        return [float(value) for value in shadingProfile]
+    
+    @staticmethod
+    def readBlindProfile(intgainFile):
+        """
+        Return the hourly profile of the first blind group in a *_intgain.csv file
+        of ds_el_lighting. Return None if the file has no blind column.
+        """
+        blindProfile = []
+        blindColumn = None
+        with open(intgainFile, "r") as inf:
+            for lineCount, line in enumerate(inf):
+                values = line.strip().split(",")
+                if lineCount == 3:
+                    for columnCount, heading in enumerate(values):
+                        if columnCount > 2 and heading.strip().startswith("blind"):
+                            blindColumn = columnCount
+                            break
+                    if blindColumn == None: return None
+                elif lineCount > 3 and len(values) > blindColumn:
+                    blindProfile.append(float(values[blindColumn]))
+        return blindProfile
+    
+    def getStateInEffect(self, spaceCount, HOY, numOfStates):
+        """Return the (shadingGroup, state) key for an hour. HOY starts from 0."""
+        try: blindProfile = self.blindProfiles[spaceCount]
+        except: blindProfile = None
+        
+        if not blindProfile or numOfStates == 0 or blindProfile[HOY] <= 0:
+            return (0, 0)
+        
+        stateInEffect = max(int(round(numOfStates * blindProfile[HOY])), 1)
+        return (1, stateInEffect - 1)
+    
+    def readIlluminanceValues(self, illFileSets):
+        if 1 in illFileSets: numOfStates = len(illFileSets[1])
+        else: numOfStates = 0
+        
+        ptsRanges = []
+        for spaceCount, numOfPts in enumerate(self.numOfPtsInEachSpace):
+            start = sum(self.numOfPtsInEachSpace[:spaceCount])
+            ptsRanges.append((start, start + numOfPts))
+        
+        # find out which state is in effect for each space in each hour
+        hourlyStates = []
+        for spaceCount in range(self.numOfSpaces):
+            hourlyStates.append([self.getStateInEffect(spaceCount, HOY, numOfStates) \
+                                 for HOY in range(len(self.occupancy[spaceCount]))])
+        
+        # collect the values of each point in an array to keep the memory low for large studies
+        ptsValues = [array.array("d") for pt in range(sum(self.numOfPtsInEachSpace))]
+        
+        for shadingGroup, stateFileLists in illFileSets.items():
+            if shadingGroup > 1: continue # Honeybee only supports one shading group
+            for state, illFiles in enumerate(stateFileLists):
+                stateKey = (shadingGroup, state)
+                illReaders = [hb_IllFileReader(illFile) for illFile in illFiles]
+                for HOY, hourValues in enumerate(izip(*[illReader.iterHourValues() for illReader in illReaders])):
+                    hourValues = list(chain.from_iterable(hourValues))
+                    for spaceCount, (start, end) in enumerate(ptsRanges):
+                        if not self.occupancy[spaceCount][HOY] or hourlyStates[spaceCount][HOY] != stateKey:
+                            continue
+                        for ptCount in range(start, end):
+                            ptsValues[ptCount].append(hourValues[ptCount])
+        
+        # sort the values and keep the running sums for cDA
+        self.ptsValues = []
+        self.ptsCumSums = []
+        for ptCount in range(len(ptsValues)):
+            ptValues = array.array("d", sorted(ptsValues[ptCount]))
+            ptsValues[ptCount] = None
+            cumSums = array.array("d", [0])
+            total = 0
+            for value in ptValues:
+                total += value
+                cumSums.append(total)
+            self.ptsValues.append(ptValues)
+            self.ptsCumSums.append(cumSums)
+        
+        self.ptsRanges = ptsRanges
+    
+    def getPercentage(self, count, spaceCount):
+        numOfOccupiedHours = self.numOfOccupiedHours[spaceCount]
+        if numOfOccupiedHours == 0: return 0
+        return 100.0 * count / numOfOccupiedHours
+    
+    def getDA(self, spaceCount, threshold = 300):
+        """Percentage of the occupied hours that each point receives at least threshold lux."""
+        start, end = self.ptsRanges[spaceCount]
+        return [self.getPercentage(len(ptValues) - bisect.bisect_left(ptValues, threshold), spaceCount) \
+                for ptValues in self.ptsValues[start:end]]
+    
+    def getCDA(self, spaceCount, threshold = 300):
+        """
+        Continuous Daylight Autonomy. Hours below the threshold get partial credit
+        of illuminance / threshold.
+        """
+        start, end = self.ptsRanges[spaceCount]
+        CDA = []
+        for ptValues, cumSums in zip(self.ptsValues[start:end], self.ptsCumSums[start:end]):
+            index = bisect.bisect_left(ptValues, threshold)
+            credit = (len(ptValues) - index) + cumSums[index] / threshold
+            CDA.append(self.getPercentage(credit, spaceCount))
+        return CDA
+    
+    def getUDI(self, spaceCount, lowerThreshold = 100, upperThreshold = 2000):
+        """
+        Useful Daylight Illuminance.
+        Returns percentage of the occupied hours less than lowerThreshold, between the
+        thresholds and more than upperThreshold for each point as three lists.
+        """
+        start, end = self.ptsRanges[spaceCount]
+        underUDI, inRangeUDI, overUDI = [], [], []
+        for ptValues in self.ptsValues[start:end]:
+            underCount = bisect.bisect_left(ptValues, lowerThreshold)
+            overCount = len(ptValues) - bisect.bisect_right(ptValues, upperThreshold)
+            underUDI.append(self.getPercentage(underCount, spaceCount))
+            inRangeUDI.append(self.getPercentage(len(ptValues) - underCount - overCount, spaceCount))
+            overUDI.append(self.getPercentage(overCount, spaceCount))
+        return underUDI, inRangeUDI, overUDI
+    
+    def getsDA(self, spaceCount, threshold = 300, targetPercentage = 50):
+        """Percentage of the points with DA of at least targetPercentage."""
+        DA = self.getDA(spaceCount, threshold)
+        if len(DA) == 0: return 0
+        return 100.0 * len([value for value in DA if value >= targetPercentage]) / len(DA)
+    
+    def getASE(self, spaceCount, threshold = 1000, numOfHours = 250):
+        """
+        Annual Sunlight Exposure. Percentage of the points that receive more than
+        threshold lux for more than numOfHours occupied hours. For a standard ASE
+        the .ill files should only include direct sunlight.
+        """
+        start, end = self.ptsRanges[spaceCount]
+        ptsCount = end - start
+        if ptsCount == 0: return 0
+        exposedCount = 0
+        for ptValues in self.ptsValues[start:end]:
+            if len(ptValues) - bisect.bisect_right(ptValues, threshold) > numOfHours:
+                exposedCount += 1
+        return 100.0 * exposedCount / ptsCount
+    
+class hb_PointKDTree(object):
+    """
+    A k-d tree over a list of points to find the closest test point to a point.
+    
+    The tree is stored as a balanced implicit tree: the points are reordered so
+    the median of each range is the node and the two halves are its children.
+    The tree doesn't check if the points change. Keep it with a hash of the
+    coordinates of the points (e.g. md5 of the test points and the .pts files of
+    the study) and build a new tree when the hash changes.
+    
+    Args:
+        points: A list of Rhino points.
+    """
+    
+    def __init__(self, points):
+        self.numOfPts = len(points)
+        self.points = [(pt.X, pt.Y, pt.Z, ptCount) for ptCount, pt in enumerate(points)]
+        self.buildNode(0, len(self.points), 0)
+    
+    def buildNode(self, start, end, axis):
+        if end - start <= 1: return
+        self.points[start:end] = sorted(self.points[start:end], key = lambda pt: pt[axis])
+        median = (start + end) // 2
+        self.buildNode(start, median, (axis + 1) % 3)
+        self.buildNode(median + 1, end, (axis + 1) % 3)
+    
+    def getClosestPoint(self, point, maxDistance = None):
+        """
+        Return the index of the closest point and its distance. If there is no
+        point within maxDistance the index will be -1.
+        """
+        target = (point.X, point.Y, point.Z)
+        best = [-1, float("inf") if maxDistance == None else maxDistance ** 2]
+        self.searchNode(0, len(self.points), 0, target, best)
+        return best[0], math.sqrt(best[1]) if best[0] != -1 else None
+    
+    def searchNode(self, start, end, axis, target, best):
+        if end <= start: return
+        median = (start + end) // 2
+        pt = self.points[median]
+        distance = (pt[0] - target[0]) ** 2 + (pt[1] - target[1]) ** 2 + (pt[2] - target[2]) ** 2
+        # on a tie keep the point that comes first in the original list
+        if distance < best[1] or (distance == best[1] and (best[0] == -1 or pt[3] < best[0])):
+            best[0], best[1] = pt[3], distance
+        
+        diff = target[axis] - pt[axis]
+        nextAxis = (axis + 1) % 3
+        if diff < 0:
+            nearRange, farRange = (start, median), (median + 1, end)
+        else:
+            nearRange, farRange = (median + 1, end), (start, median)
         
-        return illFiles
+        self.searchNode(nearRange[0], nearRange[1], nextAxis, target, best)
+        if diff ** 2 <= best[1]:
+            self.searchNode(farRange[0], farRange[1], nextAxis, target, best)
     
 class hb_EnergySimulatioParameters(object):
     
@@ -4199,6 +7501,7 @@ class ReadEPSchedules(object):
         self.startHOY = 1
         self.endHOY = 24
         self.unit = "unknown"
+        self.hb_scheduleCompiler = hb_ScheduleCompiler(ghenv.Component)
     
     def getScheduleTypeLimitsData(self, schName):
         
@@ -4218,155 +7521,365 @@ class ReadEPSchedules(object):
         return lowerLimit, upperLimit, numericType, unitType
     
     
-    def getDayEPScheduleValues(self, schName = None):
+    def getScheduleValues(self, schName = None):
+        """
+        Return schedule values in the same shape as the EnergyPlus object.
         
+        Schedule:Year, Schedule:Compact and Schedule:Constant return 365 lists of 24 values,
+        Schedule:Week:Daily returns 7 lists of 24 values and Schedule:Day:Interval
+        returns a list of 24 values. Values are calculated by hb_ScheduleCompiler.
+        """
         if schName == None:
             schName = self.schName
+        if self.hb_EPObjectsAUX.isSchedule(schName):
+            scheduleType, unit, values = \
+                self.hb_scheduleCompiler.getCompiledSchedule(schName, self.startDayOfTheWeek)
             
-        values, comments = self.hb_EPScheduleAUX.getScheduleDataByName(schName.upper(), ghenv.Component)
-        typeLimitName = values[1]
-        lowerLimit, upperLimit, numericType, unitType = \
-                self.getScheduleTypeLimitsData(typeLimitName)
-                
-        numberOfDaySch = int((len(values) - 3) /2)
-        
-        hourlyValues = range(24)
-        startHour = 0
-        for i in range(numberOfDaySch):
-            value = float(values[2 * i + 4])
-            untilTime = map(int, values[2 * i + 3].split(":"))
-            endHour = int(untilTime[0] +  untilTime[1]/60)
-            for hour in range(startHour, endHour):
-                hourlyValues[hour] = value
+            if self.count == 0:
+                self.schType = scheduleType
             
-            startHour = endHour
-        
-        if numericType.strip().lower() == "district":
-            hourlyValues = map(int, hourlyValues)
+            self.count += 1
+            if unit != None: self.unit = unit
+            
+            if scheduleType in ("schedule:year", "schedule:compact", "schedule:constant", "schedule:file"):
+                # update last day of schedule
+                self.endHOY = 8760
+                hourlyValues = [list(values[day * 24: (day + 1) * 24]) for day in range(365)]
+            elif scheduleType == "schedule:week:daily":
+                # set the last date of the schedule to one week
+                self.endHOY = 24 * 7
+                hourlyValues = [list(values[day * 24: (day + 1) * 24]) for day in range(7)]
+            elif scheduleType == "schedule:day:interval":
+                hourlyValues = list(values)
+            else:
+                print "Honeybee doesn't support " + scheduleType + " currently." + \
+                      "Email us the type and we will try to add it to Honeybee."
+                      
+                hourlyValues = []
             
-        return hourlyValues
+            return hourlyValues
+
+
+class hb_ScheduleCompiler(object):
+    """
+    Compile EnergyPlus schedules into flat arrays of values.
     
+    Schedule:Year, Schedule:Compact, Schedule:Week:Daily, Schedule:Day:Interval,
+    Schedule:Constant, Schedule:File and .csv schedules are expanded once and memoized
+    by name, start day of the week and timesteps per hour. The memo is shared by all
+    instances and is reset when the Honeybee schedule libraries change. The values
+    that are returned are copies and can be changed.
     
-    def getWeeklyEPScheduleValues(self, schName = None):
-        """
-        Schedule:Week:Daily
-        ['Schedule Type', 'Sunday Schedule:Day Name', 'Monday Schedule:Day Name',
-        'Tuesday Schedule:Day Name', 'Wednesday Schedule:Day Name', 'Thursday Schedule:Day Name',
-        'Friday Schedule:Day Name', 'Saturday Schedule:Day Name', 'Holiday Schedule:Day Name',
-        'SummerDesignDay Schedule:Day Name', 'WinterDesignDay Schedule:Day Name',
-        'CustomDay1 Schedule:Day Name', 'CustomDay2 Schedule:Day Name']
-        """
+    Args:
+        component: Optional Grasshopper component to report the warnings.
+    """
+    
+    def __init__(self, component = None):
+        self.hb_EPScheduleAUX = EPScheduleAux()
+        self.component = component
         
-        if schName == None:
-            schName = self.schName
-            
-        values, comments = self.hb_EPScheduleAUX.getScheduleDataByName(schName.upper(), ghenv.Component)
+        if not sc.sticky.has_key("honeybee_compiledSchedules"):
+            sc.sticky["honeybee_compiledSchedules"] = {"libraryVersion": None, "schedules": {}}
+    
+    def getLibraryVersion(self):
+        """Return a key that changes when schedules are added to or removed from the libraries."""
+        scheduleLib = sc.sticky["honeybee_ScheduleLib"]
+        typeLimitsLib = sc.sticky["honeybee_ScheduleTypeLimitsLib"]
+        
+        # only hb_LazyEPLibrary has a version
+        scheduleLibVersion = getattr(scheduleLib, "version", None)
+        typeLimitsLibVersion = getattr(typeLimitsLib, "version", None)
+        if scheduleLibVersion == None or typeLimitsLibVersion == None: return None
+        
+        return id(scheduleLib), scheduleLibVersion, id(typeLimitsLib), typeLimitsLibVersion
+    
+    def getMemo(self):
+        compiledSchedules = sc.sticky["honeybee_compiledSchedules"]
+        libraryVersion = self.getLibraryVersion()
+        if libraryVersion == None:
+            # libraries can't be tracked so don't reuse the results
+            return {}
         
-        if self.count == 1:
-            # set the last date of the schedule to one week
-            self.endHOY = 24 * 7
+        if compiledSchedules["libraryVersion"] != libraryVersion:
+            compiledSchedules["libraryVersion"] = libraryVersion
+            compiledSchedules["schedules"] = {}
         
-        sundaySchedule = self.getScheduleValues(values[1])
-        mondaySchedule = self.getScheduleValues(values[2])
-        tuesdaySchedule = self.getScheduleValues(values[3])
-        wednesdaySchedule = self.getScheduleValues(values[4])
-        thursdaySchedule = self.getScheduleValues(values[5])
-        fridaySchedule = self.getScheduleValues(values[6])
-        saturdaySchedule = self.getScheduleValues(values[7])
+        return compiledSchedules["schedules"]
+    
+    def getCompiledSchedule(self, schName, startDayOfTheWeek = 0, timestepsPerHour = 1):
+        """
+        Return scheduleType, unit and values for a schedule.
         
-        holidaySchedule = self.getScheduleValues(values[8])
-        summerDesignDaySchedule = self.getScheduleValues(values[9])
-        winterDesignDaySchedule = self.getScheduleValues(values[10])
-        customDay1Schedule = self.getScheduleValues(values[11])
-        customDay2Schedule = self.getScheduleValues(values[12])
+        Values is an array of floats for 365 days for Schedule:Year, Schedule:Compact,
+        Schedule:Constant, Schedule:File and .csv schedules, 7 days for Schedule:Week:Daily
+        and a single day for Schedule:Day:Interval with timestepsPerHour values for each
+        hour. The values are memoized and shouldn't be changed.
         
-        hourlyValues = [sundaySchedule, mondaySchedule, tuesdaySchedule, \
-                       wednesdaySchedule, thursdaySchedule, fridaySchedule, \
-                       saturdaySchedule]
+        Args:
+            schName: Schedule name or path to a .csv schedule.
+            startDayOfTheWeek: Index of the week day that the year starts with (0 = Sunday).
+            timestepsPerHour: Number of values for each hour. Default is 1.
+        """
+        if schName.lower().endswith(".csv"):
+            if not os.path.isfile(schName):
+                raise ValueError("Failed to find the schedule file: " + schName)
+            key = schName, os.path.getmtime(schName), timestepsPerHour
+        else:
+            key = schName.upper(), startDayOfTheWeek % 7, timestepsPerHour
         
-        hourlyValues = hourlyValues[self.startDayOfTheWeek:] + \
-                       hourlyValues[:self.startDayOfTheWeek]
+        memo = self.getMemo()
+        if key not in memo:
+            memo[key] = self.compileSchedule(schName, startDayOfTheWeek % 7, timestepsPerHour)
         
-        return hourlyValues
+        return memo[key]
     
+    def getScheduleValues(self, schName, startDayOfTheWeek = 0, timestepsPerHour = 1):
+        """Return the compiled values of a schedule. See getCompiledSchedule."""
+        return array.array('d', self.getCompiledSchedule(schName, startDayOfTheWeek, timestepsPerHour)[2])
     
-    def getConstantEPScheduleValues(self, schName):
+    def getHourlyValues(self, schName, startDayOfTheWeek = 0, timestepsPerHour = 1):
         """
-        'Schedule:Constant'
-        ['Schedule Type', 'Schedule Type Limits Name', 'Hourly Value']
+        Return values of a schedule for the whole year. Week and day schedules are
+        repeated for all the days of the year.
         """
+        scheduleType, unit, values = \
+            self.getCompiledSchedule(schName, startDayOfTheWeek, timestepsPerHour)
+        
+        dayLength = 24 * timestepsPerHour
+        if len(values) == 365 * dayLength or scheduleType == "schedule:file":
+            # don't return the memoized values
+            return array.array('d', values)
+        elif scheduleType == "schedule:week:daily":
+            yearValues = array.array('d')
+            for day in range(365):
+                weekDay = day % 7
+                yearValues.extend(values[weekDay * dayLength: (weekDay + 1) * dayLength])
+            return yearValues
+        else:
+            return values * 365
+    
+    def getUnit(self, typeLimitName):
+        if typeLimitName == None or typeLimitName.strip() == "": return None
         
-        if schName == None:
-            schName = self.schName
-            
-        values, comments = self.hb_EPScheduleAUX.getScheduleDataByName(schName.upper(), ghenv.Component)
-        typeLimitName = values[1]
-        lowerLimit, upperLimit, numericType, unitType = \
-                self.getScheduleTypeLimitsData(typeLimitName)
+        schedule, comments = self.hb_EPScheduleAUX.getScheduleTypeLimitsDataByName(typeLimitName.upper(), self.component)
+        if schedule == None: return None
+        try:
+            lowerLimit, upperLimit, numericType, unitType = schedule[1:]
+        except:
+            lowerLimit, upperLimit, numericType = schedule[1:]
+            unitType = "unknown"
         
-        hourlyValues = [float(values[2])]
+        if unitType == "unknown": return numericType
+        return unitType
+    
+    def compileSchedule(self, schName, startDayOfTheWeek, timestepsPerHour):
+        if schName.lower().endswith(".csv"):
+            return "schedule:file", None, self.compileCSVSchedule(schName, timestepsPerHour)
+        
+        values, comments = self.hb_EPScheduleAUX.getScheduleDataByName(schName.upper(), self.component)
+        if values == None:
+            raise ValueError("Failed to find " + schName + " in the Honeybee schedule library.")
+        
+        scheduleType = values[0].lower()
+        unit = None
+        if scheduleType == "schedule:year":
+            unit = self.getUnit(values[1])
+            scheduleValues = self.compileYearSchedule(values, startDayOfTheWeek, timestepsPerHour)
+        elif scheduleType == "schedule:compact":
+            unit = self.getUnit(values[1])
+            scheduleValues = self.compileCompactSchedule(values, startDayOfTheWeek, timestepsPerHour)
+        elif scheduleType == "schedule:week:daily":
+            # week schedules don't have type limits. use the type limits of the first day
+            unit = self.getCompiledSchedule(values[1], startDayOfTheWeek, timestepsPerHour)[1]
+            scheduleValues = self.compileWeekSchedule(values, startDayOfTheWeek, timestepsPerHour)
+        elif scheduleType == "schedule:day:interval":
+            unit = self.getUnit(values[1])
+            scheduleValues = self.compileDaySchedule(values, timestepsPerHour)
+        elif scheduleType == "schedule:constant":
+            unit = self.getUnit(values[1])
+            scheduleValues = array.array('d', [float(values[2])]) * (8760 * timestepsPerHour)
+        elif scheduleType == "schedule:file":
+            unit = self.getUnit(values[1])
+            scheduleValues = self.compileFileSchedule(values, timestepsPerHour)
+        else:
+            print "Honeybee doesn't support " + scheduleType + " currently." + \
+                  "Email us the type and we will try to add it to Honeybee."
+            scheduleValues = array.array('d')
         
-        if numericType.strip().lower() == "district":
-            hourlyValues = map(int, hourlyValues)
-        return scheduleConstant
+        return scheduleType, unit, scheduleValues
     
+    def compileDaySchedule(self, values, timestepsPerHour):
+        """
+        Schedule:Day:Interval
+        ['Schedule Type', 'Schedule Type Limits Name', 'Interpolate to Timestep', 'Time 1 {hh:mm}', 'Value Until Time 1']
+        """
+        dayValues = array.array('d', [0]) * (24 * timestepsPerHour)
+        numberOfDaySch = int((len(values) - 3) /2)
+        
+        startIndex = 0
+        for i in range(numberOfDaySch):
+            value = float(values[2 * i + 4])
+            untilTime = map(int, values[2 * i + 3].split(":"))
+            # values are set to the last full timestep before until time
+            endIndex = min((60 * untilTime[0] + untilTime[1]) * timestepsPerHour // 60, len(dayValues))
+            for index in range(startIndex, endIndex):
+                dayValues[index] = value
+            
+            startIndex = endIndex
+        
+        return dayValues
     
-    def getYearlyEPScheduleValues(self, schName = None):
-        # place holder for 365 days
-        hourlyValues = range(365)
+    def compileWeekSchedule(self, values, startDayOfTheWeek, timestepsPerHour):
+        """
+        Schedule:Week:Daily
+        ['Schedule Type', 'Sunday Schedule:Day Name', ..., 'Saturday Schedule:Day Name', ...]
         
-        # update last day of schedule
-        self.endHOY = 8760
+        The week starts from startDayOfTheWeek.
+        """
+        daySchedules = [values[dayCount] for dayCount in range(1, 8)]
+        daySchedules = daySchedules[startDayOfTheWeek:] + daySchedules[:startDayOfTheWeek]
         
-        if schName == None:
-            schName = self.schName
+        weekValues = array.array('d')
+        for daySchedule in daySchedules:
+            weekValues.extend(self.getCompiledSchedule(daySchedule, startDayOfTheWeek, timestepsPerHour)[2])
         
-        values, comments = self.hb_EPScheduleAUX.getScheduleDataByName(schName.upper(), ghenv.Component)
+        return weekValues
+    
+    def compileYearSchedule(self, values, startDayOfTheWeek, timestepsPerHour):
+        """
+        Schedule:Year
+        ['Schedule Type', 'Schedule Type Limits Name', 'Schedule:Week Name 1', 'Start Month 1',
+        'Start Day 1', 'End Month 1', 'End Day 1', ...]
+        """
+        lb_preparation = sc.sticky["ladybug_Preparation"]()
+        dayLength = 24 * timestepsPerHour
+        yearValues = array.array('d', [0]) * (365 * dayLength)
         
-        # generate weekly schedules
         numOfWeeklySchedules = int((len(values)-2)/5)
         
         for i in range(numOfWeeklySchedules):
             weekDayScheduleName = values[5 * i + 2]
             
-            startDay = int(self.lb_preparation.getJD(int(values[5 * i + 3]), int(values[5 * i + 4])))
-            endDay = int(self.lb_preparation.getJD(int(values[5 * i + 5]), int(values[5 * i + 6])))
+            startDay = int(lb_preparation.getJD(int(values[5 * i + 3]), int(values[5 * i + 4])))
+            endDay = int(lb_preparation.getJD(int(values[5 * i + 5]), int(values[5 * i + 6])))
             
-            # 7 list for 7 days of the week
-            hourlyValuesForTheWeek = self.getScheduleValues(weekDayScheduleName)
+            weekValues = self.getCompiledSchedule(weekDayScheduleName, startDayOfTheWeek, timestepsPerHour)[2]
             
             for day in range(startDay-1, endDay):
-                hourlyValues[day] = hourlyValuesForTheWeek[day%7]
-            
-        return hourlyValues
-    
-    def getScheduleValues(self, schName = None):
-        if schName == None:
-            schName = self.schName
-        if self.hb_EPObjectsAUX.isSchedule(schName):
-            scheduleValues, comments = self.hb_EPScheduleAUX.getScheduleDataByName(schName.upper(), ghenv.Component)
-            
-            scheduleType = scheduleValues[0].lower()
-            if self.count == 0:
-                self.schType = scheduleType
-
-            self.count += 1
+                weekDay = day % 7
+                yearValues[day * dayLength: (day + 1) * dayLength] = \
+                    weekValues[weekDay * dayLength: (weekDay + 1) * dayLength]
+        
+        return yearValues
+    
+    def getCompactWeekDays(self, dayTypes, assignedWeekDays):
+        # week days of a For field of Schedule:Compact (0 = Sunday)
+        weekDayNames = ["sunday", "monday", "tuesday", "wednesday", "thursday", "friday", "saturday"]
+        weekDays = set()
+        for dayType in dayTypes.lower().split():
+            if dayType in weekDayNames: weekDays.add(weekDayNames.index(dayType))
+            elif dayType == "weekdays": weekDays.update(range(1, 6))
+            elif dayType == "weekends": weekDays.update([0, 6])
+            elif dayType == "alldays": weekDays.update(range(7))
+            elif dayType == "allotherdays": weekDays.update(set(range(7)) - assignedWeekDays)
+            # holidays, design days and custom days are not a part of the year
+        return weekDays
+    
+    def compileCompactSchedule(self, values, startDayOfTheWeek, timestepsPerHour):
+        """
+        Schedule:Compact
+        ['Schedule Type', 'Schedule Type Limits Name', 'Through: 12/31', 'For: Weekdays',
+        'Until: 08:00', '0.5', 'Until: 24:00', '1', 'For: AllOtherDays', ...]
+        
+        Interpolate fields are ignored and the values are set to the last full timestep
+        before until time the same as Schedule:Day:Interval.
+        """
+        lb_preparation = sc.sticky["ladybug_Preparation"]()
+        dayLength = 24 * timestepsPerHour
+        yearValues = array.array('d', [0]) * (365 * dayLength)
+        
+        # [(endDay, [(weekDays, dayValues), ...]), ...]
+        periods = []
+        assignedWeekDays = set()
+        dayValues = None
+        startIndex = 0
+        fields = [str(value).strip() for value in values[2:]]
+        fieldCount = 0
+        while fieldCount < len(fields):
+            keyword, separator, fieldValue = fields[fieldCount].partition(":")
+            keyword = keyword.strip().lower()
+            if keyword == "through":
+                month, day = map(int, fieldValue.strip().split("/"))
+                periods.append((int(lb_preparation.getJD(month, day)), []))
+                assignedWeekDays = set()
+            elif keyword == "for":
+                weekDays = self.getCompactWeekDays(fieldValue, assignedWeekDays)
+                assignedWeekDays.update(weekDays)
+                dayValues = array.array('d', [0]) * dayLength
+                startIndex = 0
+                periods[-1][1].append((weekDays, dayValues))
+            elif keyword == "until":
+                # the value is the next field
+                untilTime = map(int, fieldValue.strip().split(":"))
+                fieldCount += 1
+                value = float(fields[fieldCount])
+                endIndex = min((60 * untilTime[0] + untilTime[1]) * timestepsPerHour // 60, dayLength)
+                for index in range(startIndex, endIndex):
+                    dayValues[index] = value
+                startIndex = endIndex
+            fieldCount += 1
+        
+        startDay = 0
+        for endDay, daySchedules in periods:
+            for day in range(startDay, endDay):
+                weekDay = (day + startDayOfTheWeek) % 7
+                for weekDays, dayValues in daySchedules:
+                    if weekDay in weekDays:
+                        yearValues[day * dayLength: (day + 1) * dayLength] = dayValues
+                        break
+            startDay = endDay
+        
+        return yearValues
+    
+    def compileFileSchedule(self, values, timestepsPerHour):
+        """
+        Schedule:File
+        ['Schedule Type', 'Schedule Type Limits Name', 'File Name', 'Column Number',
+        'Rows to Skip at Top', ...]
+        """
+        fileName = values[2]
+        columnIndex = int(values[3]) - 1
+        try: rowsToSkip = int(values[4])
+        except: rowsToSkip = 0
+        
+        return self.readScheduleFile(fileName, columnIndex, rowsToSkip, timestepsPerHour)
+    
+    def compileCSVSchedule(self, filePath, timestepsPerHour):
+        # Honeybee csv schedules have 4 lines of header and values in the 5th column
+        return self.readScheduleFile(filePath, 4, 4, timestepsPerHour)
+    
+    def readScheduleFile(self, filePath, columnIndex, rowsToSkip, timestepsPerHour):
+        if not os.path.isfile(filePath):
+            raise ValueError("Failed to find the schedule file: " + filePath)
+        
+        fileValues = array.array('d')
+        with open(filePath, "r") as schFile:
+            for lineCount, line in enumerate(schFile):
+                if lineCount < rowsToSkip: continue
+                columns = line.split(',')
+                if len(columns) <= columnIndex: continue
+                try: fileValues.append(float(columns[columnIndex]))
+                except ValueError: pass
+        
+        if timestepsPerHour == 1 or len(fileValues) != 8760:
+            return fileValues
+        
+        # repeat hourly values for each timestep
+        scheduleValues = array.array('d')
+        for value in fileValues:
+            scheduleValues.extend(array.array('d', [value]) * timestepsPerHour)
+        return scheduleValues
 
-            if scheduleType == "schedule:year":
-                hourlyValues = self.getYearlyEPScheduleValues(schName)
-            elif scheduleType == "schedule:day:interval":
-                hourlyValues = self.getDayEPScheduleValues(schName)
-            elif scheduleType == "schedule:week:daily":
-                hourlyValues = self.getWeeklyEPScheduleValues(schName)
-            elif scheduleType == "schedule:constant":
-                hourlyValues = self.getConstantEPScheduleValues(schName)
-            else:
-                print "Honeybee doesn't support " + scheduleType + " currently." + \
-                      "Email us the type and we will try to add it to Honeybee."
-                      
-                hourlyValues = []
-            
-            return hourlyValues
 
 class EPTypes(object):
     def __init__(self):
@@ -5117,6 +8630,8 @@ class EPZone(object):
     
     def transform(self, transform, clearSurfacesBC = True, flip = False):
         self.name += "_t"
+        # geometry can be shared with the object in the hive
+        self.geometry = self.geometry.Duplicate()
         self.geometry.Transform(transform)
         self.cenPt.Transform(transform)
         for surface in self.surfaces:
@@ -5253,15 +8768,20 @@ class EPZone(object):
                 if cenpt == HBSrf.cenPt:
                     if nVecs[count] != HBSrf.normalVector:
                         print "Normal direction for " + HBSrf.name + " is fixed by Honeybee!"
+                        # geometries can be shared with the objects in the hive
+                        HBSrf.geometry = HBSrf.geometry.Duplicate()
                         HBSrf.geometry.Flip()
                         HBSrf.normalVector.Reverse()
                         HBSrf.basePlane.Flip()
-                        try: HBSrf.punchedGeometry.Flip()
+                        try:
+                            HBSrf.punchedGeometry = HBSrf.punchedGeometry.Duplicate()
+                            HBSrf.punchedGeometry.Flip()
                         except: pass
                         if HBSrf.hasChild and HBSrf.isPlanar:
                             for childSrf in HBSrf.childSrfs:
                                 if childSrf.normalVector != nVecs[count]:
                                     print "Normal direction for " + childSrf.name + " is fixed by Honeybee!"
+                                    childSrf.geometry = childSrf.geometry.Duplicate()
                                     childSrf.geometry.Flip()
                                     childSrf.normalVector.Reverse()
                                     childSrf.basePlane.Flip()
@@ -5275,6 +8795,7 @@ class EPZone(object):
                                 vecAngleDiff = math.degrees(rc.Geometry.Vector3d.VectorAngle(nVecs[count], childSrf.normalVector))
                                 if vecAngleDiff > 45:
                                     print "Normal direction for " + childSrf.name + " is fixed by Honeybee!"
+                                    childSrf.geometry = childSrf.geometry.Duplicate()
                                     childSrf.geometry.Flip()
                                     childSrf.normalVector.Reverse()
         
@@ -6417,14 +9938,12 @@ class hb_EPSurface(object):
         #print self.meshedFace.Faces.Count
     
     def disposeCurrentMeshes(self):
-        if self.meshedFace.Faces.Count>0:
-            self.meshedFace.Dispose()
-            self.meshedFace = rc.Geometry.Mesh()
+        # meshes can be shared with the objects in the hive so they are
+        # replaced and not disposed. collectMeshFaces appends to the new mesh.
+        self.meshedFace = rc.Geometry.Mesh()
         if self.hasChild:
             for fenSrf in self.childSrfs:
-                if fenSrf.meshedFace.Faces.Count>0:
-                    fenSrf.meshedFace.Dispose()
-                    fenSrf.meshedFace = rc.Geometry.Mesh()
+                fenSrf.meshedFace = rc.Geometry.Mesh()
     
     def getSrfCenPtandNormalAlternate(self):
         brepFace = self.geometry.Faces[0]
@@ -6554,6 +10073,9 @@ class hb_EPSurface(object):
            Transform can be any valid transform object (e.g Translate, Rotate, Mirror)
         """
         self.name += "_t"
+        # geometry and mesh can be shared with the object in the hive
+        self.geometry = self.geometry.Duplicate()
+        self.meshedFace = self.meshedFace.Duplicate()
         self.geometry.Transform(transform)
         self.meshedFace.Transform(transform)
         # move center point and normal
@@ -6572,6 +10094,7 @@ class hb_EPSurface(object):
             self.setBCObjectToOutdoors()
             
         if not self.isChild and self.hasChild:
+            self.punchedGeometry = self.punchedGeometry.Duplicate()
             self.punchedGeometry.Transform(transform)
             if flip: self.punchedGeometry.Flip()
             
@@ -7463,6 +10986,375 @@ class zoneNetworkSolving(object):
         return newAjdacenList
 
 
+class hb_SurfacePlaneIndex(object):
+    """
+    Spatial index of Honeybee zone surfaces for adjacency solving
+
+    Surfaces are bucketed by their plane (unit normal + offset from the model center).
+    A query only returns surfaces that are coplanar, facing the opposite direction
+    and have an overlapping bounding box with the test surface so the exact
+    (and expensive) closest point check only runs for real candidates.
+    Surfaces with exactly the same normal direction are also returned unless
+    oppositeFacingOnly is set to True.
+    """
+
+    def __init__(self, HBZones, tol = None, angleTol = None, oppositeFacingOnly = False):
+        if tol == None: tol = sc.doc.ModelAbsoluteTolerance
+        if angleTol == None: angleTol = sc.doc.ModelAngleToleranceRadians
+
+        self.tol = tol
+        self.angleTol = angleTol
+        self.oppositeFacingOnly = oppositeFacingOnly
+        self.buckets = {}
+        self.nonPlanarSrfs = []
+        self.srfData = {}
+
+        # collect surface data
+        # key is (zone index, surface index) so the results can be sorted in input order
+        allCenPts = []
+        for zoneCount, HBZone in enumerate(HBZones):
+            for srfCount, HBSrf in enumerate(HBZone.surfaces):
+                normal = rc.Geometry.Vector3d(HBSrf.normalVector)
+                normal.Unitize()
+                bbox = HBSrf.geometry.GetBoundingBox(True)
+                bbox.Inflate(tol)
+                self.srfData[(zoneCount, srfCount)] = [HBZone, HBSrf, normal, bbox]
+                allCenPts.append(HBSrf.cenPt)
+
+        # move the origin to the center of the model to keep offsets small
+        if len(allCenPts) != 0:
+            self.origin = rc.Geometry.BoundingBox(allCenPts).Center
+        else:
+            self.origin = rc.Geometry.Point3d.Origin
+
+        # an error in normal direction shows up as an error in offset
+        # proportional to the distance from the origin
+        maxDist = max([self.origin.DistanceTo(pt) for pt in allCenPts] + [0])
+        self.offsetRes = max(2 * tol, 2 * angleTol * maxDist)
+        self.normalRes = max(2 * angleTol, 1e-3)
+
+        for key, (HBZone, HBSrf, normal, bbox) in self.srfData.items():
+            if not HBSrf.isPlanar:
+                self.nonPlanarSrfs.append(key)
+                continue
+            planeKey = self.getPlaneKey(normal, self.getOffset(normal, HBSrf.cenPt))
+            if planeKey not in self.buckets: self.buckets[planeKey] = []
+            self.buckets[planeKey].append(key)
+
+    def getOffset(self, normal, pt):
+        return normal * (pt - self.origin)
+
+    def getPlaneKey(self, normal, offset):
+        return (int(round(normal.X / self.normalRes)), int(round(normal.Y / self.normalRes)), \
+                int(round(normal.Z / self.normalRes)), int(round(offset / self.offsetRes)))
+
+    def getNeighbourKeys(self, planeKey):
+        keys = []
+        nx, ny, nz, d = planeKey
+        for i in (-1, 0, 1):
+            for j in (-1, 0, 1):
+                for k in (-1, 0, 1):
+                    for l in (-1, 0, 1):
+                        keys.append((nx + i, ny + j, nz + k, d + l))
+        return keys
+
+    def isCandidate(self, HBSrf, normal, bbox, candidateKey):
+        candidateSrf, candidateNormal, candidateBBox = self.srfData[candidateKey][1:]
+
+        # opposite facing
+        if rc.Geometry.Vector3d.VectorAngle(candidateNormal, -normal) > self.angleTol:
+            # surfaces with the very same direction have always been accepted
+            if self.oppositeFacingOnly or \
+               rc.Geometry.Vector3d.VectorAngle(HBSrf.normalVector, candidateSrf.normalVector) != 0:
+                return False
+
+        # overlapping bounding boxes
+        if bbox.Min.X > candidateBBox.Max.X or bbox.Max.X < candidateBBox.Min.X: return False
+        if bbox.Min.Y > candidateBBox.Max.Y or bbox.Max.Y < candidateBBox.Min.Y: return False
+        if bbox.Min.Z > candidateBBox.Max.Z or bbox.Max.Z < candidateBBox.Min.Z: return False
+
+        return True
+
+    def getCandidates(self, zoneCount, srfCount):
+        """
+        Return a sorted list of (zone index, surface index) for surfaces from
+        other zones that can be adjacent to this surface
+        """
+        HBZone, HBSrf, normal, bbox = self.srfData[(zoneCount, srfCount)]
+
+        if HBSrf.isPlanar:
+            # look for the opposite plane
+            planeKeys = [self.getPlaneKey(-normal, -self.getOffset(normal, HBSrf.cenPt))]
+            if not self.oppositeFacingOnly:
+                # and the same plane for the surfaces with the same direction
+                planeKeys.append(self.getPlaneKey(normal, self.getOffset(normal, HBSrf.cenPt)))
+            keys = []
+            for planeKey in planeKeys:
+                for neighbourKey in self.getNeighbourKeys(planeKey):
+                    if neighbourKey in self.buckets:
+                        keys.extend(self.buckets[neighbourKey])
+            keys.extend(self.nonPlanarSrfs)
+        else:
+            keys = self.srfData.keys()
+
+        candidates = []
+        for key in set(keys):
+            if key[0] == zoneCount: continue
+            if self.isCandidate(HBSrf, normal, bbox, key):
+                candidates.append(key)
+
+        candidates.sort()
+        return candidates
+
+    def getSurface(self, key):
+        return self.srfData[key][:2]
+
+
+class hb_HiveStore(object):
+    """
+    Managed store for Honeybee objects that are added to the hive.
+    
+    Objects are grouped by the component that added them. All the objects that a
+    component adds during a single Grasshopper solution are one generation. Once the
+    component adds a new generation the objects of the previous one are superseded
+    and removed from the store. The store can also be limited to an approximate
+    number of bytes in which case the least recently used objects are removed first.
+    
+    Args:
+        maxBytes: Optional approximate memory budget in bytes. Default is None (no limit).
+    """
+    
+    def __init__(self, maxBytes = None):
+        self.maxBytes = maxBytes
+        self.objects = {}
+        self.objectSizes = {}
+        self.objectComponents = {}
+        self.lastAccess = {}
+        self.accessCount = 0
+        # keys and solution number of the current generation of each component
+        self.componentKeys = {}
+        self.componentGenerations = {}
+        self.solutionCount = 0
+        self.lastComponentId = None
+        self.watchedDocuments = set()
+        self.documents = []
+        # watched component instances by id and the ones that expired since they
+        # last added objects
+        self.watchedComponents = {}
+        self.expiredComponents = set()
+        self.totalBytes = 0
+        # keep one reference to the handler so it can be removed from the event
+        self.expiredHandler = self.onComponentExpired
+    
+    def __contains__(self, key):
+        return key in self.objects
+    
+    def has_key(self, key):
+        return key in self.objects
+    
+    def __getitem__(self, key):
+        HBObject = self.objects[key]
+        self.accessCount += 1
+        self.lastAccess[key] = self.accessCount
+        return HBObject
+    
+    def __len__(self):
+        return len(self.objects)
+    
+    def keys(self):
+        return self.objects.keys()
+    
+    def items(self):
+        return self.objects.items()
+    
+    def watchDocument(self, document):
+        """Count the solutions of a Grasshopper document to find new generations."""
+        if document == None: return
+        docId = document.DocumentID.ToString()
+        if docId in self.watchedDocuments: return
+        try:
+            document.SolutionStart += self.onSolutionStart
+            document.ObjectsDeleted += self.onObjectsDeleted
+            self.watchedDocuments.add(docId)
+            self.documents.append(document)
+        except Exception, e:
+            print "Failed to watch Grasshopper solutions for the hive: " + `e`
+    
+    def onSolutionStart(self, sender, e):
+        self.solutionCount += 1
+    
+    def onObjectsDeleted(self, sender, e):
+        # remove the objects of the deleted components and stop watching them
+        for obj in e.Objects:
+            try: componentId = obj.InstanceGuid.ToString()
+            except: continue
+            self.removeComponent(componentId)
+    
+    def watchComponent(self, componentId):
+        """
+        Watch a component instance so the next time it solves it starts a new generation.
+        Returns True if the component is found in one of the watched documents.
+        """
+        if componentId in self.watchedComponents: return True
+        for document in self.documents:
+            try:
+                component = document.FindObject(System.Guid(componentId), False)
+                if component == None: continue
+                component.SolutionExpired += self.expiredHandler
+                self.watchedComponents[componentId] = component
+                return True
+            except Exception, e:
+                print "Failed to watch the component for the hive: " + `e`
+                return False
+        return False
+    
+    def unwatchComponent(self, componentId):
+        """Remove the SolutionExpired handler of a watched component."""
+        component = self.watchedComponents.pop(componentId, None)
+        self.expiredComponents.discard(componentId)
+        if component == None: return
+        try: component.SolutionExpired -= self.expiredHandler
+        except: pass
+    
+    def onComponentExpired(self, sender, e):
+        self.expiredComponents.add(sender.InstanceGuid.ToString())
+    
+    def startGeneration(self, componentId):
+        """
+        Start a new generation for the component if this is the first time it adds
+        objects in the current solution. Returns True if a new generation is started.
+        """
+        if self.watchComponent(componentId):
+            # the component expires before every new solution of its own
+            isNewGeneration = componentId in self.expiredComponents or \
+                              componentId not in self.componentKeys
+            self.expiredComponents.discard(componentId)
+        elif self.watchedDocuments:
+            isNewGeneration = self.componentGenerations.get(componentId) != self.solutionCount
+        else:
+            # no solution events. objects from the same component in a row are one generation
+            isNewGeneration = self.lastComponentId != componentId
+        
+        self.lastComponentId = componentId
+        if not isNewGeneration: return False
+        
+        # remove the objects from the superseded generation
+        for key in list(self.componentKeys.get(componentId, ())):
+            self.removeObject(key)
+        
+        self.componentKeys[componentId] = set()
+        self.componentGenerations[componentId] = self.solutionCount
+        return True
+    
+    def addObject(self, componentId, key, HBObject):
+        if key in self.objects: self.removeObject(key)
+        
+        size = self.getApproximateSize(HBObject)
+        self.objects[key] = HBObject
+        self.objectSizes[key] = size
+        self.objectComponents[key] = componentId
+        self.accessCount += 1
+        self.lastAccess[key] = self.accessCount
+        self.totalBytes += size
+        self.componentKeys.setdefault(componentId, set()).add(key)
+    
+    def removeObject(self, key):
+        if key not in self.objects: return
+        
+        del self.objects[key]
+        del self.lastAccess[key]
+        self.totalBytes -= self.objectSizes.pop(key)
+        componentId = self.objectComponents.pop(key)
+        try: self.componentKeys[componentId].discard(key)
+        except KeyError: pass
+    
+    def removeComponent(self, componentId):
+        """Remove all the objects that are added by a component and stop watching it."""
+        for key in list(self.componentKeys.get(componentId, ())):
+            self.removeObject(key)
+        self.componentKeys.pop(componentId, None)
+        self.componentGenerations.pop(componentId, None)
+        self.unwatchComponent(componentId)
+        if self.lastComponentId == componentId: self.lastComponentId = None
+    
+    def applyMemoryBudget(self, componentId = None):
+        """
+        Remove the least recently used objects until the store is under maxBytes.
+        Objects of the current generation of componentId are not removed.
+        """
+        if self.maxBytes == None or self.totalBytes <= self.maxBytes: return 0
+        
+        protectedKeys = self.componentKeys.get(componentId, set())
+        keys = sorted(self.objects.keys(), key = lambda k: self.lastAccess[k])
+        removedCount = 0
+        for key in keys:
+            if self.totalBytes <= self.maxBytes: break
+            if key in protectedKeys: continue
+            self.removeObject(key)
+            removedCount += 1
+        
+        return removedCount
+    
+    @staticmethod
+    def getGeometrySize(geometry):
+        """Return an approximate size of a Rhino geometry in bytes."""
+        try:
+            if isinstance(geometry, rc.Geometry.Mesh):
+                return 28 * geometry.Vertices.Count + 16 * geometry.Faces.Count
+            elif isinstance(geometry, rc.Geometry.Brep):
+                return 1024 * geometry.Faces.Count + 256 * geometry.Edges.Count + 64 * geometry.Vertices.Count
+        except: pass
+        return 256
+    
+    def getApproximateSize(self, HBObject):
+        """Return an approximate size of a Honeybee object and its children in bytes."""
+        size = 0
+        visited = set()
+        objectsToVisit = [HBObject]
+        while objectsToVisit:
+            obj = objectsToVisit.pop()
+            if id(obj) in visited: continue
+            visited.add(id(obj))
+            
+            try: attributes = obj.__dict__.items()
+            except AttributeError: continue
+            
+            size += 64 * len(attributes)
+            for attrName, attr in attributes:
+                # parent objects are counted under their own key
+                if attrName == "parent": continue
+                
+                if isinstance(attr, (list, tuple)): items = attr
+                else: items = [attr]
+                
+                for item in items:
+                    if isinstance(item, rc.Geometry.GeometryBase):
+                        if id(item) in visited: continue
+                        visited.add(id(item))
+                        size += self.getGeometrySize(item)
+                    elif hasattr(item, "objectType"):
+                        objectsToVisit.append(item)
+        return size
+    
+    def getStats(self):
+        """
+        Return a dictionary with the number of objects and the approximate bytes
+        for the whole store and for each component.
+        """
+        components = {}
+        for key, componentId in self.objectComponents.items():
+            if componentId not in components:
+                components[componentId] = {"numOfObjects": 0, "approximateBytes": 0, \
+                                           "generation": self.componentGenerations.get(componentId)}
+            components[componentId]["numOfObjects"] += 1
+            components[componentId]["approximateBytes"] += self.objectSizes[key]
+        
+        return {"numOfObjects": len(self.objects),
+                "approximateBytes": self.totalBytes,
+                "maxBytes": self.maxBytes,
+                "components": components}
+
+
 class hb_Hive(object):
     
     class CopyClass(object):
@@ -7488,18 +11380,49 @@ class hb_Hive(object):
         elif bb1.Max.DistanceTo(bb2.Max) > 5 * sc.doc.ModelAbsoluteTolerance:
             raise Exception(msg)
             
-    def addToHoneybeeHive(self, HBObjects, GHComponentID):
-        # check if the honeybeedictionary already existed
-        # if not create the dictionary
+    def getHive(self):
+        """Return the object store of the hive. Create it if it doesn't exist."""
+        # check if the honeybee store already existed
+        # if not create the store
         # eventually this should be generated as soon as they user let the bee fly
-        if not sc.sticky.has_key('HBHive'): sc.sticky['HBHive'] = {}
+        # check the behaviour and not the class. Once Honeybee flies again the store
+        # in sticky is an instance of the previous hb_HiveStore class
+        if not sc.sticky.has_key('HBHive'): sc.sticky['HBHive'] = hb_HiveStore()
+        elif not hasattr(sc.sticky['HBHive'], 'addObject'):
+            # dictionary from an older version
+            hive = hb_HiveStore()
+            for key, HBObject in sc.sticky['HBHive'].items():
+                hive.addObject(key[:36], key, HBObject)
+            sc.sticky['HBHive'] = hive
+        
+        try: sc.sticky['HBHive'].watchDocument(ghenv.Component.OnPingDocument())
+        except: pass
+        
+        return sc.sticky['HBHive']
+    
+    def getHiveStats(self):
+        """Return number of objects and approximate bytes in the hive for each component."""
+        return self.getHive().getStats()
+    
+    def setHiveMaxBytes(self, maxBytes):
+        """Set an approximate memory budget for the hive. Use None for no limit."""
+        hive = self.getHive()
+        hive.maxBytes = maxBytes
+        hive.applyMemoryBudget()
+    
+    def addToHoneybeeHive(self, HBObjects, GHComponentID):
+        hive = self.getHive()
+        # the first 36 characters are the InstanceGuid of the component
+        componentId = GHComponentID[:36]
+        hive.startGeneration(componentId)
+        
         geometries = []
         childGeometries = []
         
         for HBObject in HBObjects:
             key = GHComponentID + HBObject.name
             
-            sc.sticky['HBHive'][key] = HBObject
+            hive.addObject(componentId, key, HBObject)
             
             # assuming that all the HBOBjects has a geometry! I assume they do
             
@@ -7544,41 +11467,67 @@ class hb_Hive(object):
                 geometries.append(geometry)
             except Exception, e:
                 print "Reached the maximum array size for UserDictionary: " + `e`
-                    
+        
+        hive.applyMemoryBudget(componentId)
+        
         # return geometry with the ID
         return geometries
         
+    def getSharedGeometryMemo(self, HBObject):
+        """
+        Return a copy.deepcopy memo that maps every Rhino geometry of a Honeybee
+        object and its related Honeybee objects to itself.
+        
+        Using this memo, copy.deepcopy copies the Honeybee objects but keeps the
+        geometries and meshes shared between the original and the copy.
+        """
+        memo = {}
+        visited = set()
+        objectsToVisit = [HBObject]
+        while objectsToVisit:
+            obj = objectsToVisit.pop()
+            if id(obj) in visited: continue
+            visited.add(id(obj))
+            
+            try: attributes = obj.__dict__.values()
+            except AttributeError: continue
+            
+            for attr in attributes:
+                if isinstance(attr, (list, tuple)): items = attr
+                else: items = [attr]
+                
+                for item in items:
+                    if isinstance(item, rc.Geometry.GeometryBase):
+                        memo[id(item)] = item
+                    elif hasattr(item, "objectType"):
+                        # zones, surfaces, child surfaces and parents
+                        objectsToVisit.append(item)
+        return memo
+    
     def callFromHoneybeeHive(self, geometryList):
+        hive = self.getHive()
         HBObjects = []
         for geometry in geometryList:
             
             key = geometry.UserDictionary['HBID']
-            if sc.sticky['HBHive'].has_key(key):
-                HBObject = sc.sticky['HBHive'][key]
+            if hive.has_key(key):
+                HBObject = hive[key]
                 
                 # make sure Honeybee object is not moved or rotated
                 self.checkifTransformed(geometry, HBObject)
                 
                 try:
-                    # after the first round meshedFace makes copy.deepcopy crash
-                    # so I need to regenerate meshFaces
-                    if HBObject.objectType == "HBZone":
-                        for surface in HBObject.surfaces:
-                            newMesh = rc.Geometry.Mesh()
-                            newMesh.Append(surface.meshedFace)
-                            surface.meshedFace = newMesh
-                    elif HBObject.objectType == "HBSurface": 
-                        newMesh = rc.Geometry.Mesh()
-                        newMesh.Append(HBObject.meshedFace)
-                        HBObject.meshedFace = newMesh
-                    
-                    HBObjects.append(copy.deepcopy(HBObject))
+                    # copy the object but share Rhino geometries and meshes with the
+                    # object in the hive. Methods that change the geometry in place
+                    # duplicate it first (copy-on-write) so the hive stays untouched.
+                    memo = self.getSharedGeometryMemo(HBObject)
+                    HBObjects.append(copy.deepcopy(HBObject, memo))
                     
                 except Exception, e:
                     print `e`
                     print "Failed to copy the object. Returning the original objects...\n" +\
                     "This can cause strange behaviour!"
-                    HBObjects.append(sc.sticky['HBHive'][key])
+                    HBObjects.append(HBObject)
                 
         return HBObjects
 
@@ -7611,7 +11560,13 @@ class hb_RADParameters(object):
 
 class hb_DSParameters(object):
     
-    def __init__(self, outputUnits = [2], dynamicSHDGroup_1 = None,  dynamicSHDGroup_2 = None, RhinoViewsName = [] , adaptiveZone = False, dgp_imageSize = 250, onlyRunGlareAnalysis = True):
+    def __init__(self, outputUnits = [2], dynamicSHDGroup_1 = None,  dynamicSHDGroup_2 = None, RhinoViewsName = [] , adaptiveZone = False, dgp_imageSize = 250, onlyRunGlareAnalysis = True, writeBinaryResults = False, useMatrixEngine = False):
+        
+        # write a binary copy of the .ill files after the study (see hb_AnnualResultsStore)
+        self.writeBinaryResults = writeBinaryResults
+        
+        # run the study with daylight coefficients and a sky matrix instead of Daysim (see hb_AnnualDaylightMatrix)
+        self.useMatrixEngine = useMatrixEngine
         
         if len(outputUnits)!=0 and outputUnits[0]!=None: self.outputUnits = outputUnits
         else: self.outputUnits = [2]
@@ -8115,7 +12070,7 @@ if checkIn.letItFly:
                   "Download the files from address below and copy them to: " + sc.sticky["Honeybee_DefaultFolder"] + \
                   "\nhttps://github.com/mostaphaRoudsari/Honeybee/tree/master/resources\n"
         if libFilePaths != -1:
-            EPLibs = HB_GetEPLibraries()
+            EPLibs = HB_GetEPLibraries(os.path.join(sc.sticky["Honeybee_DefaultFolder"], "libraryCache"))
             
             try:
                 for pathCount, path in enumerate(libFilePaths):
@@ -8145,6 +12100,8 @@ if checkIn.letItFly:
             
             
         sc.sticky["honeybee_Hive"] = hb_Hive
+        sc.sticky["honeybee_HiveStore"] = hb_HiveStore
+        sc.sticky["honeybee_SurfacePlaneIndex"] = hb_SurfacePlaneIndex
         sc.sticky["honeybee_generationHive"] = generationhb_hive
         sc.sticky["honeybee_GetEPLibs"] = HB_GetEPLibraries
         sc.sticky["honeybee_DefaultMaterialLib"] = materialLibrary
@@ -8154,6 +12111,7 @@ if checkIn.letItFly:
         sc.sticky["honeybee_EPScheduleAUX"] = EPScheduleAux
         sc.sticky["honeybee_EPObjectsAUX"] = EPObjectsAux
         sc.sticky["honeybee_ReadSchedules"] = ReadEPSchedules
+        sc.sticky["honeybee_ScheduleCompiler"] = hb_ScheduleCompiler
         sc.sticky["honeybee_BuildingProgramsLib"] = BuildingProgramsLib
         sc.sticky["honeybee_EPTypes"] = EPTypes()
         sc.sticky["honeybee_EPZone"] = EPZone
@@ -8194,6 +12152,14 @@ if checkIn.letItFly:
         sc.sticky["honeybee_RADParameters"] = hb_RADParameters
         sc.sticky["honeybee_DSParameters"] = hb_DSParameters
         sc.sticky["honeybee_ReadAnnualResultsAux"] = hb_ReadAnnualResultsAux
+        sc.sticky["honeybee_EPBatchRunner"] = hb_EPBatchRunner
+        sc.sticky["honeybee_EPCSVReader"] = hb_EPCSVReader
+        sc.sticky["honeybee_EPSQLReader"] = hb_EPSQLReader
+        sc.sticky["honeybee_SkyCache"] = hb_SkyCache
+        sc.sticky["honeybee_IllFileReader"] = hb_IllFileReader
+        sc.sticky["honeybee_AnnualResultsStore"] = hb_AnnualResultsStore
+        sc.sticky["honeybee_DaylightMetrics"] = hb_DaylightMetrics
+        sc.sticky["honeybee_PointKDTree"] = hb_PointKDTree
         sc.sticky["honeybee_EPParameters"] = hb_EnergySimulatioParameters
         sc.sticky["honeybee_SerializeObjects"] = SerializeObjects
         sc.sticky["honeybee_GridBasedDLResults"] = CalculateGridBasedDLAnalysisResults
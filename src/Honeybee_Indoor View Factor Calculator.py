@@ -76,7 +76,6 @@ from Grasshopper.Kernel.Data import GH_Path
 import Rhino as rc
 import rhinoscriptsyntax as rs
 import scriptcontext as sc
-import operator
 import System.Threading.Tasks as tasks
 import time
 
@@ -1192,113 +1191,270 @@ def checkViewResolution(viewResolution, lb_preparation):
     
     return newVecs, skyViewVecs
 
-def allSame(items):
-    return all(x == items[0] for x in items)
-
-def parallel_projection(zoneSrfsMesh, viewVectors, pointList):
-    #Placeholder for the outcome of the parallel projection.
-    pointIntList = []
-    for point in pointList: pointIntList.append([])
+class MeshRayTree(object):
+    """
+    A bounding volume hierarchy over the triangles of several lists of meshes.
     
-    #Keep track of the divisor.
-    divisor = len(viewVectors)
+    The tree is built once per zone and is shared by all of the test points so that
+    each ray only gets tested against the few triangles that lie along its path
+    instead of every surface mesh of the zone.
+    The triangle test of the tree is slightly looser than MeshRay so it never misses
+    a mesh that MeshRay hits. Every mesh that the tree finds is then checked with
+    rc.Geometry.Intersect.Intersection.MeshRay, so hits on the edges and the vertices
+    of the meshes are the same as testing every mesh with MeshRay.
     
-    def intersect(i):
-        point = pointList[i]
-        #Create the rays to be projected from each point.
-        pointRays = []
-        for vec in viewVectors: pointRays.append(rc.Geometry.Ray3d(point, vec))
+    Args:
+        meshGroups: A list of mesh lists (e.g. [zoneSrfsMesh, zoneOpaqueMesh, zoneWindowMesh]).
+            Hits are reported with the index of the mesh inside its own group.
+        leafSize: Maximum number of triangles in each leaf of the tree.
+        tolerance: Distance that the boxes of the triangles are inflated. Default is
+            the absolute tolerance of the Rhino document.
+    """
+    
+    def __init__(self, meshGroups, leafSize = 4, tolerance = None):
+        self.leafSize = leafSize
+        self.meshGroups = meshGroups
+        if tolerance == None: tolerance = sc.doc.ModelAbsoluteTolerance
+        self.tolerance = tolerance
+        
+        # each triangle is (vertex 0, edge 1, edge 2, group index, mesh index)
+        self.triangles = []
+        for groupCount, meshes in enumerate(meshGroups):
+            for meshCount, mesh in enumerate(meshes):
+                for triangle in self.getMeshTriangles(mesh):
+                    self.addTriangle(triangle, groupCount, meshCount)
+        
+        # nodes are stored in flat lists. Leaves have no children and
+        # keep the start and end index of their triangles.
+        self.nodeMin = []
+        self.nodeMax = []
+        self.nodeChildren = []
+        self.nodeRange = []
+        
+        if len(self.triangles) != 0:
+            self.buildNode(0, len(self.triangles))
+    
+    @staticmethod
+    def getMeshTriangles(mesh):
+        triangles = []
+        vertices = mesh.Vertices
+        for face in mesh.Faces:
+            ptA, ptB, ptC = vertices[face.A], vertices[face.B], vertices[face.C]
+            triangles.append((ptA, ptB, ptC))
+            if face.IsQuad: triangles.append((ptA, ptC, vertices[face.D]))
+        return triangles
+    
+    def addTriangle(self, triangle, groupCount, meshCount):
+        ptA, ptB, ptC = triangle
+        v0 = (ptA.X, ptA.Y, ptA.Z)
+        e1 = (ptB.X - ptA.X, ptB.Y - ptA.Y, ptB.Z - ptA.Z)
+        e2 = (ptC.X - ptA.X, ptC.Y - ptA.Y, ptC.Z - ptA.Z)
+        xs, ys, zs = (ptA.X, ptB.X, ptC.X), (ptA.Y, ptB.Y, ptC.Y), (ptA.Z, ptB.Z, ptC.Z)
+        # inflate the box so the rays that touch an edge of the triangle aren't lost to rounding
+        tol = self.tolerance
+        bbox = ((min(xs) - tol, min(ys) - tol, min(zs) - tol), (max(xs) + tol, max(ys) + tol, max(zs) + tol))
+        center = ((bbox[0][0] + bbox[1][0]) / 2.0, (bbox[0][1] + bbox[1][1]) / 2.0, (bbox[0][2] + bbox[1][2]) / 2.0)
+        self.triangles.append((v0, e1, e2, groupCount, meshCount, bbox, center))
+    
+    def buildNode(self, start, end):
+        nodeIndex = len(self.nodeMin)
+        tris = self.triangles[start:end]
+        self.nodeMin.append(tuple(min(tri[5][0][axis] for tri in tris) for axis in range(3)))
+        self.nodeMax.append(tuple(max(tri[5][1][axis] for tri in tris) for axis in range(3)))
+        self.nodeChildren.append(None)
+        self.nodeRange.append((start, end))
+        
+        if end - start <= self.leafSize: return nodeIndex
+        
+        # split along the longest axis of the triangle centers
+        centerMin = [min(tri[6][axis] for tri in tris) for axis in range(3)]
+        centerMax = [max(tri[6][axis] for tri in tris) for axis in range(3)]
+        extents = [centerMax[axis] - centerMin[axis] for axis in range(3)]
+        axis = extents.index(max(extents))
+        if extents[axis] == 0: return nodeIndex
+        
+        tris.sort(key = lambda tri: tri[6][axis])
+        self.triangles[start:end] = tris
+        middle = (start + end) // 2
+        
+        leftIndex = self.buildNode(start, middle)
+        rightIndex = self.buildNode(middle, end)
+        self.nodeChildren[nodeIndex] = (leftIndex, rightIndex)
+        
+        return nodeIndex
+    
+    def rayHitsBox(self, nodeIndex, origin, invDir, maxT):
+        tMin, tMax = 0, maxT
+        boxMin, boxMax = self.nodeMin[nodeIndex], self.nodeMax[nodeIndex]
+        for axis in range(3):
+            t1 = (boxMin[axis] - origin[axis]) * invDir[axis]
+            t2 = (boxMax[axis] - origin[axis]) * invDir[axis]
+            if t1 > t2: t1, t2 = t2, t1
+            if t1 > tMin: tMin = t1
+            if t2 < tMax: tMax = t2
+            if tMin > tMax: return False
+        return True
+    
+    @staticmethod
+    def rayHitsTriangle(origin, direction, triangle, epsilon = 1e-4):
+        # Moller-Trumbore. returns the ray parameter or -1 if the ray misses the triangle.
+        # epsilon keeps the rays that pass close to an edge so MeshRay can decide
+        v0, e1, e2 = triangle[:3]
+        px = direction[1] * e2[2] - direction[2] * e2[1]
+        py = direction[2] * e2[0] - direction[0] * e2[2]
+        pz = direction[0] * e2[1] - direction[1] * e2[0]
+        det = e1[0] * px + e1[1] * py + e1[2] * pz
+        if abs(det) < 1e-12: return -1
+        invDet = 1.0 / det
         
-        #Create a list that will hold the intersection hits of each surface
-        srfHits = []
-        for srf in zoneSrfsMesh: srfHits.append([])
+        tx, ty, tz = origin[0] - v0[0], origin[1] - v0[1], origin[2] - v0[2]
+        u = (tx * px + ty * py + tz * pz) * invDet
+        if u < -epsilon or u > 1 + epsilon: return -1
         
-        #Perform the intersection of the rays with the mesh.
-        pointIntersectList = []
-        for rayCount, ray in enumerate(pointRays):
-            pointIntersectList.append([])
-            for srf in zoneSrfsMesh:
-                intersect = rc.Geometry.Intersect.Intersection.MeshRay(srf, ray)
-                if intersect == -1: intersect = "N"
-                pointIntersectList[rayCount].append(intersect)
+        qx = ty * e1[2] - tz * e1[1]
+        qy = tz * e1[0] - tx * e1[2]
+        qz = tx * e1[1] - ty * e1[0]
+        v = (direction[0] * qx + direction[1] * qy + direction[2] * qz) * invDet
+        if v < -epsilon or u + v > 1 + epsilon: return -1
         
-        #Find the intersection that was the closest for each ray.
-        for list in pointIntersectList:
-            if allSame(list) == False:
-                minIndex, minValue = min(enumerate(list), key=operator.itemgetter(1))
-                srfHits[minIndex].append(1)
+        t = (e2[0] * qx + e2[1] * qy + e2[2] * qz) * invDet
+        if t < -epsilon: return -1
+        return max(t, 0)
+    
+    def shootRay(self, point, vector, nearestGroup = 0, hitsGroup = None):
+        """
+        Shoot a ray through the tree. Meshes that the tree finds are checked with MeshRay.
         
-        #Sum up the lists and divide by the total rays to get the view factor.
-        for hitList in srfHits:
-            pointIntList[i].append(sum(hitList)/divisor)
+        Returns:
+            nearestIndex: Index of the closest mesh of nearestGroup that is hit by the ray (-1 if none).
+                If two meshes are hit at the same distance, the one with the lower index is returned.
+            hits: An ordered list of the indices of all the meshes in hitsGroup that are hit by the ray.
+        """
+        ray = rc.Geometry.Ray3d(point, vector)
+        def meshRay(groupCount, meshCount):
+            return rc.Geometry.Intersect.Intersection.MeshRay(self.meshGroups[groupCount][meshCount], ray)
+        
+        return self.traceRay((point.X, point.Y, point.Z), (vector.X, vector.Y, vector.Z), \
+                             meshRay, nearestGroup, hitsGroup)
+    
+    def traceRay(self, origin, direction, meshRay, nearestGroup = 0, hitsGroup = None):
+        """
+        Shoot a ray through the tree with the origin and direction as tuples of 3 floats.
+        
+        meshRay(groupCount, meshCount) returns the ray parameter of the hit with a mesh
+        or a negative number if the ray misses it. It is only called once for each mesh
+        that the tree finds along the ray. The return values are the same as shootRay.
+        """
+        nearestIndex, nearestT = -1, float("inf")
+        hits = set()
+        if len(self.nodeMin) == 0: return nearestIndex, []
+        
+        meshHits = {}
+        invDir = tuple(1.0 / d if d != 0 else float("inf") for d in direction)
+        # avoid nan from 0 * inf in the slab test
+        invDir = tuple(d if d != float("inf") else 1e300 for d in invDir)
+        
+        stack = [0]
+        while stack:
+            nodeIndex = stack.pop()
+            # leave some room for the difference between the tree and MeshRay
+            maxT = nearestT * (1 + 1e-6) + 1e-6 if hitsGroup == None else float("inf")
+            if not self.rayHitsBox(nodeIndex, origin, invDir, maxT): continue
+            
+            children = self.nodeChildren[nodeIndex]
+            if children != None:
+                stack.extend(children)
+                continue
+            
+            start, end = self.nodeRange[nodeIndex]
+            for triangle in self.triangles[start:end]:
+                groupCount, meshCount = triangle[3], triangle[4]
+                if groupCount != nearestGroup and groupCount != hitsGroup: continue
+                # the mesh is already checked with MeshRay
+                if (groupCount, meshCount) in meshHits: continue
+                if self.rayHitsTriangle(origin, direction, triangle) < 0: continue
+                t = meshHits[(groupCount, meshCount)] = meshRay(groupCount, meshCount)
+                if t < 0: continue
+                if groupCount == hitsGroup: hits.add(meshCount)
+                if groupCount == nearestGroup:
+                    if t < nearestT or (t == nearestT and meshCount < nearestIndex):
+                        nearestIndex, nearestT = meshCount, t
+        
+        return nearestIndex, sorted(hits)
+
+
+def buildZoneRayTrees(zoneSrfsMesh, zoneOpaqueMesh, zoneWindowMesh):
+    #Build one tree for each zone with all of the surface, opaque and window meshes.
+    zoneRayTrees = []
+    for zoneCount, srfMeshes in enumerate(zoneSrfsMesh):
+        try: opaqueMeshes = zoneOpaqueMesh[zoneCount]
+        except: opaqueMeshes = []
+        try: windowMeshes = zoneWindowMesh[zoneCount]
+        except: windowMeshes = []
+        zoneRayTrees.append(MeshRayTree([srfMeshes, opaqueMeshes, windowMeshes]))
+    
+    return zoneRayTrees
+
+def getPointViewFactors(rayTree, srfCount, viewVectors, point):
+    #Find the closest surface that each ray hits.
+    srfHits = [0] * srfCount
+    for vec in viewVectors:
+        srfIndex, windowHits = rayTree.shootRay(point, vec, nearestGroup = 0)
+        if srfIndex != -1: srfHits[srfIndex] += 1
+    
+    #Sum up the hits and divide by the total rays to get the view factor.
+    divisor = len(viewVectors)
+    return [hitCount/divisor for hitCount in srfHits]
+
+def getPointSkyView(rayTree, skyViewVecs, point, zoneWindowTransmiss, zoneHasWindows, zoneWindowNames):
+    finalViewCount = []
+    finalWindowNameCount = []
+    for vec in skyViewVecs:
+        opaqueIndex, windowHits = rayTree.shootRay(point, vec, nearestGroup = 1, hitsGroup = 2)
+        if opaqueIndex == -1:
+            if zoneHasWindows == 2:
+                #This is the code to indicate that the point is outside and there is no need to calculate a window transmissivity.
+                finalViewCount.append(1)
+                finalWindowNameCount.append(0)
+            else:
+                #The ray is not blocked but it is hitting a window and so we need to factor in the window transmissivity.
+                transmiss = 1
+                winNameList = []
+                for winCount in windowHits:
+                    transmiss = transmiss * zoneWindowTransmiss[winCount]
+                    winNameList.append(zoneWindowNames[winCount].upper())
+                finalViewCount.append(transmiss)
+                finalWindowNameCount.append(winNameList)
+        else:
+            #The ray has been blocked by an opaque surface.
+            finalViewCount.append(0)
+            finalWindowNameCount.append(0)
+    
+    #Sum up the lists and divide by the total rays to get the view factor.
+    divisor = len(skyViewVecs)
+    return sum(finalViewCount)/divisor, finalViewCount, finalWindowNameCount
+
+def parallel_projection(rayTree, srfCount, viewVectors, pointList):
+    #Placeholder for the outcome of the parallel projection.
+    pointIntList = [None] * len(pointList)
+    
+    def intersect(i):
+        pointIntList[i] = getPointViewFactors(rayTree, srfCount, viewVectors, pointList[i])
     
     tasks.Parallel.ForEach(range(len(pointList)), intersect)
     
     return pointIntList
 
 
-def parallel_skyProjection(zoneOpaqueMesh, skyViewVecs, pointList, zoneWindowMesh, zoneWindowTransmiss, zoneHasWindows, zoneWindowNames):
+def parallel_skyProjection(rayTree, skyViewVecs, pointList, zoneWindowTransmiss, zoneHasWindows, zoneWindowNames):
     #Placeholder for the outcome of the parallel projection.
-    pointIntList = []
-    skyBlockedList = []
-    skyBlockWindowNameCount = []
-    for num in range(len(pointList)):
-        pointIntList.append(0.0)
-        skyBlockedList.append([])
-        skyBlockWindowNameCount.append([])
-    
-    #Keep track of the divisor.
-    divisor = len(skyViewVecs)
+    pointIntList = [0.0] * len(pointList)
+    skyBlockedList = [[] for num in range(len(pointList))]
+    skyBlockWindowNameCount = [[] for num in range(len(pointList))]
     
     def intersect(i):
-        point = pointList[i]
-        #Create the rays to be projected from each point.
-        pointRays = []
-        for vec in skyViewVecs: pointRays.append(rc.Geometry.Ray3d(point, vec))
-        
-        #Perform the intersection of the rays with the opaque mesh.
-        pointIntersectList = []
-        for rayCount, ray in enumerate(pointRays):
-            pointIntersectList.append([])
-            for srf in zoneOpaqueMesh:
-                intersect = rc.Geometry.Intersect.Intersection.MeshRay(srf, ray)
-                if intersect == -1: pass
-                else: pointIntersectList[rayCount].append(1)
-        
-        #See if the ray passed all of the context meshes.
-        finalIntersectList = []
-        for ray in pointRays:
-            finalIntersectList.append([])
-        for listCt, rayList in enumerate(pointIntersectList):
-            for intersect in rayList:
-                finalIntersectList[listCt].append(intersect)
-        
-        finalViewCount = []
-        finalWindowNameCount = []
-        for rayListCount, rayList in enumerate(finalIntersectList):
-            if sum(rayList) == 0:
-                if zoneHasWindows == 2:
-                    finalViewCount.append(1)
-                    finalWindowNameCount.append(0)
-                else:
-                    transmiss = 1
-                    winNameList = []
-                    for winCount, winMesh in enumerate(zoneWindowMesh):
-                        intersect = rc.Geometry.Intersect.Intersection.MeshRay(winMesh, pointRays[rayListCount])
-                        if intersect == -1: pass
-                        else:
-                            transmiss = transmiss * zoneWindowTransmiss[winCount]
-                            winNameList.append(zoneWindowNames[winCount].upper())
-                    finalViewCount.append(transmiss)
-                    finalWindowNameCount.append(winNameList)
-            else:
-                finalViewCount.append(0)
-                finalWindowNameCount.append(0)
-        
-        #Sum up the lists and divide by the total rays to get the view factor.
-        skyBlockedList[i] = finalViewCount
-        skyBlockWindowNameCount[i] = finalWindowNameCount
-        pointIntList[i] = sum(finalViewCount)/divisor
+        pointIntList[i], skyBlockedList[i], skyBlockWindowNameCount[i] = \
+            getPointSkyView(rayTree, skyViewVecs, pointList[i], zoneWindowTransmiss, zoneHasWindows, zoneWindowNames)
     
     tasks.Parallel.ForEach(range(len(pointList)), intersect)
     
@@ -1311,7 +1467,7 @@ def checkOutdoorViewFac(outdoorTestPtViewFactor):
     return outdoorNonSrfViewFac
 
 
-def skyViewCalc(testPts, zoneOpaqueMesh, skyViewVecs, zoneHasWindows, zoneWindowMesh, zoneWindowTransmiss, zoneWindowNames):
+def skyViewCalc(testPts, zoneRayTrees, skyViewVecs, zoneHasWindows, zoneWindowTransmiss, zoneWindowNames):
     testPtSkyView = []
     testPtSkyBlockedList = []
     testPtBlockName = []
@@ -1319,7 +1475,7 @@ def skyViewCalc(testPts, zoneOpaqueMesh, skyViewVecs, zoneHasWindows, zoneWindow
     for zoneCount, pointList in enumerate(testPts):
         if zoneHasWindows[zoneCount] > 0:
             if parallel_ == True or parallel_ == None:
-                skyViewFactors, skyBlockedList, finalWindowNameCount = parallel_skyProjection(zoneOpaqueMesh[zoneCount], skyViewVecs, testPts[zoneCount], zoneWindowMesh[zoneCount], zoneWindowTransmiss[zoneCount], zoneHasWindows[zoneCount], zoneWindowNames[zoneCount])
+                skyViewFactors, skyBlockedList, finalWindowNameCount = parallel_skyProjection(zoneRayTrees[zoneCount], skyViewVecs, pointList, zoneWindowTransmiss[zoneCount], zoneHasWindows[zoneCount], zoneWindowNames[zoneCount])
                 testPtSkyView.append(skyViewFactors)
                 testPtSkyBlockedList.append(skyBlockedList)
                 testPtBlockName.append(finalWindowNameCount)
@@ -1328,57 +1484,9 @@ def skyViewCalc(testPts, zoneOpaqueMesh, skyViewVecs, zoneHasWindows, zoneWindow
                 testPtSkyBlockedList.append([])
                 testPtBlockName.append([])
                 for pointCount, point in enumerate(pointList):
-                    #Make the list that will eventually hold the view factors of each surface.
-                    divisor = len(skyViewVecs)
-                    
-                    #Create the rays to be projected from each point.
-                    pointRays = []
-                    for vec in skyViewVecs: pointRays.append(rc.Geometry.Ray3d(point, vec))
-                    
-                    #Perform the intersection of the rays with the opaque mesh.
-                    pointIntersectList = []
-                    for rayCount, ray in enumerate(pointRays):
-                        pointIntersectList.append([])
-                        for srf in zoneOpaqueMesh[zoneCount]:
-                            intersect = rc.Geometry.Intersect.Intersection.MeshRay(srf, ray)
-                            if intersect == -1: pointIntersectList[rayCount].append(0)
-                            else: pointIntersectList[rayCount].append(1)
-                    
-                    #See if the ray passed all of the context meshes.
-                    finalIntersectList = []
-                    for ray in pointRays:
-                        finalIntersectList.append([])
-                    for listCt, rayList in enumerate(pointIntersectList):
-                        for intersect in rayList:
-                            finalIntersectList[listCt].append(intersect)
-                    
-                    finalViewCount = []
-                    finalWindowNameCount = []
-                    for rayListCount, rayList in enumerate(finalIntersectList):
-                        if sum(rayList) == 0:
-                            if zoneHasWindows[zoneCount] == 2:
-                                finalViewCount.append(1) #This is the code to indicate that the point is outside and there is no need to calculate a window transmissivity.
-                                finalWindowNameCount.append(0)
-                            else:
-                                #The ray is not blocked but it is hitting a window and so we need to factor in the window transmissivity.
-                                transmiss = 1
-                                winNameList = []
-                                for winCount, winMesh in enumerate(zoneWindowMesh[zoneCount]):
-                                    intersect = rc.Geometry.Intersect.Intersection.MeshRay(winMesh, pointRays[rayListCount])
-                                    if intersect == -1: pass
-                                    else:
-                                        transmiss = transmiss * zoneWindowTransmiss[zoneCount][winCount]
-                                        winNameList.append(zoneWindowNames[zoneCount][winCount].upper())
-                                finalViewCount.append(transmiss)
-                                finalWindowNameCount.append(winNameList)
-                        else:
-                            #The ray has been blocked by an opaque surface.
-                            finalViewCount.append(0)
-                            finalWindowNameCount.append(0)
-                    
-                    #Sum up the lists and divide by the total rays to get the view factor.
+                    skyView, finalViewCount, finalWindowNameCount = getPointSkyView(zoneRayTrees[zoneCount], skyViewVecs, point, zoneWindowTransmiss[zoneCount], zoneHasWindows[zoneCount], zoneWindowNames[zoneCount])
                     testPtSkyBlockedList[zoneCount].append(finalViewCount)
-                    testPtSkyView[zoneCount].append(sum(finalViewCount)/divisor)
+                    testPtSkyView[zoneCount].append(skyView)
                     testPtBlockName[zoneCount].append(finalWindowNameCount)
         else:
             testPtSkyView.append(0)
@@ -1388,49 +1496,18 @@ def skyViewCalc(testPts, zoneOpaqueMesh, skyViewVecs, zoneHasWindows, zoneWindow
     return testPtSkyView, testPtSkyBlockedList, testPtBlockName
 
 
-def main(testPts, zoneSrfsMesh, viewVectors, includeOutdoor):
+def main(testPts, zoneSrfsMesh, zoneRayTrees, viewVectors, includeOutdoor):
     testPtViewFactor = []
     
     for zoneCount, pointList in enumerate(testPts):
+        srfCount = len(zoneSrfsMesh[zoneCount])
         if parallel_ == True  or parallel_ == None:
-            viewFactors = parallel_projection(zoneSrfsMesh[zoneCount], viewVectors, testPts[zoneCount])
+            viewFactors = parallel_projection(zoneRayTrees[zoneCount], srfCount, viewVectors, pointList)
             testPtViewFactor.append(viewFactors)
         else:
             testPtViewFactor.append([])
             for pointCount, point in enumerate(pointList):
-                #Make the list that will eventually hold the view factors of each surface.
-                testPtViewFactor[zoneCount].append([])
-                divisor = len(viewVectors)
-                
-                #Create the rays to be projected from each point.
-                pointRays = []
-                for vec in viewVectors: pointRays.append(rc.Geometry.Ray3d(point, vec))
-                
-                #Create a list that will hold the intersection hits of each surface
-                srfHits = []
-                for srf in zoneSrfsMesh[zoneCount]: srfHits.append([])
-                
-                #Perform the intersection of the rays with the mesh.
-                pointIntersectList = []
-                for rayCount, ray in enumerate(pointRays):
-                    pointIntersectList.append([])
-                    for srf in zoneSrfsMesh[zoneCount]:
-                        intersect = rc.Geometry.Intersect.Intersection.MeshRay(srf, ray)
-                        if intersect == -1: intersect = "N"
-                        pointIntersectList[rayCount].append(intersect)
-                
-                #Find the intersection that was the closest for each ray.
-                for list in pointIntersectList:
-                    try:
-                        if allSame(list) == False:
-                            minIndex, minValue = min(enumerate(list), key=operator.itemgetter(1))
-                            srfHits[minIndex].append(1)
-                    except: pass
-                
-                #Sum up the lists and divide by the total rays to get the view factor.
-                for hitList in srfHits:
-                    testPtViewFactor[zoneCount][pointCount].append(sum(hitList)/divisor)
-    
+                testPtViewFactor[zoneCount].append(getPointViewFactors(zoneRayTrees[zoneCount], srfCount, viewVectors, point))
     
     return testPtViewFactor
 
@@ -1564,8 +1641,9 @@ if checkData == True and buildMesh == True:
 if checkData == True and _runIt == True and geoCheck == True and buildMesh == True:
     start = time.clock()
     viewVectors, skyViewVecs = checkViewResolution(viewResolution, lb_preparation)
-    testPtViewFactor = main(testPtsInit, zoneSrfsMesh, viewVectors, includeOutdoor)
-    testPtSkyView, testPtBlockedVec, testPtBlockName = skyViewCalc(testPtsInit, zoneOpaqueMesh, skyViewVecs, zoneHasWindows, zoneWindowMesh, zoneWindowTransmiss, zoneWindowNames)
+    zoneRayTrees = buildZoneRayTrees(zoneSrfsMesh, zoneOpaqueMesh, zoneWindowMesh)
+    testPtViewFactor = main(testPtsInit, zoneSrfsMesh, zoneRayTrees, viewVectors, includeOutdoor)
+    testPtSkyView, testPtBlockedVec, testPtBlockName = skyViewCalc(testPtsInit, zoneRayTrees, skyViewVecs, zoneHasWindows, zoneWindowTransmiss, zoneWindowNames)
     
     outdoorNonSrfViewFac = []
     if sectionMethod != 0 and includeOutdoor == True:
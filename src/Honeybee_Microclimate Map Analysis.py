@@ -260,27 +260,50 @@ def processPrevailOutdoorTemp(prevailingOutdoorTemp, avgMonthOrRunMean):
     return prevailTemp, coldTimes
 
 
-def calculatePointMRT(srfTempDict, testPtsViewFactor, hour, originalHour, outdoorClac, outSrfTempDict, outdoorNonSrfViewFac, prevailingOutdoorTemp):
-    #Calculate the MRT for each point.
+def createSrfTempMatrix(srfTempDict, testPtsViewFactor, outdoorClac, outSrfTempDict):
+    #Collect the surface temperature lists of each zone in the same order as the surfaces of the view factor matrix.
+    #This way, the temperatures of an hour are looked up once per zone instead of once per point.
+    srfTempMtx = []
+    for zoneCount, pointList in enumerate(testPtsViewFactor):
+        if outdoorClac == False or zoneCount != len(testPtsViewFactor)-1: tempDict = srfTempDict
+        else: tempDict = outSrfTempDict
+        
+        srfTempMtx.append([])
+        if len(pointList) == 0: continue
+        for srfCount in range(len(pointList[0])):
+            try: srfTempMtx[zoneCount].append(tempDict[str([zoneCount,srfCount])]["srfTemp"])
+            except: srfTempMtx[zoneCount].append(None)
+    
+    return srfTempMtx
+
+def createZoneValueMatrix(zoneDict, datakey):
+    #Collect the hourly values of each zone in the order of the zone weights.
+    zoneValueMtx = []
+    for path in range(len(zoneDict)):
+        try: zoneValueMtx.append(zoneDict[path][datakey])
+        except: zoneValueMtx.append(None)
+    
+    return zoneValueMtx
+
+def getHourValues(valueMtx, hour):
+    #Pull out a single hour from each list of hourly values.
+    hourValues = []
+    for values in valueMtx:
+        if values != None: hourValues.append(values[hour])
+        else: hourValues.append(None)
+    return hourValues
+
+def calculatePointMRT(srfTempMtx, testPtsViewFactor, hour, originalHour, outdoorClac, outdoorNonSrfViewFac, prevailingOutdoorTemp):
+    #Calculate the MRT for each point by multiplying the view factors with the surface temperatures of the hour.
     pointMRTValues = []
     for zoneCount, pointList in enumerate(testPtsViewFactor):
+        hourSrfTemps = getHourValues(srfTempMtx[zoneCount], hour)
         if outdoorClac == False or zoneCount != len(testPtsViewFactor)-1:
-            pointMRTValues.append([])
-            for pointViewFactor in pointList:
-                pointMRT = 0
-                for srfCount, srfView in enumerate(pointViewFactor):
-                    path  = str([zoneCount,srfCount])
-                    weightedSrfTemp = srfView*(srfTempDict[path]["srfTemp"][hour])
-                    pointMRT = pointMRT+weightedSrfTemp
-                pointMRTValues[zoneCount].append(round(pointMRT, 3))
+            pointMRTValues.append([round(sum([srfView*srfTemp for srfView, srfTemp in zip(pointViewFactor, hourSrfTemps)]), 3) for pointViewFactor in pointList])
         else:
             pointMRTValues.append([])
             for ptCount, pointViewFactor in enumerate(pointList):
-                pointMRT = 0
-                for srfCount, srfView in enumerate(pointViewFactor):
-                    path  = str([zoneCount,srfCount])
-                    weightedSrfTemp = srfView*(outSrfTempDict[path]["srfTemp"][hour])
-                    pointMRT = pointMRT+weightedSrfTemp
+                pointMRT = sum([srfView*srfTemp for srfView, srfTemp in zip(pointViewFactor, hourSrfTemps)])
                 weightedSrfTemp = outdoorNonSrfViewFac[ptCount]*prevailingOutdoorTemp[originalHour]
                 pointMRT = pointMRT+weightedSrfTemp
                 pointMRTValues[zoneCount].append(round(pointMRT, 3))
@@ -401,27 +424,35 @@ def calculateSolarAdjustedMRT(pointMRTValues, stepOfSimulation, originalHour, di
     return solarAdjustedPointMRTValues
 
 
-def getAirPointValue(airTempDict, testPtZoneWeights, testPtsViewFactor, hour, originalHour, outdoorClac, prevailingOutdoorTemp):
-    #Calculate the value for each point.
+def getAirPointValue(zoneValueMtx, testPtZoneWeights, testPtsViewFactor, hour, originalHour, outdoorClac, prevailingOutdoorTemp):
+    #Calculate the value for each point by multiplying the zone weights with the zone values of the hour.
     pointValues = []
+    hourZoneValues = getHourValues(zoneValueMtx, hour)
     for zoneCount, pointList in enumerate(testPtsViewFactor):
         if outdoorClac == False or zoneCount != len(testPtsViewFactor)-1:
-            pointValues.append([])
-            for pointWeght in testPtZoneWeights[zoneCount]:
-                pointValue = 0
-                for Count, weight in enumerate(pointWeght):
-                    path  = Count
-                    weightedPointVal = weight*(airTempDict[path]["airTemp"][hour])
-                    pointValue = pointValue+weightedPointVal
-                pointValues[zoneCount].append(round(pointValue, 3))
+            pointValues.append([round(sum([weight*zoneValue for weight, zoneValue in zip(pointWeght, hourZoneValues)]), 3) for pointWeght in testPtZoneWeights[zoneCount]])
         else:
-            pointValues.append([])
-            for pointWeght in pointList:
-                pointValue = prevailingOutdoorTemp[originalHour]
-                pointValues[zoneCount].append(round(pointValue, 3))
+            pointValue = round(prevailingOutdoorTemp[originalHour], 3)
+            pointValues.append([pointValue] * len(pointList))
     
     return pointValues
 
+def getPointWindSpeed(flowVolValues, projectedAreas, testPtsViewFactor, originalHour, outdoorClac, allWindSpeedsSame, winSpeedNumbers, outWindSpeed, outdoorPtHeightWeights, d, a, lb_wind):
+    #Compute the wind speed of each zone once and copy it for all of the zone points.
+    pointWindSpeedValues = []
+    for pointListCount, pointList in enumerate(testPtsViewFactor):
+        if outdoorClac == False or pointListCount != len(testPtsViewFactor)-1:
+            windFlowVal = flowVolValues[pointListCount]/projectedAreas[pointListCount]
+            if allWindSpeedsSame == True: windFlowVal = windFlowVal + winSpeedNumbers[originalHour-1]
+            else: windFlowVal = windFlowVal + winSpeedNumbers[pointListCount][originalHour-1]
+            pointWindSpeedValues.extend([windFlowVal] * len(pointList))
+        else:
+            for valCount, val in enumerate(pointList):
+                ptWindSpeed = lb_wind.calcWindSpeedBasedOnHeight(outWindSpeed[originalHour-1], outdoorPtHeightWeights[valCount], d, a, 270, 0.14)
+                pointWindSpeedValues.append(ptWindSpeed)
+    
+    return pointWindSpeedValues
+
 
 def warpByHeight(pointAirTempValues, ptHeightWeights, flowVolValues, heatGainValues, adjacentList, adjacentNameList, groupedInletArea, groupedZoneHeights, groupedGlzHeights, groupedWinCeilDiffs, outdoorClac, prevailingOutdoorTemp):
     #Get a list of total heat gain for each of the grouped zones.
@@ -837,6 +868,10 @@ def mainAdapt(HOYs, analysisPeriod, srfTempNumbers, srfTempHeaders, airTempDataN
         #Run through every hour of the analysis to fill up the matrices.
         calcCancelled = False
         try:
+            #Build the matrices of surface temperatures and zone values that get multiplied by the point view factors and weights every hour.
+            srfTempMtx = createSrfTempMatrix(srfTempDict, testPtsViewFactor, outdoorClac, outSrfTempDict)
+            zoneAirTempMtx = createZoneValueMatrix(airTempDict, "airTemp")
+            
             def climateMap(count):
                 #Ability to cancel with Esc
                 if gh.GH_Document.IsEscapeKeyDown(): assert False
@@ -852,7 +887,7 @@ def mainAdapt(HOYs, analysisPeriod, srfTempNumbers, srfTempHeaders, airTempDataN
                 for zoneVal in heatGainDataNumbers: heatGainValues.append(zoneVal[hour-1])
                 
                 #Compute the radiant temperature.
-                pointMRTValues = calculatePointMRT(srfTempDict, testPtsViewFactor, hour-1, originalHour-1, outdoorClac, outSrfTempDict, outdoorNonSrfViewFac, prevailingOutdoorTemp)
+                pointMRTValues = calculatePointMRT(srfTempMtx, testPtsViewFactor, hour-1, originalHour-1, outdoorClac, outdoorNonSrfViewFac, prevailingOutdoorTemp)
                 if sum(zoneHasWindows) != 0:
                     if allWindowShadesSame == True: pointMRTValues = calculateSolarAdjustedMRT(pointMRTValues, hour, originalHour, diffSolarRad, directSolarRad, globHorizRad, count, sunVecInfo, testPtSkyView, testPtBlockedVec, winTrans, cloA, floorR, skyPatchMeshes, zoneHasWindows, outdoorClac, lb_comfortModels)
                     else:
@@ -863,39 +898,17 @@ def mainAdapt(HOYs, analysisPeriod, srfTempNumbers, srfTempHeaders, airTempDataN
                 radTempMtx[count+1] = pointMRTValues
                 
                 #Compute the air temperature.
-                pointAirTempValues = getAirPointValue(airTempDict, testPtZoneWeights, testPtsViewFactor, hour-1, originalHour-1, outdoorClac, prevailingOutdoorTemp)
+                pointAirTempValues = getAirPointValue(zoneAirTempMtx, testPtZoneWeights, testPtsViewFactor, hour-1, originalHour-1, outdoorClac, prevailingOutdoorTemp)
                 if mixedAirOverride[hour-1] == 0: pointAirTempValues = warpByHeight(pointAirTempValues, ptHeightWeights, flowVolValues, heatGainValues, adjacentList, adjacentNameList, groupedInletArea, groupedZoneHeights, groupedGlzHeights, groupedWinCeilDiffs, outdoorClac, prevailingOutdoorTemp)
                 pointAirTempValues = lb_preparation.flattenList(pointAirTempValues)
                 airTempMtx[count+1] = pointAirTempValues
                 
                 #Compute the operative temperature.
-                pointOpTempValues = []
-                for ptCount, airTemp in enumerate(pointAirTempValues):
-                    pointOpTempValues.append((airTemp+pointMRTValues[ptCount])/2)
+                pointOpTempValues = [(airTemp+pointMRT)/2 for airTemp, pointMRT in zip(pointAirTempValues, pointMRTValues)]
                 operativeTempMtx[count+1] = pointOpTempValues
                 
                 #Compute the wind speed.
-                pointWindSpeedValues = []
-                if outdoorClac == True:
-                    for pointListCount, pointList in enumerate(testPtsViewFactor):
-                        if pointListCount != len(testPtsViewFactor)-1:
-                            for val in pointList:
-                                windFlowVal = flowVolValues[pointListCount]/projectedAreas[pointListCount]
-                                if allWindSpeedsSame == True: windFlowVal = windFlowVal + winSpeedNumbers[originalHour-1]
-                                else:
-                                    windFlowVal = windFlowVal + winSpeedNumbers[pointListCount][originalHour-1]
-                                pointWindSpeedValues.append(windFlowVal)
-                        else:
-                            for valCount, val in enumerate(pointList):
-                                ptWindSpeed = lb_wind.calcWindSpeedBasedOnHeight(outWindSpeed[originalHour-1], outdoorPtHeightWeights[valCount], d, a, 270, 0.14)
-                                pointWindSpeedValues.append(ptWindSpeed)
-                else:
-                    for pointListCount, pointList in enumerate(testPtsViewFactor):
-                        for val in pointList:
-                            windFlowVal = flowVolValues[pointListCount]/projectedAreas[pointListCount]
-                            if allWindSpeedsSame == True: windFlowVal = windFlowVal + winSpeedNumbers[originalHour-1]
-                            else: windFlowVal = windFlowVal + winSpeedNumbers[pointListCount][originalHour-1]
-                            pointWindSpeedValues.append(windFlowVal)
+                pointWindSpeedValues = getPointWindSpeed(flowVolValues, projectedAreas, testPtsViewFactor, originalHour, outdoorClac, allWindSpeedsSame, winSpeedNumbers, outWindSpeed, outdoorPtHeightWeights, d, a, lb_wind)
                 
                 #Compute the adaptive comfort and deg from target.
                 adaptComfPointValues = []
@@ -1034,6 +1047,11 @@ def mainPMV(HOYs, analysisPeriod, srfTempNumbers, srfTempHeaders, airTempDataNum
         #Run through every hour of the analysis to fill up the matrices.
         calcCancelled = False
         try:
+            #Build the matrices of surface temperatures and zone values that get multiplied by the point view factors and weights every hour.
+            srfTempMtx = createSrfTempMatrix(srfTempDict, testPtsViewFactor, outdoorClac, outSrfTempDict)
+            zoneAirTempMtx = createZoneValueMatrix(airTempDict, "airTemp")
+            zoneRelHumidMtx = createZoneValueMatrix(relHumidDict, "airTemp")
+            
             def climateMapPMV(count):
                 #Ability to cancel with Esc
                 if gh.GH_Document.IsEscapeKeyDown(): assert False
@@ -1049,7 +1067,7 @@ def mainPMV(HOYs, analysisPeriod, srfTempNumbers, srfTempHeaders, airTempDataNum
                 for zoneVal in heatGainDataNumbers: heatGainValues.append(zoneVal[hour-1])
                 
                 #Compute the radiant temperature.
-                pointMRTValues = calculatePointMRT(srfTempDict, testPtsViewFactor, hour-1, originalHour-1, outdoorClac, outSrfTempDict, outdoorNonSrfViewFac, outDryBulbTemp)
+                pointMRTValues = calculatePointMRT(srfTempMtx, testPtsViewFactor, hour-1, originalHour-1, outdoorClac, outdoorNonSrfViewFac, outDryBulbTemp)
                 if sum(zoneHasWindows) != 0:
                     if allWindowShadesSame == True: pointMRTValues = calculateSolarAdjustedMRT(pointMRTValues, hour, originalHour, diffSolarRad, directSolarRad, globHorizRad, count, sunVecInfo, testPtSkyView, testPtBlockedVec, winTrans, cloA, floorR, skyPatchMeshes, zoneHasWindows, outdoorClac, lb_comfortModels)
                     else:
@@ -1060,37 +1078,17 @@ def mainPMV(HOYs, analysisPeriod, srfTempNumbers, srfTempHeaders, airTempDataNum
                 radTempMtx[count+1] = pointMRTValues
                 
                 #Compute the air temperature.
-                pointAirTempValues = getAirPointValue(airTempDict, testPtZoneWeights, testPtsViewFactor, hour-1, originalHour-1, outdoorClac, outDryBulbTemp)
+                pointAirTempValues = getAirPointValue(zoneAirTempMtx, testPtZoneWeights, testPtsViewFactor, hour-1, originalHour-1, outdoorClac, outDryBulbTemp)
                 if mixedAirOverride[hour-1] == 0: pointAirTempValues = warpByHeight(pointAirTempValues, ptHeightWeights, flowVolValues, heatGainValues, adjacentList, adjacentNameList, groupedInletArea, groupedZoneHeights, groupedGlzHeights, groupedWinCeilDiffs, outdoorClac, outDryBulbTemp)
                 pointAirTempValues = lb_preparation.flattenList(pointAirTempValues)
                 airTempMtx[count+1] = pointAirTempValues
                 
                 #Compute the relative humidity.
-                pointRelHumidValues = getAirPointValue(relHumidDict, testPtZoneWeights, testPtsViewFactor, hour-1, originalHour-1, outdoorClac, outRelHumid)
+                pointRelHumidValues = getAirPointValue(zoneRelHumidMtx, testPtZoneWeights, testPtsViewFactor, hour-1, originalHour-1, outdoorClac, outRelHumid)
                 pointRelHumidValues = lb_preparation.flattenList(pointRelHumidValues)
                 
                 #Compute the wind speed.
-                pointWindSpeedValues = []
-                if outdoorClac == True:
-                    for pointListCount, pointList in enumerate(testPtsViewFactor):
-                        if pointListCount != len(testPtsViewFactor)-1:
-                            for val in pointList:
-                                windFlowVal = flowVolValues[pointListCount]/projectedAreas[pointListCount]
-                                if allWindSpeedsSame == True: windFlowVal = windFlowVal + winSpeedNumbers[originalHour-1]
-                                else:
-                                    windFlowVal = windFlowVal + winSpeedNumbers[pointListCount][originalHour-1]
-                                pointWindSpeedValues.append(windFlowVal)
-                        else:
-                            for valCount, val in enumerate(pointList):
-                                ptWindSpeed = lb_wind.calcWindSpeedBasedOnHeight(outWindSpeed[originalHour-1], outdoorPtHeightWeights[valCount], d, a, 270, 0.14)
-                                pointWindSpeedValues.append(ptWindSpeed)
-                else:
-                    for pointListCount, pointList in enumerate(testPtsViewFactor):
-                        for val in pointList:
-                            windFlowVal = flowVolValues[pointListCount]/projectedAreas[pointListCount]
-                            if allWindSpeedsSame == True: windFlowVal = windFlowVal + winSpeedNumbers[originalHour-1]
-                            else: windFlowVal = windFlowVal + winSpeedNumbers[pointListCount][originalHour-1]
-                            pointWindSpeedValues.append(windFlowVal)
+                pointWindSpeedValues = getPointWindSpeed(flowVolValues, projectedAreas, testPtsViewFactor, originalHour, outdoorClac, allWindSpeedsSame, winSpeedNumbers, outWindSpeed, outdoorPtHeightWeights, d, a, lb_wind)
                 
                 #Compute the SET and PMV comfort.
                 setPointValues = []
@@ -1249,6 +1247,11 @@ def mainUTCI(HOYs, analysisPeriod, srfTempNumbers, srfTempHeaders, airTempDataNu
         #Run through every hour of the analysis to fill up the matrices.
         calcCancelled = False
         try:
+            #Build the matrices of surface temperatures and zone values that get multiplied by the point view factors and weights every hour.
+            srfTempMtx = createSrfTempMatrix(srfTempDict, testPtsViewFactor, outdoorClac, outSrfTempDict)
+            zoneAirTempMtx = createZoneValueMatrix(airTempDict, "airTemp")
+            zoneRelHumidMtx = createZoneValueMatrix(relHumidDict, "airTemp")
+            
             def climateMapUTCI(count):
                 #Ability to cancel with Esc
                 if gh.GH_Document.IsEscapeKeyDown(): assert False
@@ -1264,7 +1267,7 @@ def mainUTCI(HOYs, analysisPeriod, srfTempNumbers, srfTempHeaders, airTempDataNu
                 for zoneVal in heatGainDataNumbers: heatGainValues.append(zoneVal[hour-1])
                 
                 #Compute the radiant temperature.
-                pointMRTValues = calculatePointMRT(srfTempDict, testPtsViewFactor, hour-1, originalHour-1, outdoorClac, outSrfTempDict, outdoorNonSrfViewFac, outDryBulbTemp)
+                pointMRTValues = calculatePointMRT(srfTempMtx, testPtsViewFactor, hour-1, originalHour-1, outdoorClac, outdoorNonSrfViewFac, outDryBulbTemp)
                 if sum(zoneHasWindows) != 0:
                     if allWindowShadesSame == True: pointMRTValues = calculateSolarAdjustedMRT(pointMRTValues, hour, originalHour, diffSolarRad, directSolarRad, globHorizRad, count, sunVecInfo, testPtSkyView, testPtBlockedVec, winTrans, cloA, floorR, skyPatchMeshes, zoneHasWindows, outdoorClac, lb_comfortModels)
                     else:
@@ -1275,37 +1278,17 @@ def mainUTCI(HOYs, analysisPeriod, srfTempNumbers, srfTempHeaders, airTempDataNu
                 radTempMtx[count+1] = pointMRTValues
                 
                 #Compute the air temperature.
-                pointAirTempValues = getAirPointValue(airTempDict, testPtZoneWeights, testPtsViewFactor, hour-1, originalHour-1, outdoorClac, outDryBulbTemp)
+                pointAirTempValues = getAirPointValue(zoneAirTempMtx, testPtZoneWeights, testPtsViewFactor, hour-1, originalHour-1, outdoorClac, outDryBulbTemp)
                 if mixedAirOverride[hour-1] == 0: pointAirTempValues = warpByHeight(pointAirTempValues, ptHeightWeights, flowVolValues, heatGainValues, adjacentList, adjacentNameList, groupedInletArea, groupedZoneHeights, groupedGlzHeights, groupedWinCeilDiffs, outdoorClac, outDryBulbTemp)
                 pointAirTempValues = lb_preparation.flattenList(pointAirTempValues)
                 airTempMtx[count+1] = pointAirTempValues
                 
                 #Compute the relative humidity.
-                pointRelHumidValues = getAirPointValue(relHumidDict, testPtZoneWeights, testPtsViewFactor, hour-1, originalHour-1, outdoorClac, outRelHumid)
+                pointRelHumidValues = getAirPointValue(zoneRelHumidMtx, testPtZoneWeights, testPtsViewFactor, hour-1, originalHour-1, outdoorClac, outRelHumid)
                 pointRelHumidValues = lb_preparation.flattenList(pointRelHumidValues)
                 
                 #Compute the wind speed.
-                pointWindSpeedValues = []
-                if outdoorClac == True:
-                    for pointListCount, pointList in enumerate(testPtsViewFactor):
-                        if pointListCount != len(testPtsViewFactor)-1:
-                            for val in pointList:
-                                windFlowVal = flowVolValues[pointListCount]/projectedAreas[pointListCount]
-                                if allWindSpeedsSame == True: windFlowVal = windFlowVal + winSpeedNumbers[originalHour-1]
-                                else:
-                                    windFlowVal = windFlowVal + winSpeedNumbers[pointListCount][originalHour-1]
-                                pointWindSpeedValues.append(windFlowVal)
-                        else:
-                            for valCount, val in enumerate(pointList):
-                                ptWindSpeed = lb_wind.calcWindSpeedBasedOnHeight(outWindSpeed[originalHour-1], newOutdoorPtHeightWeights[valCount], d, a, 270, 0.14)
-                                pointWindSpeedValues.append(ptWindSpeed)
-                else:
-                    for pointListCount, pointList in enumerate(testPtsViewFactor):
-                        for val in pointList:
-                            windFlowVal = flowVolValues[pointListCount]/projectedAreas[pointListCount]
-                            if allWindSpeedsSame == True: windFlowVal = windFlowVal + winSpeedNumbers[originalHour-1]
-                            else: windFlowVal = windFlowVal + winSpeedNumbers[pointListCount][originalHour-1]
-                            pointWindSpeedValues.append(windFlowVal)
+                pointWindSpeedValues = getPointWindSpeed(flowVolValues, projectedAreas, testPtsViewFactor, originalHour, outdoorClac, allWindSpeedsSame, winSpeedNumbers, outWindSpeed, newOutdoorPtHeightWeights, d, a, lb_wind)
                 
                 #Compute the SET and PMV comfort.
                 utciPointValues = []
@@ -37,6 +37,7 @@ Provided by Honeybee 0.0.58
         _ar_: Ambient resolution. "This number will determine the maximum density of ambient values used in interpolation. Error will start to increase on surfaces spaced closer than the scene size divided by the ambient resolution. The maximum ambient value density is the scene size times the ambient accuracy."
         _aa_: Ambient accuracy. "This value will approximately equal the error from indirect illuminance interpolation. A value of zero implies no interpolation"
         additionalP_: Use this input to set other Radiance parameters as needed. You need to follow Radiance's standard syntax (e.g. -ps 1 -lw 0.01)
+        reuseAmbientFile_: Set to True to keep the ambient file of the scene and start the next runs of the same scene and parameters from it. The next runs are much faster but most of the points are interpolated from the stored ambient values so the results are not the same as a new run. In a test room with -ab 5 the illuminance was 5.1% different on average and up to 25.6% different. Default is False.
 """
 
 ghenv.Component.Name = "Honeybee_RADParameters"
@@ -178,6 +179,8 @@ def main():
                 radPar["additional"].append(par)
                 print par
         
+        radPar["reuseAmbientFile"] = reuseAmbientFile_ == True
+        
         return dictToClass(radPar)
 
 
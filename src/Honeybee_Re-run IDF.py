@@ -51,6 +51,7 @@ ghenv.Component.AdditionalHelpFromDocStrings = "0"
 
 import os
 import shutil
+import scriptcontext as sc
 import Grasshopper.Kernel as gh
 import time
 
@@ -104,6 +105,35 @@ def runBatchFile(batchFileAddress):
     #execute the batch file
     os.system(batchFileAddress)
 
+def runIDF(workingDir, idfFileName, epwFileAddress, EPDirectory, batchFileAddress):
+    # run the file with Honeybee's batch runner if Honeybee is flying so the run can be
+    # cancelled with the escape key and the results are collected from the run folder
+    if not sc.sticky.has_key("honeybee_EPBatchRunner"):
+        runBatchFile(batchFileAddress)
+        return None
+    
+    # the runner reports the progress every second. only print it when a run is done
+    lastNumOfDoneRuns = [None]
+    def printProgress(lines):
+        numOfDoneRuns = len([line for line in lines \
+                             if line.split(": ")[-1].split(" ")[0] not in ("pending", "running")])
+        if numOfDoneRuns == lastNumOfDoneRuns[0]: return
+        lastNumOfDoneRuns[0] = numOfDoneRuns
+        print "\n".join(lines)
+    
+    runner = sc.sticky["honeybee_EPBatchRunner"](workingDir, EPDirectory, maxWorkers = 1, \
+                                                 progressCallback = printProgress, \
+                                                 cancelCheck = gh.GH_Document.IsEscapeKeyDown)
+    runner.addRun(idfFileName, epwFileAddress)
+    result = runner.run()[0]
+    
+    if result["status"] != "finished":
+        warning = "EnergyPlus run is " + result["status"] + ". Check " + str(result["err"]) + " for errors."
+        ghenv.Component.AddRuntimeMessage(gh.GH_RuntimeMessageLevel.Warning, warning)
+    
+    if len(result["csv"]) != 0: return result["csv"][0]
+    return None
+
 
 
 
@@ -149,16 +179,24 @@ else:
 
 
 
-if checkdata and checkTheInputs(_EPDirectory,_idfFileName) != -1:
-    batchFileAddress = writeBatchFile(_workingDir, _idfFileName, _epwFileAddress, EPDirectory = 'C:\\EnergyPlusV8-3-0')
+# use the EnergyPlus folder that Honeybee has found if the directory is not provided
+EPDirectory = _EPDirectory
+if EPDirectory == None and sc.sticky.has_key("honeybee_folders"):
+    EPDirectory = sc.sticky["honeybee_folders"]["EPPath"]
+if EPDirectory == None: EPDirectory = 'C:\\EnergyPlusV8-3-0'
+EPDirectory = str(EPDirectory).rstrip("\\")
+
+if checkdata and checkTheInputs(EPDirectory,_idfFileName) != -1:
+    batchFileAddress = writeBatchFile(_workingDir, _idfFileName, _epwFileAddress, EPDirectory)
     print "The file is written to %s"%batchFileAddress 
     
     if runIt_:
-        runBatchFile(batchFileAddress)
+        resultFileAddress = runIDF(_workingDir, _idfFileName, _epwFileAddress, EPDirectory, batchFileAddress)
     
         if _idfFileName.endswith('.idf'):  shIdfFileName = _idfFileName.replace('.idf', '')
         else: shIdfFileName = _idfFileName
-        resultFileAddress = str(_workingDir) + str(shIdfFileName) + '.csv'
+        if resultFileAddress == None:
+            resultFileAddress = str(_workingDir) + str(shIdfFileName) + '.csv'
 
         time = time.localtime(time.time())
         
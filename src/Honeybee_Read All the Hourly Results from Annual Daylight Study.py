@@ -50,6 +50,7 @@ except: pass
 
 
 import os
+import scriptcontext as sc
 from System import Object
 import Grasshopper.Kernel as gh
 from Grasshopper import DataTree
@@ -94,6 +95,12 @@ def convertIllFileDaraTreeIntoSortedDictionary(illFilesAddress):
 def main(illFilesAddress, testPoints, annualProfiles):
     msg = str.Empty
     
+    if not sc.sticky.has_key('honeybee_release'):
+        msg = "You should first let Honeybee to fly first..."
+        return msg, None, None
+    
+    hb_illFileReader = sc.sticky["honeybee_IllFileReader"]
+    
     shadingProfiles = []
     shadingGroupsCount = 0 # assume there in no shading groups
     
@@ -189,13 +196,9 @@ def main(illFilesAddress, testPoints, annualProfiles):
     for shadingGroupCount in range(len(illFileSets.keys())):
         for shadingState, resultFiles in enumerate(illFileSets[shadingGroupCount]):
             for resultFile in resultFiles:
-                result = open(resultFile, 'r')
-                for HOY, line in enumerate(result):
-                   line = line.replace('\n', '', 10)
-                   lineSeg = line.Split(' ')
-                   for hourLuxValue in lineSeg[4:]:
-                      illuminanceValues[shadingGroupCount][HOY][shadingState].append(float(hourLuxValue))
-                result.close()
+                illReader = hb_illFileReader(resultFile)
+                for HOY, hourValues in enumerate(illReader.iterHourValues()):
+                    illuminanceValues[shadingGroupCount][HOY][shadingState].extend(hourValues)
 
     return msg, illuminanceValues, shadingProfiles
 
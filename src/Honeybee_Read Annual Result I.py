@@ -34,6 +34,8 @@ Provided by Honeybee 0.0.58
         _DLAIllumThresholds_: Illuminance threshold for Daylight Autonomy calculation in lux. Default is set to 300 lux.
         SHDGroupI_Sensors_: Senors for dhading group I. Use shadingGroupSensors component to prepare the inputs
         SHDGroupII_Sensors_: Senors for dhading group II. Use shadingGroupSensors component to prepare the inputs
+        blindProfiles_: Hourly blind profile of shading group I for each space (0 = up, 1 = down). Connect the shadingProfiles output of Daysim Annual Profiles. Each branch is a space. If there is no profile for a space the profile that ds_el_lighting calculates is used, or the blinds are up all year if writeLightingProfiles_ is set to False.
+        writeLightingProfiles_: Set to False to skip running Daysim's ds_el_lighting for each space. Default is True. ds_el_lighting writes the annual lighting profiles and the electric lighting reports. The daylight metrics are calculated by Honeybee and only use the blind profiles of this step for dynamic shadings with no blindProfiles_.
         _runIt: set to True to run the analysis
     Returns:
         DLA: Daylight Autonomy > Percentage of the time during the active occupancy hours that the test point receives more daylight than the illuminance threshold.
@@ -41,8 +43,10 @@ Provided by Honeybee 0.0.58
         UDLI_100_2000: Useful Daylight illuminance > Percentage of time during the active occupancy hours that the test point receives between 100 and 2000 lux.
         UDLI_More_2000: Useful Daylight illuminance > Percentage of time during the active occupancy hours that the test point receives more than 2000 lux.
         CDA: Continuous Daylight Autonomy > Similar to Daylight Autonomy except that the point receives illuminaceLevel/illuminace threshold for hours that illuminance level is less than the threshold.
-        sDA: Spatial Daylight Autonomy > sDA is the percent of analysis points across the analysis area that meet or exceed _DLAIllumThresholds value (set to 300 lux for LEED) for at least 50% of the analysis period. Honeybee doesn't consider the effect of dynamic blinds in calculating sDA.
-        annualProfiles: A .csv file generated by Daysim that can be used as lighting schedule for annual energy simulation
+        sDA: Spatial Daylight Autonomy > sDA is the percent of analysis points across the analysis area that meet or exceed _DLAIllumThresholds value (set to 300 lux for LEED) for at least 50% of the analysis period. If blindProfiles_ are connected the illuminance of each hour is read from the shading state that is in effect.
+        ASE: Annual Sunlight Exposure > Percentage of the points in each space that receive more than 1000 lux for more than 250 occupied hours. For a standard ASE the .ill files should only include direct sunlight.
+        annualProfiles: A .csv file generated by Daysim that can be used as lighting schedule for annual energy simulation. Not available if writeLightingProfiles_ is set to False.
+        htmReport: Daysim's electric lighting report for each space. Not available if writeLightingProfiles_ is set to False.
 """
 ghenv.Component.Name = "Honeybee_Read Annual Result I"
 ghenv.Component.NickName = 'readAnnualResultsI'
@@ -63,8 +67,6 @@ from Grasshopper.Kernel.Data import GH_Path
 import Rhino as rc
 import scriptcontext as sc
 import os
-import subprocess
-import time
 import shutil
 
 """
@@ -83,21 +85,6 @@ def getFilelength(fileName):
             pass
     return i + 1
 
-def isTheStudyOver(fileNames):
-    while True:
-        cmd = 'WMIC PROCESS get Commandline' #,Processid'
-        proc = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE)
-        cmdCount = 0
-        for line in proc.stdout:
-            if line.strip().startswith("cmd") and line.strip().endswith(".bat"):
-                fileName = line.strip().split(" ")[-1].split("\\")[-1]
-                # I should check the file names and make sure they are the right files
-                if fileName in fileNames:
-                    cmdCount += 1
-        time.sleep(0.2)
-        if cmdCount == 0:
-            return
-            
 def convertIllFileDaraTreeIntoSortedDictionary(illFilesAddress):
     
     # I should move this function into Honeybee_Honeybee #BadPractice!
@@ -151,11 +138,8 @@ def convertEPScheduleToDSSchedule(scheduleName, folder):
           "daylight savings time is based on user input),,\n" + \
           "# month,day,time,occupancy (1=present/0=absent)\n"
 
-    readSchedules = sc.sticky["honeybee_ReadSchedules"](scheduleName, 0)
-    dailyValues  = readSchedules.getScheduleValues()
-        
-    hourlyValues = []
-    for values in dailyValues: hourlyValues.extend(values)
+    scheduleCompiler = sc.sticky["honeybee_ScheduleCompiler"](ghenv.Component)
+    hourlyValues = scheduleCompiler.getHourlyValues(scheduleName, 0)
     
     # create a temp folder inside folder will .ill files
     if not os.path.isdir(folder): os.mkdir(folder)
@@ -183,7 +167,7 @@ def convertEPScheduleToDSSchedule(scheduleName, folder):
     
     return fullPath
 
-def main(illFilesAddress, testPts, testVecs, occFiles, lightingControlGroups, SHDGroupI_Sensors, SHDGroupII_Sensors, DLAIllumThresholds, runInBackground = False):
+def main(illFilesAddress, testPts, testVecs, occFiles, lightingControlGroups, SHDGroupI_Sensors, SHDGroupII_Sensors, blindProfiles, DLAIllumThresholds, writeLightingProfiles = True, runInBackground = False):
     
     if sc.sticky.has_key('honeybee_release'):
 
@@ -204,6 +188,9 @@ def main(illFilesAddress, testPts, testVecs, occFiles, lightingControlGroups, SH
         hb_DSPath = hb_folders["DSPath"]
         hb_DSCore = hb_folders["DSCorePath"]
         hb_DSLibPath = hb_folders["DSLibPath"]
+        hb_illFileReader = sc.sticky["honeybee_IllFileReader"]
+        hb_daylightMetrics = sc.sticky["honeybee_DaylightMetrics"]
+        hb_writeRAD = sc.sticky["honeybee_WriteRAD"]()
     else:
         msg = "You should first let Honeybee to fly first..."
         
@@ -350,11 +337,7 @@ def main(illFilesAddress, testPts, testVecs, occFiles, lightingControlGroups, SH
     # that's why I just try the first list of the ill files
     numOfPtsInEachFile = []
     for illFile in originalIllFilesSorted[0][0]:
-        with open(illFile, "r") as illInf:
-            for lineCount, line in enumerate(illInf):
-                if not line.startswith("#"):
-                    numOfPtsInEachFile.append(len(line.strip().split(" ")) - 4)
-                    break
+        numOfPtsInEachFile.append(hb_illFileReader(illFile).numOfPts)
     
     # find the current project directory that could be differnt from the old one
     projectDirectory = os.path.dirname(originalIllFilesSorted[0][0][0]) + "\\"
@@ -367,7 +350,50 @@ def main(illFilesAddress, testPts, testVecs, occFiles, lightingControlGroups, SH
         msg = "Number of points in ill files: " + `sum(numOfPtsInEachFile)` + \
               " doesn't match the number of points in point files: " + `numOfPts`
         return msg, None
-   
+    
+    # the blind profiles are only needed for dynamic shadings
+    hasDynamicShading = len(originalIllFilesSorted.keys()) > 1
+    spacesBlindProfiles = []
+    if hasDynamicShading:
+        for branchNum in range(numOfSpaces):
+            try: spacesBlindProfiles.append(hb_daylightMetrics.getBlindProfile(blindProfiles.Branch(branchNum)))
+            except: spacesBlindProfiles.append(None)
+    
+    def calculateMetrics(spacesBlindProfiles):
+        # calculate the metrics in-process
+        if hasDynamicShading and (None in spacesBlindProfiles or [] in spacesBlindProfiles):
+            warning = "There is no blind profile for some of the spaces. The blinds are considered up all year for these spaces.\n" + \
+                      "Set writeLightingProfiles_ to True to use the blind profiles of Daysim or connect the shading profiles of Daysim Annual Profiles to blindProfiles_."
+            w = gh.GH_RuntimeMessageLevel.Warning
+            ghenv.Component.AddRuntimeMessage(w, warning)
+        
+        daylightMetrics = hb_daylightMetrics(originalIllFilesSorted, numOfPtsInEachSpace, occFiles, spacesBlindProfiles)
+        
+        DLAValues = []
+        underUDLIValues = []
+        inRangeUDLIValues = []
+        overUDLIValues = []
+        CDAValues = []
+        sDAValues = []
+        ASEValues = []
+        for spaceCount in range(numOfSpaces):
+            try: illumT = DLAIllumThresholds[spaceCount]
+            except: illumT = DLAIllumThresholds[0]
+            
+            DLAValues.append(daylightMetrics.getDA(spaceCount, illumT))
+            CDAValues.append(daylightMetrics.getCDA(spaceCount, illumT))
+            underUDLI, inRangeUDLI, overUDLI = daylightMetrics.getUDI(spaceCount)
+            underUDLIValues.append(underUDLI)
+            inRangeUDLIValues.append(inRangeUDLI)
+            overUDLIValues.append(overUDLI)
+            sDAValues.append("%.2f"%daylightMetrics.getsDA(spaceCount, illumT))
+            ASEValues.append("%.2f"%daylightMetrics.getASE(spaceCount))
+        
+        return [DLAValues, underUDLIValues, inRangeUDLIValues, overUDLIValues, CDAValues, sDAValues, ASEValues]
+    
+    if not writeLightingProfiles: return None, calculateMetrics(spacesBlindProfiles) + [[], []]
+    
+    # the rest is only needed for Daysim's annual lighting profiles and electric lighting reports
     # find the heading files and creat multiple ill files for the study
     heaFiles = []
     filePath =  os.path.dirname(originalIllFilesSorted[0][0][0])
@@ -738,6 +764,13 @@ def main(illFilesAddress, testPts, testVecs, occFiles, lightingControlGroups, SH
         with open(os.path.join(filePath, heaFileName), "w") as heaf:
             heaf.write(modifiedHea)
             
+    # remove the results of the last run so an outdated file is never read
+    for spaceCount in range(numOfSpaces):
+        subProjectName = projectName + "_space_" + str(spaceCount)
+        for resultFile in [subProjectName + "_intgain.csv", subProjectName + "_electriclighting.htm"]:
+            try: os.remove(os.path.join(filePath, resultFile))
+            except OSError: pass
+    
     # write batch files
     batchFileNames = []
     pathStr = "SET RAYPATH=.;" + hb_RADLibPath + ";" + hb_DSPath + ";" + hb_DSLibPath + ";\nPATH=" + hb_RADPath + ";" + hb_DSPath + ";" + hb_DSLibPath + ";$PATH\n"
@@ -756,113 +789,36 @@ def main(illFilesAddress, testPts, testVecs, occFiles, lightingControlGroups, SH
             
             batchInf.write(batchFileStr)
             
-    # write a batch file and run the study
+    # run the batch files on all the CPUs and wait for all of them to finish
     ncpus = int(os.environ["NUMBER_OF_PROCESSORS"])
     if ncpus == 0: ncpus = 1
     
-    #execute the batch files in parallel if there is enough CPUs!
-    fileNames = []
-
-    if ncpus >= numOfSpaces:
-        for fileName in batchFileNames:
-            batchFileName = os.path.join(filePath, fileName)
-            fileNames.append(batchFileName)
-            if runInBackground:
-                p = subprocess.Popen(batchFileName , shell=True)
-            else:
-                p = subprocess.Popen(r'start cmd /c ' + batchFileName , shell=True)
-                
-        isTheStudyOver(batchFileNames)
-    else:
-        for fileName in batchFileNames:
-            batchFileName = os.path.join(filePath, fileName)
-            if runInBackground:
-                p = subprocess.Popen(batchFileName , shell=True)
-            else:
-                p = subprocess.Popen(r'start cmd /c ' + batchFileName , shell=True)
-    
-    # calculate sDA    
-    
-    #sDADict = {}
-    
-    #if len(newIllFileNamesDict.keys())!=1:
-    #    warning = "This version of Honeybee doesn't consider dynamic blinds in sDA calculation!\n"
-    #    w = gh.GH_RuntimeMessageLevel.Warning
-    #    ghenv.Component.AddRuntimeMessage(w, warning)
-    #    
-    #for spaceCount, spaceIllFiles in enumerate(newIllFileNamesDict[0]):
-    #    totalOccupancyHours = 0
-    #    sDADict[spaceCount] = 0
-        
-    #    try: DLAIllumThreshold = DLAIllumThresholds[spaceCount]
-    #    except: DLAIllumThreshold = DLAIllumThresholds[0]
-    #    
-    #    
-    #    # open the file to read the values
-    #    with open(spaceIllFiles, "r") as illInf:
-    #        
-    #        # import occupancy profile
-    #        try: occFile = occFiles[spaceCount]
-    #        except: occFile = occFiles[0]
-    #        with open(occFile, "r") as occInFile:
-    #            occupancyLines = occInFile.readlines()
-    #            
-    #        # each line represnt an hour
-    #        for lineCount, line in enumerate(illInf):
-    #            higherThanThreshold = 0
-    #            # check the occupancy profile
-    #            if int(occupancyLines[lineCount + 3].split(",")[-1]) != 0:
-    #                totalOccupancyHours += 1
-    #                illValues = line.split("  ")[1].strip().split(" ")
-    #                
-    #                # check number of points that satisfy the minimum illuminance
-    #                for sensorCount, illuminance in enumerate(illValues):
-    #                    # print float(illuminance), DLAIllumThreshold, float(illuminance) >= DLAIllumThreshold
-    #                    if float(illuminance) >= DLAIllumThreshold:
-    #                        higherThanThreshold += 1
-    #                
-    #                if higherThanThreshold/len(illValues) > .5:
-    #                    sDADict[spaceCount] += 1
-    #        
-    #        sDADict[spaceCount] = "%.2f"%((sDADict[spaceCount]/totalOccupancyHours) * 100)
-          
-    
-    # read all the results
-    DLALists = []
-    underUDLILists = []
-    inRangeUDLILists = []
-    overUDLILists = []
-    CDALists = []
-    EPLSchLists = []
-    htmLists = []
+    jobs = hb_writeRAD.executeBatchFiles([os.path.join(filePath, fileName) for fileName in batchFileNames], \
+                                         ncpus, runInBackground)
     
-    resultFiles = os.listdir(projectDirectory)
-    for fileName in resultFiles:
-        if fileName.endswith(".DA"): DLALists.append(os.path.join(filePath,fileName))
-        elif fileName.endswith(".CDA"): CDALists.append(os.path.join(filePath,fileName))
-        elif fileName.endswith(".htm"): htmLists.append(os.path.join(filePath,fileName))
-        elif fileName.endswith("_intgain.csv"): EPLSchLists.append(os.path.join(filePath,fileName))
-        elif fileName.endswith("less_than_100.UDI"): underUDLILists.append(os.path.join(filePath,fileName))
-        elif fileName.endswith("100_2000.UDI"): inRangeUDLILists.append(os.path.join(filePath,fileName))
-        elif fileName.endswith("more_than_2000.UDI"): overUDLILists.append(os.path.join(filePath,fileName))
-        
-    # sort the lists
-    try: CDALists = sorted(CDALists, key=lambda fileName: int(fileName.split(".")[-2].split("_")[-1]))
-    except: pass
-    try: DLALists = sorted(DLALists, key=lambda fileName: int(fileName.split(".")[-2].split("_")[-2]))
-    except: pass
-    try: htmLists = sorted(htmLists, key=lambda fileName: int(fileName.split(".")[-2].split("_")[-2]))
-    except: pass
-    try: EPLSchLists = sorted(EPLSchLists, key=lambda fileName: int(fileName.split(".")[-2].split("_")[-2]))
-    except: pass    
-    try: underUDLILists = sorted(underUDLILists, key=lambda fileName: int(fileName.split(".")[-2].split("_")[-4]))
-    except: pass
-    try: inRangeUDLILists = sorted(inRangeUDLILists, key=lambda fileName: int(fileName.split(".")[-2].split("_")[-3]))
-    except: pass
-    try: overUDLILists = sorted(overUDLILists, key=lambda fileName: int(fileName.split(".")[-2].split("_")[-4]))
-    except: pass
+    failedJobs = [job.name for job in jobs if job.status != "finished"]
+    if len(failedJobs) != 0:
+        warning = "Daysim failed to write the lighting profiles for " + ", ".join(failedJobs) + "."
+        w = gh.GH_RuntimeMessageLevel.Warning
+        ghenv.Component.AddRuntimeMessage(w, warning)
     
-    return None, [DLALists, underUDLILists, inRangeUDLILists, overUDLILists, CDALists, EPLSchLists, htmLists]
+    # read the files of this run. Spaces that failed get no file
+    EPLSchLists = []
+    htmLists = []
+    for spaceCount in range(numOfSpaces):
+        subProjectName = projectName + "_space_" + str(spaceCount)
+        EPLSchFile = os.path.join(filePath, subProjectName + "_intgain.csv")
+        htmFile = os.path.join(filePath, subProjectName + "_electriclighting.htm")
+        EPLSchLists.append(EPLSchFile if os.path.isfile(EPLSchFile) else None)
+        htmLists.append(htmFile if os.path.isfile(htmFile) else None)
+    
+    # use the blind profiles that ds_el_lighting calculated for the spaces with no blindProfiles_
+    if hasDynamicShading:
+        for spaceCount in range(numOfSpaces):
+            if not spacesBlindProfiles[spaceCount] and EPLSchLists[spaceCount] != None:
+                spacesBlindProfiles[spaceCount] = hb_daylightMetrics.readBlindProfile(EPLSchLists[spaceCount])
+    
+    return None, calculateMetrics(spacesBlindProfiles) + [EPLSchLists, htmLists]
 
 def isAllNone(dataList):
     for item in dataList.AllData():
@@ -876,7 +832,7 @@ if _runIt and not isAllNone(_illFilesAddress) and not isAllNone(_testPoints):
     lightingControlGroups_.SimplifyPaths()
     _illFilesAddress.SimplifyPaths()
     
-    res = main(_illFilesAddress, _testPoints, ptsVectors_, occupancyFiles_, lightingControlGroups_, SHDGroupI_Sensors_, SHDGroupII_Sensors_, _DLAIllumThresholds_, _runIt > 1)
+    res = main(_illFilesAddress, _testPoints, ptsVectors_, occupancyFiles_, lightingControlGroups_, SHDGroupI_Sensors_, SHDGroupII_Sensors_, blindProfiles_, _DLAIllumThresholds_, writeLightingProfiles_ != False, _runIt > 1)
     
     if res!= -1:
         msg, results = res
@@ -886,7 +842,7 @@ if _runIt and not isAllNone(_illFilesAddress) and not isAllNone(_testPoints):
             ghenv.Component.AddRuntimeMessage(w, msg)
             
         else:
-            DLALists, underUDLILists, inRangeUDLILists, overUDLILists, CDALists, EPLSchLists, htmLists = results
+            DLAValues, underUDLIValues, inRangeUDLIValues, overUDLIValues, CDAValues, sDAValues, ASEValues, EPLSchLists, htmLists = results
             DLA = DataTree[Object]()
             UDLI_Less_100 = DataTree[Object]()    
             UDLI_100_2000 = DataTree[Object]()
@@ -894,33 +850,21 @@ if _runIt and not isAllNone(_illFilesAddress) and not isAllNone(_testPoints):
             CDA = DataTree[Object]()
             annualProfiles = DataTree[Object]()
             sDA = DataTree[Object]()
+            ASE = DataTree[Object]()
             htmReport = DataTree[Object]()
             
-            def readDSStandardResults(filePath):
-                results = []
-                with open(filePath, "r") as inf:
-                    for line in inf:
-                        if not line.startswith("#"):
-                            results.append(float(line.split("\t")[-1]))
-                return results
-            
-            def getsDA(DLARes, threshold = 50):
-                moreThan = 0
-                for res in DLARes:
-                    if res >= threshold:
-                        moreThan += 1
-                return "%.2f"%((moreThan/len(DLARes)) * 100)
-            
-            
             for branchNum in range(_testPoints.BranchCount):
                 p = GH_Path(branchNum)
-                DLARes = readDSStandardResults(DLALists[branchNum])
-                DLA.AddRange(DLARes, p)
-                UDLI_Less_100.AddRange(readDSStandardResults(underUDLILists[branchNum]), p)
-                UDLI_100_2000.AddRange(readDSStandardResults(inRangeUDLILists[branchNum]), p)
-                UDLI_More_2000.AddRange(readDSStandardResults(overUDLILists[branchNum]), p)
-                CDA.AddRange(readDSStandardResults(CDALists[branchNum]), p)
-                annualProfiles.Add(EPLSchLists[branchNum], p)
-                sDA.Add(getsDA(DLARes), p)
-                htmReport.Add(htmLists[branchNum], p)
+                DLA.AddRange(DLAValues[branchNum], p)
+                UDLI_Less_100.AddRange(underUDLIValues[branchNum], p)
+                UDLI_100_2000.AddRange(inRangeUDLIValues[branchNum], p)
+                UDLI_More_2000.AddRange(overUDLIValues[branchNum], p)
+                CDA.AddRange(CDAValues[branchNum], p)
+                sDA.Add(sDAValues[branchNum], p)
+                ASE.Add(ASEValues[branchNum], p)
+                try:
+                    annualProfiles.Add(EPLSchLists[branchNum], p)
+                    htmReport.Add(htmLists[branchNum], p)
+                except IndexError:
+                    pass
                     
\ No newline at end of file
@@ -30,12 +30,12 @@ Provided by Honeybee 0.0.58
         _illFilesAddress: List of .ill files
         _testPoints: List of 3d Points
         _annualProfiles: Address to a valid *_intgain.csv generated by daysim.
-        _targetPoint: One of the points from the test points
+        _targetPoint: One or more points from the test points. The values of all the points are read in a single pass over each result file.
     Returns:
-        iIllumLevelsNoDynamicSHD: Illuminance values without dynamic shadings
-        iIllumLevelsDynamicSHDGroupI: Illuminance values when shading group I is closed
-        iIllumLevelsDynamicSHDGroupII: Illuminance values when shading group II is closed
-        iIlluminanceBasedOnOccupancy: Illuminance values based on Daysim user behavior
+        iIllumLevelsNoDynamicSHD: Illuminance values without dynamic shadings. Each branch is a target point.
+        iIllumLevelsDynamicSHDGroupI: Illuminance values when shading group I is closed. The first index of each branch is the target point and the second index is the shading state.
+        iIllumLevelsDynamicSHDGroupII: Illuminance values when shading group II is closed. The first index of each branch is the target point and the second index is the shading state.
+        iIlluminanceBasedOnOccupancy: Illuminance values based on Daysim user behavior. Each branch is a target point.
 """
 ghenv.Component.Name = "Honeybee_Read DS Result for a point"
 ghenv.Component.NickName = 'readDSHourlyResults'
@@ -50,6 +50,7 @@ except: pass
 
 
 import os
+import hashlib
 import scriptcontext as sc
 from System import Object
 import Grasshopper.Kernel as gh
@@ -97,9 +98,46 @@ def convertIllFileDaraTreeIntoSortedDictionary(illFilesAddress):
     
     return illFileSets
 
-def main(illFilesAddress, testPoints, targetPoint, annualProfiles):
+def getPointsHash(testPoints, studyFolder):
+    # md5 of the coordinates of the test points and the content of the .pts files of the study
+    md5 = hashlib.md5()
+    for pt in testPoints.AllData():
+        md5.update("%r,%r,%r;"%(pt.X, pt.Y, pt.Z))
+    for fileName in sorted(os.listdir(studyFolder)):
+        if fileName.lower().endswith(".pts"):
+            md5.update(fileName + ";")
+            with open(os.path.join(studyFolder, fileName), "rb") as ptsInf:
+                for chunk in iter(lambda: ptsInf.read(65536), ""):
+                    md5.update(chunk)
+    return md5.hexdigest()
+
+def getNumOfPtsInEachFile(illFiles, hb_illFileReader, hb_annualResultsStore):
+    # use the binary copy of the results or the .pts files so the .ill files are not opened
+    storeEntry = hb_annualResultsStore(os.path.dirname(illFiles[0])).getEntry(illFiles[0])
+    if storeEntry != None and len(storeEntry[0]["numOfPts"]) == len(illFiles):
+        return storeEntry[0]["numOfPts"]
+    
+    numOfPtsInEachFile = []
+    for illFile in illFiles:
+        ptsFile = illFile[:-4] + ".pts"
+        if os.path.isfile(ptsFile):
+            with open(ptsFile, "r") as ptsInf:
+                numOfPtsInEachFile.append(len([line for line in ptsInf if line.strip()!=""]))
+        else:
+            numOfPtsInEachFile.append(hb_illFileReader(illFile).numOfPts)
+    return numOfPtsInEachFile
+
+def main(illFilesAddress, testPoints, targetPoints, annualProfiles):
     msg = str.Empty
     
+    if not sc.sticky.has_key('honeybee_release'):
+        msg = "You should first let Honeybee to fly first..."
+        return msg, None, None
+    
+    hb_illFileReader = sc.sticky["honeybee_IllFileReader"]
+    hb_pointKDTree = sc.sticky["honeybee_PointKDTree"]
+    hb_annualResultsStore = sc.sticky["honeybee_AnnualResultsStore"]
+    
     shadingProfiles = []
     shadingGroupsCount = 0 # assume there in no shading groups
     
@@ -169,88 +207,69 @@ def main(illFilesAddress, testPoints, targetPoint, annualProfiles):
     
     illFileSets = convertIllFileDaraTreeIntoSortedDictionary(illFilesAddress)
         
-    # find the index of the point
-    pointFound = False
-    targetPtIndex = 0
-    for branch in range(testPoints.BranchCount):
-        for pt in testPoints.Branch(branch):
-            if pt.DistanceTo(targetPoint) < sc.doc.ModelAbsoluteTolerance:
-                pointFound = True
-                break
-            targetPtIndex+=1
-        if pointFound ==True: break
+    # find the index of the points
+    # the tree is kept for the study folder and is rebuilt when the test points or the .pts files change
+    studyFolder = os.path.dirname(illFileSets[0][0][0])
+    if not sc.sticky.has_key("honeybee_testPointsKDTrees"):
+        sc.sticky["honeybee_testPointsKDTrees"] = {}
+    pointsKDTrees = sc.sticky["honeybee_testPointsKDTrees"]
     
-    # check number of points in each of the ill files
-    # number of points should be the same in all the illfile lists
-    # that's why I just try the first list of the ill files
-    numOfPtsInEachFile = []
-    for illFile in illFileSets[0][0]:
-        with open(illFile, "r") as illInf:
-            for lineCount, line in enumerate(illInf):
-                if not line.startswith("#"):
-                    numOfPtsInEachFile.append(len(line.strip().split(" ")) - 4)
-                    break
-    
-    # find the right ill file(s) to look into and read the results
-    # print targetPtIndex
-    targetListNumber = None
-    targetIndexNumber = None
-    for listCount, numOfPts in enumerate(numOfPtsInEachFile):
-        if sum(numOfPtsInEachFile[:listCount]) >= targetPtIndex + 1:
-            targetListNumber = listCount - 1
-            targetIndexNumber = targetPtIndex - sum(numOfPtsInEachFile[:listCount-1])
-            #print "list number is: ", listCount - 1
-            #print "index number is:", targetPtIndex - sum(numOfPtsInEachFile[:listCount-1])
-            break
+    pointsHash = getPointsHash(testPoints, studyFolder)
+    if studyFolder not in pointsKDTrees or pointsKDTrees[studyFolder][0] != pointsHash:
+        # number of points should be the same in all the illfile lists
+        # that's why I just try the first list of the ill files
+        numOfPtsInEachFile = getNumOfPtsInEachFile(illFileSets[0][0], hb_illFileReader, hb_annualResultsStore)
+        pointsKDTrees[studyFolder] = pointsHash, hb_pointKDTree(list(testPoints.AllData())), numOfPtsInEachFile
     
-    # Probably this is not the best way but I really want to get it done tonight!
-    if targetListNumber == None:
-        targetListNumber = len(numOfPtsInEachFile)-1
-        targetIndexNumber = targetPtIndex - sum(numOfPtsInEachFile[:targetListNumber])
-    
-    if targetIndexNumber < 0:
-        msg = "The target point is not inside the point list"
-        return msg, None, None
+    pointsHash, pointsKDTree, numOfPtsInEachFile = pointsKDTrees[studyFolder]
     
-    # find in which space the point is located
-    targetSpace = None
-    for listCount, numOfPts in enumerate(numOfPtsInEachSpace):
-        if sum(numOfPtsInEachSpace[:listCount]) >= targetPtIndex + 1:
-            targetSpace = listCount - 1
-            break    
-    if targetSpace == None:
-        targetSpace = len(numOfPtsInEachSpace)-1
+    # find the file and the index inside the file for each target point
+    targetPtsInEachFile = {}
+    targetSpaces = []
+    for targetCount, targetPoint in enumerate(targetPoints):
+        targetPtIndex, distance = pointsKDTree.getClosestPoint(targetPoint, sc.doc.ModelAbsoluteTolerance)
+        if targetPtIndex == -1 or targetPtIndex >= sum(numOfPtsInEachFile):
+            msg = "The target point is not inside the point list"
+            return msg, None, None
+        
+        ptsOffset = 0
+        for listCount, numOfPts in enumerate(numOfPtsInEachFile):
+            if targetPtIndex < ptsOffset + numOfPts:
+                targetPtsInEachFile.setdefault(listCount, []).append((targetCount, targetPtIndex - ptsOffset))
+                break
+            ptsOffset += numOfPts
+        
+        # find in which space the point is located
+        ptsOffset = 0
+        for spaceCount, numOfPts in enumerate(numOfPtsInEachSpace):
+            ptsOffset += numOfPts
+            if targetPtIndex < ptsOffset: break
+        targetSpaces.append(spaceCount)
     
-    # 3 place holderd for the potential 3 outputs
+    # 3 place holderd for the potential 3 outputs for each target point
     # no blinds, shading group I and shading group II
-    illuminanceValues = {0: [],
-                         1: [],
-                         2: [],
-                         }
-                         
-    # create a sublist for every shading state
-    for shadingGroupCount in range(len(illFileSets.keys())):
-        # each file represnts one state of shading
-        for resultFile in illFileSets[shadingGroupCount]:
-            # add an empty list for each state
-            illuminanceValues[shadingGroupCount].append([])
-    
+    illuminanceValues = []
+    for targetPoint in targetPoints:
+        illuminanceValues.append({0: [], 1: [], 2: []})
+        # create a sublist for every shading state
+        for shadingGroupCount in illFileSets.keys():
+            for resultFile in illFileSets[shadingGroupCount]:
+                illuminanceValues[-1][shadingGroupCount].append([])
     
+    # read all the target points of each file in a single pass
     for shadingGroupCount in illFileSets.keys():
         for stateCount, targetIllFiles in enumerate(illFileSets[shadingGroupCount]):
-            targetIllFile = targetIllFiles[targetListNumber]
-            result = open(targetIllFile, 'r')
-            for lineCount, line in enumerate(result):
-                hourLuxValue = line.strip().split(" ")[targetIndexNumber + 4]
-                illuminanceValues[shadingGroupCount][stateCount].append(float(hourLuxValue))
-            result.close()
-            
-                
-    return msg, illuminanceValues, shadingProfiles[branch]
+            for listCount, targetPts in targetPtsInEachFile.items():
+                illReader = hb_illFileReader(targetIllFiles[listCount])
+                pointsValues = illReader.getPointsValues([ptIndex for targetCount, ptIndex in targetPts])
+                for (targetCount, ptIndex), pointValues in zip(targetPts, pointsValues):
+                    illuminanceValues[targetCount][shadingGroupCount][stateCount].extend(pointValues)
+    
+    return msg, illuminanceValues, [shadingProfiles[targetSpace] for targetSpace in targetSpaces]
 
 
 
-if _targetPoint!=None and not isAllNone(_illFilesAddress) and not isAllNone(_testPoints):
+if len(_targetPoint)!=0 and _targetPoint[0]!=None and not isAllNone(_illFilesAddress) and not isAllNone(_testPoints):
     
     _testPoints.SimplifyPaths()
     _illFilesAddress.SimplifyPaths()
@@ -259,62 +278,62 @@ if _targetPoint!=None and not isAllNone(_illFilesAddress) and not isAllNone(_tes
     for branch in range(_testPoints.BranchCount):
         numOfPtsInEachSpace.append(len(_testPoints.Branch(branch)))
     
-    msg, illuminanceValues, shadingProfile = main(_illFilesAddress, _testPoints, _targetPoint, annualProfiles_)
-    
-    if shadingProfile!=[]: shadingProfile = shadingProfile[0]
+    msg, illuminanceValues, shadingProfiles = main(_illFilesAddress, _testPoints, _targetPoint, annualProfiles_)
     
     if msg!=str.Empty:
         w = gh.GH_RuntimeMessageLevel.Warning
         ghenv.Component.AddRuntimeMessage(w, msg)
         
     else:
-        annualIllumNoDynamicSHD = []
+        annualIllumNoDynamicSHD = DataTree[Object]()
         annualIllumDynamicSHDGroupI = DataTree[Object]()
         annualIllumDynamicSHDGroupII = DataTree[Object]()
-        iIlluminanceBasedOnOccupancy = []
+        iIlluminanceBasedOnOccupancy = DataTree[Object]()
         
         heading = ["key:location/dataType/units/frequency/startsAt/endsAt",
                     " ", "Annual illuminance values", "lux", "Hourly",
                     (1, 1, 1), (12, 31, 24)]
         
-        for shadingGroup in illuminanceValues.keys():
-            # results with no blind
-            if shadingGroup==0:
-                annualIllumNoDynamicSHD.extend(heading + illuminanceValues[0][0])
-            
-            elif shadingGroup==1 and len(illuminanceValues[1])!=0:
-                for shadingState, illumValues in enumerate(illuminanceValues[1]):
-                    p = GH_Path(shadingState)
-                    annualIllumDynamicSHDGroupI.AddRange(heading, p)
-                    annualIllumDynamicSHDGroupI.AddRange(illumValues, p)
-            
-            elif shadingGroup==2 and len(illuminanceValues[2])!=0:
-                for shadingState, illumValues in enumerate(illuminanceValues[2]):
-                    p = GH_Path(shadingState)
-                    annualIllumDynamicSHDGroupII.AddRange(heading, p)
-                    annualIllumDynamicSHDGroupII.AddRange(illumValues, p)
-
-        
-        # create the mixed result with the shadings
-        if len(shadingProfile)!=0 and len(illuminanceValues[1])!=0:
-            mixResults = heading
-            
-            # for now Honeybee only supports single shading group so the number of
-            # states is length of shading group 1
-            numberOfStates = len(illuminanceValues[1])
-            for HOY, shdProfile in enumerate(shadingProfile):
-                if shdProfile == 0:
-                    # no blinds
-                    mixResults.append(illuminanceValues[0][0][HOY])
-                else:
-                    stateInEffect = int(round(numberOfStates * shdProfile))
-                    mixResults.append(illuminanceValues[1][stateInEffect-1][HOY])
-            
-            iIlluminanceBasedOnOccupancy = mixResults
+        for targetCount, targetValues in enumerate(illuminanceValues):
+            for shadingGroup in targetValues.keys():
+                # results with no blind
+                if shadingGroup==0:
+                    annualIllumNoDynamicSHD.AddRange(heading + targetValues[0][0], GH_Path(targetCount))
+                
+                elif shadingGroup==1 and len(targetValues[1])!=0:
+                    for shadingState, illumValues in enumerate(targetValues[1]):
+                        p = GH_Path(targetCount, shadingState)
+                        annualIllumDynamicSHDGroupI.AddRange(heading, p)
+                        annualIllumDynamicSHDGroupI.AddRange(illumValues, p)
+                
+                elif shadingGroup==2 and len(targetValues[2])!=0:
+                    for shadingState, illumValues in enumerate(targetValues[2]):
+                        p = GH_Path(targetCount, shadingState)
+                        annualIllumDynamicSHDGroupII.AddRange(heading, p)
+                        annualIllumDynamicSHDGroupII.AddRange(illumValues, p)
             
-            if len(illuminanceValues[2])!=0:
-                msg = "Honeybee currently only supports one shading group for results visulaization."
+            # create the mixed result with the shadings
+            shadingProfile = shadingProfiles[targetCount]
+            if shadingProfile!=[]: shadingProfile = shadingProfile[0]
             
+            if len(shadingProfile)!=0 and len(targetValues[1])!=0:
+                mixResults = list(heading)
+                
+                # for now Honeybee only supports single shading group so the number of
+                # states is length of shading group 1
+                numberOfStates = len(targetValues[1])
+                for HOY, shdProfile in enumerate(shadingProfile):
+                    if shdProfile == 0:
+                        # no blinds
+                        mixResults.append(targetValues[0][0][HOY])
+                    else:
+                        stateInEffect = int(round(numberOfStates * shdProfile))
+                        mixResults.append(targetValues[1][stateInEffect-1][HOY])
+                
+                iIlluminanceBasedOnOccupancy.AddRange(mixResults, GH_Path(targetCount))
+                
+                if len(targetValues[2])!=0:
+                    msg = "Honeybee currently only supports one shading group for results visulaization."
         
         if msg!=str.Empty:
             w = gh.GH_RuntimeMessageLevel.Warning
@@ -187,149 +187,149 @@ def checkCentralSys(sysInt, sysType):
 # PARSE THE RESULT FILE.
 if _resultFileAddress and gotData == True:
     #try:
-    result = open(_resultFileAddress, 'r')
+    csvReader = sc.sticky["honeybee_EPCSVReader"](_resultFileAddress)
     
-    for lineCount, line in enumerate(result):
-        if lineCount == 0:
-            #ANALYZE THE FILE HEADING
-            key = []; path = []
-            for columnCount, column in enumerate(line.split(',')):
-                if 'Zone Ideal Loads Supply Air Sensible Cooling Energy' in column:
-                    key.append(0)
-                    zoneName = checkZone(" " + column.split(':')[0].split(' IDEAL LOADS AIR SYSTEM')[0])
-                    makeHeader(sensibleCooling, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Sensible Cooling Energy", "kWh", True)
-                    dataTypeList[0] = True
-                
-                elif 'Zone Ideal Loads Supply Air Latent Cooling Energy' in column:
-                    key.append(1)
-                    zoneName = checkZone(" " + column.split(':')[0].split(' IDEAL LOADS AIR SYSTEM')[0])
-                    makeHeader(latentCooling, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Latent Cooling Energy", "kWh", True)
-                    dataTypeList[1] = True
-                
-                elif 'Zone Ideal Loads Supply Air Sensible Heating Energy' in column:
-                    key.append(2)
-                    zoneName = checkZone(" " + column.split(':')[0].split(' IDEAL LOADS AIR SYSTEM')[0])
-                    makeHeader(sensibleHeating, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Sensible Heating Energy", "kWh", True)
-                    dataTypeList[2] = True
-                
-                elif 'Zone Ideal Loads Supply Air Latent Heating Energy' in column:
-                    key.append(3)
-                    zoneName = checkZone(" " + column.split(':')[0].split(' IDEAL LOADS AIR SYSTEM')[0])
-                    makeHeader(latentHeating, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Latent Heating Energy", "kWh", True)
-                    dataTypeList[3] = True
-                
-                elif 'System Node Standard Density Volume Flow Rate' in column:
-                    if "RETURN" in column or "OUTDOOR AIR" in column or "ZONE AIR NODE" in column:
+    line = csvReader.getHeaderLine()
+    #ANALYZE THE FILE HEADING
+    key = []; path = []
+    for columnCount, column in enumerate(line.split(',')):
+        if 'Zone Ideal Loads Supply Air Sensible Cooling Energy' in column:
+            key.append(0)
+            zoneName = checkZone(" " + column.split(':')[0].split(' IDEAL LOADS AIR SYSTEM')[0])
+            makeHeader(sensibleCooling, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Sensible Cooling Energy", "kWh", True)
+            dataTypeList[0] = True
+        
+        elif 'Zone Ideal Loads Supply Air Latent Cooling Energy' in column:
+            key.append(1)
+            zoneName = checkZone(" " + column.split(':')[0].split(' IDEAL LOADS AIR SYSTEM')[0])
+            makeHeader(latentCooling, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Latent Cooling Energy", "kWh", True)
+            dataTypeList[1] = True
+        
+        elif 'Zone Ideal Loads Supply Air Sensible Heating Energy' in column:
+            key.append(2)
+            zoneName = checkZone(" " + column.split(':')[0].split(' IDEAL LOADS AIR SYSTEM')[0])
+            makeHeader(sensibleHeating, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Sensible Heating Energy", "kWh", True)
+            dataTypeList[2] = True
+        
+        elif 'Zone Ideal Loads Supply Air Latent Heating Energy' in column:
+            key.append(3)
+            zoneName = checkZone(" " + column.split(':')[0].split(' IDEAL LOADS AIR SYSTEM')[0])
+            makeHeader(latentHeating, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Latent Heating Energy", "kWh", True)
+            dataTypeList[3] = True
+        
+        elif 'System Node Standard Density Volume Flow Rate' in column:
+            if "RETURN" in column or "OUTDOOR AIR" in column or "ZONE AIR NODE" in column:
+                key.append(-1)
+                path.append(-1)
+            else:
+                if ' IDEAL LOADS SUPPLY INLET' in column:
+                    key.append(4)
+                    zoneName = checkZone(" " + column.split(':')[0].split(' IDEAL LOADS SUPPLY INLET')[0])
+                    makeHeader(supplyVolFlow, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Supply Air Standard Density Volume Flow Rate", "m3/s", True)
+                    dataTypeList[4] = True
+                else:
+                    try:
+                        zoneName = checkCentralSys((" " + column.split(":")[0].split('NODE')[-1]), 0)
+                        centralSys = True
+                        makeHeader(supplyVolFlow, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Supply Air Standard Density Volume Flow Rate", "m3/s", True)
+                        dataTypeList[4] = True
+                        key.append(4)
+                        print zoneName
+                    except:
                         key.append(-1)
                         path.append(-1)
-                    else:
-                        if ' IDEAL LOADS SUPPLY INLET' in column:
-                            key.append(4)
-                            zoneName = checkZone(" " + column.split(':')[0].split(' IDEAL LOADS SUPPLY INLET')[0])
-                            makeHeader(supplyVolFlow, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Supply Air Standard Density Volume Flow Rate", "m3/s", True)
-                            dataTypeList[4] = True
-                        else:
-                            try:
-                                zoneName = checkCentralSys((" " + column.split(":")[0].split('NODE')[-1]), 0)
-                                centralSys = True
-                                makeHeader(supplyVolFlow, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Supply Air Standard Density Volume Flow Rate", "m3/s", True)
-                                dataTypeList[4] = True
-                                key.append(4)
-                                print zoneName
-                            except:
-                                key.append(-1)
-                                path.append(-1)
-                
-                elif 'System Node Temperature' in column:
-                    if "RETURN" in column or "OUTDOOR AIR" in column or "ZONE AIR NODE" in column:
+        
+        elif 'System Node Temperature' in column:
+            if "RETURN" in column or "OUTDOOR AIR" in column or "ZONE AIR NODE" in column:
+                key.append(-1)
+                path.append(-1)
+            else:
+                if ' IDEAL LOADS SUPPLY INLET' in column:
+                    key.append(5)
+                    zoneName = checkZone(" " + column.split(':')[0].split(' IDEAL LOADS SUPPLY INLET')[0])
+                    makeHeader(supplyAirTemp, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Supply Air Temperature", "C", False)
+                    dataTypeList[5] = True
+                else:
+                    try:
+                        zoneName = checkCentralSys((" " + column.split(":")[0].split('NODE')[-1]), 1)
+                        centralSys = True
+                        makeHeader(supplyAirTemp, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Supply Air Temperature", "C", False)
+                        dataTypeList[5] = True
+                        key.append(5)
+                    except:
                         key.append(-1)
                         path.append(-1)
-                    else:
-                        if ' IDEAL LOADS SUPPLY INLET' in column:
-                            key.append(5)
-                            zoneName = checkZone(" " + column.split(':')[0].split(' IDEAL LOADS SUPPLY INLET')[0])
-                            makeHeader(supplyAirTemp, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Supply Air Temperature", "C", False)
-                            dataTypeList[5] = True
-                        else:
-                            try:
-                                zoneName = checkCentralSys((" " + column.split(":")[0].split('NODE')[-1]), 1)
-                                centralSys = True
-                                makeHeader(supplyAirTemp, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Supply Air Temperature", "C", False)
-                                dataTypeList[5] = True
-                                key.append(5)
-                            except:
-                                key.append(-1)
-                                path.append(-1)
-                
-                elif 'System Node Relative Humidity' in column:
-                    if "RETURN" in column or "OUTDOOR AIR" in column or "ZONE AIR NODE" in column:
+        
+        elif 'System Node Relative Humidity' in column:
+            if "RETURN" in column or "OUTDOOR AIR" in column or "ZONE AIR NODE" in column:
+                key.append(-1)
+                path.append(-1)
+            else:
+                if ' IDEAL LOADS SUPPLY INLET' in column:
+                    key.append(6)
+                    zoneName = checkZone(" " + column.split(':')[0].split(' IDEAL LOADS SUPPLY INLET')[0])
+                    makeHeader(supplyAirHumidity, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Supply Air Relative Humidity", "%", False)
+                    dataTypeList[6] = True
+                else:
+                    try:
+                        zoneName = checkCentralSys((" " + column.split(":")[0].split('NODE')[-1]), 2)
+                        centralSys = True
+                        makeHeader(supplyAirHumidity, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Supply Air Relative Humidity", "%", False)
+                        dataTypeList[6] = True
+                        key.append(6)
+                    except:
                         key.append(-1)
                         path.append(-1)
-                    else:
-                        if ' IDEAL LOADS SUPPLY INLET' in column:
-                            key.append(6)
-                            zoneName = checkZone(" " + column.split(':')[0].split(' IDEAL LOADS SUPPLY INLET')[0])
-                            makeHeader(supplyAirHumidity, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Supply Air Relative Humidity", "%", False)
-                            dataTypeList[6] = True
-                        else:
-                            try:
-                                zoneName = checkCentralSys((" " + column.split(":")[0].split('NODE')[-1]), 2)
-                                centralSys = True
-                                makeHeader(supplyAirHumidity, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Supply Air Relative Humidity", "%", False)
-                                dataTypeList[6] = True
-                                key.append(6)
-                            except:
-                                key.append(-1)
-                                path.append(-1)
-                
-                elif 'Earth Tube Zone Sensible Cooling Energy' in column:
-                    key.append(7)
-                    zoneName = checkZone(" " + column.split(':')[0])
-                    makeHeader(earthTubeCooling, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Earth Tube Cooling Energy", "kWh", True)
-                    dataTypeList[7] = True
-                
-                elif 'Earth Tube Zone Sensible Heating Energy' in column:
-                    key.append(8)
-                    zoneName = checkZone(" " + column.split(':')[0])
-                    makeHeader(earthTubeHeating, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Earth Tube Heating Energy", "kWh", True)
-                    dataTypeList[8] = True
-                
-                else:
-                    key.append(-1)
-                    path.append(-1)
-                
-            #print key
-            #print path
+        
+        elif 'Earth Tube Zone Sensible Cooling Energy' in column:
+            key.append(7)
+            zoneName = checkZone(" " + column.split(':')[0])
+            makeHeader(earthTubeCooling, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Earth Tube Cooling Energy", "kWh", True)
+            dataTypeList[7] = True
+        
+        elif 'Earth Tube Zone Sensible Heating Energy' in column:
+            key.append(8)
+            zoneName = checkZone(" " + column.split(':')[0])
+            makeHeader(earthTubeHeating, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Earth Tube Heating Energy", "kWh", True)
+            dataTypeList[8] = True
+        
         else:
-            for columnCount, column in enumerate(line.split(',')):
-                p = GH_Path(int(path[columnCount]))
-                if normByFlr == True: flrArea = floorAreaList[int(path[columnCount])]
-                else: flrArea = 1
-                
-                if key[columnCount] == 0:
-                    sensibleCooling.Add((float(column)/3600000)/flrArea, p)
-                elif key[columnCount] == 1:
-                    latentCooling.Add((float(column)/3600000)/flrArea, p)
-                elif key[columnCount] == 2:
-                    sensibleHeating.Add((float(column)/3600000)/flrArea, p)
-                elif key[columnCount] == 3:
-                    latentHeating.Add((float(column)/3600000)/flrArea, p)
-                elif key[columnCount] == 4:
-                    supplyVolFlow.Add((float(column))/flrArea, p)
-                elif key[columnCount] == 5:
-                    supplyAirTemp.Add(float(column), p)
-                elif key[columnCount] == 6:
-                    supplyAirHumidity.Add(float(column), p)
-                elif key[columnCount] == 7:
-                    earthTubeCooling.Add((float(column)/3600000)/flrArea, p)
-                elif key[columnCount] == 8:
-                    earthTubeHeating.Add((float(column)/3600000)/flrArea, p)
-                
-    result.close()
+            key.append(-1)
+            path.append(-1)
+        
+    #print key
+    #print path
+
+    # only read the columns that are used
+    dataColumns = [columnCount for columnCount, k in enumerate(key) if k != -1]
+    for lineCount, row in enumerate(csvReader.iterRows(dataColumns), 1):
+        for columnCount in dataColumns:
+            column = row[columnCount]
+            p = GH_Path(int(path[columnCount]))
+            if normByFlr == True: flrArea = floorAreaList[int(path[columnCount])]
+            else: flrArea = 1
+            
+            if key[columnCount] == 0:
+                sensibleCooling.Add((float(column)/3600000)/flrArea, p)
+            elif key[columnCount] == 1:
+                latentCooling.Add((float(column)/3600000)/flrArea, p)
+            elif key[columnCount] == 2:
+                sensibleHeating.Add((float(column)/3600000)/flrArea, p)
+            elif key[columnCount] == 3:
+                latentHeating.Add((float(column)/3600000)/flrArea, p)
+            elif key[columnCount] == 4:
+                supplyVolFlow.Add((float(column))/flrArea, p)
+            elif key[columnCount] == 5:
+                supplyAirTemp.Add(float(column), p)
+            elif key[columnCount] == 6:
+                supplyAirHumidity.Add(float(column), p)
+            elif key[columnCount] == 7:
+                earthTubeCooling.Add((float(column)/3600000)/flrArea, p)
+            elif key[columnCount] == 8:
+                earthTubeHeating.Add((float(column)/3600000)/flrArea, p)
+            
     parseSuccess = True
     #except:
-    #    try: result.close()
-    #    except: pass
     #    parseSuccess = False
     #    warn = 'Failed to parse the result file.  Check the folder of the file address you are plugging into this component and make sure that there is a .csv file in the folder. \n'+ \
     #              'If there is no csv file or there is a file with no data in it (it is 0 kB), your simulation probably did not run correctly. \n' + \
@@ -281,317 +281,318 @@ for name in zoneNameList:
 # PARSE THE RESULT FILE.
 if _resultFileAddress and gotData == True and csvExists == True:
     try:
-        result = open(_resultFileAddress, 'r')
+        csvReader = sc.sticky["honeybee_EPCSVReader"](_resultFileAddress)
         
-        for lineCount, line in enumerate(result):
-            if lineCount == 0:
-                #ANALYZE THE FILE HEADING
-                key = []; path = []
-                for columnCount, column in enumerate(line.split(',')):
-                    if 'Zone Ideal Loads Supply Air Total Cooling Energy' in column or 'Zone Packaged Terminal Heat Pump Total Cooling Energy' in column or 'Chiller Electric Energy' in column:
-                        key.append(0)
-                        if 'Zone Ideal Loads Supply Air Total Cooling Energy' in column and 'ZONEHVAC' in column:
-                            zoneName = checkZone(" " + ":".join(column.split(":")[:-1]).split('ZONEHVAC')[0])
-                            if zoneName == None: zoneName = checkZone(" " + ":".join(column.split(":")[:-1]).split(' ZONEHVAC')[0])
-                        elif 'IDEAL LOADS AIR SYSTEM' in column: zoneName = checkZone(" " + ":".join(column.split(":")[:-1]).split(' IDEAL LOADS AIR SYSTEM')[0])
-                        elif 'ZONE HVAC PACKAGED TERMINAL HEAT PUMP' in column: zoneName = checkZoneSys(" " + ":".join(column.split(":")[:-1]).split('ZONE HVAC PACKAGED TERMINAL HEAT PUMP ')[-1])
-                        elif 'Chiller Electric Energy' in column:
-                            zoneName = checkCentralSys(1, 0)
-                            centralSys = True
-                        else: zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
-                        makeHeader(cooling, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Cooling Energy", energyUnit, True)
-                        dataTypeList[2] = True
-                    
-                    elif 'Zone Ideal Loads Supply Air Total Heating Energy' in column or 'Zone Packaged Terminal Heat Pump Total Heating Energy' in column or 'Boiler Heating Energy' in column:
-                        key.append(1)
-                        if 'Zone Ideal Loads Supply Air Total Heating Energy' in column and 'ZONEHVAC' in column:
-                            zoneName = checkZone(" " + ":".join(column.split(":")[:-1]).split('ZONEHVAC')[0])
-                            if zoneName == None: zoneName = checkZone(" " + ":".join(column.split(":")[:-1]).split(' ZONEHVAC')[0])
-                        elif 'IDEAL LOADS AIR SYSTEM' in column: zoneName = checkZone(" " + ":".join(column.split(":")[:-1]).split(' IDEAL LOADS AIR SYSTEM')[0])
-                        elif 'ZONE HVAC PACKAGED TERMINAL HEAT PUMP' in column: zoneName = checkZoneSys(" " + ":".join(column.split(":")[:-1]).split('ZONE HVAC PACKAGED TERMINAL HEAT PUMP ')[-1])
-                        elif 'Boiler Heating Energy' in column:
-                            zoneName = checkCentralSys(1, 1)
-                            centralSys = True
-                        else: zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
-                        makeHeader(heating, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Heating Energy", energyUnit, True)
-                        dataTypeList[3] = True
-                    
-                    elif 'Zone Lights Electric Energy' in column:
-                        key.append(2)
-                        zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
-                        makeHeader(electricLight, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Electric Lighting Energy", energyUnit, True)
-                        dataTypeList[4] = True
-                    
-                    elif 'Zone Electric Equipment Electric Energy' in column:
-                        key.append(3)
-                        zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
-                        makeHeader(electricEquip, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Electric Equipment Energy", energyUnit, True)
-                        dataTypeList[5] = True
-                    
-                    elif 'Fan Electric Energy' in column:
-                        key.append(15)
-                        if 'FAN CONSTANT VOLUME' in column:
-                            zoneName = checkZoneSys(" " + ":".join(column.split(":")[:-1]).split('FAN CONSTANT VOLUME ')[-1])
-                            makeHeader(fanElectric, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Fan Electric Energy", energyUnit, True)
-                        elif 'FAN VARIABLE VOLUME' in column:
-                            centralSys = True
-                            zoneName = checkCentralSys(" " + ":".join(column.split(":")[:-1]).split('FAN VARIABLE VOLUME ')[-1], 2)
-                            makeHeader(fanElectric, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Fan Electric Energy", energyUnit, True)
-                        elif 'Zone Ventilation Fan Electric Energy' in column:
-                            zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
-                            makeHeader(fanElectric, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Fan Electric Energy", energyUnit, True)
-                        elif 'Earth Tube Fan Electric Energy' in column:
-                            zoneName = checkZoneOther(dataIndex, " " + ":".join(column.split(":")[:-1]))
-                            makeHeaderAlt(fanElectric, path[columnCount], zoneName, column.split('(')[-1].split(')')[0], "Earth Tube Fan Electric Energy", energyUnit, True)
-                        dataTypeList[6] = True
-                    
-                    elif 'Pump Electric Energy' in column:
-                        key.append(25)
-                        if 'PUMP CONSTANT SPEED' in column:
-                            zoneName = checkZoneSys(" " + ":".join(column.split(":")[:-1]).split('PUMP CONSTANT SPEED ')[-1])
-                            makeHeader(pumpElectric, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Pump Electric Energy", energyUnit, True)
-                        elif 'PUMP VARIABLE SPEED' in column:
-                            centralSys = True
-                            zoneName = checkCentralSys(" " + ":".join(column.split(":")[:-1]).split('PUMP VARIABLE SPEED ')[-1], 3)
-                            makeHeader(pumpElectric, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Pump Electric Energy", energyUnit, True)
-                        dataTypeList[7] = True
-                    
-                    elif 'Zone People Total Heating Energy' in column:
-                        key.append(4)
-                        zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
-                        makeHeader(peopleGains, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "People Energy", energyUnit, True)
-                        dataTypeList[8] = True
-                    
-                    elif 'Zone Windows Total Transmitted Solar Radiation Energy' in column:
-                        key.append(5)
-                        zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
-                        makeHeader(totalSolarGain, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Total Solar Gain", energyUnit, True)
-                        dataTypeList[9] = True
-                    
-                    elif 'Zone Ventilation Total Heat Loss Energy ' in column:
-                        key.append(6)
-                        zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
-                        makeHeader(natVentEnergy, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Natural Ventilation Energy", energyUnit, True)
-                        dataTypeList[12] = True
-                    
-                    elif 'Zone Ventilation Total Heat Gain Energy' in column:
-                        key.append(7)
-                        zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
-                    
-                    elif 'Zone Ideal Loads Zone Total Heating Energy' in column:
-                        key.append(23)
-                        zoneName = checkZone(" " + ":".join(column.split(":")[:-1]).split(' IDEAL LOADS')[0])
-                        zoneHeatingEnergy[int(path[-1])].append(zoneName)
-                        zoneHeatingEnergy[int(path[-1])].append(column.split('(')[-1].split(')')[0])
-                    
-                    elif 'Zone Ideal Loads Zone Total Cooling Energy' in column:
-                        key.append(24)
-                        zoneName = checkZone(" " + ":".join(column.split(":")[:-1]).split(' IDEAL LOADS')[0])
-                        zoneCoolingEnergy[int(path[-1])].append(zoneName)
-                        zoneCoolingEnergy[int(path[-1])].append(column.split('(')[-1].split(')')[0])
-                    
-                    elif 'Zone Infiltration Total Heat Loss Energy' in column:
-                        key.append(8)
-                        zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
-                        makeHeader(infiltrationEnergy, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Infiltration Energy", energyUnit, True)
-                        dataTypeList[10] = True
-                    
-                    elif 'Zone Infiltration Total Heat Gain Energy' in column:
-                        key.append(9)
-                        zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
-                    
-                    elif 'Zone Operative Temperature' in column:
-                        key.append(10)
-                        zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
-                        makeHeader(operativeTemperature, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Operative Temperature", "C", False)
-                        dataTypeList[13] = True
-                    
-                    elif 'Zone Mean Air Temperature' in column:
-                        key.append(11)
-                        zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
-                        makeHeader(airTemperature, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Air Temperature", "C", False)
-                        dataTypeList[14] = True
-                    
-                    elif 'Zone Mean Radiant Temperature' in column:
-                        key.append(12)
-                        zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
-                        makeHeader(meanRadTemperature, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Radiant Temperature", "C", False)
-                        dataTypeList[15] = True
-                    
-                    elif 'Zone Air Relative Humidity' in column:
-                        key.append(13)
-                        zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
-                        makeHeader(relativeHumidity, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Relative Humidity", "%", False)
-                        dataTypeList[16] = True
-                    
-                    elif 'Zone Ventilation Standard Density Volume Flow Rate' in column:
-                        key.append(16)
-                        zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
-                        natVentFlow[int(path[-1])].append(zoneName)
-                        natVentFlow[int(path[-1])].append(column.split('(')[-1].split(')')[0])
-                    
-                    elif 'Zone Infiltration Standard Density Volume Flow Rate' in column:
-                        key.append(17)
-                        zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
-                        infiltrationFlow[int(path[-1])].append(zoneName)
-                        infiltrationFlow[int(path[-1])].append(column.split('(')[-1].split(')')[0])
-                    
-                    elif 'Zone Mechanical Ventilation Standard Density Volume Flow Rate' in column:
-                        key.append(22)
-                        zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
-                        mechSysAirFlow[int(path[-1])].append(zoneName)
-                        mechSysAirFlow[int(path[-1])].append(column.split('(')[-1].split(')')[0])
-                    
-                    elif 'Earth Tube Air Flow Volume' in column:
-                        key.append(21)
-                        zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
-                        earthTubeFlow[int(path[-1])].append(zoneName)
-                        earthTubeFlow[int(path[-1])].append(column.split('(')[-1].split(')')[0])
-                    
-                    elif 'Zone Air Heat Balance Internal Convective Heat Gain Rate' in column:
-                        key.append(18)
-                        zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
-                        internalAirGain[int(path[-1])].append(zoneName)
-                        internalAirGain[int(path[-1])].append(column.split('(')[-1].split(')')[0])
-                    
-                    elif 'Zone Air Heat Balance Surface Convection Rate' in column:
-                        key.append(19)
-                        zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
-                        surfaceAirGain[int(path[-1])].append(zoneName)
-                        surfaceAirGain[int(path[-1])].append(column.split('(')[-1].split(')')[0])
-                    
-                    elif 'Zone Air Heat Balance System Air Transfer Rate' in column:
-                        key.append(20)
-                        zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
-                        systemAirGain[int(path[-1])].append(zoneName)
-                        systemAirGain[int(path[-1])].append(column.split('(')[-1].split(')')[0])
-                    
-                    elif 'Zone' in column and not "Earth Tube" in column or "Pump Electric Energy" in column:
-                        if not "System" in column and not "SYSTEM" in column and not "ZONEHVAC" in column:
-                            zoneName = checkZoneOther(dataIndex, (" " + ":".join(column.split(":")[:-1])))
-                        elif 'IDEAL LOADS' in column:
-                            zoneName = checkZoneOther(dataIndex, (" " + column.split(" IDEAL LOADS")[0]))
-                        else: zoneName = None
-                        
-                        if zoneName != None:
-                            key.append(14)
-                            otherDataName = column.split(':')[-1].split(' [')[0].upper()
-                            if "ENERGY" in otherDataName or "GAIN" in otherDataName or "MASS" in otherDataName or "VOLUME" in otherDataName or "Loss" in otherDataName: normalizble = True
-                            else: normalizble = False
-                            otherZDatFlrNormList.append(normalizble)
-                            makeHeaderAlt(otherZoneData, path[columnCount], zoneName, column.split('(')[-1].split(')')[0], column.split(':')[-1].split(' [')[0], column.split('[')[-1].split(']')[0], normalizble)
-                            dataTypeList[19] = True
-                        else:
-                            key.append(-1)
-                            path.append(-1)
-                    
-                    else:
-                        key.append(-1)
-                        path.append(-1)
-                    
-                #print key
-                #print path
+        line = csvReader.getHeaderLine()
+        #ANALYZE THE FILE HEADING
+        key = []; path = []
+        for columnCount, column in enumerate(line.split(',')):
+            if 'Zone Ideal Loads Supply Air Total Cooling Energy' in column or 'Zone Packaged Terminal Heat Pump Total Cooling Energy' in column or 'Chiller Electric Energy' in column:
+                key.append(0)
+                if 'Zone Ideal Loads Supply Air Total Cooling Energy' in column and 'ZONEHVAC' in column:
+                    zoneName = checkZone(" " + ":".join(column.split(":")[:-1]).split('ZONEHVAC')[0])
+                    if zoneName == None: zoneName = checkZone(" " + ":".join(column.split(":")[:-1]).split(' ZONEHVAC')[0])
+                elif 'IDEAL LOADS AIR SYSTEM' in column: zoneName = checkZone(" " + ":".join(column.split(":")[:-1]).split(' IDEAL LOADS AIR SYSTEM')[0])
+                elif 'ZONE HVAC PACKAGED TERMINAL HEAT PUMP' in column: zoneName = checkZoneSys(" " + ":".join(column.split(":")[:-1]).split('ZONE HVAC PACKAGED TERMINAL HEAT PUMP ')[-1])
+                elif 'Chiller Electric Energy' in column:
+                    zoneName = checkCentralSys(1, 0)
+                    centralSys = True
+                else: zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
+                makeHeader(cooling, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Cooling Energy", energyUnit, True)
+                dataTypeList[2] = True
+            
+            elif 'Zone Ideal Loads Supply Air Total Heating Energy' in column or 'Zone Packaged Terminal Heat Pump Total Heating Energy' in column or 'Boiler Heating Energy' in column:
+                key.append(1)
+                if 'Zone Ideal Loads Supply Air Total Heating Energy' in column and 'ZONEHVAC' in column:
+                    zoneName = checkZone(" " + ":".join(column.split(":")[:-1]).split('ZONEHVAC')[0])
+                    if zoneName == None: zoneName = checkZone(" " + ":".join(column.split(":")[:-1]).split(' ZONEHVAC')[0])
+                elif 'IDEAL LOADS AIR SYSTEM' in column: zoneName = checkZone(" " + ":".join(column.split(":")[:-1]).split(' IDEAL LOADS AIR SYSTEM')[0])
+                elif 'ZONE HVAC PACKAGED TERMINAL HEAT PUMP' in column: zoneName = checkZoneSys(" " + ":".join(column.split(":")[:-1]).split('ZONE HVAC PACKAGED TERMINAL HEAT PUMP ')[-1])
+                elif 'Boiler Heating Energy' in column:
+                    zoneName = checkCentralSys(1, 1)
+                    centralSys = True
+                else: zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
+                makeHeader(heating, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Heating Energy", energyUnit, True)
+                dataTypeList[3] = True
+            
+            elif 'Zone Lights Electric Energy' in column:
+                key.append(2)
+                zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
+                makeHeader(electricLight, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Electric Lighting Energy", energyUnit, True)
+                dataTypeList[4] = True
+            
+            elif 'Zone Electric Equipment Electric Energy' in column:
+                key.append(3)
+                zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
+                makeHeader(electricEquip, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Electric Equipment Energy", energyUnit, True)
+                dataTypeList[5] = True
+            
+            elif 'Fan Electric Energy' in column:
+                key.append(15)
+                if 'FAN CONSTANT VOLUME' in column:
+                    zoneName = checkZoneSys(" " + ":".join(column.split(":")[:-1]).split('FAN CONSTANT VOLUME ')[-1])
+                    makeHeader(fanElectric, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Fan Electric Energy", energyUnit, True)
+                elif 'FAN VARIABLE VOLUME' in column:
+                    centralSys = True
+                    zoneName = checkCentralSys(" " + ":".join(column.split(":")[:-1]).split('FAN VARIABLE VOLUME ')[-1], 2)
+                    makeHeader(fanElectric, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Fan Electric Energy", energyUnit, True)
+                elif 'Zone Ventilation Fan Electric Energy' in column:
+                    zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
+                    makeHeader(fanElectric, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Fan Electric Energy", energyUnit, True)
+                elif 'Earth Tube Fan Electric Energy' in column:
+                    zoneName = checkZoneOther(dataIndex, " " + ":".join(column.split(":")[:-1]))
+                    makeHeaderAlt(fanElectric, path[columnCount], zoneName, column.split('(')[-1].split(')')[0], "Earth Tube Fan Electric Energy", energyUnit, True)
+                dataTypeList[6] = True
+            
+            elif 'Pump Electric Energy' in column:
+                key.append(25)
+                if 'PUMP CONSTANT SPEED' in column:
+                    zoneName = checkZoneSys(" " + ":".join(column.split(":")[:-1]).split('PUMP CONSTANT SPEED ')[-1])
+                    makeHeader(pumpElectric, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Pump Electric Energy", energyUnit, True)
+                elif 'PUMP VARIABLE SPEED' in column:
+                    centralSys = True
+                    zoneName = checkCentralSys(" " + ":".join(column.split(":")[:-1]).split('PUMP VARIABLE SPEED ')[-1], 3)
+                    makeHeader(pumpElectric, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Pump Electric Energy", energyUnit, True)
+                dataTypeList[7] = True
+            
+            elif 'Zone People Total Heating Energy' in column:
+                key.append(4)
+                zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
+                makeHeader(peopleGains, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "People Energy", energyUnit, True)
+                dataTypeList[8] = True
+            
+            elif 'Zone Windows Total Transmitted Solar Radiation Energy' in column:
+                key.append(5)
+                zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
+                makeHeader(totalSolarGain, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Total Solar Gain", energyUnit, True)
+                dataTypeList[9] = True
+            
+            elif 'Zone Ventilation Total Heat Loss Energy ' in column:
+                key.append(6)
+                zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
+                makeHeader(natVentEnergy, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Natural Ventilation Energy", energyUnit, True)
+                dataTypeList[12] = True
+            
+            elif 'Zone Ventilation Total Heat Gain Energy' in column:
+                key.append(7)
+                zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
+            
+            elif 'Zone Ideal Loads Zone Total Heating Energy' in column:
+                key.append(23)
+                zoneName = checkZone(" " + ":".join(column.split(":")[:-1]).split(' IDEAL LOADS')[0])
+                zoneHeatingEnergy[int(path[-1])].append(zoneName)
+                zoneHeatingEnergy[int(path[-1])].append(column.split('(')[-1].split(')')[0])
+            
+            elif 'Zone Ideal Loads Zone Total Cooling Energy' in column:
+                key.append(24)
+                zoneName = checkZone(" " + ":".join(column.split(":")[:-1]).split(' IDEAL LOADS')[0])
+                zoneCoolingEnergy[int(path[-1])].append(zoneName)
+                zoneCoolingEnergy[int(path[-1])].append(column.split('(')[-1].split(')')[0])
+            
+            elif 'Zone Infiltration Total Heat Loss Energy' in column:
+                key.append(8)
+                zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
+                makeHeader(infiltrationEnergy, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Infiltration Energy", energyUnit, True)
+                dataTypeList[10] = True
+            
+            elif 'Zone Infiltration Total Heat Gain Energy' in column:
+                key.append(9)
+                zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
+            
+            elif 'Zone Operative Temperature' in column:
+                key.append(10)
+                zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
+                makeHeader(operativeTemperature, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Operative Temperature", "C", False)
+                dataTypeList[13] = True
+            
+            elif 'Zone Mean Air Temperature' in column:
+                key.append(11)
+                zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
+                makeHeader(airTemperature, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Air Temperature", "C", False)
+                dataTypeList[14] = True
+            
+            elif 'Zone Mean Radiant Temperature' in column:
+                key.append(12)
+                zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
+                makeHeader(meanRadTemperature, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Radiant Temperature", "C", False)
+                dataTypeList[15] = True
+            
+            elif 'Zone Air Relative Humidity' in column:
+                key.append(13)
+                zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
+                makeHeader(relativeHumidity, int(path[columnCount]), zoneName, column.split('(')[-1].split(')')[0], "Relative Humidity", "%", False)
+                dataTypeList[16] = True
+            
+            elif 'Zone Ventilation Standard Density Volume Flow Rate' in column:
+                key.append(16)
+                zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
+                natVentFlow[int(path[-1])].append(zoneName)
+                natVentFlow[int(path[-1])].append(column.split('(')[-1].split(')')[0])
+            
+            elif 'Zone Infiltration Standard Density Volume Flow Rate' in column:
+                key.append(17)
+                zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
+                infiltrationFlow[int(path[-1])].append(zoneName)
+                infiltrationFlow[int(path[-1])].append(column.split('(')[-1].split(')')[0])
+            
+            elif 'Zone Mechanical Ventilation Standard Density Volume Flow Rate' in column:
+                key.append(22)
+                zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
+                mechSysAirFlow[int(path[-1])].append(zoneName)
+                mechSysAirFlow[int(path[-1])].append(column.split('(')[-1].split(')')[0])
+            
+            elif 'Earth Tube Air Flow Volume' in column:
+                key.append(21)
+                zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
+                earthTubeFlow[int(path[-1])].append(zoneName)
+                earthTubeFlow[int(path[-1])].append(column.split('(')[-1].split(')')[0])
+            
+            elif 'Zone Air Heat Balance Internal Convective Heat Gain Rate' in column:
+                key.append(18)
+                zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
+                internalAirGain[int(path[-1])].append(zoneName)
+                internalAirGain[int(path[-1])].append(column.split('(')[-1].split(')')[0])
+            
+            elif 'Zone Air Heat Balance Surface Convection Rate' in column:
+                key.append(19)
+                zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
+                surfaceAirGain[int(path[-1])].append(zoneName)
+                surfaceAirGain[int(path[-1])].append(column.split('(')[-1].split(')')[0])
+            
+            elif 'Zone Air Heat Balance System Air Transfer Rate' in column:
+                key.append(20)
+                zoneName = checkZone(" " + ":".join(column.split(":")[:-1]))
+                systemAirGain[int(path[-1])].append(zoneName)
+                systemAirGain[int(path[-1])].append(column.split('(')[-1].split(')')[0])
+            
+            elif 'Zone' in column and not "Earth Tube" in column or "Pump Electric Energy" in column:
+                if not "System" in column and not "SYSTEM" in column and not "ZONEHVAC" in column:
+                    zoneName = checkZoneOther(dataIndex, (" " + ":".join(column.split(":")[:-1])))
+                elif 'IDEAL LOADS' in column:
+                    zoneName = checkZoneOther(dataIndex, (" " + column.split(" IDEAL LOADS")[0]))
+                else: zoneName = None
+                
+                if zoneName != None:
+                    key.append(14)
+                    otherDataName = column.split(':')[-1].split(' [')[0].upper()
+                    if "ENERGY" in otherDataName or "GAIN" in otherDataName or "MASS" in otherDataName or "VOLUME" in otherDataName or "Loss" in otherDataName: normalizble = True
+                    else: normalizble = False
+                    otherZDatFlrNormList.append(normalizble)
+                    makeHeaderAlt(otherZoneData, path[columnCount], zoneName, column.split('(')[-1].split(')')[0], column.split(':')[-1].split(' [')[0], column.split('[')[-1].split(']')[0], normalizble)
+                    dataTypeList[19] = True
+                else:
+                    key.append(-1)
+                    path.append(-1)
+            
             else:
-                for columnCount, column in enumerate(line.split(',')):
-                    if key[columnCount] != 14:
-                        try: p = GH_Path(int(path[columnCount]))
-                        except: p = GH_Path(int(path[columnCount][0]), int(path[columnCount][1]))
-                    else:
-                        p = GH_Path(int(path[columnCount][0]), int(path[columnCount][1]))
-                    
-                    if normByFlr == True:
-                        try: flrArea = floorAreaList[int(path[columnCount])]
-                        except: flrArea = floorAreaList[int(path[columnCount][0])]
-                    else: flrArea = 1
-                    
-                    if key[columnCount] == 0:
-                        try: cooling.Add((float(column)/3600000)/flrArea, p)
-                        except: dataTypeList[2] = False
-                    elif key[columnCount] == 1:
-                        try: heating.Add((float(column)/3600000)/flrArea, p)
-                        except: dataTypeList[3] = False
-                    elif key[columnCount] == 2:
-                        try: electricLight.Add((float(column)/3600000)/flrArea, p)
-                        except: dataTypeList[4] = False
-                    elif key[columnCount] == 3:
-                        try: electricEquip.Add((float(column)/3600000)/flrArea, p)
-                        except: dataTypeList[5] = False
-                    elif key[columnCount] == 4:
-                        try: peopleGains.Add((float(column)/3600000)/flrArea, p)
-                        except: dataTypeList[6] = False
-                    elif key[columnCount] == 5:
-                        try: totalSolarGain.Add((float(column)/3600000)/flrArea, p)
-                        except: dataTypeList[7] = False
-                    elif key[columnCount] == 6:
-                        try: natVentEnergy.Add((((float(column))*(-1)/3600000) + ((float( line.split(',')[columnCount+1] ))/3600000))/flrArea, p)
-                        except: dataTypeList[11] = False
-                    elif key[columnCount] == 7:
-                        pass
-                    elif key[columnCount] == 23:
-                        try: zoneHeatingEnergy[int(path[columnCount])].append(float(column))
-                        except: pass
-                    elif key[columnCount] == 24:
-                        try: zoneCoolingEnergy[int(path[columnCount])].append(float(column))
-                        except: pass
-                    elif key[columnCount] == 8:
-                        try: infiltrationEnergy.Add((((float(column))*(-1)/3600000) + ((float( line.split(',')[columnCount+1] ))/3600000))/flrArea, p)
-                        except: dataTypeList[9] = False
-                    elif key[columnCount] == 9:
-                        pass
-                    elif key[columnCount] == 10:
-                        try: operativeTemperature.Add(float(column), p)
-                        except: dataTypeList[12] = False
-                    elif key[columnCount] == 11:
-                        try: airTemperature.Add(float(column), p)
-                        except: dataTypeList[13] = False
-                    elif key[columnCount] == 12:
-                        try: meanRadTemperature.Add(float(column), p)
-                        except: dataTypeList[14] = False
-                    elif key[columnCount] == 13:
-                        try: relativeHumidity.Add(float(column), p)
-                        except: dataTypeList[15] = False
-                    elif key[columnCount] == 14:
-                        try:
-                            if otherZDatFlrNormList[otherZDatFlrCount] == False:
-                                otherZoneData.Add(float(column), p)
-                            else:
-                                otherZoneData.Add(float(column)/flrArea, p)
-                            if otherZDatFlrCount != len(otherZDatFlrNormList)-1: otherZDatFlrCount += 1
-                            else: otherZDatFlrCount
-                        except: pass
-                    elif key[columnCount] == 15:
-                        try: fanElectric.Add((float(column)/3600000)/flrArea, p)
-                        except: pass
-                    elif key[columnCount] == 25:
-                        try: pumpElectric.Add((float(column)/3600000)/flrArea, p)
-                        except: pass
-                    elif key[columnCount] == 16:
-                        try: natVentFlow[int(path[columnCount])].append(float(column))
-                        except: pass
-                    elif key[columnCount] == 17:
-                        try: infiltrationFlow[int(path[columnCount])].append(float(column))
-                        except: pass
-                    elif key[columnCount] == 22:
-                        try: mechSysAirFlow[int(path[columnCount])].append(float(column))
-                        except: pass
-                    elif key[columnCount] == 21:
-                        try: earthTubeFlow[int(path[columnCount])].append(float(column))
-                        except: pass
-                    elif key[columnCount] == 18:
-                        try: internalAirGain[int(path[columnCount])].append(float(column))
-                        except: pass
-                    elif key[columnCount] == 19:
-                        try: surfaceAirGain[int(path[columnCount])].append(float(column))
-                        except: pass
-                    elif key[columnCount] == 20:
-                        try: systemAirGain[int(path[columnCount])].append(float(column))
-                        except: pass
-                    
-        result.close()
+                key.append(-1)
+                path.append(-1)
+            
+        #print key
+        #print path
+
+        # only read the columns that are used. natural ventilation and infiltration also use the next column
+        dataColumns = [columnCount for columnCount, k in enumerate(key) if k != -1]
+        readColumns = dataColumns + [columnCount + 1 for columnCount in dataColumns if key[columnCount] in (6, 8)]
+        for lineCount, row in enumerate(csvReader.iterRows(readColumns), 1):
+            for columnCount in dataColumns:
+                column = row[columnCount]
+                if key[columnCount] != 14:
+                    try: p = GH_Path(int(path[columnCount]))
+                    except: p = GH_Path(int(path[columnCount][0]), int(path[columnCount][1]))
+                else:
+                    p = GH_Path(int(path[columnCount][0]), int(path[columnCount][1]))
+                
+                if normByFlr == True:
+                    try: flrArea = floorAreaList[int(path[columnCount])]
+                    except: flrArea = floorAreaList[int(path[columnCount][0])]
+                else: flrArea = 1
+                
+                if key[columnCount] == 0:
+                    try: cooling.Add((float(column)/3600000)/flrArea, p)
+                    except: dataTypeList[2] = False
+                elif key[columnCount] == 1:
+                    try: heating.Add((float(column)/3600000)/flrArea, p)
+                    except: dataTypeList[3] = False
+                elif key[columnCount] == 2:
+                    try: electricLight.Add((float(column)/3600000)/flrArea, p)
+                    except: dataTypeList[4] = False
+                elif key[columnCount] == 3:
+                    try: electricEquip.Add((float(column)/3600000)/flrArea, p)
+                    except: dataTypeList[5] = False
+                elif key[columnCount] == 4:
+                    try: peopleGains.Add((float(column)/3600000)/flrArea, p)
+                    except: dataTypeList[6] = False
+                elif key[columnCount] == 5:
+                    try: totalSolarGain.Add((float(column)/3600000)/flrArea, p)
+                    except: dataTypeList[7] = False
+                elif key[columnCount] == 6:
+                    try: natVentEnergy.Add((((float(column))*(-1)/3600000) + ((float( row[columnCount+1] ))/3600000))/flrArea, p)
+                    except: dataTypeList[11] = False
+                elif key[columnCount] == 7:
+                    pass
+                elif key[columnCount] == 23:
+                    try: zoneHeatingEnergy[int(path[columnCount])].append(float(column))
+                    except: pass
+                elif key[columnCount] == 24:
+                    try: zoneCoolingEnergy[int(path[columnCount])].append(float(column))
+                    except: pass
+                elif key[columnCount] == 8:
+                    try: infiltrationEnergy.Add((((float(column))*(-1)/3600000) + ((float( row[columnCount+1] ))/3600000))/flrArea, p)
+                    except: dataTypeList[9] = False
+                elif key[columnCount] == 9:
+                    pass
+                elif key[columnCount] == 10:
+                    try: operativeTemperature.Add(float(column), p)
+                    except: dataTypeList[12] = False
+                elif key[columnCount] == 11:
+                    try: airTemperature.Add(float(column), p)
+                    except: dataTypeList[13] = False
+                elif key[columnCount] == 12:
+                    try: meanRadTemperature.Add(float(column), p)
+                    except: dataTypeList[14] = False
+                elif key[columnCount] == 13:
+                    try: relativeHumidity.Add(float(column), p)
+                    except: dataTypeList[15] = False
+                elif key[columnCount] == 14:
+                    try:
+                        if otherZDatFlrNormList[otherZDatFlrCount] == False:
+                            otherZoneData.Add(float(column), p)
+                        else:
+                            otherZoneData.Add(float(column)/flrArea, p)
+                        if otherZDatFlrCount != len(otherZDatFlrNormList)-1: otherZDatFlrCount += 1
+                        else: otherZDatFlrCount
+                    except: pass
+                elif key[columnCount] == 15:
+                    try: fanElectric.Add((float(column)/3600000)/flrArea, p)
+                    except: pass
+                elif key[columnCount] == 25:
+                    try: pumpElectric.Add((float(column)/3600000)/flrArea, p)
+                    except: pass
+                elif key[columnCount] == 16:
+                    try: natVentFlow[int(path[columnCount])].append(float(column))
+                    except: pass
+                elif key[columnCount] == 17:
+                    try: infiltrationFlow[int(path[columnCount])].append(float(column))
+                    except: pass
+                elif key[columnCount] == 22:
+                    try: mechSysAirFlow[int(path[columnCount])].append(float(column))
+                    except: pass
+                elif key[columnCount] == 21:
+                    try: earthTubeFlow[int(path[columnCount])].append(float(column))
+                    except: pass
+                elif key[columnCount] == 18:
+                    try: internalAirGain[int(path[columnCount])].append(float(column))
+                    except: pass
+                elif key[columnCount] == 19:
+                    try: surfaceAirGain[int(path[columnCount])].append(float(column))
+                    except: pass
+                elif key[columnCount] == 20:
+                    try: systemAirGain[int(path[columnCount])].append(float(column))
+                    except: pass
+                
         parseSuccess = True
     except:
-        try: result.close()
-        except: pass
         parseSuccess = False
         warn = 'Failed to parse the result file.  Check the folder of the file address you are plugging into this component and make sure that there is a .csv file in the folder. \n'+ \
                   'If there is a file with no data in it (it is 0 kB), your simulation probably did not run correctly. \n' + \
@@ -51,6 +51,7 @@ except: pass
 
 
 import os
+import scriptcontext as sc
 from System import Object
 import Grasshopper.Kernel as gh
 from Grasshopper import DataTree
@@ -96,6 +97,12 @@ def convertIllFileDaraTreeIntoSortedDictionary(illFilesAddress):
 def main(illFilesAddress, testPoints, HOY, annualProfiles):
     msg = str.Empty
     
+    if not sc.sticky.has_key('honeybee_release'):
+        msg = "You should first let Honeybee to fly first..."
+        return msg, None, None
+    
+    hb_illFileReader = sc.sticky["honeybee_IllFileReader"]
+    
     shadingProfiles = []
     shadingGroupsCount = 0 # assume there in no shading groups
     
@@ -190,15 +197,9 @@ def main(illFilesAddress, testPoints, HOY, annualProfiles):
         for stateCount, resultFiles in enumerate(illFileSets[shadingGroupCount]):
             
             for resultFile in resultFiles:
-                result = open(resultFile, 'r')
-                for lineCount, line in enumerate(result):
-                    if lineCount == int(HOY-1):
-                       line = line.replace('\n', '', 10)
-                       lineSeg = line.Split(' ')
-                       for hourLuxValue in lineSeg[4:]:
-                           illuminanceValues[shadingGroupCount][stateCount].append(float(hourLuxValue))
-                           
-                result.close()
+                # jump to the line for the hour instead of reading the whole file
+                illReader = hb_illFileReader(resultFile)
+                illuminanceValues[shadingGroupCount][stateCount].extend(illReader.getHourValues(int(HOY-1)))
     
     return msg, illuminanceValues, shadingProfiles
 
@@ -34,6 +34,7 @@ Provided by Honeybee 0.0.58
         _workingDir_: Working directory on your system. Default is set to C:\Ladybug
         _thisRunName: Name of this run so you can recognize it later
         additionalRadFiles_: A list of fullpath to valid radiance files which will be added to the scene
+        incremental_: Set to True to only calculate the test points that are not calculated in the previous runs of the same octree with the same parameters, including the run of Run Daylight Simulation that wrote the octree. Results of the other points are read from the previous runs. This option only works for grid-based analysis. Default is False.
         
     Returns:
         resultFiles: Result files. You need to need other components based on the type of the analysis to calculate the results
@@ -65,7 +66,7 @@ from Grasshopper import DataTree
 from Grasshopper.Kernel.Data import GH_Path
 
 
-def main(octFile, analysisRecipe, numOfCPUs, thisRunName, runIt):
+def main(octFile, analysisRecipe, numOfCPUs, thisRunName, runIt, incremental = False):
     # import the classes
     w = gh.GH_RuntimeMessageLevel.Warning
     if not sc.sticky.has_key('ladybug_release') or not sc.sticky.has_key('honeybee_release'):
@@ -159,7 +160,7 @@ def main(octFile, analysisRecipe, numOfCPUs, thisRunName, runIt):
     hb_writeRADAUX.exportTestMesh(subWorkingDir, radFileName)
     
     # write analysis type to folder
-    hb_writeRADAUX.exportTypeFile(subWorkingDir, radFileName)
+    hb_writeRADAUX.exportTypeFile(subWorkingDir, radFileName, analysisRecipe)
     
     # copy the sky file to the local folder except for annual analysis
     radSkyFileName = hb_writeRADAUX.copySkyFile(subWorkingDir, radFileName)
@@ -170,6 +171,9 @@ def main(octFile, analysisRecipe, numOfCPUs, thisRunName, runIt):
     # except image-based simulation
     testPtsEachCPU, lenOfPts = hb_writeRAD.writeTestPtFile(subWorkingDir, \
                                     radFileName, numOfCPUs, analysisRecipe)
+    
+    if len(testPtsEachCPU)!=0: # make sure it is a grid based analysis
+        numOfCPUs = len(testPtsEachCPU) #in case number of CPUs are more than number of test points
             
     ######################## WRITE BATCH FILES #######################
     # if analysis type is annual this function will write hea files too
@@ -180,8 +184,19 @@ def main(octFile, analysisRecipe, numOfCPUs, thisRunName, runIt):
                             [], newOctFileName, runOverture = False)
     
     if runIt:
-        hb_writeRAD.runBatchFiles(initBatchFileName, batchFilesName, \
-                                  fileNames, pcompBatchFile, waitingTime)
+        if analysisRecipe.type == 0:
+            expectedResultFiles = hb_writeRAD.runTiledRendering(initBatchFileName, numOfCPUs, waitingTime)
+        elif incremental:
+            # only trace the points that are not in the result store of the octree.
+            # the store belongs to the study of the octree
+            expectedResultFiles = hb_writeRAD.runRtraceChunks(subWorkingDir, radFileName, radFileName, \
+                                                              analysisRecipe, lenOfPts, waitingTime, \
+                                                              incremental = True, resultStoreStudyDir = workingDir)
+            print "The batch files of the CPUs (%s) are only written to run the study manually."%\
+                  ", ".join([os.path.basename(fileName) for fileName in batchFilesName])
+        else:
+            hb_writeRAD.runBatchFiles(initBatchFileName, batchFilesName, \
+                                      fileNames, pcompBatchFile, waitingTime)
         
         results = hb_writeRAD.collectResults(subWorkingDir, radFileName, \
                                 numOfCPUs, analysisRecipe, expectedResultFiles)
@@ -195,7 +210,7 @@ def main(octFile, analysisRecipe, numOfCPUs, thisRunName, runIt):
     else:
         # return name of the file
         if  analysisRecipe.type == 0: return [], [], [], subWorkingDir
-        else: return [], analysisRecipe.testPoints, [], subWorkingDir
+        else: return [], analysisRecipe.testPts, [], subWorkingDir
                 
 
 
@@ -215,7 +230,7 @@ if _runIt == True and _analysisRecipe!=None and _octFile!=None and _thisRunName!
               "\nHoneybee set the number of CPUs to " + str(ncpus) + ".\n"
         numOfCPUs = ncpus
     
-    result = main(_octFile, _analysisRecipe, numOfCPUs, _thisRunName, _runIt)
+    result = main(_octFile, _analysisRecipe, numOfCPUs, _thisRunName, _runIt, incremental_ == True)
     
     if result!= -1:
         
@@ -39,6 +39,7 @@ Provided by Honeybee 0.0.58
         additionalRadFiles_: A list of fullpath to valid radiance files which will be added to the scene
         exportAirWalls_: Set to True if you want to export air walls as surfaces and False if you don't want air walls be exported.  The default is set to False.
         overwriteResults_: Set to False if you want the component create a copy of all the results. Default is True
+        incremental_: Set to True to only calculate the test points that are not calculated in the previous runs of the same octree with the same parameters. The results of the new points are kept for the next incremental runs of this component and Refine Daylight Simulation. This option only works for grid-based analysis. Default is False.
         
     Returns:
         readMe!: ...
@@ -79,7 +80,7 @@ ghenv.Component.Params.Output[3].NickName = "results"
 ghenv.Component.Params.Output[3].Name = "results"
 results = []
 
-def main(north, originalHBObjects, analysisRecipe, runRad, numOfCPUs, workingDir, radFileName, meshParameters, waitingTime, additionalRadFiles, overwriteResults, exportAirWalls):
+def main(north, originalHBObjects, analysisRecipe, runRad, numOfCPUs, workingDir, radFileName, meshParameters, waitingTime, additionalRadFiles, overwriteResults, exportAirWalls, incremental = False):
     # import the classes
     w = gh.GH_RuntimeMessageLevel.Warning
     
@@ -211,8 +212,41 @@ def main(north, originalHBObjects, analysisRecipe, runRad, numOfCPUs, workingDir
                             additionalRadFiles)
     
     if runRad:
-        hb_writeRAD.runBatchFiles(initBatchFileName, batchFilesName, \
-                                  fileNames, pcompBatchFile, waitingTime, runRad > 1)
+        if analysisRecipe.type != 0 and analysisRecipe.type != 2:
+            # grid-based analysis. Run the init batch file to create the octree and
+            # calculate the points in small chunks so all the CPUs stay busy
+            initJobs = hb_writeRAD.runBatchFiles(initBatchFileName, [], [], pcompBatchFile, \
+                                                 waitingTime, runRad > 1)
+            
+            # don't start the workers if the user pressed Esc or the octree is not created
+            if any(job.status == "cancelled" for job in initJobs):
+                msg = "The analysis is cancelled by the user!"
+            elif any(job.status != "finished" for job in initJobs):
+                msg = "Failed to create the octree for the analysis.\n" + \
+                      "Check " + initBatchFileName + " and the report of the component."
+            else:
+                msg = None
+            
+            if msg != None:
+                w = gh.GH_RuntimeMessageLevel.Warning
+                print msg
+                ghenv.Component.AddRuntimeMessage(w, msg)
+                return -1
+            
+            # in incremental runs only trace the new points and keep their results
+            # for the next runs and Refine Daylight Simulation
+            hb_writeRAD.runRtraceChunks(subWorkingDir, radFileName, radFileName + '_RAD', \
+                                        analysisRecipe, lenOfPts, waitingTime, incremental = incremental)
+            print "The batch files of the CPUs (%s) are only written to run the study manually."%\
+                  ", ".join([os.path.basename(fileName) for fileName in batchFilesName])
+        elif analysisRecipe.type == 0:
+            # image-based analysis. Render the tiles of the views on the CPUs and
+            # stitch them as they are rendered
+            expectedResultFiles = hb_writeRAD.runTiledRendering(initBatchFileName, numOfCPUs, \
+                                                                waitingTime, runRad > 1)
+        else:
+            hb_writeRAD.runBatchFiles(initBatchFileName, batchFilesName, \
+                                      fileNames, pcompBatchFile, waitingTime, runRad > 1)
         
         results = hb_writeRAD.collectResults(subWorkingDir, radFileName, \
                                 numOfCPUs, analysisRecipe, expectedResultFiles)
@@ -255,7 +289,7 @@ if _writeRad == True and _analysisRecipe!=None and ((len(_HBObjects)!=0 and _HBO
     
     result = main(north_, _HBObjects, _analysisRecipe, runRad_, numOfCPUs, \
                   _workingDir_, _radFileName_, meshSettings_, waitingTime, \
-                  additionalRadFiles_, overwriteResults_, exportAirWalls_)
+                  additionalRadFiles_, overwriteResults_, exportAirWalls_, incremental_ == True)
     
     if result!= -1:
         
@@ -337,6 +371,14 @@ if _writeRad == True and _analysisRecipe!=None and ((len(_HBObjects)!=0 and _HBO
             # sort ill files
             resultFiles = hb_readAnnualResultsAux.sortIllFiles(annualResultFiles)
             
+            # write a binary copy of the results for the result readers
+            if _analysisRecipe.DSParameters != None and getattr(_analysisRecipe.DSParameters, "writeBinaryResults", False):
+                try:
+                    hb_annualResultsStore = sc.sticky["honeybee_AnnualResultsStore"](os.path.dirname(resultFiles.Branch(0)[0]))
+                    hb_annualResultsStore.writeStore(resultFiles)
+                except Exception, e:
+                    print "Failed to write the binary copy of the results:\n" + `e`
+            
         elif HDRFiles != []:
             # check the error log
             errFile = os.path.join(studyFolder + "error.log")
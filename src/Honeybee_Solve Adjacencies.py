@@ -31,6 +31,7 @@ Provided by Honeybee 0.0.58
         altBC_: An optional alternate boundary condition such as "Adiabatic".  The default will be "Surafce", which ensures that heat flows across each adjacent surface to a neighboring zone.
         tolerance_: The tolerance in Rhino model units that will be used determine whether two zones are adjacent to each other.  If no value is input here, the component will use the tolerance of the Rhino model document.
         removeCurrentAdjc_: If you are using this component after already solving for the adjacencies between some of the zones previously, set this to "False" in order to remeber the previously determined adcacency conditions.  If set to "True", the current adjacencies will be removed. The default is set to "False" in order to remeber your previously-set adjacencies.
+        oppositeFacingOnly_: Set to "True" to only find adjacencies between surfaces that face each other. By default surfaces that face the same direction are also considered as adjacent, the same as the older versions of this component.
         _findAdjc: Set to "True" to solve adjacencies between zones.
     Returns:
         readMe!: A report of the found adjacencies.
@@ -52,15 +53,6 @@ import scriptcontext as sc
 import Grasshopper.Kernel as gh
 import uuid
 
-def shootIt(rayList, geometry, tol = 0.01, bounce =1):
-   # shoot a list of rays from surface to geometry
-   # to find if geometry is adjacent to surface
-   for ray in rayList:
-        intPt = rc.Geometry.Intersect.Intersection.RayShoot(ray, geometry, bounce)
-        if intPt:
-            if ray.Position.DistanceTo(intPt[0]) <= tol:
-                return True #'Bang!'
-
 def updateZoneMixing(surface1, zone1, zone2):
     #Change the air mixing between the zone and other zones to "True"
     zone1.mixAir = True
@@ -175,7 +167,7 @@ def notTheSameZone(targetZone, testZone):
         return targetZone.name != testZone.name
     
 
-def main(HBZones, altConstruction, altBC, tol, remCurrent):
+def main(HBZones, altConstruction, altBC, tol, remCurrent, oppositeFacingOnly = None):
     
     # import the classes
     if not sc.sticky.has_key('honeybee_release'):
@@ -222,13 +214,29 @@ def main(HBZones, altConstruction, altBC, tol, remCurrent):
                     srf.setBC('OUTDOORS')
                     srf.setBCObjectToOutdoors()
     
+    if oppositeFacingOnly == None:
+        # the input is left at its default
+        warning = "Surfaces that face the same direction are also set as adjacent, " + \
+                  "the same as the older versions of this component.\n" + \
+                  "Set oppositeFacingOnly_ to True to only check surfaces that face each other."
+        w = gh.GH_RuntimeMessageLevel.Warning
+        ghenv.Component.AddRuntimeMessage(w, warning)
+    
+    # index surfaces by plane so each surface is only tested against
+    # coplanar surfaces of other zones with overlapping bounding boxes
+    srfIndex = sc.sticky["honeybee_SurfacePlaneIndex"](HBZoneObjects, tol, \
+                                                       oppositeFacingOnly = oppositeFacingOnly == True)
+    
     # solve it zone by zone
-    for testZone in HBZoneObjects:
+    for testZoneCount, testZone in enumerate(HBZoneObjects):
         # mesh each surface and test if it will be adjacent to any surface
         # from other zones
-        for srf in testZone.surfaces:
+        for srfCount, srf in enumerate(testZone.surfaces):
             #print srf.type, srf.BC 
             if srf.BC.upper() == 'OUTDOORS' or srf.BC.upper() == 'GROUND' or srf.BC.upper() == 'ADIABATIC':
+                candidates = srfIndex.getCandidates(testZoneCount, srfCount)
+                if len(candidates) == 0: continue
+                
                 #Create a mesh of surface to use center points as test points
                 meshPar = rc.Geometry.MeshingParameters.Default
                 BrepMesh = rc.Geometry.Mesh.CreateFromBrep(srf.geometry, meshPar)[0]
@@ -237,52 +245,32 @@ def main(HBZones, altConstruction, altBC, tol, remCurrent):
                 BrepMesh.FaceNormals.ComputeFaceNormals()
                 BrepMesh.FaceNormals.UnitizeFaceNormals()
                 
-                # dictionary to collect center points and rays
-                raysDict = {}
+                # collect center points
+                testPts = []
                 for faceIndex in range(BrepMesh.Faces.Count):
                     srfNormal = (BrepMesh.FaceNormals)[faceIndex]
                     meshSrfCen = BrepMesh.Faces.GetFaceCenter(faceIndex)
                     # move testPt backward for half of tolerance
                     meshSrfCen = rc.Geometry.Point3d.Add(meshSrfCen, -rc.Geometry.Vector3d(srfNormal)* tol /2)
-                    
-                    raysDict[meshSrfCen] = rc.Geometry.Ray3d(meshSrfCen, srfNormal)
+                    testPts.append(meshSrfCen)
                 
-                for targetZone in HBZoneObjects:
-                    if notTheSameZone(targetZone, testZone):
-                        # check ray intersection to see if this zone is next to the surface
-                        if shootIt(raysDict.values(), [targetZone.geometry], tol + sc.doc.ModelAbsoluteTolerance):
-                            for surface in targetZone.surfaces:
-                                # check if z value of center points matches
-                                #print abs(surface.cenPt.Z - srf.cenPt.Z)
-                                #if abs(surface.cenPt.Z - srf.cenPt.Z) < tol:
-                                # check distance with the nearest point on each surface
-                                for pt in raysDict.keys():
-                                    if surface.geometry.ClosestPoint(pt).DistanceTo(pt) <= tol:
-                                        # extra check for normal direction
-                                        normalAngle = abs(rc.Geometry.Vector3d.VectorAngle(surface.normalVector, srf.normalVector))
-                                        revNormalAngle = abs(rc.Geometry.Vector3d.VectorAngle(surface.normalVector, -srf.normalVector))
-                                        #print normalAngle
-                                        #print revNormalAngle
-                                        if normalAngle==0  or revNormalAngle <= sc.doc.ModelAngleToleranceRadians:
-                                            print 'Surface ' + srf.name + ' which is a ' + srf.srfType[srf.type] + \
-                                                  '\t-> is adjacent to <-\t' + surface.name + ' which is a ' + \
-                                                  surface.srfType[surface.type] + '.'
-                                            #if normalAngle == 0:
-                                            #    msg = "Warning: Normal direction of one of the surfaces " + srf.name + ", " + surface.name + " should be reversed!"
-                                            #    print msg
-                                            #    w = gh.GH_RuntimeMessageLevel.Warning
-                                            #    ghenv.Component.AddRuntimeMessage(w, msg)
-                                            
-                                            updateAdj(srf, surface, altConstruction, altBC, tol)                                        
-                                            if surface.type == 4:
-                                                flowRate = updateZoneMixing(surface, testZone, targetZone)
-                                                print "Air has been mixed between " + testZone.name + " and " + targetZone.name + " with a flow rate of " + str(flowRate) + " m3/s."
-                                            
-                                            break
+                for candidate in candidates:
+                    targetZone, surface = srfIndex.getSurface(candidate)
+                    if not notTheSameZone(targetZone, testZone): continue
                     
-                #if srf.type == 3 and srf.BCObject.name == '':
-                #        srf.setType(1) # Roof
-                #        srf.setBC(srf.srfBC[srf.type])
+                    # check distance with the nearest point on the surface
+                    for pt in testPts:
+                        if surface.geometry.ClosestPoint(pt).DistanceTo(pt) <= tol:
+                            print 'Surface ' + srf.name + ' which is a ' + srf.srfType[srf.type] + \
+                                  '\t-> is adjacent to <-\t' + surface.name + ' which is a ' + \
+                                  surface.srfType[surface.type] + '.'
+                            
+                            updateAdj(srf, surface, altConstruction, altBC, tol)
+                            if surface.type == 4:
+                                flowRate = updateZoneMixing(surface, testZone, targetZone)
+                                print "Air has been mixed between " + testZone.name + " and " + targetZone.name + " with a flow rate of " + str(flowRate) + " m3/s."
+                            
+                            break
     
     # add zones to dictionary
     ModifiedHBZones  = hb_hive.addToHoneybeeHive(HBZoneObjects, ghenv.Component.InstanceGuid.ToString() + str(uuid.uuid4()))
@@ -299,7 +287,7 @@ if _findAdjc and _HBZones and _HBZones[0]!=None:
     if tol < sc.doc.ModelAbsoluteTolerance:
         tol = sc.doc.ModelAbsoluteTolerance
         
-    results = main(_HBZones, altConstruction_, altBC_, tol, removeCurrentAdjc_)
+    results = main(_HBZones, altConstruction_, altBC_, tol, removeCurrentAdjc_, oppositeFacingOnly_)
     
     if results!=-1:
         HBZonesWADJ = results
\ No newline at end of file
@@ -126,8 +126,8 @@ def recallHBZoneProperties(HOYs, occupancyThere):
                     ghenv.Component.AddRuntimeMessage(gh.GH_RuntimeMessageLevel.Warning, msg)
                     checkZones = False
                 else:
-                    readSchedules = sc.sticky["honeybee_ReadSchedules"](zoneOccSched, 0)
-                    values  = readSchedules.getScheduleValues()
+                    scheduleCompiler = sc.sticky["honeybee_ScheduleCompiler"](ghenv.Component)
+                    values  = list(scheduleCompiler.getHourlyValues(zoneOccSched, 0))
             elif zoneOccSched.lower().endswith(".csv"):
                 # check if csv file exists.
                 if not os.path.isfile(zoneOccSched):
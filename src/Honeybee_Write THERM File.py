@@ -188,6 +188,8 @@ def checkTheInputs():
             if abs(polyNormalRev.X - basePlaneNormal.X)< tol and abs(polyNormalRev.Y - basePlaneNormal.Y) < tol and abs(polyNormalRev.Z - basePlaneNormal.Z) < tol:
                 polygon.normalVector = polyNormalRev
                 polygon.plane.Flip()
+                # geometry can be shared with the polygon in the hive
+                polygon.geometry = polygon.geometry.Duplicate()
                 polygon.geometry.Flip()
             else:
                 checkData = False
@@ -0,0 +1,86 @@
+#
+# Honeybee: A Plugin for Environmental Analysis (GPL) started by Mostapha Sadeghipour Roudsari
+#
+# This file is part of Honeybee.
+#
+# Copyright (c) 2013-2015, Mostapha Sadeghipour Roudsari <Sadeghipour@gmail.com>
+# Honeybee is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published
+# by the Free Software Foundation; either version 3 of the License,
+# or (at your option) any later version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Honeybee; If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+
+
+"""
+Load classes of Honeybee_Honeybee.py without Rhino and Grasshopper.
+
+Honeybee_Honeybee.py can only run inside Grasshopper, but a few of its classes
+only use the standard library. loadClasses copies these classes out of the source
+and runs them with the modules that they use. Run the tests with Python 2.7:
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import re
+import math
+import time
+import json
+import array
+import bisect
+import pickle
+import struct
+import shutil
+import sqlite3
+import hashlib
+import tempfile
+import threading
+import subprocess
+from itertools import chain, izip
+
+honeybeeFile = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), \
+                            "src", "Honeybee_Honeybee.py")
+
+
+def getClassSource(className, sourceFile = honeybeeFile):
+    classLines = []
+    with open(sourceFile, "r") as sourceInf:
+        for line in sourceInf:
+            if line.startswith("class %s("%className):
+                classLines.append(line)
+            elif len(classLines) != 0:
+                if line.strip() != "" and not line[0].isspace(): break
+                classLines.append(line)
+    
+    if len(classLines) == 0:
+        raise ValueError("Failed to find %s in %s."%(className, sourceFile))
+    return "".join(classLines).replace("\r\n", "\n")
+
+
+def getComponentFile(componentName):
+    return os.path.join(os.path.dirname(honeybeeFile), componentName + ".py")
+
+
+def loadClasses(*classNames, **kwargs):
+    """
+    Return a namespace with the classes. Classes that use each other should be loaded together.
+    Use sourceFile to load the classes of a component (see getComponentFile).
+    """
+    sourceFile = kwargs.get("sourceFile", honeybeeFile)
+    namespace = {"os": os, "sys": sys, "math": math, "time": time, "json": json, "array": array, \
+                 "bisect": bisect, "pickle": pickle, "struct": struct, "chain": chain, "izip": izip, \
+                 "shutil": shutil, "hashlib": hashlib, "tempfile": tempfile, "threading": threading, \
+                 "subprocess": subprocess, "re": re, "sqlite3": sqlite3, "ManagementObjectSearcher": None}
+    for className in classNames:
+        exec getClassSource(className, sourceFile) in namespace
+    return namespace
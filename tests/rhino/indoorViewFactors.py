@@ -0,0 +1,166 @@
+#
+# Honeybee: A Plugin for Environmental Analysis (GPL) started by Mostapha Sadeghipour Roudsari
+#
+# This file is part of Honeybee.
+#
+# Copyright (c) 2013-2015, Mostapha Sadeghipour Roudsari <Sadeghipour@gmail.com>
+# Honeybee is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published
+# by the Free Software Foundation; either version 3 of the License,
+# or (at your option) any later version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Honeybee; If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+
+
+"""
+Compare MeshRayTree of Indoor View Factor Calculator with a MeshRay of every mesh.
+
+Run this script from Rhino's Python editor. It loads MeshRayTree from the source of
+the component and traces a sample zone: a 6 x 4 x 3 m room with a window in the
+south wall. The test points sit on a grid that is aligned with the mesh vertices
+and the rays include the directions to every vertex of the zone, so many rays hit
+the meshes exactly on an edge or a vertex.
+
+For every ray the closest surface (view factors) and the opaque and window hits
+(sky view) of the tree are compared with the all-meshes MeshRay loop that the
+component used before the tree. Any difference is printed and an AssertionError
+is raised at the end. tests/test_meshRayTree.py runs the same comparison without
+Rhino with stand-ins for the meshes and MeshRay.
+"""
+
+import Rhino as rc
+import scriptcontext as sc
+import math
+import os
+
+componentFile = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), \
+                             "src", "Honeybee_Indoor View Factor Calculator.py")
+
+
+def loadMeshRayTree():
+    # copy the class out of the component. The rest of the component needs Grasshopper
+    classLines = []
+    with open(componentFile, "r") as componentInf:
+        for line in componentInf:
+            if line.startswith("class MeshRayTree"):
+                classLines.append(line)
+            elif len(classLines) != 0:
+                if line.strip() != "" and not line[0].isspace(): break
+                classLines.append(line)
+
+    namespace = {"rc": rc, "sc": sc}
+    exec "".join(classLines) in namespace
+    return namespace["MeshRayTree"]
+
+
+def quadMesh(pts):
+    mesh = rc.Geometry.Mesh()
+    for pt in pts: mesh.Vertices.Add(pt)
+    mesh.Faces.AddFace(0, 1, 2, 3)
+    mesh.Normals.ComputeNormals()
+    return mesh
+
+
+def gridMesh(xs, zs, y, skipFace):
+    # a wall in the xz plane with one face left out for the window
+    mesh = rc.Geometry.Mesh()
+    for z in zs:
+        for x in xs: mesh.Vertices.Add(x, y, z)
+    for row in range(len(zs) - 1):
+        for column in range(len(xs) - 1):
+            if (column, row) == skipFace: continue
+            a = row * len(xs) + column
+            mesh.Faces.AddFace(a, a + 1, a + 1 + len(xs), a + len(xs))
+    mesh.Normals.ComputeNormals()
+    return mesh
+
+
+def createSampleZone():
+    P = rc.Geometry.Point3d
+    floor = quadMesh([P(0, 0, 0), P(6, 0, 0), P(6, 4, 0), P(0, 4, 0)])
+    ceiling = quadMesh([P(0, 0, 3), P(0, 4, 3), P(6, 4, 3), P(6, 0, 3)])
+    northWall = quadMesh([P(0, 4, 0), P(6, 4, 0), P(6, 4, 3), P(0, 4, 3)])
+    eastWall = quadMesh([P(6, 0, 0), P(6, 4, 0), P(6, 4, 3), P(6, 0, 3)])
+    westWall = quadMesh([P(0, 0, 0), P(0, 0, 3), P(0, 4, 3), P(0, 4, 0)])
+    southWall = gridMesh([0, 1.5, 4.5, 6], [0, 1, 2.5, 3], 0, (1, 1))
+    window = quadMesh([P(1.5, 0, 1), P(4.5, 0, 1), P(4.5, 0, 2.5), P(1.5, 0, 2.5)])
+
+    srfMeshes = [floor, ceiling, northWall, eastWall, westWall, southWall, window]
+    opaqueMeshes = [floor, ceiling, northWall, eastWall, westWall, southWall]
+    windowMeshes = [window]
+    return srfMeshes, opaqueMeshes, windowMeshes
+
+
+def getRayVectors(point, meshes, numOfVectors = 500):
+    # evenly spread directions plus the directions to every vertex of the zone
+    vectors = []
+    goldenAngle = math.pi * (3 - math.sqrt(5))
+    for count in range(numOfVectors):
+        z = 1 - (count + 0.5) * 2.0 / numOfVectors
+        radius = math.sqrt(1 - z * z)
+        vectors.append(rc.Geometry.Vector3d(radius * math.cos(goldenAngle * count), \
+                                            radius * math.sin(goldenAngle * count), z))
+    for mesh in meshes:
+        for vertex in mesh.Vertices:
+            vector = rc.Geometry.Point3d(vertex) - point
+            if vector.Length > 0: vectors.append(vector)
+    return vectors
+
+
+def nearestHit(meshes, ray):
+    # the loop of the component before MeshRayTree. Ties go to the lower index
+    nearestIndex, nearestT = -1, None
+    for meshCount, mesh in enumerate(meshes):
+        t = rc.Geometry.Intersect.Intersection.MeshRay(mesh, ray)
+        if t < 0: continue
+        if nearestT == None or t < nearestT: nearestIndex, nearestT = meshCount, t
+    return nearestIndex
+
+
+def allHits(meshes, ray):
+    return [meshCount for meshCount, mesh in enumerate(meshes) \
+            if rc.Geometry.Intersect.Intersection.MeshRay(mesh, ray) >= 0]
+
+
+def main():
+    MeshRayTree = loadMeshRayTree()
+    srfMeshes, opaqueMeshes, windowMeshes = createSampleZone()
+    rayTree = MeshRayTree([srfMeshes, opaqueMeshes, windowMeshes])
+
+    testPts = [rc.Geometry.Point3d(x, y, z) for x in (0.75, 1.5, 3, 4.5, 5.25) \
+               for y in (1, 2, 3) for z in (0.75, 1, 1.5)]
+
+    numOfRays = 0
+    differences = []
+    for point in testPts:
+        for vector in getRayVectors(point, srfMeshes):
+            numOfRays += 1
+            ray = rc.Geometry.Ray3d(point, vector)
+
+            srfIndex = rayTree.shootRay(point, vector, nearestGroup = 0)[0]
+            expectedSrfIndex = nearestHit(srfMeshes, ray)
+            if srfIndex != expectedSrfIndex:
+                differences.append("%s %s: surface %d instead of %d"%(point, vector, srfIndex, expectedSrfIndex))
+
+            opaqueIndex, windowHits = rayTree.shootRay(point, vector, nearestGroup = 1, hitsGroup = 2)
+            isBlocked = len(allHits(opaqueMeshes, ray)) != 0
+            if (opaqueIndex != -1) != isBlocked:
+                differences.append("%s %s: blocked is %s instead of %s"%(point, vector, opaqueIndex != -1, isBlocked))
+            if not isBlocked and windowHits != allHits(windowMeshes, ray):
+                differences.append("%s %s: windows %s instead of %s"%(point, vector, windowHits, allHits(windowMeshes, ray)))
+
+    for difference in differences: print difference
+    print "%d points, %d rays, %d differences."%(len(testPts), numOfRays, len(differences))
+    assert len(differences) == 0, "MeshRayTree doesn't match MeshRay."
+
+
+if __name__ == "__main__":
+    main()
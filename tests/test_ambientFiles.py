@@ -0,0 +1,95 @@
+#
+# Honeybee: A Plugin for Environmental Analysis (GPL) started by Mostapha Sadeghipour Roudsari
+#
+# This file is part of Honeybee.
+#
+# Copyright (c) 2013-2015, Mostapha Sadeghipour Roudsari <Sadeghipour@gmail.com>
+# Honeybee is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published
+# by the Free Software Foundation; either version 3 of the License,
+# or (at your option) any later version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Honeybee; If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+
+
+"""
+Test merging the ambient files of the workers with hb_WriteRADAUX.mergeAmbientFiles.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import hbSource
+
+
+def getAmbientHeader(ambFile):
+    # radiance header, an empty line and the 2 bytes of the magic number
+    return "#?RADIANCE\nrtrace -af %s\nFORMAT=Radiance_ambval\n\n\x02\x2d"%ambFile
+
+
+class MergeAmbientFilesTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.hb_WriteRADAUX = hbSource.loadClasses("hb_WriteRADAUX")["hb_WriteRADAUX"]
+        self.folder = tempfile.mkdtemp()
+        self.ambFile = os.path.join(self.folder, "room_RAD.amb")
+        self.mergedFile = os.path.join(self.folder, "merged.amb")
+    
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors = True)
+    
+    def writeFile(self, fileName, data):
+        filePath = os.path.join(self.folder, fileName)
+        with open(filePath, "wb") as outf:
+            outf.write(data)
+        return filePath
+    
+    def readMergedFile(self):
+        with open(self.mergedFile, "rb") as inf:
+            return inf.read()
+    
+    def testSeededCopies(self):
+        # each worker starts from a copy of the study file and adds its values at the end
+        baseData = getAmbientHeader("room_RAD.amb") + "base"
+        self.writeFile("room_RAD.amb", baseData)
+        workerFiles = [self.writeFile("room_RAD_0.amb", baseData + "values0"),
+                       self.writeFile("room_RAD_1.amb", baseData + "values1")]
+        
+        self.hb_WriteRADAUX.mergeAmbientFiles(self.ambFile, workerFiles, self.mergedFile)
+        self.assertEqual(self.readMergedFile(), baseData + "values0values1")
+    
+    def testNewCopies(self):
+        # there is no study file to start from so each worker writes its own header
+        workerFiles = [self.writeFile("room_RAD_0.amb", getAmbientHeader("room_RAD_0.amb") + "values0"),
+                       self.writeFile("room_RAD_1.amb", getAmbientHeader("room_RAD_1.amb") + "values1")]
+        
+        self.hb_WriteRADAUX.mergeAmbientFiles(self.ambFile, workerFiles, self.mergedFile)
+        self.assertEqual(self.readMergedFile(), getAmbientHeader("room_RAD_0.amb") + "values0values1")
+    
+    def testMagicNumber(self):
+        # the header of the first copy ends with an empty line and 0x022d (AMBMAGIC 557)
+        header = getAmbientHeader("room_RAD_0.amb")
+        self.assertEqual(self.hb_WriteRADAUX.getAmbientValuesStart(header + "values0", "room_RAD_0.amb"), len(header))
+        
+        # a copy with a different magic number is not merged
+        workerFiles = [self.writeFile("room_RAD_0.amb", header + "values0"),
+                       self.writeFile("room_RAD_1.amb", getAmbientHeader("room_RAD_1.amb")[:-2] + "\x2d\x02values1")]
+        self.assertRaises(ValueError, self.hb_WriteRADAUX.mergeAmbientFiles, self.ambFile, workerFiles, self.mergedFile)
+        
+        # a file that is not an ambient file can't be the base
+        workerFiles = [self.writeFile("room_RAD_0.amb", "not an ambient file")]
+        self.assertRaises(ValueError, self.hb_WriteRADAUX.mergeAmbientFiles, self.ambFile, workerFiles, self.mergedFile)
+
+
+if __name__ == "__main__":
+    unittest.main()
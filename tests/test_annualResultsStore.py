@@ -0,0 +1,129 @@
+#
+# Honeybee: A Plugin for Environmental Analysis (GPL) started by Mostapha Sadeghipour Roudsari
+#
+# This file is part of Honeybee.
+#
+# Copyright (c) 2013-2015, Mostapha Sadeghipour Roudsari <Sadeghipour@gmail.com>
+# Honeybee is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published
+# by the Free Software Foundation; either version 3 of the License,
+# or (at your option) any later version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Honeybee; If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+
+
+"""
+Test hb_IllFileReader and hb_AnnualResultsStore with small .ill files.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import hbSource
+
+
+class IllFileTree(object):
+    # the parts of a Grasshopper data tree that writeStore uses
+    class GH_Path(object):
+        def __init__(self, indices):
+            self.Indices = indices
+    
+    def __init__(self, branches):
+        self.branches = branches
+        self.BranchCount = len(branches)
+    
+    def Branch(self, branchCount):
+        return self.branches[branchCount][1]
+    
+    def Path(self, branchCount):
+        return self.GH_Path(self.branches[branchCount][0])
+
+
+class AnnualResultsStoreTest(unittest.TestCase):
+    
+    numOfHours = 30
+    
+    def setUp(self):
+        namespace = hbSource.loadClasses("hb_IllFileReader", "hb_AnnualResultsStore")
+        self.hb_IllFileReader = namespace["hb_IllFileReader"]
+        self.hb_AnnualResultsStore = namespace["hb_AnnualResultsStore"]
+        self.studyFolder = tempfile.mkdtemp()
+        
+        # two files with 3 and 2 points. the value of a point at an hour is hour + point / 10
+        self.illFiles = [self.writeIllFile("study_0.ill", 0, 3), self.writeIllFile("study_1.ill", 3, 2)]
+    
+    def tearDown(self):
+        shutil.rmtree(self.studyFolder, ignore_errors = True)
+    
+    def writeIllFile(self, fileName, firstPt, numOfPts):
+        illFile = os.path.join(self.studyFolder, fileName)
+        with open(illFile, "w") as illOutf:
+            for hour in range(self.numOfHours):
+                values = ["%.1f"%(hour + (firstPt + ptCount) / 10.0) for ptCount in range(numOfPts)]
+                illOutf.write("1 1 %.3f  %s\n"%(hour + 0.5, " ".join(values)))
+        return illFile
+    
+    def expectedValues(self, ptIndex):
+        return [hour + ptIndex / 10.0 for hour in range(self.numOfHours)]
+    
+    def assertValues(self, values, expectedValues):
+        self.assertEqual(len(values), len(expectedValues))
+        for value, expectedValue in zip(values, expectedValues):
+            self.assertAlmostEqual(value, expectedValue, places = 4)
+    
+    def testAsciiPointsValues(self):
+        illReader = self.hb_IllFileReader(self.illFiles[0], useBinaryStore = False)
+        self.assertEqual(illReader.numOfPts, 3)
+        values = illReader.getPointsValues([2, 0])
+        self.assertValues(values[0], self.expectedValues(2))
+        self.assertValues(values[1], self.expectedValues(0))
+        self.assertValues(illReader.getHourValues(4), [4, 4.1, 4.2])
+    
+    def testPointMajorFileByDefault(self):
+        store = self.hb_AnnualResultsStore(self.studyFolder)
+        store.writeStore(IllFileTree([([0], self.illFiles)]))
+        
+        entry = store.header["states"][0]
+        self.assertEqual(entry["pointMajorFile"], "annualResults_0_0_points.bin")
+        self.assertTrue(os.path.isfile(os.path.join(self.studyFolder, entry["pointMajorFile"])))
+        
+        # the second file starts from the fourth point of the store
+        illReader = self.hb_IllFileReader(self.illFiles[1])
+        self.assertTrue(illReader.store != None)
+        values = illReader.getPointsValues([1, 0])
+        self.assertValues(values[0], self.expectedValues(4))
+        self.assertValues(values[1], self.expectedValues(3))
+        self.assertValues(illReader.getHourValues(29), [29.3, 29.4])
+    
+    def testHourMajorOnly(self):
+        store = self.hb_AnnualResultsStore(self.studyFolder)
+        store.writeStore(IllFileTree([([0], self.illFiles)]), writePointMajorFile = False)
+        
+        entry = store.header["states"][0]
+        self.assertEqual(entry["pointMajorFile"], None)
+        self.assertValues(store.readPointsValues(entry, [4, 1])[0], self.expectedValues(4))
+    
+    def testOutdatedStore(self):
+        store = self.hb_AnnualResultsStore(self.studyFolder)
+        store.writeStore(IllFileTree([([0], self.illFiles)]))
+        
+        # a new run of the study with one more hour
+        self.numOfHours += 1
+        self.writeIllFile("study_0.ill", 0, 3)
+        illReader = self.hb_IllFileReader(self.illFiles[0])
+        self.assertEqual(illReader.store, None)
+        self.assertValues(illReader.getPointValues(1), self.expectedValues(1))
+
+
+if __name__ == "__main__":
+    unittest.main()
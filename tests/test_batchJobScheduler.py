@@ -0,0 +1,148 @@
+#
+# Honeybee: A Plugin for Environmental Analysis (GPL) started by Mostapha Sadeghipour Roudsari
+#
+# This file is part of Honeybee.
+#
+# Copyright (c) 2013-2015, Mostapha Sadeghipour Roudsari <Sadeghipour@gmail.com>
+# Honeybee is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published
+# by the Free Software Foundation; either version 3 of the License,
+# or (at your option) any later version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Honeybee; If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+
+
+"""
+Test hb_BatchJobScheduler with a stand-in script instead of the Radiance batch files.
+
+The stand-in script writes its name and start and end times to a log file, sleeps
+and exits with the given code, so the tests can check the order of the jobs and
+how many of them ran at the same time.
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+
+import hbSource
+
+standInScript = """
+import sys, time
+name, logFile, duration, exitCode = sys.argv[1], sys.argv[2], float(sys.argv[3]), int(sys.argv[4])
+startTime = time.time()
+time.sleep(duration)
+with open(logFile, "a") as logOutf:
+    logOutf.write("%s %f %f\\n"%(name, startTime, time.time()))
+sys.exit(exitCode)
+"""
+
+# a shell that starts the stand-in script as a child process, the same as a batch file
+# starts rtrace. It doesn't exec the script so killing the shell doesn't kill the script
+shellCommand = '"%s" "%s" %s "%s" %s %d; true'
+
+
+class BatchJobSchedulerTest(unittest.TestCase):
+    
+    def setUp(self):
+        namespace = hbSource.loadClasses("hb_BatchJob", "hb_BatchJobScheduler")
+        self.hb_BatchJobScheduler = namespace["hb_BatchJobScheduler"]
+        
+        self.workingDir = tempfile.mkdtemp()
+        self.scriptFile = os.path.join(self.workingDir, "standIn.py")
+        with open(self.scriptFile, "w") as scriptOutf:
+            scriptOutf.write(standInScript)
+        self.logFile = os.path.join(self.workingDir, "jobs.log")
+    
+    def tearDown(self):
+        shutil.rmtree(self.workingDir, ignore_errors = True)
+    
+    def command(self, name, duration = 0.1, exitCode = 0):
+        return [sys.executable, self.scriptFile, name, self.logFile, `duration`, `exitCode`]
+    
+    def readLog(self):
+        if not os.path.isfile(self.logFile): return {}
+        with open(self.logFile, "r") as logInf:
+            return dict((line.split()[0], map(float, line.split()[1:])) for line in logInf)
+    
+    def testDependencies(self):
+        scheduler = self.hb_BatchJobScheduler(maxWorkers = 4)
+        scheduler.addJob("init", self.command("init"))
+        scheduler.addJob("cpu0", self.command("cpu0"), ["init"])
+        scheduler.addJob("cpu1", self.command("cpu1"), ["init"])
+        scheduler.addJob("merge", self.command("merge"), ["cpu0", "cpu1"])
+        jobs = scheduler.run()
+        
+        self.assertEqual([job.status for job in jobs], ["finished"] * 4)
+        log = self.readLog()
+        self.assertTrue(log["cpu0"][0] >= log["init"][1])
+        self.assertTrue(log["cpu1"][0] >= log["init"][1])
+        self.assertTrue(log["merge"][0] >= max(log["cpu0"][1], log["cpu1"][1]))
+    
+    def testMaxWorkers(self):
+        scheduler = self.hb_BatchJobScheduler(maxWorkers = 2)
+        for count in range(6):
+            scheduler.addJob("job%d"%count, self.command("job%d"%count, 0.3))
+        scheduler.run()
+        
+        # count the jobs that are running at the start of each job
+        log = self.readLog()
+        for startTime, endTime in log.values():
+            running = [name for name, (start, end) in log.items() if start <= startTime < end]
+            self.assertTrue(len(running) <= 2)
+        self.assertEqual(len(log), 6)
+    
+    def testStopOnFailure(self):
+        scheduler = self.hb_BatchJobScheduler(maxWorkers = 2, stopOnFailure = True)
+        scheduler.addJob("init", self.command("init", exitCode = 1))
+        scheduler.addJob("cpu0", self.command("cpu0"), ["init"])
+        scheduler.addJob("merge", self.command("merge"), ["cpu0"])
+        jobs = scheduler.run()
+        
+        self.assertEqual([job.status for job in jobs], ["failed", "skipped", "skipped"])
+        self.assertEqual(jobs[0].returnCode, 1)
+        self.assertEqual(self.readLog().keys(), ["init"])
+    
+    def testCaptureOutput(self):
+        scheduler = self.hb_BatchJobScheduler(captureOutput = True)
+        job = scheduler.addJob("echo", [sys.executable, "-c", "print 'rtrace'"])
+        scheduler.run()
+        self.assertEqual(job.stdout.strip(), "rtrace")
+    
+    @unittest.skipIf(os.name == "nt", "The stand-in shell command is for POSIX shells.")
+    def testCancelKillsProcessGroup(self):
+        command = shellCommand%(sys.executable, self.scriptFile, "child", self.logFile, 2, 0)
+        startTime = time.time()
+        scheduler = self.hb_BatchJobScheduler(cancelCheck = lambda: time.time() - startTime > 0.5, \
+                                              checkInterval = 0.1)
+        job = scheduler.addJob("shell", command, shell = True)
+        scheduler.run()
+        
+        self.assertTrue(scheduler.isCancelled)
+        self.assertEqual(job.status, "cancelled")
+        self.assertTrue(time.time() - startTime < 2)
+        # the child of the shell is killed before it writes to the log
+        time.sleep(2)
+        self.assertEqual(self.readLog(), {})
+    
+    @unittest.skipIf(not hasattr(os, "wait4"), "Peak memory is measured with os.wait4.")
+    def testPeakMemory(self):
+        scheduler = self.hb_BatchJobScheduler()
+        job = scheduler.addJob("job", self.command("job"))
+        scheduler.run()
+        self.assertTrue(job.peakMemory > 0)
+        self.assertTrue("peak memory" in scheduler.report())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,230 @@
+#
+# Honeybee: A Plugin for Environmental Analysis (GPL) started by Mostapha Sadeghipour Roudsari
+#
+# This file is part of Honeybee.
+#
+# Copyright (c) 2013-2015, Mostapha Sadeghipour Roudsari <Sadeghipour@gmail.com>
+# Honeybee is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published
+# by the Free Software Foundation; either version 3 of the License,
+# or (at your option) any later version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Honeybee; If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+
+
+"""
+Compare hb_DaylightMetrics with result files in the format of Daysim.
+
+The fixture is a study of two days with two spaces of two points each. Space 1
+has a blind (office_down.ill) which is down from 11:00 to 15:00 on the first day.
+The expected .DA, .CDA and .UDI files are references derived by hand in the format
+of ds_el_lighting and follow its definitions. They are not Daysim outputs.
+DaysimParityTest compares the metrics with the results of ds_el_lighting for the
+space with no blinds. It runs if ds_el_lighting is in HONEYBEE_DAYSIM_BIN or on
+PATH and is skipped otherwise. The values are within tolerance percentage points
+of the results.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+import hbSource
+
+fixtureFolder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "annualMetrics")
+
+# percentage points
+tolerance = 1
+
+# Daysim's bin folder for DaysimParityTest
+daysimBinFolder = os.environ.get("HONEYBEE_DAYSIM_BIN")
+
+
+def findDSElLighting():
+    if daysimBinFolder: folders = [daysimBinFolder]
+    else: folders = os.environ.get("PATH", "").split(os.pathsep)
+    for folder in folders:
+        for fileName in ["ds_el_lighting.exe", "ds_el_lighting"]:
+            filePath = os.path.join(folder, fileName)
+            if os.path.isfile(filePath): return filePath
+    return None
+
+
+def readDSStandardResults(filePath):
+    results = []
+    with open(filePath, "r") as inf:
+        for line in inf:
+            if not line.startswith("#"):
+                results.append(float(line.split("\t")[-1]))
+    return results
+
+
+class DaylightMetricsTest(unittest.TestCase):
+    
+    numOfPtsInEachSpace = [2, 2]
+    
+    def setUp(self):
+        namespace = hbSource.loadClasses("hb_IllFileReader", "hb_AnnualResultsStore", "hb_DaylightMetrics")
+        self.hb_DaylightMetrics = namespace["hb_DaylightMetrics"]
+        
+        # copy the files so the reader can write its index next to them
+        self.studyFolder = tempfile.mkdtemp()
+        for fileName in os.listdir(fixtureFolder):
+            shutil.copy(os.path.join(fixtureFolder, fileName), self.studyFolder)
+        
+        illFileSets = {0: [[os.path.join(self.studyFolder, "office.ill")]],
+                       1: [[os.path.join(self.studyFolder, "office_down.ill")]]}
+        
+        # the same as the shadingProfiles output of Daysim Annual Profiles
+        shadingHeading = ["key:location/dataType/units/frequency/startsAt/endsAt",
+                          " ", "Shading Profile", "0 = Up, 1 = Down", "Hourly",
+                          (1, 1, 1), (12, 31, 24)]
+        with open(os.path.join(self.studyFolder, "blindProfile_space_1.csv"), "r") as blindInf:
+            shadingProfile = shadingHeading + [line.strip() for line in blindInf]
+        blindProfiles = [None, self.hb_DaylightMetrics.getBlindProfile(shadingProfile)]
+        
+        self.daylightMetrics = self.hb_DaylightMetrics(illFileSets, self.numOfPtsInEachSpace, \
+                               [os.path.join(self.studyFolder, "occupancy.csv")], blindProfiles)
+    
+    def tearDown(self):
+        shutil.rmtree(self.studyFolder, ignore_errors = True)
+    
+    def assertDaysimResults(self, values, resultFile):
+        DSValues = readDSStandardResults(os.path.join(self.studyFolder, resultFile))
+        self.assertEqual(len(values), len(DSValues))
+        for value, DSValue in zip(values, DSValues):
+            self.assertTrue(abs(value - DSValue) <= tolerance, \
+                            "%s: %.2f instead of %.2f"%(resultFile, value, DSValue))
+    
+    def testDA(self):
+        for spaceCount in range(len(self.numOfPtsInEachSpace)):
+            self.assertDaysimResults(self.daylightMetrics.getDA(spaceCount, 300), \
+                                     "office_space_%d_autonomy.DA"%spaceCount)
+    
+    def testCDA(self):
+        for spaceCount in range(len(self.numOfPtsInEachSpace)):
+            self.assertDaysimResults(self.daylightMetrics.getCDA(spaceCount, 300), \
+                                     "office_space_%d.CDA"%spaceCount)
+    
+    def testUDI(self):
+        for spaceCount in range(len(self.numOfPtsInEachSpace)):
+            underUDI, inRangeUDI, overUDI = self.daylightMetrics.getUDI(spaceCount)
+            self.assertDaysimResults(underUDI, "office_space_%d_less_than_100.UDI"%spaceCount)
+            self.assertDaysimResults(inRangeUDI, "office_space_%d_100_2000.UDI"%spaceCount)
+            self.assertDaysimResults(overUDI, "office_space_%d_more_than_2000.UDI"%spaceCount)
+    
+    def testsDAandASE(self):
+        self.assertEqual(self.daylightMetrics.getsDA(0, 300), 100)
+        self.assertEqual(self.daylightMetrics.getsDA(0, 300, 80), 50)
+        # the points of space 1 receive more than 1000 lux for 6 and 12 occupied hours
+        self.assertEqual(self.daylightMetrics.getASE(1, 1000, 10), 50)
+        self.assertEqual(self.daylightMetrics.getASE(0, 1000, 250), 0)
+    
+    def testReadBlindProfile(self):
+        intgainFile = os.path.join(self.studyFolder, "office_space_1_intgain.csv")
+        with open(intgainFile, "w") as outf:
+            outf.write("# Daysim thermal simulation file\n# units\n#\n")
+            outf.write("month,day,time,occupancy,blind_group_1,lighting_group_1\n")
+            for HOY in range(48):
+                outf.write("1,%d,%.1f,0,%d,0\n"%(HOY // 24 + 1, HOY % 24 + 0.5, 10 <= HOY < 15))
+        blindProfile = self.hb_DaylightMetrics.readBlindProfile(intgainFile)
+        self.assertEqual(len(blindProfile), 48)
+        self.assertEqual(blindProfile[9:16], [0, 1, 1, 1, 1, 1, 0])
+
+
+@unittest.skipIf(findDSElLighting() == None, "ds_el_lighting is not available")
+class DaysimParityTest(unittest.TestCase):
+    
+    # the space with no blinds. The points are the first two columns of office.ill
+    points = [(1, 1, 0.8), (2, 1, 0.8)]
+    
+    def setUp(self):
+        namespace = hbSource.loadClasses("hb_IllFileReader", "hb_AnnualResultsStore", "hb_DaylightMetrics")
+        hb_DaylightMetrics = namespace["hb_DaylightMetrics"]
+        
+        self.studyFolder = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.studyFolder, "tmp"))
+        shutil.copy(os.path.join(fixtureFolder, "occupancy.csv"), self.studyFolder)
+        
+        illFile = os.path.join(self.studyFolder, "office_space_0.ill")
+        with open(os.path.join(fixtureFolder, "office.ill"), "r") as inf:
+            with open(illFile, "w") as outf:
+                for line in inf:
+                    values = line.split()
+                    outf.write(" ".join(values[:3 + len(self.points)]) + "\n")
+        
+        with open(os.path.join(self.studyFolder, "office_space_0.pts"), "w") as ptsf:
+            for pt in self.points:
+                ptsf.write("%.4f\t%.4f\t%.4f\t0.0000\t0.0000\t1.0000\n"%pt)
+        
+        self.writeHeaFile(os.path.join(self.studyFolder, "office_space_0.hea"))
+        
+        self.daylightMetrics = hb_DaylightMetrics({0: [[illFile]]}, [len(self.points)], \
+                               [os.path.join(self.studyFolder, "occupancy.csv")])
+    
+    def tearDown(self):
+        shutil.rmtree(self.studyFolder, ignore_errors = True)
+    
+    def writeHeaFile(self, heaFile):
+        dsElLighting = findDSElLighting()
+        with open(heaFile, "w") as heaf:
+            heaf.write("project_name       office_space_0\n" + \
+                       "project_directory  " + self.studyFolder + os.sep + "\n" + \
+                       "bin_directory      " + os.path.dirname(dsElLighting) + os.sep + "\n" + \
+                       "tmp_directory      " + os.path.join(self.studyFolder, "tmp") + os.sep + "\n" + \
+                       "place              fixture\n" + \
+                       "latitude           42.37\n" + \
+                       "longitude          71.03\n" + \
+                       "time_zone          75.0\n" + \
+                       "site_elevation     0\n" + \
+                       "time_step          60\n" + \
+                       "sensor_file        office_space_0.pts\n" + \
+                       "shading 1 static_system office_space_0.dc office_space_0.ill\n\n" + \
+                       "occupancy-file occupancy.csv\n" + \
+                       "occupancy 5 occupancy.csv\n" + \
+                       "minimum_illuminance_level 300\n" + \
+                       "daylight_savings_time 1\n" + \
+                       "user_profile 1\n" + \
+                       "active 100 1 1\n" + \
+                       "\n\nelectric_lighting_system 1\n" + \
+                       "1 manualControl 250 1\n" + \
+                       "\nsensor_file_info " + "0 " * len(self.points) + "\n\n" + \
+                       "daylight_autonomy_active_RGB office_space_0_autonomy.DA\n" + \
+                       "continuous_daylight_autonomy_active_RGB office_space_0.CDA\n" + \
+                       "UDI_100_active_RGB office_space_0_less_than_100.UDI\n" + \
+                       "UDI_100_2000_active_RGB office_space_0_100_2000.UDI\n" + \
+                       "UDI_2000_active_RGB office_space_0_more_than_2000.UDI\n" + \
+                       "occupancy_profile office_space_0_occ_profile.csv\n" + \
+                       "electric_lighting office_space_0_electriclighting.htm\n" + \
+                       "direct_sunlight_file office_space_0.dir\n" + \
+                       "thermal_simulation office_space_0_intgain.csv\n")
+    
+    def assertDaysimResults(self, values, resultFile):
+        DSValues = readDSStandardResults(os.path.join(self.studyFolder, resultFile))
+        self.assertEqual(len(values), len(DSValues))
+        for value, DSValue in zip(values, DSValues):
+            self.assertTrue(abs(value - DSValue) <= tolerance, \
+                            "%s: %.2f instead of %.2f"%(resultFile, value, DSValue))
+    
+    def testDSElLighting(self):
+        subprocess.check_call([findDSElLighting(), "office_space_0.hea"], cwd = self.studyFolder)
+        self.assertDaysimResults(self.daylightMetrics.getDA(0, 300), "office_space_0_autonomy.DA")
+        self.assertDaysimResults(self.daylightMetrics.getCDA(0, 300), "office_space_0.CDA")
+        underUDI, inRangeUDI, overUDI = self.daylightMetrics.getUDI(0)
+        self.assertDaysimResults(underUDI, "office_space_0_less_than_100.UDI")
+        self.assertDaysimResults(inRangeUDI, "office_space_0_100_2000.UDI")
+        self.assertDaysimResults(overUDI, "office_space_0_more_than_2000.UDI")
+
+
+if __name__ == "__main__":
+    unittest.main()
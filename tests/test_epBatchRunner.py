@@ -0,0 +1,167 @@
+#
+# Honeybee: A Plugin for Environmental Analysis (GPL) started by Mostapha Sadeghipour Roudsari
+#
+# This file is part of Honeybee.
+#
+# Copyright (c) 2013-2015, Mostapha Sadeghipour Roudsari <Sadeghipour@gmail.com>
+# Honeybee is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published
+# by the Free Software Foundation; either version 3 of the License,
+# or (at your option) any later version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Honeybee; If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+
+
+"""
+Test hb_EPBatchRunner with a stand-in script instead of EnergyPlus.
+
+The stand-in script is passed through the command argument. It writes the .err
+and .csv files of EnergyPlus to the folder of the run and logs its start and end
+times. The first line of each idf file sets how long it runs and if it fails.
+"""
+
+import os
+import sys
+import time
+import json
+import shutil
+import tempfile
+import unittest
+
+import hbSource
+
+standInScript = """
+import os, sys, time
+idfFile, logFile = sys.argv[1], sys.argv[2]
+with open(idfFile, "r") as idfInf:
+    mode, duration = idfInf.readline().strip("! \\n").split()
+name = os.path.splitext(os.path.basename(idfFile))[0]
+startTime = time.time()
+with open(name + ".err", "w") as errOutf:
+    errOutf.write("Program Version,EnergyPlus\\n")
+    errOutf.write("   ************* Starting Simulation at 01/01 for RUNPERIOD 1\\n")
+    errOutf.write("   ** Warning ** Stand-in warning\\n")
+    errOutf.flush()
+    time.sleep(float(duration))
+    if mode == "fatal":
+        errOutf.write("   **  Fatal  ** Stand-in fatal error\\n")
+    else:
+        errOutf.write("   ************* EnergyPlus Completed Successfully.\\n")
+if mode == "ok":
+    with open(name + ".csv", "w") as csvOutf:
+        csvOutf.write("Date/Time,Zone Air Temperature\\n 01/01  01:00:00,20\\n")
+with open(logFile, "a") as logOutf:
+    logOutf.write("%s %f %f\\n"%(name, startTime, time.time()))
+sys.exit(3 if mode == "crash" else 0)
+"""
+
+
+class EPBatchRunnerTest(unittest.TestCase):
+    
+    def setUp(self):
+        namespace = hbSource.loadClasses("hb_BatchJob", "hb_BatchJobScheduler", "hb_EPBatchRunner")
+        self.hb_EPBatchRunner = namespace["hb_EPBatchRunner"]
+        
+        self.tempFolder = tempfile.mkdtemp()
+        self.scriptFile = os.path.join(self.tempFolder, "standIn.py")
+        with open(self.scriptFile, "w") as scriptOutf:
+            scriptOutf.write(standInScript)
+        self.logFile = os.path.join(self.tempFolder, "runs.log")
+        self.epwFile = os.path.join(self.tempFolder, "weather.epw")
+        with open(self.epwFile, "w") as epwOutf:
+            epwOutf.write("LOCATION,Stand-in\n")
+        self.workingDir = os.path.join(self.tempFolder, "sweep")
+    
+    def tearDown(self):
+        shutil.rmtree(self.tempFolder, ignore_errors = True)
+    
+    def getRunner(self, maxWorkers = 4, cancelCheck = None):
+        command = [sys.executable, self.scriptFile, "{idf}", self.logFile]
+        return self.hb_EPBatchRunner(self.workingDir, maxWorkers = maxWorkers, command = command, \
+                                     cancelCheck = cancelCheck, checkInterval = 0.05)
+    
+    def writeIdf(self, name, mode = "ok", duration = 0.1):
+        idfFile = os.path.join(self.tempFolder, name + ".idf")
+        with open(idfFile, "w") as idfOutf:
+            idfOutf.write("! %s %s\nVersion,8.1;\n"%(mode, duration))
+        return idfFile
+    
+    def readLog(self):
+        if not os.path.isfile(self.logFile): return {}
+        with open(self.logFile, "r") as logInf:
+            return dict((line.split()[0], map(float, line.split()[1:])) for line in logInf)
+    
+    def testStatus(self):
+        runner = self.getRunner()
+        runner.addRun(self.writeIdf("ok"), self.epwFile)
+        runner.addRun(self.writeIdf("fatal", "fatal"), self.epwFile)
+        runner.addRun(self.writeIdf("crash", "crash"), self.epwFile)
+        results = dict((result["name"], result) for result in runner.run())
+        
+        self.assertEqual(results["ok"]["status"], "finished")
+        self.assertEqual(results["ok"]["returnCode"], 0)
+        # EnergyPlus exits with 0 after a fatal error
+        self.assertEqual(results["fatal"]["status"], "failed")
+        self.assertEqual(results["fatal"]["returnCode"], 0)
+        self.assertEqual(results["fatal"]["fatal"], 1)
+        self.assertEqual(results["crash"]["status"], "failed")
+        self.assertEqual(results["crash"]["returnCode"], 3)
+    
+    def testCollectResults(self):
+        runner = self.getRunner()
+        runner.addRun(self.writeIdf("office"), self.epwFile)
+        # the same name gets its own folder
+        runner.addRun(self.writeIdf("office"), self.epwFile)
+        runner.addRun(self.writeIdf("fatal", "fatal"), self.epwFile)
+        results = runner.run()
+        
+        self.assertEqual([result["name"] for result in results], ["office", "office_1", "fatal"])
+        for result in results[:2]:
+            folder = os.path.join(self.workingDir, result["name"])
+            self.assertEqual(result["csv"], [os.path.join(folder, result["name"] + ".csv")])
+            self.assertEqual(result["err"], os.path.join(folder, result["name"] + ".err"))
+            self.assertEqual(result["sql"], [])
+            self.assertEqual((result["warnings"], result["severe"], result["fatal"]), (1, 0, 0))
+            self.assertTrue(os.path.isfile(os.path.join(folder, "weather.epw")))
+        self.assertEqual(results[2]["csv"], [])
+        
+        with open(os.path.join(self.workingDir, "resultIndex.json"), "r") as indexFile:
+            self.assertEqual(json.load(indexFile), json.loads(json.dumps(results)))
+    
+    def testMaxWorkers(self):
+        runner = self.getRunner(maxWorkers = 2)
+        for count in range(5):
+            runner.addRun(self.writeIdf("run%d"%count, duration = 0.3), self.epwFile)
+        results = runner.run()
+        
+        self.assertEqual([result["status"] for result in results], ["finished"] * 5)
+        # count the runs that are running at the start of each run
+        log = self.readLog()
+        for startTime, endTime in log.values():
+            running = [name for name, (start, end) in log.items() if start <= startTime < end]
+            self.assertTrue(len(running) <= 2)
+        self.assertEqual(len(log), 5)
+    
+    def testCancel(self):
+        startTime = time.time()
+        runner = self.getRunner(maxWorkers = 1, cancelCheck = lambda: time.time() - startTime > 0.5)
+        runner.addRun(self.writeIdf("long", duration = 3), self.epwFile)
+        runner.addRun(self.writeIdf("next"), self.epwFile)
+        results = runner.run()
+        
+        self.assertEqual([result["status"] for result in results], ["cancelled", "cancelled"])
+        self.assertTrue(time.time() - startTime < 3)
+        self.assertEqual(results[0]["csv"], [])
+        self.assertEqual(self.readLog(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
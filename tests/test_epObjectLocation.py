@@ -0,0 +1,90 @@
+#
+# Honeybee: A Plugin for Environmental Analysis (GPL) started by Mostapha Sadeghipour Roudsari
+#
+# This file is part of Honeybee.
+#
+# Copyright (c) 2013-2015, Mostapha Sadeghipour Roudsari <Sadeghipour@gmail.com>
+# Honeybee is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published
+# by the Free Software Foundation; either version 3 of the License,
+# or (at your option) any later version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Honeybee; If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+
+
+"""
+Test hb_EPObjectLocation when the library file changes after it is indexed.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import hbSource
+
+libraryString = """Material,
+    Brick,                   !- Name
+    MediumRough,             !- Roughness
+    0.1;                     !- Thickness {m}
+
+Material,
+    Concrete,                !- Name
+    Rough,                   !- Roughness
+    0.2;                     !- Thickness {m}
+"""
+
+
+class EPObjectLocationTest(unittest.TestCase):
+    
+    def setUp(self):
+        namespace = hbSource.loadClasses("hb_EPObjectLocation", "hb_LazyEPLibrary")
+        self.hb_EPObjectLocation = namespace["hb_EPObjectLocation"]
+        self.hb_LazyEPLibrary = namespace["hb_LazyEPLibrary"]
+        
+        self.folder = tempfile.mkdtemp()
+        self.libFile = os.path.join(self.folder, "library.idf")
+        self.writeLibrary(libraryString, 1000000000)
+        self.locations = {}
+        for (key, shortKey, name, values), offset, length in self.hb_LazyEPLibrary.iterEPObjects(libraryString):
+            self.locations[name] = self.hb_EPObjectLocation(self.libFile, offset, length, shortKey, name)
+    
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors = True)
+    
+    def writeLibrary(self, libString, modifiedTime = 1000000010):
+        with open(self.libFile, "wb") as libOutf:
+            libOutf.write(libString)
+        os.utime(self.libFile, (modifiedTime, modifiedTime))
+    
+    def testLoad(self):
+        self.assertEqual(self.locations["CONCRETE"].load()[2], ("0.2", "- Thickness {m}"))
+    
+    def testReindexChangedFile(self):
+        # the offset of Concrete changes
+        self.writeLibrary("! new header\n" + libraryString.replace("Brick", "Bricks"))
+        self.assertEqual(self.locations["CONCRETE"].load()[1], ("Rough", "- Roughness"))
+        self.assertEqual(self.locations["CONCRETE"].fileStamp, self.hb_EPObjectLocation.getFileStamp(self.libFile))
+    
+    def testRemovedObject(self):
+        self.writeLibrary(libraryString.replace("Brick", "Bricks"))
+        self.assertRaises(ValueError, self.locations["BRICK"].load)
+    
+    def testSameSizeAndTime(self):
+        # an object with the same length is in the old place. The name is checked
+        self.writeLibrary(libraryString.replace("Brick,   ", "Stone,   "), 1000000000)
+        self.assertEqual(self.hb_EPObjectLocation.getFileStamp(self.libFile), self.locations["BRICK"].fileStamp)
+        self.assertRaises(ValueError, self.locations["BRICK"].load)
+        self.assertEqual(self.locations["CONCRETE"].load()[2], ("0.2", "- Thickness {m}"))
+
+
+if __name__ == "__main__":
+    unittest.main()
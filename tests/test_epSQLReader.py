@@ -0,0 +1,136 @@
+#
+# Honeybee: A Plugin for Environmental Analysis (GPL) started by Mostapha Sadeghipour Roudsari
+#
+# This file is part of Honeybee.
+#
+# Copyright (c) 2013-2015, Mostapha Sadeghipour Roudsari <Sadeghipour@gmail.com>
+# Honeybee is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published
+# by the Free Software Foundation; either version 3 of the License,
+# or (at your option) any later version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Honeybee; If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+
+
+"""
+Test reading time series of hb_EPSQLReader from an indexed copy of the sql file.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+
+import hbSource
+
+
+class EPSQLReaderTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.hb_EPSQLReader = hbSource.loadClasses("hb_EPSQLReader")["hb_EPSQLReader"]
+        
+        self.folder = tempfile.mkdtemp()
+        self.hb_EPSQLReader.indexedCopyFolder = os.path.join(self.folder, "indexed")
+        self.sqlFile = os.path.join(self.folder, "eplusout.sql")
+        self.createSQLFile()
+    
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors = True)
+    
+    def createSQLFile(self):
+        # the tables of an EnergyPlus sql file that the time series need
+        # with a sizing period (1) and a run period (2)
+        connection = sqlite3.connect(self.sqlFile)
+        connection.executescript("""
+            CREATE TABLE EnvironmentPeriods (EnvironmentPeriodIndex INTEGER PRIMARY KEY, EnvironmentType INTEGER);
+            CREATE TABLE Time (TimeIndex INTEGER PRIMARY KEY, Month INTEGER, Day INTEGER, EnvironmentPeriodIndex INTEGER);
+            CREATE TABLE ReportDataDictionary (ReportDataDictionaryIndex INTEGER PRIMARY KEY, KeyValue TEXT,
+                                               Name TEXT, Units TEXT, ReportingFrequency TEXT);
+            CREATE TABLE ReportData (ReportDataIndex INTEGER PRIMARY KEY, TimeIndex INTEGER,
+                                     ReportDataDictionaryIndex INTEGER, Value REAL);
+            INSERT INTO EnvironmentPeriods VALUES (1, 1), (2, 3);
+            """)
+        connection.executemany("INSERT INTO Time VALUES (?, ?, ?, ?)", \
+                               [(1, 7, 21, 1)] + [(timeIndex, 1, timeIndex - 1, 2) for timeIndex in range(2, 6)])
+        connection.executemany("INSERT INTO ReportDataDictionary VALUES (?, ?, ?, ?, ?)", \
+                               [(1, "ZONE_1", "Zone Air Temperature", "C", "Hourly"),
+                                (2, "ZONE_2", "Zone Air Temperature", "C", "Hourly")])
+        connection.executemany("INSERT INTO ReportData (TimeIndex, ReportDataDictionaryIndex, Value) VALUES (?, ?, ?)", \
+                               [(timeIndex, dictionaryIndex, 10 * dictionaryIndex + timeIndex) \
+                                for timeIndex in range(1, 6) for dictionaryIndex in (1, 2)])
+        connection.commit()
+        connection.close()
+    
+    def testIndexedCopy(self):
+        stamp = os.path.getsize(self.sqlFile), os.path.getmtime(self.sqlFile)
+        
+        sqlReader = self.hb_EPSQLReader(self.sqlFile)
+        self.assertFalse(sqlReader.hasReportDataIndex())
+        values = sqlReader.getValues([2, 1])
+        self.assertTrue(sqlReader.hasReportDataIndex())
+        sqlReader.close()
+        
+        # values of the sizing period are not returned
+        self.assertEqual(values, {1: [12, 13, 14, 15], 2: [22, 23, 24, 25]})
+        self.assertEqual(len(os.listdir(self.hb_EPSQLReader.indexedCopyFolder)), 1)
+        self.assertEqual((os.path.getsize(self.sqlFile), os.path.getmtime(self.sqlFile)), stamp)
+        
+        # the original file is not changed
+        connection = sqlite3.connect(self.sqlFile)
+        self.assertEqual(connection.execute("PRAGMA index_list(ReportData)").fetchall(), [])
+        connection.close()
+    
+    def testChangedFile(self):
+        sqlReader = self.hb_EPSQLReader(self.sqlFile)
+        sqlReader.getValues([1])
+        sqlReader.close()
+        
+        connection = sqlite3.connect(self.sqlFile)
+        connection.execute("UPDATE ReportData SET Value = 0 WHERE ReportDataDictionaryIndex = 1")
+        connection.commit()
+        connection.close()
+        os.utime(self.sqlFile, (os.path.getatime(self.sqlFile), os.path.getmtime(self.sqlFile) + 10))
+        
+        sqlReader = self.hb_EPSQLReader(self.sqlFile)
+        self.assertEqual(sqlReader.getValues([1]), {1: [0, 0, 0, 0]})
+        sqlReader.close()
+        self.assertEqual(len(os.listdir(self.hb_EPSQLReader.indexedCopyFolder)), 1)
+    
+    def testEvictIndexedCopies(self):
+        self.hb_EPSQLReader.maxNumOfIndexedCopies = 2
+        sqlFiles = []
+        for runName in ("run0", "run1", "run2"):
+            os.mkdir(os.path.join(self.folder, runName))
+            sqlFiles.append(os.path.join(self.folder, runName, "eplusout.sql"))
+            shutil.copy2(self.sqlFile, sqlFiles[-1])
+        
+        copyFiles = []
+        for count, sqlFile in enumerate(sqlFiles[:2]):
+            copyFiles.append(self.hb_EPSQLReader(sqlFile).getIndexedCopy())
+            lastUsed = time.time() - 100 + 10 * count
+            os.utime(copyFiles[-1], (lastUsed, lastUsed))
+        
+        # run0 is used again so run1 is the copy that is not used recently
+        self.assertEqual(self.hb_EPSQLReader(sqlFiles[0]).getIndexedCopy(), copyFiles[0])
+        copyFiles.append(self.hb_EPSQLReader(sqlFiles[2]).getIndexedCopy())
+        
+        self.assertEqual(sorted(os.listdir(self.hb_EPSQLReader.indexedCopyFolder)), \
+                         sorted([os.path.basename(copyFiles[0]), os.path.basename(copyFiles[2])]))
+        
+        # a size limit removes all but the copy that is used last
+        self.hb_EPSQLReader.cleanIndexedCopies(maxCopiesSize = 1.5 * os.path.getsize(self.sqlFile) / 1048576.0)
+        self.assertEqual(os.listdir(self.hb_EPSQLReader.indexedCopyFolder), [os.path.basename(copyFiles[2])])
+
+
+if __name__ == "__main__":
+    unittest.main()
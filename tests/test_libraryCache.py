@@ -0,0 +1,76 @@
+#
+# Honeybee: A Plugin for Environmental Analysis (GPL) started by Mostapha Sadeghipour Roudsari
+#
+# This file is part of Honeybee.
+#
+# Copyright (c) 2013-2015, Mostapha Sadeghipour Roudsari <Sadeghipour@gmail.com>
+# Honeybee is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published
+# by the Free Software Foundation; either version 3 of the License,
+# or (at your option) any later version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Honeybee; If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+
+
+"""
+Test hb_LibraryCache with two library files of the same name in different folders.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import hbSource
+
+
+class LibraryCacheTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.hb_LibraryCache = hbSource.loadClasses("hb_LibraryCache")["hb_LibraryCache"]
+        
+        self.folder = tempfile.mkdtemp()
+        self.cache = self.hb_LibraryCache(os.path.join(self.folder, "libraryCache"))
+        self.libFiles = []
+        for libFolder in ("project1", "project2"):
+            os.mkdir(os.path.join(self.folder, libFolder))
+            libFile = os.path.join(self.folder, libFolder, "OpenStudioMasterTemplate.idf")
+            with open(libFile, "w") as libOutf:
+                libOutf.write("Material, %s;\n"%libFolder)
+            self.libFiles.append(libFile)
+    
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors = True)
+    
+    def testSameFileName(self):
+        self.cache.save(self.libFiles[0], "index", {"library": "project1"})
+        self.assertEqual(self.cache.load(self.libFiles[1], "index"), None)
+        
+        self.cache.save(self.libFiles[1], "index", {"library": "project2"})
+        self.assertEqual(self.cache.load(self.libFiles[0], "index"), {"library": "project1"})
+        self.assertEqual(self.cache.load(self.libFiles[1], "index"), {"library": "project2"})
+    
+    def testChangedFile(self):
+        self.cache.save(self.libFiles[0], "index", {"library": "project1"})
+        with open(self.libFiles[0], "a") as libOutf:
+            libOutf.write("Material, new;\n")
+        self.assertEqual(self.cache.load(self.libFiles[0], "index"), None)
+    
+    def testTouchedFile(self):
+        # the modification time changes but the content is the same
+        self.cache.save(self.libFiles[0], "index", {"library": "project1"})
+        stat = os.stat(self.libFiles[0])
+        os.utime(self.libFiles[0], (stat.st_atime, stat.st_mtime + 10))
+        self.assertEqual(self.cache.load(self.libFiles[0], "index"), {"library": "project1"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+#
+# Honeybee: A Plugin for Environmental Analysis (GPL) started by Mostapha Sadeghipour Roudsari
+#
+# This file is part of Honeybee.
+#
+# Copyright (c) 2013-2015, Mostapha Sadeghipour Roudsari <Sadeghipour@gmail.com>
+# Honeybee is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published
+# by the Free Software Foundation; either version 3 of the License,
+# or (at your option) any later version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Honeybee; If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+
+
+"""
+Test MeshRayTree of Indoor View Factor Calculator against testing every mesh.
+
+The meshes are simple stand-ins for Rhino meshes and the hits of the meshes are
+found with an exact ray-triangle test instead of MeshRay. tests/rhino/indoorViewFactors.py
+runs the same comparison with Rhino meshes and MeshRay.
+"""
+
+import math
+import random
+import unittest
+
+import hbSource
+
+
+class Point(object):
+    def __init__(self, x, y, z):
+        self.X, self.Y, self.Z = x, y, z
+
+
+class Face(object):
+    def __init__(self, a, b, c, d = None):
+        self.A, self.B, self.C = a, b, c
+        self.IsQuad = d != None
+        self.D = d if d != None else c
+
+
+class Mesh(object):
+    def __init__(self, vertices, faces):
+        self.Vertices = [Point(*vertex) for vertex in vertices]
+        self.Faces = [Face(*face) for face in faces]
+
+
+def quadMesh(vertices):
+    return Mesh(vertices, [(0, 1, 2, 3)])
+
+
+def gridMesh(xs, zs, y, skipFace):
+    # a wall in the xz plane with one face left out for the window
+    vertices = [(x, y, z) for z in zs for x in xs]
+    faces = []
+    for row in range(len(zs) - 1):
+        for column in range(len(xs) - 1):
+            if (column, row) == skipFace: continue
+            a = row * len(xs) + column
+            faces.append((a, a + 1, a + 1 + len(xs), a + len(xs)))
+    return Mesh(vertices, faces)
+
+
+def createSampleZone():
+    # the same 6 x 4 x 3 m room with a window in the south wall as tests/rhino/indoorViewFactors.py
+    floor = quadMesh([(0, 0, 0), (6, 0, 0), (6, 4, 0), (0, 4, 0)])
+    ceiling = quadMesh([(0, 0, 3), (0, 4, 3), (6, 4, 3), (6, 0, 3)])
+    northWall = quadMesh([(0, 4, 0), (6, 4, 0), (6, 4, 3), (0, 4, 3)])
+    eastWall = quadMesh([(6, 0, 0), (6, 4, 0), (6, 4, 3), (6, 0, 3)])
+    westWall = quadMesh([(0, 0, 0), (0, 0, 3), (0, 4, 3), (0, 4, 0)])
+    southWall = gridMesh([0, 1.5, 4.5, 6], [0, 1, 2.5, 3], 0, (1, 1))
+    window = quadMesh([(1.5, 0, 1), (4.5, 0, 1), (4.5, 0, 2.5), (1.5, 0, 2.5)])
+    
+    opaqueMeshes = [floor, ceiling, northWall, eastWall, westWall, southWall]
+    return opaqueMeshes + [window], opaqueMeshes, [window]
+
+
+def meshRay(mesh, origin, direction):
+    # exact test of every triangle of the mesh. returns the closest hit or -1
+    nearestT = -1
+    for face in mesh.Faces:
+        triangles = [(face.A, face.B, face.C)]
+        if face.IsQuad: triangles.append((face.A, face.C, face.D))
+        for triangle in triangles:
+            ptA, ptB, ptC = [mesh.Vertices[index] for index in triangle]
+            v0 = (ptA.X, ptA.Y, ptA.Z)
+            e1 = (ptB.X - ptA.X, ptB.Y - ptA.Y, ptB.Z - ptA.Z)
+            e2 = (ptC.X - ptA.X, ptC.Y - ptA.Y, ptC.Z - ptA.Z)
+            t = MeshRayTree.rayHitsTriangle(origin, direction, (v0, e1, e2), epsilon = 0)
+            if t >= 0 and (nearestT < 0 or t < nearestT): nearestT = t
+    return nearestT
+
+
+def getRayVectors(numOfVectors = 200):
+    vectors = []
+    goldenAngle = math.pi * (3 - math.sqrt(5))
+    for count in range(numOfVectors):
+        z = 1 - (count + 0.5) * 2.0 / numOfVectors
+        radius = math.sqrt(1 - z * z)
+        vectors.append((radius * math.cos(goldenAngle * count), radius * math.sin(goldenAngle * count), z))
+    return vectors
+
+
+MeshRayTree = hbSource.loadClasses("MeshRayTree", \
+              sourceFile = hbSource.getComponentFile("Honeybee_Indoor View Factor Calculator"))["MeshRayTree"]
+
+
+class MeshRayTreeTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.meshGroups = createSampleZone()
+        self.rayTree = MeshRayTree(list(self.meshGroups), tolerance = 0.001)
+        random.seed(0)
+        self.testPts = [(x, y, z) for x in (0.75, 3, 5.25) for y in (1, 3) for z in (0.75, 1.5)] + \
+                       [(random.uniform(0.1, 5.9), random.uniform(0.1, 3.9), random.uniform(0.1, 2.9)) \
+                        for count in range(10)]
+    
+    def getMeshRay(self, origin, direction):
+        def treeMeshRay(groupCount, meshCount):
+            return meshRay(self.meshGroups[groupCount][meshCount], origin, direction)
+        return treeMeshRay
+    
+    def testNearestSurface(self):
+        for origin in self.testPts:
+            for direction in getRayVectors():
+                srfIndex = self.rayTree.traceRay(origin, direction, self.getMeshRay(origin, direction), 0)[0]
+                
+                expectedIndex, nearestT = -1, None
+                for meshCount, mesh in enumerate(self.meshGroups[0]):
+                    t = meshRay(mesh, origin, direction)
+                    if t >= 0 and (nearestT == None or t < nearestT): expectedIndex, nearestT = meshCount, t
+                
+                self.assertEqual(srfIndex, expectedIndex, (origin, direction))
+    
+    def testWindowHits(self):
+        for origin in self.testPts:
+            for direction in getRayVectors():
+                opaqueIndex, windowHits = self.rayTree.traceRay(origin, direction, \
+                                          self.getMeshRay(origin, direction), 1, 2)
+                
+                isBlocked = any(meshRay(mesh, origin, direction) >= 0 for mesh in self.meshGroups[1])
+                self.assertEqual(opaqueIndex != -1, isBlocked, (origin, direction))
+                expectedHits = [meshCount for meshCount, mesh in enumerate(self.meshGroups[2]) \
+                                if meshRay(mesh, origin, direction) >= 0]
+                self.assertEqual(windowHits, expectedHits, (origin, direction))
+    
+    def testEmptyTree(self):
+        self.assertEqual(MeshRayTree([[], [], []], tolerance = 0.001).traceRay((0, 0, 0), (1, 0, 0), None), (-1, []))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+#
+# Honeybee: A Plugin for Environmental Analysis (GPL) started by Mostapha Sadeghipour Roudsari
+#
+# This file is part of Honeybee.
+#
+# Copyright (c) 2013-2015, Mostapha Sadeghipour Roudsari <Sadeghipour@gmail.com>
+# Honeybee is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published
+# by the Free Software Foundation; either version 3 of the License,
+# or (at your option) any later version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Honeybee; If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+
+
+"""
+Compare hb_PointKDTree with a search over all the points.
+"""
+
+import random
+import unittest
+from collections import namedtuple
+
+import hbSource
+
+Point3d = namedtuple("Point3d", "X Y Z")
+
+
+def distance(pt1, pt2):
+    return ((pt1.X - pt2.X) ** 2 + (pt1.Y - pt2.Y) ** 2 + (pt1.Z - pt2.Z) ** 2) ** 0.5
+
+
+class PointKDTreeTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.hb_PointKDTree = hbSource.loadClasses("hb_PointKDTree")["hb_PointKDTree"]
+        # a grid of test points of two floors, the same as a grid-based study
+        self.points = [Point3d(x * 0.5, y * 0.5, z * 3 + 0.8) \
+                       for z in range(2) for y in range(20) for x in range(30)]
+    
+    def testClosestPoint(self):
+        tree = self.hb_PointKDTree(self.points)
+        random.seed(0)
+        for count in range(200):
+            target = Point3d(random.uniform(-1, 16), random.uniform(-1, 11), random.uniform(0, 5))
+            ptIndex, ptDistance = tree.getClosestPoint(target)
+            expectedDistance = min(distance(target, pt) for pt in self.points)
+            self.assertAlmostEqual(ptDistance, expectedDistance)
+            self.assertAlmostEqual(distance(target, self.points[ptIndex]), expectedDistance)
+    
+    def testTestPoints(self):
+        tree = self.hb_PointKDTree(self.points)
+        for ptIndex in [0, 17, 599, 600, 1199]:
+            self.assertEqual(tree.getClosestPoint(self.points[ptIndex], 0.001), (ptIndex, 0))
+    
+    def testMaxDistance(self):
+        tree = self.hb_PointKDTree(self.points)
+        self.assertEqual(tree.getClosestPoint(Point3d(0.25, 0, 0.8), 0.01), (-1, None))
+    
+    def testDuplicatePoints(self):
+        # the first point of the list is returned
+        tree = self.hb_PointKDTree(self.points + self.points)
+        self.assertEqual(tree.getClosestPoint(self.points[42])[0], 42)
+
+
+if __name__ == "__main__":
+    unittest.main()
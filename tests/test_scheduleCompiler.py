@@ -0,0 +1,205 @@
+#
+# Honeybee: A Plugin for Environmental Analysis (GPL) started by Mostapha Sadeghipour Roudsari
+#
+# This file is part of Honeybee.
+#
+# Copyright (c) 2013-2015, Mostapha Sadeghipour Roudsari <Sadeghipour@gmail.com>
+# Honeybee is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published
+# by the Free Software Foundation; either version 3 of the License,
+# or (at your option) any later version.
+#
+# Honeybee is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Honeybee; If not, see <http://www.gnu.org/licenses/>.
+#
+# @license GPL-3.0+ <http://spdx.org/licenses/GPL-3.0+>
+
+
+"""
+Test hb_ScheduleCompiler with a Schedule:Compact and a Schedule:Year.
+
+The schedules are parsed into a hb_LazyEPLibrary the same as the Honeybee
+libraries. Ladybug is replaced with a day of the year function.
+"""
+
+import unittest
+
+import hbSource
+
+scheduleStrings = ["""
+Schedule:Compact,
+    Office Occupancy,        !- Name
+    Fraction,                !- Schedule Type Limits Name
+    Through: 6/30,           !- Field 1
+    For: Weekdays,           !- Field 2
+    Until: 08:00,            !- Field 3
+    0,                       !- Field 4
+    Until: 18:00,            !- Field 5
+    1,                       !- Field 6
+    Until: 24:00,            !- Field 7
+    0,                       !- Field 8
+    For: Saturday SummerDesignDay, !- Field 9
+    Until: 12:00,            !- Field 10
+    0.5,                     !- Field 11
+    Until: 24:00,            !- Field 12
+    0,                       !- Field 13
+    For: AllOtherDays,       !- Field 14
+    Until: 24:00,            !- Field 15
+    0;                       !- Field 16
+""", """
+Schedule:Compact,
+    Office Occupancy,        !- Name
+    Fraction,                !- Schedule Type Limits Name
+    Through: 12/31,          !- Field 1
+    For: AllDays,            !- Field 2
+    Until: 24:00,            !- Field 3
+    0.25;                    !- Field 4
+""", """
+Schedule:Day:Interval,
+    Day On,                  !- Name
+    Fraction,                !- Schedule Type Limits Name
+    No,                      !- Interpolate to Timestep
+    09:00,                   !- Time 1
+    0,                       !- Value Until Time 1
+    17:00,                   !- Time 2
+    1,                       !- Value Until Time 2
+    24:00,                   !- Time 3
+    0;                       !- Value Until Time 3
+""", """
+Schedule:Day:Interval,
+    Day Off,                 !- Name
+    Fraction,                !- Schedule Type Limits Name
+    No,                      !- Interpolate to Timestep
+    24:00,                   !- Time 1
+    0;                       !- Value Until Time 1
+""", """
+Schedule:Week:Daily,
+    Week,                    !- Name
+    Day Off,                 !- Sunday Schedule:Day Name
+    Day On,                  !- Monday Schedule:Day Name
+    Day On,                  !- Tuesday Schedule:Day Name
+    Day On,                  !- Wednesday Schedule:Day Name
+    Day On,                  !- Thursday Schedule:Day Name
+    Day On,                  !- Friday Schedule:Day Name
+    Day Off,                 !- Saturday Schedule:Day Name
+    Day Off,                 !- Holiday Schedule:Day Name
+    Day On,                  !- SummerDesignDay Schedule:Day Name
+    Day On,                  !- WinterDesignDay Schedule:Day Name
+    Day Off,                 !- CustomDay1 Schedule:Day Name
+    Day Off;                 !- CustomDay2 Schedule:Day Name
+""", """
+Schedule:Year,
+    Office Year,             !- Name
+    Fraction,                !- Schedule Type Limits Name
+    Week,                    !- Schedule:Week Name 1
+    1,                       !- Start Month 1
+    1,                       !- Start Day 1
+    12,                      !- End Month 1
+    31;                      !- End Day 1
+"""]
+
+typeLimitsString = """
+ScheduleTypeLimits,
+    Fraction,                !- Name
+    0,                       !- Lower Limit Value
+    1,                       !- Upper Limit Value
+    Continuous;              !- Numeric Type
+"""
+
+daysInMonths = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+
+
+class Preparation(object):
+    
+    def getJD(self, month, day):
+        return sum(daysInMonths[:month - 1]) + day
+
+
+class ScriptContext(object):
+    
+    def __init__(self):
+        self.sticky = {}
+
+
+class ScheduleCompilerTest(unittest.TestCase):
+    
+    def setUp(self):
+        namespace = hbSource.loadClasses("hb_EPObjectLocation", "hb_LazyEPLibrary", \
+                                         "EPScheduleAux", "hb_ScheduleCompiler")
+        namespace["sc"] = ScriptContext()
+        self.sticky = namespace["sc"].sticky
+        self.hb_LazyEPLibrary = namespace["hb_LazyEPLibrary"]
+        self.sticky["ladybug_Preparation"] = Preparation
+        self.sticky["honeybee_ScheduleLib"] = self.getLibrary(scheduleStrings[0:1] + scheduleStrings[2:])
+        self.sticky["honeybee_ScheduleTypeLimitsLib"] = self.getLibrary([typeLimitsString])
+        self.hb_ScheduleCompiler = namespace["hb_ScheduleCompiler"]
+    
+    def getLibrary(self, EPObjectStrings):
+        library = self.hb_LazyEPLibrary()
+        for EPObjectStr in EPObjectStrings:
+            shortKey, name, EPObject = self.hb_LazyEPLibrary.parseEPObject(EPObjectStr)
+            library[name] = EPObject
+        return library
+    
+    def getDay(self, values, day, dayLength = 24):
+        return list(values[day * dayLength: (day + 1) * dayLength])
+    
+    def testCompactSchedule(self):
+        # the year starts on Monday
+        scheduleType, unit, values = self.hb_ScheduleCompiler().getCompiledSchedule("office occupancy", 1)
+        self.assertEqual((scheduleType, unit), ("schedule:compact", "Continuous"))
+        self.assertEqual(len(values), 8760)
+        
+        weekday = [0] * 8 + [1] * 10 + [0] * 6
+        self.assertEqual(self.getDay(values, 0), weekday)
+        self.assertEqual(self.getDay(values, 5), [0.5] * 12 + [0] * 12)
+        self.assertEqual(self.getDay(values, 6), [0] * 24)
+        self.assertEqual(self.getDay(values, 7), weekday)
+        # Through: 6/30 is the last period. The rest of the year is 0
+        self.assertEqual(self.getDay(values, 179), weekday)
+        self.assertEqual(self.getDay(values, 180), [0.5] * 12 + [0] * 12)
+        self.assertEqual(sum(values[181 * 24:]), 0)
+    
+    def testCompactScheduleTimesteps(self):
+        values = self.hb_ScheduleCompiler().getScheduleValues("Office Occupancy", 1, 4)
+        self.assertEqual(len(values), 8760 * 4)
+        self.assertEqual(self.getDay(values, 0, 96), [0] * 32 + [1] * 40 + [0] * 24)
+    
+    def testYearSchedule(self):
+        # the year starts on Sunday
+        scheduleType, unit, values = self.hb_ScheduleCompiler().getCompiledSchedule("Office Year", 0)
+        self.assertEqual(scheduleType, "schedule:year")
+        self.assertEqual(len(values), 8760)
+        
+        dayOn = [0] * 9 + [1] * 8 + [0] * 7
+        for day in range(14):
+            if day % 7 in (0, 6): self.assertEqual(self.getDay(values, day), [0] * 24)
+            else: self.assertEqual(self.getDay(values, day), dayOn)
+        self.assertEqual(sum(values), 52 * 5 * 8)
+    
+    def testHourlyValuesAreCopies(self):
+        scheduleCompiler = self.hb_ScheduleCompiler()
+        for schName in ["Office Year", "Office Occupancy"]:
+            hourlyValues = scheduleCompiler.getHourlyValues(schName, 0)
+            total = sum(hourlyValues)
+            hourlyValues[10] = 100
+            self.assertEqual(sum(scheduleCompiler.getHourlyValues(schName, 0)), total)
+            self.assertEqual(sum(self.hb_ScheduleCompiler().getHourlyValues(schName, 0)), total)
+    
+    def testLibraryChange(self):
+        scheduleCompiler = self.hb_ScheduleCompiler()
+        self.assertEqual(sum(scheduleCompiler.getHourlyValues("Office Occupancy", 1)[181 * 24:]), 0)
+        
+        # a new version of the schedule is not read from the memo
+        shortKey, name, EPObject = self.hb_LazyEPLibrary.parseEPObject(scheduleStrings[1])
+        self.sticky["honeybee_ScheduleLib"][name] = EPObject
+        self.assertEqual(sum(scheduleCompiler.getHourlyValues("Office Occupancy", 1)), 8760 * 0.25)
+
+
+if __name__ == "__main__":
+    unittest.main()